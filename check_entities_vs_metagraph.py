@@ -1,25 +1,18 @@
 #!/usr/bin/env python3
-import json
 import sys
 from pathlib import Path
 
 # Add moderntensor path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / "moderntensor_aptos"))
+sys.path.insert(0, str(Path(__file__).parent))
 
 from mt_core.metagraph.core_metagraph_adapter import CoreMetagraphClient
+from subnet1.entity_registry import get_entity_registry
 
 def load_entities():
-    """Load all entities from JSON files"""
-    entities_dir = Path(__file__).parent / "entities"
-    entities = {}
-    
-    for json_file in entities_dir.glob("*.json"):
-        with open(json_file, 'r') as f:
-            entity = json.load(f)
-            entities[json_file.stem] = entity
-    
-    return entities
+    """Load all entities from the shared entity registry (keyed by file name)"""
+    return {e.source: e.data for e in get_entity_registry().all() if e.source}
 
 def check_entities_on_metagraph():
     """Check if entities are registered on metagraph"""
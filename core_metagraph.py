@@ -5,15 +5,30 @@ CoreMetagraph - Metagraph for Core Blockchain Integration
 
 import json
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
 from web3 import Web3
 from pathlib import Path
 
+from subnet1.entity_registry import get_entity_registry
+from subnet1.chain_reader import (
+    BatchedChainReader,
+    ChainReadError,
+    ContractCall,
+    decode_words,
+    encode_address_call,
+)
+from subnet1.metagraph_cache import MetagraphCache, write_json_atomic
+from subnet1.metagraph_indexer import MetagraphIndexer, MetagraphStore
+
+# Return layout of getMinerInfo / getValidatorInfo and getNetworkStats
+ENTITY_INFO_WORDS = ("bool", "uint", "uint", "uint")
+NETWORK_STATS_WORDS = ("uint", "uint", "uint", "uint")
+
 
 class CoreMetagraph:
     """Metagraph class for Core blockchain integration"""
 
-    def __init__(self):
+    def __init__(self, transport=None, snapshot_path=None, event_driven: bool = False):
         # Core configuration
         self.contract_address = "0x594fc12B3e3AB824537b947765dd9409DAAAa143"
         self.core_token_address = "0x7B74e4868c8C500D6143CEa53a5d2F94e94c7637"
@@ -23,6 +38,8 @@ class CoreMetagraph:
 
         # Initialize Web3
         self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        # Reads go through async JSON-RPC batches instead of blocking per-entity calls
+        self.reader = BatchedChainReader(self.rpc_url, transport=transport)
 
         # Contract ABI
         self.contract_abi = [
@@ -69,109 +86,231 @@ class CoreMetagraph:
             address=self.contract_address, abi=self.contract_abi
         )
 
+        # Function selectors for batched calls
+        self.selectors = {
+            "getMinerInfo": Web3.keccak(text="getMinerInfo(address)")[:4],
+            "getValidatorInfo": Web3.keccak(text="getValidatorInfo(address)")[:4],
+            "getNetworkStats": Web3.keccak(text="getNetworkStats()")[:4],
+        }
+
         # Load entities
         self.entities = self._load_entities()
 
+        # Block-keyed cache with an incremental snapshot on disk
+        self.cache = MetagraphCache(
+            snapshot_path or Path(__file__).parent / "config" / "metagraph_snapshot.json",
+            event_driven=event_driven,
+        )
+
     def _load_entities(self):
-        """Load entities from JSON files"""
-        entities_dir = Path(__file__).parent / "entities"
-        entities = {"miners": [], "validators": []}
-
-        # Load miners
-        for i in range(1, 3):
-            miner_file = entities_dir / f"miner_{i}.json"
-            if miner_file.exists():
-                with open(miner_file, "r") as f:
-                    entities["miners"].append(json.load(f))
-
-        # Load validators
-        for i in range(1, 4):
-            validator_file = entities_dir / f"validator_{i}.json"
-            if validator_file.exists():
-                with open(validator_file, "r") as f:
-                    entities["validators"].append(json.load(f))
-
-        return entities
-
-    async def get_network_stats(self):
+        """Load entities from the shared registry (every entity file in entities/)"""
+        registry = get_entity_registry()
+        return {
+            kind: [{**e.data, "name": e.name, "address": e.address} for e in entities]
+            for kind, entities in (("miners", registry.miners()), ("validators", registry.validators()))
+        }
+
+    def _entity_call(self, function_name: str, address: str) -> ContractCall:
+        return ContractCall(
+            self.contract_address, encode_address_call(self.selectors[function_name], address)
+        )
+
+    @staticmethod
+    def _entity_info(data: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        """Decode getMinerInfo/getValidatorInfo return data (None if the call failed)."""
+        if data is None:
+            return None
+        try:
+            is_active, core_stake, btc_stake, subnet_id = decode_words(data, ENTITY_INFO_WORDS)
+        except ValueError as e:
+            print(f"Error decoding entity info: {e}")
+            return None
+        return {
+            "is_active": is_active,
+            "core_stake": Web3.from_wei(core_stake, "ether"),
+            "btc_stake": Web3.from_wei(btc_stake, "ether"),
+            "subnet_id": subnet_id,
+        }
+
+    async def _read_network_stats(self, block: Union[str, int]) -> Optional[Dict[str, Any]]:
+        """Network stats at `block`; None if the call reverted. Read errors propagate."""
+        data = await self.reader.call(
+            ContractCall(self.contract_address, self.selectors["getNetworkStats"]), block
+        )
+        if data is None:
+            return None
+        total_miners, total_validators, total_stake, total_subnets = decode_words(
+            data, NETWORK_STATS_WORDS
+        )
+        return {
+            "total_miners": total_miners,
+            "total_validators": total_validators,
+            "total_stake": Web3.from_wei(total_stake, "ether"),
+            "total_subnets": total_subnets,
+        }
+
+    async def get_network_stats(self, block: Union[str, int] = "latest"):
         """Get network statistics from contract"""
         try:
-            total_miners, total_validators, total_stake, total_subnets = (
-                self.contract.functions.getNetworkStats().call()
-            )
-            return {
-                "total_miners": total_miners,
-                "total_validators": total_validators,
-                "total_stake": Web3.from_wei(total_stake, "ether"),
-                "total_subnets": total_subnets,
-            }
-        except Exception as e:
+            return await self._read_network_stats(block)
+        except (ChainReadError, ValueError) as e:
             print(f"Error getting network stats: {e}")
             return None
 
-    async def get_miner_info(self, address: str):
-        """Get miner info from contract"""
+    async def get_entities_info(
+        self, function_name: str, addresses: List[str], block: Union[str, int] = "latest"
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Info for many addresses in one batched round-trip (None where a call failed)."""
         try:
-            is_active, core_stake, btc_stake, subnet_id = (
-                self.contract.functions.getMinerInfo(address).call()
+            results = await self.reader.call_many(
+                [self._entity_call(function_name, address) for address in addresses], block
             )
-            return {
-                "is_active": is_active,
-                "core_stake": Web3.from_wei(core_stake, "ether"),
-                "btc_stake": Web3.from_wei(btc_stake, "ether"),
-                "subnet_id": subnet_id,
-            }
-        except Exception as e:
-            print(f"Error getting miner info for {address}: {e}")
-            return None
+        except (ChainReadError, ValueError) as e:
+            print(f"Error calling {function_name} for {len(addresses)} addresses: {e}")
+            return [None] * len(addresses)
+        return [self._entity_info(data) for data in results]
+
+    async def get_miner_info(self, address: str):
+        """Get miner info from contract"""
+        return (await self.get_entities_info("getMinerInfo", [address]))[0]
 
     async def get_validator_info(self, address: str):
         """Get validator info from contract"""
-        try:
-            is_active, core_stake, btc_stake, subnet_id = (
-                self.contract.functions.getValidatorInfo(address).call()
+        return (await self.get_entities_info("getValidatorInfo", [address]))[0]
+
+    async def _read_entities(
+        self, block: Union[str, int], keys: Optional[Set[Tuple[str, str]]] = None
+    ) -> List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """
+        (kind, entity, info) for registered entities in one batch; info is None
+        where the call failed or could not be decoded. Read errors propagate.
+
+        Args:
+            block: Block to read at.
+            keys: Only these (section, lowercase address) entities; None = all.
+        """
+        miners = [m for m in self.entities["miners"] if keys is None or ("miners", m["address"].lower()) in keys]
+        validators = [
+            v for v in self.entities["validators"] if keys is None or ("validators", v["address"].lower()) in keys
+        ]
+        calls = [self._entity_call("getMinerInfo", m["address"]) for m in miners] + [
+            self._entity_call("getValidatorInfo", v["address"]) for v in validators
+        ]
+        results = await self.reader.call_many(calls, block)
+        return [
+            (kind, entity, self._entity_info(data))
+            for kind, entities, chunk in (
+                ("miners", miners, results[: len(miners)]),
+                ("validators", validators, results[len(miners):]),
             )
-            return {
-                "is_active": is_active,
-                "core_stake": Web3.from_wei(core_stake, "ether"),
-                "btc_stake": Web3.from_wei(btc_stake, "ether"),
-                "subnet_id": subnet_id,
-            }
-        except Exception as e:
-            print(f"Error getting validator info for {address}: {e}")
-            return None
+            for entity, data in zip(entities, chunk)
+        ]
 
-    async def get_all_entities_status(self):
-        """Get status of all entities"""
+    async def get_all_entities_status(self, block: Union[str, int] = "latest", keys: Optional[Set[Tuple[str, str]]] = None):
+        """Get status of all entities (miners and validators read in one batch)"""
         status = {"miners": [], "validators": []}
+        try:
+            entities = await self._read_entities(block, keys)
+        except (ChainReadError, ValueError) as e:
+            print(f"Error reading entities status: {e}")
+            return status
 
-        # Check miners
-        for miner in self.entities["miners"]:
-            info = await self.get_miner_info(miner["address"])
+        for kind, entity, info in entities:
             if info:
-                status["miners"].append(
-                    {"address": miner["address"], "name": miner["name"], **info}
+                status[kind].append(
+                    {"address": entity["address"], "name": entity["name"], **info}
                 )
 
-        # Check validators
-        for validator in self.entities["validators"]:
-            info = await self.get_validator_info(validator["address"])
-            if info:
-                status["validators"].append(
-                    {"address": validator["address"], "name": validator["name"], **info}
+        return status
+
+    async def fetch_entity_info(self, addresses: Set[str], block: Union[str, int]) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """
+        Indexer reader: miner and validator info of `addresses` in one batch.
+
+        An address whose call reverts or reports inactive with no stake is not
+        (or no longer) that kind of entity and maps to None.
+        """
+        addresses = sorted(addresses)
+        names = {
+            entity["address"].lower(): entity["name"]
+            for entity in self.entities["miners"] + self.entities["validators"]
+        }
+        # Read errors propagate: the indexer must not advance its checkpoint on a failed read
+        results = await self.reader.call_many(
+            [self._entity_call("getMinerInfo", a) for a in addresses]
+            + [self._entity_call("getValidatorInfo", a) for a in addresses],
+            block,
+        )
+        changes = {}
+        for kind, chunk in (("miners", results[: len(addresses)]), ("validators", results[len(addresses):])):
+            for address, data in zip(addresses, chunk):
+                info = self._entity_info(data)
+                registered = info is not None and (info["is_active"] or info["core_stake"] or info["btc_stake"])
+                changes[(kind, address)] = (
+                    {"name": names.get(address.lower()), **info} if registered else None
                 )
+        return changes
 
-        return status
+    def create_indexer(self, store_path=None, start_block: int = 0, **kwargs) -> MetagraphIndexer:
+        """Event-log indexer into a local sqlite store; feeds this metagraph's cache invalidation."""
+        store = MetagraphStore(store_path or Path(__file__).parent / "config" / "metagraph_index.sqlite")
+        return MetagraphIndexer(
+            self.reader,
+            store,
+            self.contract_address,
+            self.fetch_entity_info,
+            start_block=start_block,
+            on_change=self.cache.mark_dirty,
+            **kwargs,
+        )
+
+    async def _read_sections(self, keys: Optional[Set[Tuple[str, str]]], block: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Cache reader: entities (and network stats on full reads) at `block`, keyed by address.
+
+        Read errors propagate so the cache keeps its last good block. A single
+        call that failed is "unknown", not "removed": the cached value is kept.
+        """
+        if keys is None:
+            network_stats, entities = await asyncio.gather(
+                self._read_network_stats(block), self._read_entities(block)
+            )
+        else:
+            network_stats, entities = None, await self._read_entities(block, keys)
+        sections = {"miners": {}, "validators": {}}
+        for kind, entity, info in entities:
+            address = entity["address"].lower()
+            if info is not None:
+                sections[kind][address] = {"address": entity["address"], "name": entity["name"], **info}
+            elif self.cache.get(kind, address) is not None:
+                sections[kind][address] = self.cache.get(kind, address)
+        if network_stats is None:
+            network_stats = self.cache.get("network", "stats")
+        if network_stats is not None:
+            sections["network"] = {"stats": network_stats}
+        return sections
+
+    async def refresh(self) -> bool:
+        """Update the cache if the chain moved; costs one eth_blockNumber when it did not."""
+        return await self.cache.refresh(self.reader.block_number, self._read_sections)
 
     async def generate_metagraph_data(self):
         """Generate complete metagraph data"""
-        network_stats = await self.get_network_stats()
-        entities_status = await self.get_all_entities_status()
+        try:
+            await self.refresh()
+        except (ChainReadError, ValueError) as e:
+            print(f"Error refreshing metagraph (serving cached block {self.cache.block}): {e}")
+        network_stats = self.cache.get("network", "stats")
+        entities_status = {
+            "miners": list(self.cache.section("miners").values()),
+            "validators": list(self.cache.section("validators").values()),
+        }
 
         metagraph_data = {
             "contract_address": self.contract_address,
             "network": "core_testnet",
             "chain_id": self.chain_id,
+            "block": self.cache.block,
             "network_stats": network_stats,
             "entities": entities_status,
             "configuration": {
@@ -197,8 +336,7 @@ if __name__ == "__main__":
         print(json.dumps(data, indent=2))
 
         # Save to file
-        with open("core_metagraph_data.json", "w") as f:
-            json.dump(data, f, indent=2)
+        write_json_atomic(Path("core_metagraph_data.json"), data)
 
         print("\n✅ Saved to core_metagraph_data.json")
 
@@ -16,13 +16,13 @@ import os
 import argparse
 import asyncio
 import logging
-import json
 from typing import Optional
 
 # Add paths
 sys.path.append(os.path.dirname(__file__))
 sys.path.append(os.path.join(os.path.dirname(__file__), "../moderntensor_aptos"))
 
+from subnet1.entity_registry import get_entity_registry
 from subnet1.validator import Subnet1Validator
 
 # Configure logging
@@ -33,19 +33,13 @@ logger = logging.getLogger(__name__)
 
 
 def load_entity_config(entity_file: str) -> dict:
-    """Load entity configuration from JSON file"""
-    entity_path = os.path.join(
-        os.path.dirname(__file__), "entities", f"{entity_file}.json"
-    )
-
-    if not os.path.exists(entity_path):
-        raise FileNotFoundError(f"Entity file not found: {entity_path}")
-
-    with open(entity_path, "r") as f:
-        config = json.load(f)
+    """Load entity configuration (file name without .json, entity name, hex UID or address)"""
+    entity = get_entity_registry().get(entity_file)
+    if entity is None:
+        raise FileNotFoundError(f"Entity not found in entities/: {entity_file}")
 
     logger.info(f"📁 Loaded entity config: {entity_file}")
-    return config
+    return dict(entity.data)
 
 
 async def run_flexible_validator(
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark consensus score aggregation: per-dict Python loops vs NumPy matrices.
+
+The loop baseline mirrors how scores are handled today (List[ValidatorScore]
+-> {miner_uid: [...]} dicts, then a loop per miner to aggregate, update trust
+and scale to uint64). The vectorized path uses subnet1.aggregation.
+
+Examples:
+  python scripts/benchmark_aggregation.py
+  python scripts/benchmark_aggregation.py --validators 100 --miners 10000 --coverage 0.3
+"""
+
+import argparse
+import secrets
+import statistics
+from collections import defaultdict
+
+import numpy as np
+
+from benchmark_common import Stopwatch, print_table, write_json
+
+from subnet1.aggregation import (
+    AGGREGATION_MEAN,
+    AGGREGATION_MEDIAN,
+    SCORE_SCALE,
+    ScoreMatrix,
+    aggregate_consensus,
+    ema_update,
+    to_uint64,
+)
+
+TRUST_ALPHA = 0.2
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark consensus aggregation")
+    parser.add_argument("--validators", type=int, default=100)
+    parser.add_argument("--miners", type=int, default=10_000)
+    parser.add_argument("--coverage", type=float, default=1.0, help="Fraction of miners each validator scores")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Optional JSON results file")
+    return parser.parse_args()
+
+
+def make_round(args, rng):
+    validators = [secrets.token_hex(16) for _ in range(args.validators)]
+    miners = [secrets.token_hex(16) for _ in range(args.miners)]
+    stakes = {uid: float(s) for uid, s in zip(validators, rng.uniform(1, 1000, len(validators)))}
+    scored = rng.random((args.validators, args.miners)) < args.coverage
+    values = rng.random((args.validators, args.miners))
+    triples = [
+        (validators[v], miners[m], float(values[v, m]))
+        for v, m in zip(*np.nonzero(scored))
+    ]
+    rows = {
+        validators[v]: ([miners[m] for m in np.nonzero(scored[v])[0]], values[v, scored[v]])
+        for v in range(args.validators)
+    }
+    trust = {uid: 0.5 for uid in miners}
+    return triples, rows, stakes, trust
+
+
+def loop_baseline(triples, stakes, trust, method):
+    per_miner = defaultdict(list)
+    for validator_uid, miner_uid, score in triples:
+        per_miner[miner_uid].append((score, stakes.get(validator_uid, 0.0)))
+
+    performances, new_trust = {}, {}
+    for miner_uid, pairs in per_miner.items():
+        total = sum(w for _, w in pairs)
+        if method == AGGREGATION_MEAN:
+            consensus = sum(s * w for s, w in pairs) / total
+        else:
+            running = 0.0
+            for s, w in sorted(pairs):
+                running += w
+                if running >= total / 2:
+                    consensus = s
+                    break
+        new_trust[miner_uid] = (1 - TRUST_ALPHA) * trust[miner_uid] + TRUST_ALPHA * consensus
+        performances[miner_uid] = max(0, min(SCORE_SCALE, int(consensus * SCORE_SCALE)))
+    return performances, new_trust
+
+
+def vectorized(triples, stakes, trust_vector, method):
+    matrix = ScoreMatrix.from_triples(triples)
+    result = aggregate_consensus(matrix, stakes, method=method, clip_k=None)
+    new_trust = ema_update(trust_vector, result.scores, TRUST_ALPHA, observed=result.observed)
+    return to_uint64(result.scores), new_trust, matrix
+
+
+def time_repeated(fn, repeat):
+    durations = []
+    for _ in range(repeat):
+        with Stopwatch() as timer:
+            fn()
+        durations.append(timer.seconds)
+    return statistics.median(durations)
+
+
+def main():
+    args = parse_arguments()
+    rng = np.random.default_rng(0)
+    print(f"🏁 {args.validators} validators x {args.miners} miners, coverage {args.coverage:.0%}")
+    triples, rows_by_validator, stakes, trust = make_round(args, rng)
+
+    matrix = ScoreMatrix.from_rows(rows_by_validator)
+    trust_vector = np.array([trust[uid] for uid in matrix.miners.uids])
+    triples_build_s = time_repeated(lambda: ScoreMatrix.from_triples(triples), args.repeat)
+    build_s = time_repeated(lambda: ScoreMatrix.from_rows(rows_by_validator), args.repeat)
+    print(f"   Matrix build: {build_s:.4f}s from per-validator rows, {triples_build_s:.4f}s from triples")
+
+    rows = []
+    for method in (AGGREGATION_MEAN, AGGREGATION_MEDIAN):
+        loop_s = time_repeated(lambda: loop_baseline(triples, stakes, trust, method), args.repeat)
+        aggregate_s = time_repeated(
+            lambda: ema_update(
+                trust_vector,
+                aggregate_consensus(matrix, stakes, method=method, clip_k=None).scores,
+                TRUST_ALPHA,
+            ),
+            args.repeat,
+        )
+
+        # Same answers from both paths
+        expected, _ = loop_baseline(triples, stakes, trust, method)
+        performances, _, _ = vectorized(triples, stakes, trust_vector, method)
+        got = dict(zip(matrix.miners.uids, performances.tolist()))
+        mismatches = sum(1 for uid, value in expected.items() if abs(got[uid] - value) > 1)
+
+        rows.append(
+            {
+                "method": method,
+                "loop_s": loop_s,
+                "matrix_build_s": build_s,
+                "vectorized_s": aggregate_s,
+                "speedup": loop_s / aggregate_s if aggregate_s else float("nan"),
+                "mismatches": mismatches,
+            }
+        )
+
+    clip_s = time_repeated(lambda: aggregate_consensus(matrix, stakes), args.repeat)
+    rows.append({"method": "mean+clip", "matrix_build_s": build_s, "vectorized_s": clip_s})
+
+    print()
+    print_table(rows, ["method", "loop_s", "matrix_build_s", "vectorized_s", "speedup", "mismatches"])
+    if args.output:
+        write_json(args.output, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the Subnet1 benchmark scripts.
+
+All benchmarks run the same fixed prompts so their numbers are comparable
+across profiles, backends and encodings.
+"""
+
+import base64
+import json
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+# --- Add project root to sys.path ---
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from subnet1.metrics import peak_rss_mb  # noqa: E402,F401 (re-exported for benchmarks)
+
+BENCHMARK_PROMPTS = [
+    "A photorealistic image of an astronaut riding a horse on the moon.",
+    "A watercolor painting of a cozy bookstore cafe in autumn.",
+    "A synthwave style cityscape at sunset.",
+    "A macro shot of a bee collecting pollen from a sunflower.",
+    "A cute dog wearing sunglasses and a party hat.",
+]
+
+
+def clip_score_image(prompt: str, image, image_format: str = "PNG") -> float:
+    """Score a PIL image exactly the way the validator does (via base64 bytes)."""
+    from subnet1.scoring.clip_scorer import calculate_clip_score
+
+    buffer = BytesIO()
+    image.save(buffer, format=image_format)
+    return calculate_clip_score(
+        prompt=prompt, image_base64=base64.b64encode(buffer.getvalue()).decode("utf-8")
+    )
+
+
+def process_memory_mb(pids: Iterable[int]) -> Dict[str, float]:
+    """
+    Current RSS and PSS (MiB) summed over processes (Linux /proc only).
+
+    RSS counts shared pages once per process; PSS splits them between the
+    processes sharing them, so it shows what shared weights actually cost.
+    """
+    totals = {"rss_mb": 0.0, "pss_mb": 0.0}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in ("Rss", "Pss"):
+                        totals[f"{key.lower()}_mb"] += int(value.split()[0]) / 1024
+        except OSError:
+            continue
+    return totals
+
+
+class Stopwatch:
+    """Context manager measuring wall-clock seconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+        return False
+
+
+def print_table(rows: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+    """Print benchmark rows as an aligned text table."""
+    if not rows:
+        print("(no results)")
+        return
+
+    def fmt(value):
+        return f"{value:.4f}" if isinstance(value, float) else str(value)
+
+    widths = {
+        col: max(len(col), *(len(fmt(row.get(col, ""))) for row in rows))
+        for col in columns
+    }
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    print("  ".join("-" * widths[col] for col in columns))
+    for row in rows:
+        print("  ".join(fmt(row.get(col, "")).ljust(widths[col]) for col in columns))
+
+
+def write_json(path: str, rows: List[Dict[str, Any]]) -> None:
+    """Save raw benchmark rows for later comparison."""
+    with open(path, "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"\n💾 Results saved to {path}")
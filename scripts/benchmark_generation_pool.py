@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark the multi-process generation pool against the single pipeline.
+
+Submits the same batch of prompts concurrently (as overlapping validator
+tasks would arrive) and reports images per minute plus the memory of all
+involved processes. RSS double counts weight pages shared through the
+safetensors mmap; PSS shows what they really cost.
+
+Examples:
+  python scripts/benchmark_generation_pool.py
+  python scripts/benchmark_generation_pool.py --workers 2 4 --images 20 --steps 10
+"""
+
+import argparse
+import gc
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark_common import (
+    BENCHMARK_PROMPTS,
+    Stopwatch,
+    print_table,
+    process_memory_mb,
+    write_json,
+)
+
+from subnet1.models.model_manager import get_model_manager
+from subnet1.models.generation_pool import GenerationPool
+from subnet1.models.generation_profiles import get_generation_profile
+from subnet1.models.image_generator import generate_image_from_prompt, load_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the generation pool")
+    parser.add_argument("--model-id", default="segmind/tiny-sd")
+    parser.add_argument("--profile", default=None, help="Generation profile (default: IMAGEGEN_PROFILE)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[2, 4],
+        help="Pool sizes to compare with the single pipeline",
+    )
+    parser.add_argument("--images", type=int, default=12, help="Images generated per mode")
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--size", type=int, default=512, help="Square output size")
+    parser.add_argument("--output", default=None, help="Optional JSON results file")
+    return parser.parse_args()
+
+
+def prompts(count):
+    return [BENCHMARK_PROMPTS[i % len(BENCHMARK_PROMPTS)] for i in range(count)]
+
+
+def run_jobs(generate, args):
+    """Run all prompts concurrently through `generate`; returns (seconds, images produced)."""
+    job = dict(num_inference_steps=args.steps, height=args.size, width=args.size)
+    with Stopwatch() as timer, ThreadPoolExecutor(max_workers=args.images) as executor:
+        results = list(executor.map(lambda prompt: generate(prompt=prompt, **job), prompts(args.images)))
+    return timer.seconds, sum(image is not None for image in results)
+
+
+def benchmark_single(args, profile):
+    with Stopwatch() as load_timer:
+        if load_pipeline(model_id=args.model_id, profile=profile) is None:
+            return {"mode": "single", "error": "load failed"}
+    generate_image_from_prompt("a photo of a cat", model_id=args.model_id, num_inference_steps=2, profile=profile)
+
+    seconds, produced = run_jobs(
+        lambda **kwargs: generate_image_from_prompt(model_id=args.model_id, profile=profile, **kwargs), args
+    )
+    memory = process_memory_mb([os.getpid()])
+    get_model_manager().clear()
+    gc.collect()
+    return {
+        "mode": "single",
+        "startup_s": load_timer.seconds,
+        "images_per_min": produced * 60 / seconds,
+        **memory,
+    }
+
+
+def benchmark_pool(args, profile, workers):
+    pool = GenerationPool(model_id=args.model_id, num_workers=workers, profile=profile)
+    with Stopwatch() as load_timer:
+        pool.start()
+    try:
+        seconds, produced = run_jobs(pool.generate, args)
+        memory = process_memory_mb([os.getpid(), *pool.pids])
+    finally:
+        pool.shutdown()
+    return {
+        "mode": f"pool x{workers}",
+        "startup_s": load_timer.seconds,
+        "images_per_min": produced * 60 / seconds,
+        **memory,
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_arguments()
+    profile = get_generation_profile(args.profile)
+
+    print(f"🏁 {args.images} images x {args.steps} steps at {args.size}px, profile '{profile.name}'")
+    rows = [benchmark_single(args, profile)]
+    for workers in args.workers:
+        print(f"⏳ Pool with {workers} workers...")
+        rows.append(benchmark_pool(args, profile, workers))
+
+    print()
+    print_table(rows, ["mode", "startup_s", "images_per_min", "rss_mb", "pss_mb"])
+    if args.output:
+        write_json(args.output, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark image generation profiles.
+
+For every profile, loads the pipeline, runs one warm-up generation, then
+generates the shared benchmark prompts and reports seconds per image and
+mean CLIP score.
+
+Examples:
+  python scripts/benchmark_generation_profiles.py
+  python scripts/benchmark_generation_profiles.py --profiles default fast_cpu --steps 15
+"""
+
+import argparse
+import gc
+import logging
+import statistics
+
+from benchmark_common import (
+    BENCHMARK_PROMPTS,
+    Stopwatch,
+    clip_score_image,
+    print_table,
+    write_json,
+)
+
+from subnet1.models.generation_profiles import GENERATION_PROFILES, get_generation_profile
+from subnet1.models.model_manager import get_model_manager
+from subnet1.models.image_generator import generate_image_from_prompt, load_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark generation profiles")
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        default=list(GENERATION_PROFILES),
+        help="Profiles to benchmark (default: all)",
+    )
+    parser.add_argument("--model-id", default="segmind/tiny-sd")
+    parser.add_argument(
+        "--steps",
+        type=int,
+        default=None,
+        help="Override steps for every profile (default: each profile's own)",
+    )
+    parser.add_argument("--size", type=int, default=512, help="Square output size")
+    parser.add_argument("--output", default=None, help="Optional JSON results file")
+    return parser.parse_args()
+
+
+def benchmark_profile(name: str, args) -> dict:
+    profile = get_generation_profile(name)
+    steps = args.steps or profile.num_inference_steps
+
+    with Stopwatch() as load_timer:
+        pipeline = load_pipeline(model_id=args.model_id, profile=profile)
+    if pipeline is None:
+        return {"profile": name, "error": "load failed"}
+
+    # Warm-up (torch.compile and allocator warm-up should not count)
+    with Stopwatch() as warmup_timer:
+        generate_image_from_prompt(
+            BENCHMARK_PROMPTS[0],
+            model_id=args.model_id,
+            num_inference_steps=steps,
+            height=args.size,
+            width=args.size,
+            profile=profile,
+        )
+
+    durations, scores = [], []
+    for prompt in BENCHMARK_PROMPTS:
+        with Stopwatch() as timer:
+            image = generate_image_from_prompt(
+                prompt,
+                model_id=args.model_id,
+                num_inference_steps=steps,
+                height=args.size,
+                width=args.size,
+                profile=profile,
+            )
+        if image is None:
+            logger.warning(f"Profile {name}: generation failed for '{prompt}'")
+            continue
+        durations.append(timer.seconds)
+        scores.append(clip_score_image(prompt, image))
+
+    return {
+        "profile": name,
+        "steps": steps,
+        "load_s": load_timer.seconds,
+        "warmup_s": warmup_timer.seconds,
+        "s_per_image": statistics.mean(durations) if durations else float("nan"),
+        "clip_score": statistics.mean(scores) if scores else float("nan"),
+        "images": len(durations),
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_arguments()
+
+    print(f"🏁 Benchmarking {len(args.profiles)} profiles on {len(BENCHMARK_PROMPTS)} prompts")
+    rows = []
+    for name in args.profiles:
+        print(f"⏳ Profile '{name}'...")
+        rows.append(benchmark_profile(name, args))
+        # Only keep one profile's weights in memory at a time
+        get_model_manager().clear()
+        gc.collect()
+
+    print()
+    print_table(
+        rows, ["profile", "steps", "load_s", "warmup_s", "s_per_image", "clip_score", "images"]
+    )
+    if args.output:
+        write_json(args.output, rows)
+
+
+if __name__ == "__main__":
+    main()
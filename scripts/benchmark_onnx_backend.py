@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Compare the PyTorch and ONNX Runtime generation backends side by side.
+
+For every backend, loads the pipeline (the first ONNX run exports the model
+into the offline model directory; export time is reported separately as
+load_s), runs one warm-up generation, then generates the shared benchmark
+prompts and reports seconds per image and mean CLIP score.
+
+Examples:
+  python scripts/benchmark_onnx_backend.py
+  python scripts/benchmark_onnx_backend.py --backends torch onnx-int8 --steps 15 --size 384
+"""
+
+import argparse
+import gc
+import logging
+import statistics
+
+from benchmark_common import (
+    BENCHMARK_PROMPTS,
+    Stopwatch,
+    clip_score_image,
+    peak_rss_mb,
+    print_table,
+    write_json,
+)
+
+from subnet1.models import onnx_backend
+from subnet1.models.generation_profiles import get_generation_profile
+from subnet1.models.model_manager import get_model_manager
+from subnet1.models.image_generator import generate_image_from_prompt, load_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark torch vs ONNX Runtime generation backends")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=list(onnx_backend.BACKENDS),
+        choices=onnx_backend.BACKENDS,
+        help="Backends to benchmark (default: all)",
+    )
+    parser.add_argument("--model-id", default="segmind/tiny-sd")
+    parser.add_argument("--profile", default="fast_cpu", help="Generation profile (threads, scheduler, steps)")
+    parser.add_argument("--steps", type=int, default=None, help="Override the profile's steps")
+    parser.add_argument("--size", type=int, default=512, help="Square output size")
+    parser.add_argument("--output", default=None, help="Optional JSON results file")
+    return parser.parse_args()
+
+
+def benchmark_backend(backend: str, args) -> dict:
+    profile = get_generation_profile(args.profile)
+    steps = args.steps or profile.num_inference_steps
+    kwargs = dict(
+        model_id=args.model_id,
+        num_inference_steps=steps,
+        height=args.size,
+        width=args.size,
+        profile=profile,
+        backend=backend,
+    )
+
+    with Stopwatch() as load_timer:
+        pipeline = load_pipeline(model_id=args.model_id, profile=profile, backend=backend)
+    if pipeline is None:
+        return {"backend": backend, "error": "load failed"}
+
+    with Stopwatch() as warmup_timer:
+        generate_image_from_prompt(BENCHMARK_PROMPTS[0], **kwargs)
+
+    durations, scores = [], []
+    for prompt in BENCHMARK_PROMPTS:
+        with Stopwatch() as timer:
+            image = generate_image_from_prompt(prompt, **kwargs)
+        if image is None:
+            logger.warning(f"Backend {backend}: generation failed for '{prompt}'")
+            continue
+        durations.append(timer.seconds)
+        scores.append(clip_score_image(prompt, image))
+
+    return {
+        "backend": backend,
+        "steps": steps,
+        "load_s": load_timer.seconds,
+        "warmup_s": warmup_timer.seconds,
+        "s_per_image": statistics.mean(durations) if durations else float("nan"),
+        "clip_score": statistics.mean(scores) if scores else float("nan"),
+        "peak_rss_mb": peak_rss_mb(),
+        "images": len(durations),
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_arguments()
+
+    backends = args.backends
+    if not onnx_backend.is_available():
+        print("⚠️ optimum[onnxruntime] is not installed; benchmarking torch only")
+        backends = [b for b in backends if b == onnx_backend.BACKEND_TORCH]
+
+    print(f"🏁 Benchmarking {len(backends)} backends on {len(BENCHMARK_PROMPTS)} prompts")
+    rows = []
+    for backend in backends:
+        print(f"⏳ Backend '{backend}'...")
+        rows.append(benchmark_backend(backend, args))
+        # Only keep one backend's weights in memory at a time
+        get_model_manager().clear()
+        gc.collect()
+
+    print()
+    # peak_rss_mb is the process high-water mark so far (monotonic across rows)
+    print_table(
+        rows, ["backend", "steps", "load_s", "warmup_s", "s_per_image", "clip_score", "peak_rss_mb", "images"]
+    )
+    if args.output:
+        write_json(args.output, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark miner output encodings.
+
+Encodes the same images with several OutputSpecs and reports encode time,
+payload size and the CLIP score delta against lossless full-resolution PNG
+(the encoding miners used before output specs existed).
+
+Examples:
+  python scripts/benchmark_output_encoding.py
+  python scripts/benchmark_output_encoding.py --images "result_image/*.png"
+"""
+
+import argparse
+import base64
+import glob
+import logging
+import statistics
+from io import BytesIO
+
+from PIL import Image
+
+from benchmark_common import BENCHMARK_PROMPTS, Stopwatch, print_table, write_json
+
+from subnet1.models.image_encoding import OutputSpec, encode_image
+from subnet1.scoring.clip_scorer import calculate_clip_score
+
+logger = logging.getLogger(__name__)
+
+SPECS = {
+    "png_full_legacy": None,  # Pillow default PNG settings, full resolution
+    "png_full_fast": OutputSpec("PNG"),
+    "png_256": OutputSpec("PNG", max_edge=256),
+    "jpeg90_full": OutputSpec("JPEG", quality=90),
+    "jpeg90_256": OutputSpec("JPEG", quality=90, max_edge=256),
+    "jpeg80_224": OutputSpec("JPEG", quality=80, max_edge=224),
+    "webp85_256": OutputSpec("WEBP", quality=85, max_edge=256),
+}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark output encodings")
+    parser.add_argument(
+        "--images",
+        default=None,
+        help="Glob of existing images to encode (default: generate from benchmark prompts)",
+    )
+    parser.add_argument(
+        "--prompt",
+        default=None,
+        help="Prompt to score --images against (default: benchmark prompts in order)",
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="Encode repetitions per image")
+    parser.add_argument("--output", default=None, help="Optional JSON results file")
+    return parser.parse_args()
+
+
+def load_samples(args):
+    """Return a list of (prompt, PIL image) pairs."""
+    if args.images:
+        paths = sorted(glob.glob(args.images))
+        return [
+            (args.prompt or BENCHMARK_PROMPTS[i % len(BENCHMARK_PROMPTS)], Image.open(p).convert("RGB"))
+            for i, p in enumerate(paths)
+        ]
+
+    from subnet1.models.image_generator import generate_image_from_prompt
+
+    samples = []
+    for prompt in BENCHMARK_PROMPTS:
+        image = generate_image_from_prompt(prompt)
+        if image is not None:
+            samples.append((prompt, image))
+    return samples
+
+
+def legacy_png(image: Image.Image) -> bytes:
+    buffered = BytesIO()
+    image.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def benchmark_spec(name, spec, samples, baseline_scores, repeats):
+    encode_times, sizes, deltas = [], [], []
+    for (prompt, image), baseline in zip(samples, baseline_scores):
+        with Stopwatch() as timer:
+            for _ in range(repeats):
+                data = legacy_png(image) if spec is None else encode_image(image, spec)
+        encode_times.append(timer.seconds / repeats)
+        sizes.append(len(data))
+        score = calculate_clip_score(prompt=prompt, image_base64=base64.b64encode(data).decode("utf-8"))
+        deltas.append(score - baseline)
+
+    return {
+        "spec": name,
+        "encode_ms": statistics.mean(encode_times) * 1000,
+        "kbytes": statistics.mean(sizes) / 1024,
+        "clip_delta": statistics.mean(deltas),
+        "clip_delta_max": max(deltas, key=abs),
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_arguments()
+
+    samples = load_samples(args)
+    if not samples:
+        print("❌ No images to benchmark")
+        return
+    print(f"🏁 Benchmarking {len(SPECS)} encodings on {len(samples)} images")
+
+    baseline_scores = [
+        calculate_clip_score(prompt=prompt, image_bytes=legacy_png(image)) for prompt, image in samples
+    ]
+    rows = [
+        benchmark_spec(name, spec, samples, baseline_scores, args.repeats)
+        for name, spec in SPECS.items()
+    ]
+
+    baseline = rows[0]
+    for row in rows:
+        row["speedup"] = baseline["encode_ms"] / row["encode_ms"] if row["encode_ms"] else float("nan")
+        row["size_ratio"] = baseline["kbytes"] / row["kbytes"] if row["kbytes"] else float("nan")
+
+    print()
+    print_table(
+        rows, ["spec", "encode_ms", "speedup", "kbytes", "size_ratio", "clip_delta", "clip_delta_max"]
+    )
+    if args.output:
+        write_json(args.output, rows)
+
+
+if __name__ == "__main__":
+    main()
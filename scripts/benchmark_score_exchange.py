@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark peer score exchange encodings: JSON dicts vs the binary score codec.
+
+Encodes one validator's scores for every miner (hex UIDs, as on chain) and
+reports payload size and encode/decode time. The delta rows encode a slot
+whose scores drift slightly from the previous one, the common case between
+consecutive slots.
+
+Examples:
+  python scripts/benchmark_score_exchange.py
+  python scripts/benchmark_score_exchange.py --miners 10000 --coverage 0.5 --drift 0.01
+"""
+
+import argparse
+import json
+import secrets
+import statistics
+
+import numpy as np
+
+from benchmark_common import Stopwatch, print_table, write_json
+
+from subnet1.response_cache import encode_json
+from subnet1.score_codec import CONTENT_TYPE_BINARY, ScoreCodec
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark score exchange encodings")
+    parser.add_argument("--miners", type=int, default=10_000)
+    parser.add_argument("--coverage", type=float, default=1.0, help="Fraction of miners scored per slot")
+    parser.add_argument("--drift", type=float, default=0.02, help="Std-dev of score change between slots")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default=None, help="Optional JSON results file")
+    return parser.parse_args()
+
+
+def timed(fn, repeat):
+    """Median seconds of `repeat` calls, and the last result."""
+    times, result = [], None
+    for _ in range(repeat):
+        with Stopwatch() as sw:
+            result = fn()
+        times.append(sw.seconds)
+    return statistics.median(times), result
+
+
+def main():
+    args = parse_arguments()
+    rng = np.random.default_rng(0)
+    miners = [secrets.token_hex(16) for _ in range(args.miners)]
+    scored = [uid for uid in miners if rng.random() < args.coverage]
+    previous = rng.random(len(scored))
+    current = np.clip(previous + rng.normal(0, args.drift, len(scored)), 0, 1)
+    previous_scores = dict(zip(scored, previous.tolist()))
+    scores = dict(zip(scored, current.tolist()))
+    print(f"🏁 {len(scores)} scores over a metagraph of {args.miners} miners")
+
+    rows = []
+
+    def add(name, encode, decode):
+        encode_s, payload = timed(encode, args.repeat)
+        decode_s, _ = timed(lambda: decode(payload), args.repeat)
+        rows.append({
+            "encoding": name,
+            "bytes": len(payload),
+            "bytes_per_score": round(len(payload) / max(1, len(scores)), 2),
+            "encode_ms": encode_s * 1000,
+            "decode_ms": decode_s * 1000,
+        })
+
+    add("json", lambda: json.dumps(scores).encode(), json.loads)
+    add("orjson", lambda: encode_json(scores), json.loads)
+
+    for name, compress in (("binary", False), ("binary+zlib", True)):
+        codec = ScoreCodec(miners, compress=compress, delta=False)
+        add(name, lambda: codec.encode(2, scores), lambda p: codec.decode(p, peer="v1").to_dict())
+
+    for name, compress in (("binary+delta", False), ("binary+delta+zlib", True)):
+        sender, receiver = ScoreCodec(miners, compress=compress), ScoreCodec(miners, compress=compress)
+        receiver.decode(sender.encode(1, previous_scores), peer="v1")
+        sent, received = sender._sent, receiver._received["v1"]
+
+        def encode_delta(sender=sender, sent=sent):
+            # Each repetition encodes slot 2 against the same slot-1 base
+            sender._sent, sender._frames_since_keyframe = sent, 1
+            return sender.encode(2, scores)
+
+        def decode_delta(payload, receiver=receiver, received=received):
+            receiver._received["v1"] = received
+            return receiver.decode(payload, peer="v1").to_dict()
+
+        add(name, encode_delta, decode_delta)
+
+    baseline = rows[0]["bytes"]
+    for row in rows:
+        row["size_vs_json"] = f"{row['bytes'] / baseline:.1%}"
+
+    print_table(rows, ["encoding", "bytes", "bytes_per_score", "size_vs_json", "encode_ms", "decode_ms"])
+    print(f"\nBinary frames are sent with Content-Type {CONTENT_TYPE_BINARY}")
+    if args.output:
+        write_json(args.output, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Write offline safetensors copies of the Subnet1 models.
+
+Converts the image generation pipeline (default segmind/tiny-sd) and the
+CLIP scorer weights (default ViT-B/32) into the offline model directory
+(SUBNET1_MODEL_DIR, default ./model_store). Afterwards load_pipeline and
+load_clip_model pick them up automatically and memory-map the weights
+instead of unpickling .bin / .pt checkpoints.
+
+Run once per host (or copy the directory between hosts):
+  python scripts/convert_models_to_safetensors.py
+  python scripts/convert_models_to_safetensors.py --model-id segmind/tiny-sd --clip ViT-B/32 ViT-L/14
+"""
+
+import argparse
+import os
+import time
+
+import benchmark_common  # noqa: F401 (adds the project root to sys.path)
+
+from subnet1.models.model_store import clip_weights_path, model_dir, pipeline_dir
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Convert Subnet1 models to safetensors")
+    parser.add_argument("--model-id", default="segmind/tiny-sd", help="Diffusers pipeline to convert")
+    parser.add_argument("--clip", nargs="*", default=["ViT-B/32"], help="CLIP models to convert")
+    parser.add_argument("--output-dir", default=None, help="Offline model directory (default: SUBNET1_MODEL_DIR)")
+    parser.add_argument("--skip-pipeline", action="store_true", help="Only convert CLIP weights")
+    return parser.parse_args()
+
+
+def directory_size_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / (1024 * 1024)
+
+
+def convert_pipeline(model_id: str, root: str):
+    import torch
+    from diffusers import StableDiffusionPipeline
+
+    target = pipeline_dir(model_id, root)
+    start = time.time()
+    pipeline = StableDiffusionPipeline.from_pretrained(model_id, torch_dtype=torch.float32, use_safetensors=False)
+    pipeline.save_pretrained(target, safe_serialization=True)
+    print(f"✅ {model_id} -> {target} ({directory_size_mb(target):.0f} MiB, {time.time() - start:.1f}s)")
+
+
+def convert_clip(model_name: str, root: str):
+    import clip
+    from safetensors.torch import save_file
+
+    target = clip_weights_path(model_name, root)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    start = time.time()
+    model, _ = clip.load(model_name, device="cpu", jit=False)
+    # Same dtype as the scorer uses on CPU, so the weights can be mapped without a cast
+    state_dict = {name: tensor.contiguous() for name, tensor in model.float().state_dict().items()}
+    save_file(state_dict, target)
+    print(
+        f"✅ CLIP {model_name} -> {target} ({os.path.getsize(target) / (1024 * 1024):.0f} MiB, {time.time() - start:.1f}s)"
+    )
+
+
+def main():
+    args = parse_arguments()
+    root = args.output_dir or model_dir()
+    os.makedirs(root, exist_ok=True)
+    print(f"📦 Offline model directory: {root}")
+
+    if not args.skip_pipeline:
+        convert_pipeline(args.model_id, root)
+    for model_name in args.clip:
+        convert_clip(model_name, root)
+
+    if args.output_dir:
+        print(f"\nℹ️ Set SUBNET1_MODEL_DIR={root} so miners and validators load from it.")
+
+
+if __name__ == "__main__":
+    main()
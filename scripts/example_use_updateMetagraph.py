@@ -5,17 +5,26 @@ Replaces individual updateMinerScores() calls with efficient batch processing
 """
 
 import json
+import sys
 from typing import Dict, List
 from web3 import Web3
 from pathlib import Path
 
+# --- Add project root to sys.path ---
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from subnet1.aggregation import ScoreMatrix, to_uint64
+from subnet1.entity_registry import EntityRegistry, get_entity_registry
+
 
 class MetagraphUpdater:
     """Example class showing how to use updateMetagraph function"""
 
-    def __init__(self, contract_address: str, rpc_url: str):
+    def __init__(self, contract_address: str, rpc_url: str, registry: EntityRegistry = None):
         self.contract_address = contract_address
         self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        # Miner name / hex UID / address -> entity (loaded once from entities/)
+        self.registry = registry or get_entity_registry()
 
         # ModernTensor ABI with new updateMetagraph function
         self.contract_abi = [
@@ -49,6 +58,27 @@ class MetagraphUpdater:
             address=self.contract_address, abi=self.contract_abi
         )
 
+    def scale_scores(self, final_scores: Dict[str, float], report_missing: bool = False):
+        """
+        Miners with a known address and their scores in the contract's uint64 fixed point
+        (0.0-1.0 -> 0-1000000, 6 decimals), scaled as one vector.
+
+        Returns:
+            (miner_uids, addresses, performances)
+        """
+        miner_uids, addresses = [], []
+        for miner_uid in final_scores:
+            miner_address = self.registry.address_of(miner_uid)
+            if not miner_address:
+                if report_missing:
+                    print(f"⚠️ Miner {miner_uid} address not found, skipping...")
+                continue
+            miner_uids.append(miner_uid)
+            addresses.append(miner_address)
+
+        matrix = ScoreMatrix.from_rows({"consensus": (miner_uids, [final_scores[uid] for uid in miner_uids])})
+        return miner_uids, addresses, to_uint64(matrix.scores[0]).tolist()
+
     def submit_consensus_batch(
         self, final_scores: Dict[str, float], validator_private_key: str
     ):
@@ -61,32 +91,8 @@ class MetagraphUpdater:
         )
 
         # Prepare batch data
-        addresses = []
-        performances = []
-        trust_scores = []
-
-        # UID to address mapping (reuse from existing code)
-        uid_to_address_map = {
-            "subnet1_miner_001": "0xd89fBAbb72190ed22F012ADFC693ad974bAD3005",
-            "subnet1_miner_002": "0x16102CA8BEF74fb6214AF352989b664BF0e50498",
-            "7375626e6574315f6d696e65725f303031": "0xd89fBAbb72190ed22F012ADFC693ad974bAD3005",
-            "7375626e6574315f6d696e65725f303032": "0x16102CA8BEF74fb6214AF352989b664BF0e50498",
-        }
-
-        for miner_uid, consensus_score in final_scores.items():
-            # Find miner address
-            miner_address = uid_to_address_map.get(miner_uid)
-            if not miner_address:
-                print(f"⚠️ Miner {miner_uid} address not found, skipping...")
-                continue
-
-            # Scale score (0.0-1.0 -> 0-1000000 for 6 decimal precision)
-            score_scaled = int(consensus_score * 1_000_000)
-            score_scaled = max(0, min(1_000_000, score_scaled))
-
-            addresses.append(miner_address)
-            performances.append(score_scaled)
-            trust_scores.append(score_scaled)
+        miner_uids, addresses, performances = self.scale_scores(final_scores, report_missing=True)
+        trust_scores = list(performances)
 
         if not addresses:
             print("❌ No valid miners to update")
@@ -149,31 +155,9 @@ class MetagraphUpdater:
         )
 
         # Prepare batch data
-        addresses = []
-        performances = []
-        trust_scores = []
-        reward_amounts = []
-
-        uid_to_address_map = {
-            "subnet1_miner_001": "0xd89fBAbb72190ed22F012ADFC693ad974bAD3005",
-            "subnet1_miner_002": "0x16102CA8BEF74fb6214AF352989b664BF0e50498",
-            "7375626e6574315f6d696e65725f303031": "0xd89fBAbb72190ed22F012ADFC693ad974bAD3005",
-            "7375626e6574315f6d696e65725f303032": "0x16102CA8BEF74fb6214AF352989b664BF0e50498",
-        }
-
-        for miner_uid, consensus_score in final_scores.items():
-            miner_address = uid_to_address_map.get(miner_uid)
-            if not miner_address:
-                continue
-
-            # Scale score and reward
-            score_scaled = max(0, min(1_000_000, int(consensus_score * 1_000_000)))
-            reward_amount = int(rewards.get(miner_uid, 0) * 1e18)  # Convert to wei
-
-            addresses.append(miner_address)
-            performances.append(score_scaled)
-            trust_scores.append(score_scaled)
-            reward_amounts.append(reward_amount)
+        miner_uids, addresses, performances = self.scale_scores(final_scores)
+        trust_scores = list(performances)
+        reward_amounts = [int(rewards.get(uid, 0) * 1e18) for uid in miner_uids]  # Convert to wei
 
         if not addresses:
             print("❌ No valid miners to update")
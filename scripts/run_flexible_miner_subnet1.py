@@ -31,6 +31,12 @@ sys.path.insert(0, str(moderntensor_path))
 # --- Import required classes ---
 try:
     from subnet1.miner import Subnet1Miner
+    from subnet1.coordination import create_coordination_backend
+    from subnet1.validator_discovery import (
+        ValidatorDiscovery,
+        env_endpoint_source,
+        metagraph_endpoint_source,
+    )
     from mt_core.config.settings import settings as sdk_settings
     from mt_core.account import Account
     from mt_core.core.datatypes import MinerInfo
@@ -234,8 +240,15 @@ class FlexibleSubnet1Miner:
         # Initialize components
         self.subnet1_miner = None
         self.slot_coordinator = None
+        # Push-based view of validator slot states (inotify / unix / udp / poll)
+        self.coordination = None
         self.validator_endpoints = []
         self.last_validator_check = 0
+        # Concurrent health probes of registered validators (RTT / error rate table)
+        self.discovery = ValidatorDiscovery(
+            self._validator_endpoint_source(),
+            ttl_seconds=max(self.config.validator_detection_interval, 5),
+        )
 
         # Performance tracking
         self.tasks_received = 0
@@ -282,6 +295,12 @@ class FlexibleSubnet1Miner:
                     coordination_dir="slot_coordination",
                 )
 
+                self.coordination = create_coordination_backend(
+                    coordination_dir="slot_coordination",
+                    poll_interval=self.config.validator_detection_interval,
+                )
+                await self.coordination.start()
+
             # Start background tasks
             if self.auto_detect_validators:
                 asyncio.create_task(self._validator_detection_loop())
@@ -300,6 +319,8 @@ class FlexibleSubnet1Miner:
         logger.info("🛑 Stopping FlexibleSubnet1Miner")
 
         try:
+            if self.coordination:
+                await self.coordination.stop()
             if self.subnet1_miner:
                 await self.subnet1_miner.__aexit__(None, None, None)
 
@@ -310,6 +331,10 @@ class FlexibleSubnet1Miner:
         """Background loop to detect active validators."""
         logger.info("🔍 Starting validator detection loop")
 
+        if self.coordination is not None:
+            await self._validator_event_loop()
+            return
+
         while True:
             try:
                 current_time = time.time()
@@ -328,6 +353,27 @@ class FlexibleSubnet1Miner:
                 logger.error(f"❌ Error in validator detection loop: {e}")
                 await asyncio.sleep(30)  # Error recovery delay
 
+    async def _validator_event_loop(self):
+        """Re-detect validators whenever a validator's slot state changes (no idle polling)."""
+        logger.info(
+            f"🔍 Validator detection driven by [cyan]{self.coordination.name}[/] coordination events"
+        )
+        await self._detect_active_validators()
+        while True:
+            try:
+                event = await self.coordination.wait_for_event()
+                logger.debug(
+                    f"📨 Validator {event.validator_uid[:10]}... entered {event.phase} (slot {event.slot}), "
+                    f"{(time.time() - event.timestamp) * 1000:.0f}ms ago"
+                )
+                await self._detect_active_validators()
+                self.last_validator_check = time.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error in validator event loop: {e}")
+                await asyncio.sleep(1)
+
     async def _detect_active_validators(self):
         """Detect currently active validators."""
         try:
@@ -335,7 +381,11 @@ class FlexibleSubnet1Miner:
 
             # Method 1: Check coordination files
             active_validators = []
-            if self.slot_coordinator:
+            if self.coordination is not None:
+                current_slot = self.coordination.current_slot()
+                if current_slot is not None:
+                    active_validators = self.coordination.active_validators(current_slot)
+            elif self.slot_coordinator:
                 # Get current slot and check for active coordination files
                 current_slot, current_phase, _ = (
                     self.slot_coordinator.get_current_slot_and_phase()
@@ -363,24 +413,34 @@ class FlexibleSubnet1Miner:
         except Exception as e:
             logger.error(f"❌ Error detecting validators: {e}")
 
+    def _validator_endpoint_source(self):
+        """Registered validators from the metagraph, else SUBNET1_VALIDATOR_ENDPOINTS."""
+        try:
+            from mt_core.metagraph.core_metagraph_adapter import CoreMetagraphClient
+
+            return metagraph_endpoint_source(CoreMetagraphClient())
+        except Exception as e:
+            logger.debug(f"Metagraph client unavailable ({e}); using SUBNET1_VALIDATOR_ENDPOINTS")
+            return env_endpoint_source()
+
     async def _discover_validators_via_network(self):
-        """Discover validators via network pings."""
-        # This would implement network-based validator discovery
-        # For now, just a placeholder
-        pass
+        """Probe all registered validators concurrently (one timeout per sweep)."""
+        table = await self.discovery.sweep()
+        if table:
+            best = table[0]
+            logger.debug(
+                f"🌐 {len(self.discovery.healthy_endpoints())}/{len(table)} validators healthy; "
+                f"fastest {best.url} ({best.to_dict()['rtt_ms']}ms)"
+            )
 
     def _assess_network_conditions(self, validator_count: int):
-        """Assess network conditions based on validator activity."""
-        if validator_count >= 3:
-            self.network_conditions = "good"
-        elif validator_count >= 2:
-            self.network_conditions = "fair"
-        elif validator_count >= 1:
-            self.network_conditions = "poor"
-        else:
-            self.network_conditions = "unstable"
-
-        logger.debug(f"📊 Network conditions: {self.network_conditions}")
+        """Assess network conditions from measured validator latency percentiles."""
+        self.network_conditions, _ = self.discovery.assess()
+        percentiles = self.discovery.rtt_percentiles()
+        logger.debug(
+            f"📊 Network conditions: {self.network_conditions} "
+            f"(p95 RTT {percentiles['p95']}, {validator_count} active validators)"
+        )
 
     async def _timing_adjustment_loop(self):
         """Background loop to adjust timing based on network conditions."""
@@ -389,7 +449,8 @@ class FlexibleSubnet1Miner:
         while True:
             try:
                 await self._adjust_timing_based_on_conditions()
-                await asyncio.sleep(60)  # Check every minute
+                # At least once per probe TTL, so the table never ages out between sweeps
+                await asyncio.sleep(min(60, self.discovery.ttl_seconds))
 
             except Exception as e:
                 logger.error(f"❌ Error in timing adjustment loop: {e}")
@@ -400,15 +461,10 @@ class FlexibleSubnet1Miner:
         if not self.config.auto_adjust_timing:
             return
 
-        # Adjust response timeout multiplier based on network conditions
-        if self.network_conditions == "good":
-            self.config.response_timeout_multiplier = 1.0
-        elif self.network_conditions == "fair":
-            self.config.response_timeout_multiplier = 1.2
-        elif self.network_conditions == "poor":
-            self.config.response_timeout_multiplier = 1.5
-        else:  # unstable
-            self.config.response_timeout_multiplier = 2.0
+        # Own sweep (TTL-gated): validator detection only runs on coordination events
+        await self._discover_validators_via_network()
+        # Multiplier derived from measured RTT percentiles and error rates
+        self.network_conditions, self.config.response_timeout_multiplier = self.discovery.assess()
 
         logger.debug(
             f"⏰ Adjusted timeout multiplier to {self.config.response_timeout_multiplier:.1f} "
@@ -420,7 +476,19 @@ class FlexibleSubnet1Miner:
         return base_timeout * self.config.response_timeout_multiplier
 
     def should_respond_to_task(self, task_deadline: float) -> bool:
-        """Determine if miner should respond to a task given its deadline."""
+        """
+        Determine if miner should respond to a task given its deadline.
+
+        Uses the miner's admission controller (measured p95 latency + queue depth)
+        when available; falls back to a static estimate before the miner starts.
+        """
+        admission = getattr(self.subnet1_miner, "admission", None)
+        if admission is not None:
+            decision = admission.evaluate(task_deadline, getattr(self.subnet1_miner, "_in_flight", 0))
+            if not decision.admitted:
+                logger.debug(f"🚫 Would reject task: {decision.reason}")
+            return decision.admitted
+
         current_time = time.time()
         time_remaining = task_deadline - current_time
 
@@ -458,7 +526,14 @@ class FlexibleSubnet1Miner:
             raise
 
     def get_performance_metrics(self) -> Dict[str, Any]:
-        """Get miner performance metrics."""
+        """Get miner performance metrics (from the underlying miner's telemetry)."""
+        miner_metrics = getattr(self.subnet1_miner, "metrics", None)
+        telemetry = miner_metrics.snapshot() if miner_metrics is not None else {}
+        if telemetry:
+            self.tasks_received = telemetry["tasks_received"]
+            self.tasks_completed = telemetry["tasks_completed"]
+            self.avg_response_time = telemetry["end_to_end"]["mean"] or 0.0
+
         completion_rate = (
             self.tasks_completed / max(self.tasks_received, 1) * 100
         )
@@ -473,6 +548,11 @@ class FlexibleSubnet1Miner:
             "network_conditions": self.network_conditions,
             "active_validators": len(self.validator_endpoints),
             "current_timeout_multiplier": self.config.response_timeout_multiplier,
+            "throughput_per_minute": telemetry.get("throughput_per_minute", 0.0),
+            "outcomes": telemetry.get("outcomes", {}),
+            "per_validator": telemetry.get("per_validator", {}),
+            "phases": telemetry.get("phases", {}),
+            "validator_discovery": self.discovery.get_status(),
         }
 
 
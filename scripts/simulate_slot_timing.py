@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Offline discrete-event simulator for flexible-consensus slot timing.
+
+Predicts how a FlexibleConsensusConfig preset behaves at a given network size
+without deploying it. Each simulated slot runs the same phases as the real
+validators:
+
+  task assignment -> miner generation -> validator scoring (in arrival order)
+  -> score exchange until `min_validators_for_consensus` (optionally
+  auto-extended) -> metagraph submission
+
+Miner latency, network delay, per-result scoring time and chain submission
+time are drawn from configurable distributions or from recorded samples.
+All slots of a chunk are simulated at once as NumPy arrays, so thousands of
+slots with 50 validators and 2,000 miners run in seconds.
+
+Distributions:
+  const:30                   fixed value
+  uniform:10,40              uniform between two values
+  lognormal:25,0.4           median 25s, log-space sigma 0.4
+  exponential:5              mean 5s
+  empirical:samples.json     resample recorded seconds (JSON list,
+  empirical:run.json#scoring   or one key of a JSON object of lists)
+
+Presets:
+  config:<mode>   full timing from flexible_config.py (rigid, balanced, ultra_flexible, performance)
+  sdk:<mode>      buffers/extension/quorum from FlexibleConsensusSDK.create_flexible_config,
+                  phase minimums from the flexible_config.py mode of the same name (else balanced)
+
+Examples:
+  python scripts/simulate_slot_timing.py
+  python scripts/simulate_slot_timing.py --validators 50 --miners 2000 --slots 5000
+  python scripts/simulate_slot_timing.py --presets config:performance sdk:performance \\
+      --miner-latency empirical:miner_latency.json --scoring-time lognormal:0.4,0.3
+"""
+
+import argparse
+import json
+import tempfile
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmark_common import Stopwatch, print_table, write_json
+
+from flexible_config import FlexibleConfigManager  # noqa: E402 (project root added by benchmark_common)
+from subnet1.flexible_consensus_sdk import FlexibleConsensusSDK
+
+Sampler = Callable[[np.random.Generator, Tuple[int, ...]], np.ndarray]
+
+DEFAULT_PRESETS = ["config:rigid", "config:balanced", "config:performance", "sdk:balanced", "sdk:performance"]
+
+
+# --- Distributions ---
+def parse_distribution(spec: str) -> Sampler:
+    """Sampler for a distribution spec such as 'lognormal:25,0.4' (see module docstring)."""
+    kind, _, args = spec.partition(":")
+    if kind == "empirical":
+        path, _, key = args.partition("#")
+        with open(path) as f:
+            data = json.load(f)
+        samples = np.asarray(data[key] if key else data, dtype=np.float64)
+        if samples.size == 0:
+            raise ValueError(f"No samples in {args}")
+        return lambda rng, shape: rng.choice(samples, size=shape)
+
+    values = [float(v) for v in args.split(",")] if args else []
+    if kind == "const":
+        return lambda rng, shape: np.full(shape, values[0])
+    if kind == "uniform":
+        return lambda rng, shape: rng.uniform(values[0], values[1], shape)
+    if kind == "lognormal":
+        mu, sigma = np.log(values[0]), values[1]
+        return lambda rng, shape: rng.lognormal(mu, sigma, shape)
+    if kind == "exponential":
+        return lambda rng, shape: rng.exponential(values[0], shape)
+    raise ValueError(f"Unknown distribution '{spec}'")
+
+
+# --- Presets ---
+@dataclass
+class SlotTiming:
+    """Phase schedule of one slot, in seconds from slot start."""
+
+    name: str
+    slot_seconds: float
+    assignment_seconds: float
+    execution_seconds: float
+    consensus_seconds: float
+    metagraph_seconds: float
+    task_deadline_buffer: float
+    consensus_deadline_buffer: float
+    metagraph_deadline_buffer: float
+    auto_extend_on_consensus: bool
+    max_auto_extension_seconds: float
+    min_validators_for_consensus: int
+
+    @property
+    def task_deadline(self) -> float:
+        return self.assignment_seconds + self.execution_seconds + self.task_deadline_buffer
+
+    @property
+    def consensus_deadline(self) -> float:
+        return self.task_deadline + self.consensus_seconds + self.consensus_deadline_buffer
+
+    @property
+    def metagraph_deadline(self) -> float:
+        return self.consensus_deadline + self.metagraph_seconds + self.metagraph_deadline_buffer
+
+    @classmethod
+    def from_configs(cls, name: str, phases, buffers) -> "SlotTiming":
+        """Phase lengths from a flexible_config.py config, buffers/quorum from `buffers`."""
+        return cls(
+            name=name,
+            slot_seconds=phases.slot_duration_minutes * 60,
+            assignment_seconds=phases.min_task_assignment_seconds,
+            execution_seconds=phases.min_task_execution_seconds,
+            consensus_seconds=phases.min_consensus_seconds,
+            metagraph_seconds=phases.min_metagraph_update_seconds,
+            task_deadline_buffer=buffers.task_deadline_buffer,
+            consensus_deadline_buffer=buffers.consensus_deadline_buffer,
+            metagraph_deadline_buffer=buffers.metagraph_deadline_buffer,
+            auto_extend_on_consensus=buffers.auto_extend_on_consensus,
+            max_auto_extension_seconds=buffers.max_auto_extension_seconds,
+            min_validators_for_consensus=getattr(buffers, "min_validators_for_consensus", 2),
+        )
+
+
+def load_presets(names: List[str]) -> List[SlotTiming]:
+    with tempfile.TemporaryDirectory() as config_dir:
+        manager = FlexibleConfigManager(config_dir=config_dir)
+    modes = manager.list_available_modes()["consensus_modes"]
+    sdk = FlexibleConsensusSDK()
+
+    presets = []
+    for name in names:
+        source, _, mode = name.partition(":")
+        phases = manager.get_consensus_config(mode if mode in modes else "balanced")
+        if source == "config":
+            presets.append(SlotTiming.from_configs(name, phases, phases))
+        elif source == "sdk":
+            presets.append(SlotTiming.from_configs(name, phases, sdk.create_flexible_config(mode)))
+        else:
+            raise ValueError(f"Unknown preset '{name}' (use config:<mode> or sdk:<mode>)")
+    return presets
+
+
+# --- Simulation ---
+@dataclass
+class SimulationResult:
+    preset: str
+    slots: int
+    schedule_seconds: float
+    mean_slot_seconds: float
+    tasks_per_slot: float
+    scored_per_slot: float
+    miners_scored_per_slot: float
+    task_miss_rate: float
+    scoring_miss_rate: float
+    consensus_miss_rate: float
+    extension_rate: float
+    metagraph_miss_rate: float
+    task_utilization: float
+    consensus_utilization: float
+    metagraph_utilization: float
+    sim_seconds: float = 0.0
+
+
+def _sequential_finish(arrivals: np.ndarray, durations: np.ndarray) -> np.ndarray:
+    """
+    Finish times of a single server working through jobs in arrival order.
+
+    f_i = max(a_i, f_{i-1}) + s_i  ==  S_i + max_{j<=i}(a_j - S_{j-1}),  S = cumsum(s)
+    """
+    cumulative = np.cumsum(durations, axis=-1)
+    start_slack = arrivals - (cumulative - durations)
+    return cumulative + np.maximum.accumulate(start_slack, axis=-1)
+
+
+class SlotSimulator:
+    """Vectorized simulation of many slots of one preset."""
+
+    def __init__(self, args, miner_latency: Sampler, network_delay: Sampler, scoring_time: Sampler, submit_time: Sampler):
+        self.args = args
+        self.miner_latency = miner_latency
+        self.network_delay = network_delay
+        self.scoring_time = scoring_time
+        self.submit_time = submit_time
+
+    def run(self, timing: SlotTiming, seed: int) -> SimulationResult:
+        args = self.args
+        rng = np.random.default_rng(seed)
+        # Persistent per-miner speed: some hosts are simply slower than others
+        miner_speed = rng.lognormal(0.0, args.miner_spread, args.miners)
+        totals: Dict[str, float] = {}
+        for start in range(0, args.slots, args.chunk):
+            for key, value in self._run_chunk(timing, rng, miner_speed, min(args.chunk, args.slots - start)).items():
+                totals[key] = totals.get(key, 0.0) + value
+
+        slots, cells = args.slots, args.slots * args.validators
+        received = max(totals["received"], 1.0)
+        return SimulationResult(
+            preset=timing.name,
+            slots=slots,
+            schedule_seconds=max(timing.slot_seconds, timing.metagraph_deadline),
+            mean_slot_seconds=max(timing.slot_seconds, timing.metagraph_deadline) + totals["extension_seconds"] / cells,
+            tasks_per_slot=totals["tasks"] / slots,
+            scored_per_slot=totals["scored"] / slots,
+            miners_scored_per_slot=totals["miners_scored"] / slots,
+            task_miss_rate=1.0 - totals["received"] / max(totals["tasks"], 1.0),
+            scoring_miss_rate=1.0 - totals["scored"] / received,
+            consensus_miss_rate=1.0 - totals["reached"] / cells,
+            extension_rate=totals["extended"] / cells,
+            metagraph_miss_rate=1.0 - totals["submitted"] / cells,
+            task_utilization=totals["task_used"] / cells,
+            consensus_utilization=totals["consensus_used"] / cells,
+            metagraph_utilization=totals["metagraph_used"] / cells,
+        )
+
+    def _run_chunk(self, timing: SlotTiming, rng, miner_speed: np.ndarray, slots: int) -> Dict[str, float]:
+        args = self.args
+        validators, tasks, miners = args.validators, args.tasks_per_validator, args.miners
+        shape = (slots, validators, tasks)
+        task_deadline, consensus_deadline = timing.task_deadline, timing.consensus_deadline
+
+        # --- Task round-trip ---
+        # Each validator picks miners at random (with replacement); a miner
+        # hit by several validators in the same slot queues the extra tasks.
+        miner_ids = rng.integers(0, miners, shape)
+        slot_miner = (np.arange(slots)[:, None, None] * miners + miner_ids).ravel()
+        load = np.bincount(slot_miner, minlength=slots * miners)[slot_miner].reshape(shape)
+        queue_factor = np.ceil(load / args.miner_concurrency)
+
+        sent = rng.uniform(0.0, timing.assignment_seconds, shape)
+        generation = self.miner_latency(rng, shape) * miner_speed[miner_ids] * queue_factor
+        arrivals = sent + self.network_delay(rng, shape) + generation + self.network_delay(rng, shape)
+        received = arrivals <= task_deadline
+
+        # --- Scoring: each validator scores received results one at a time, in arrival order ---
+        order = np.argsort(np.where(received, arrivals, np.inf), axis=-1)
+        sorted_arrivals = np.take_along_axis(arrivals, order, axis=-1)
+        sorted_received = np.take_along_axis(received, order, axis=-1)
+        durations = np.where(sorted_received, self.scoring_time(rng, shape), 0.0)
+        finish = _sequential_finish(np.where(sorted_received, sorted_arrivals, 0.0), durations)
+        scored_sorted = sorted_received & (finish <= consensus_deadline)
+        last_finish = np.max(np.where(sorted_received, finish, -np.inf), axis=-1)
+        # Scores go out once the task deadline has passed and scoring is done (or cut off)
+        broadcast = np.clip(last_finish, task_deadline, consensus_deadline)
+
+        # --- Score exchange until quorum ---
+        exchange = broadcast[:, None, :] + self.network_delay(rng, (slots, validators, validators))
+        own = np.arange(validators)
+        exchange[:, own, own] = broadcast
+        quorum = min(max(1, timing.min_validators_for_consensus), validators)
+        quorum_time = np.partition(exchange, quorum - 1, axis=-1)[..., quorum - 1]
+        max_extension = timing.max_auto_extension_seconds if timing.auto_extend_on_consensus else 0.0
+        reached = quorum_time <= consensus_deadline + max_extension
+        extension = np.where(reached, np.clip(quorum_time - consensus_deadline, 0.0, None), 0.0)
+        consensus_end = np.maximum(quorum_time, broadcast)
+
+        # --- Metagraph submission ---
+        submitted_at = consensus_end + self.submit_time(rng, (slots, validators))
+        submitted = reached & (submitted_at <= timing.metagraph_deadline + extension)
+
+        # --- Unique miners scored per slot ---
+        scored = np.zeros(shape, dtype=bool)
+        np.put_along_axis(scored, order, scored_sorted, axis=-1)
+        miners_scored = np.count_nonzero(np.bincount(slot_miner, weights=scored.ravel(), minlength=slots * miners))
+
+        last_arrival = np.max(np.where(received, arrivals, 0.0), axis=-1)
+        consensus_window = consensus_deadline - task_deadline
+        metagraph_window = timing.metagraph_deadline - consensus_deadline
+        return {
+            "tasks": float(received.size),
+            "received": float(received.sum()),
+            "scored": float(scored_sorted.sum()),
+            "miners_scored": float(miners_scored),
+            "reached": float(reached.sum()),
+            "extended": float((extension > 0).sum()),
+            "extension_seconds": float(extension.sum()),
+            "submitted": float(submitted.sum()),
+            # Fraction of each phase window actually used
+            "task_used": float((last_arrival / task_deadline).sum()) if task_deadline > 0 else 0.0,
+            "consensus_used": float(((consensus_end - task_deadline) / consensus_window).sum()) if consensus_window > 0 else 0.0,
+            "metagraph_used": float(((submitted_at - consensus_end) / metagraph_window).sum()) if metagraph_window > 0 else 0.0,
+        }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Simulate flexible-consensus slot timing and throughput")
+    parser.add_argument("--presets", nargs="+", default=DEFAULT_PRESETS, help="config:<mode> / sdk:<mode>")
+    parser.add_argument("--slots", type=int, default=2000)
+    parser.add_argument("--validators", type=int, default=50)
+    parser.add_argument("--miners", type=int, default=2000)
+    parser.add_argument("--tasks-per-validator", type=int, default=40, help="Miners each validator tasks per slot")
+    parser.add_argument("--miner-concurrency", type=int, default=1, help="Tasks a miner generates in parallel")
+    parser.add_argument("--miner-latency", default="lognormal:25,0.4", help="Generation seconds per task")
+    parser.add_argument("--miner-spread", type=float, default=0.3, help="Log-sigma of per-miner speed")
+    parser.add_argument("--network-delay", default="lognormal:0.15,0.7", help="One-way message delay")
+    parser.add_argument("--scoring-time", default="lognormal:0.25,0.3", help="Validator seconds per result")
+    parser.add_argument("--submit-time", default="lognormal:6,0.5", help="Metagraph transaction seconds")
+    parser.add_argument("--chunk", type=int, default=200, help="Slots simulated per vectorized chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Optional JSON results file")
+    return parser.parse_args()
+
+
+def main(argv_args: Optional[argparse.Namespace] = None):
+    args = argv_args or parse_arguments()
+    simulator = SlotSimulator(
+        args,
+        miner_latency=parse_distribution(args.miner_latency),
+        network_delay=parse_distribution(args.network_delay),
+        scoring_time=parse_distribution(args.scoring_time),
+        submit_time=parse_distribution(args.submit_time),
+    )
+    print(
+        f"Simulating {args.slots} slots: {args.validators} validators, {args.miners} miners, "
+        f"{args.tasks_per_validator} tasks/validator/slot"
+    )
+
+    rows = []
+    for timing in load_presets(args.presets):
+        with Stopwatch() as sw:
+            result = simulator.run(timing, args.seed)
+        result.sim_seconds = sw.seconds
+        rows.append(asdict(result))
+
+    print_table(
+        rows,
+        ["preset", "schedule_seconds", "mean_slot_seconds", "scored_per_slot", "miners_scored_per_slot",
+         "task_miss_rate", "scoring_miss_rate", "consensus_miss_rate", "extension_rate", "metagraph_miss_rate"],
+    )
+    print()
+    print_table(rows, ["preset", "task_utilization", "consensus_utilization", "metagraph_utilization", "sim_seconds"])
+    if args.output:
+        write_json(args.output, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Sync the local metagraph index from contract logs and query it.
+
+The first run walks eth_getLogs from --start-block; later runs resume from
+the checkpoint stored in the sqlite file, so only new blocks cost RPC.
+Queries read the local store only.
+
+Examples:
+  python scripts/sync_metagraph_index.py --start-block 5000000
+  python scripts/sync_metagraph_index.py --follow --interval 10
+  python scripts/sync_metagraph_index.py --no-sync --address 0xd89fBAbb72190ed22F012ADFC693ad974bAD3005
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core_metagraph import CoreMetagraph  # noqa: E402
+from subnet1.chain_reader import ChainReadError  # noqa: E402
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Sync and query the local metagraph index")
+    parser.add_argument("--store", default=None, help="sqlite file (default: config/metagraph_index.sqlite)")
+    parser.add_argument("--start-block", type=int, default=0, help="First block when there is no checkpoint")
+    parser.add_argument("--max-block-range", type=int, default=2000)
+    parser.add_argument("--confirmations", type=int, default=3)
+    parser.add_argument("--follow", action="store_true", help="Keep syncing every --interval seconds")
+    parser.add_argument("--interval", type=float, default=15.0)
+    parser.add_argument("--no-sync", action="store_true", help="Only query the local store")
+    parser.add_argument("--address", default=None, help="Show one entity by address")
+    parser.add_argument("--uid", default=None, help="Show one entity by UID")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_arguments()
+    logging.basicConfig(level=logging.INFO)
+    indexer = CoreMetagraph().create_indexer(
+        args.store,
+        start_block=args.start_block,
+        max_block_range=args.max_block_range,
+        confirmations=args.confirmations,
+    )
+
+    if args.follow:
+        await indexer.run(args.interval)
+        return
+    if not args.no_sync:
+        try:
+            count = await indexer.sync_once()
+            print(f"📇 Processed {count} logs, checkpoint at block {indexer.store.checkpoint()}")
+        except ChainReadError as e:
+            print(f"⚠️ Sync failed, showing local data: {e}")
+
+    store = indexer.store
+    if args.address or args.uid:
+        entity = store.get(args.address) if args.address else store.get_by_uid(args.uid)
+        print(json.dumps(entity, indent=2) if entity else "❌ Not in local index")
+        return
+    for kind in ("miners", "validators"):
+        entities = store.entities(kind)
+        print(f"\n{kind.upper()} ({len(entities)})")
+        for entity in entities:
+            print(f"   {entity['address']}  uid={entity.get('uid')}  active={entity.get('is_active')}  "
+                  f"core_stake={entity.get('core_stake')}  block={entity['indexed_block']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,228 @@
+"""
+Self-tuning phase timing for flexible consensus.
+
+The flexible-consensus presets ship fixed deadline buffers (e.g.
+task_deadline_buffer=20, consensus_deadline_buffer=30). On a fast network
+they waste most of every slot; on a slow one they cut phases off. The
+controller here measures what each slot's phases actually took and moves
+each buffer towards the measured tail latency, within safe bounds and a
+limited step per slot, recording every decision so operators can see why
+timing changed.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Measured phases of a consensus slot
+PHASE_TASK_ROUND_TRIP = "task_round_trip"
+PHASE_SCORING = "scoring"
+PHASE_CONSENSUS_EXCHANGE = "consensus_exchange"
+PHASE_METAGRAPH_SUBMIT = "metagraph_submit"
+PHASES = (PHASE_TASK_ROUND_TRIP, PHASE_SCORING, PHASE_CONSENSUS_EXCHANGE, PHASE_METAGRAPH_SUBMIT)
+
+# How several observations of a phase within one slot combine: tasks run in
+# parallel (slowest one matters), results are scored one after another.
+_SLOT_COMBINE: Dict[str, Callable[[Iterable[float]], float]] = {
+    PHASE_TASK_ROUND_TRIP: max,
+    PHASE_SCORING: sum,
+    PHASE_CONSENSUS_EXCHANGE: max,
+    PHASE_METAGRAPH_SUBMIT: max,
+}
+
+# Which config buffer has to absorb which phases
+BUFFER_PHASES: Dict[str, Tuple[str, ...]] = {
+    "task_deadline_buffer": (PHASE_TASK_ROUND_TRIP,),
+    "consensus_deadline_buffer": (PHASE_SCORING, PHASE_CONSENSUS_EXCHANGE),
+    "metagraph_deadline_buffer": (PHASE_METAGRAPH_SUBMIT,),
+}
+
+# Safe (min, max) seconds per buffer
+DEFAULT_BOUNDS: Dict[str, Tuple[int, int]] = {
+    "task_deadline_buffer": (5, 120),
+    "consensus_deadline_buffer": (5, 180),
+    "metagraph_deadline_buffer": (3, 60),
+}
+
+
+@dataclass(frozen=True)
+class TimingDecision:
+    """One buffer adjustment (or the reason it was left alone)."""
+
+    slot: Optional[int]
+    buffer: str
+    previous: int
+    new: int
+    # Measured tail latency x headroom, before bounds and step limits
+    target: Optional[float]
+    samples: int
+    reason: str
+    timestamp: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class AdaptiveTimingController:
+    """
+    Learns consensus phase durations per slot and sizes the config buffers from them.
+
+    buffer = clamp(quantile(phase durations) * headroom, bounds), moved at most
+    `max_step_fraction` of its current value per adjustment.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        headroom: float = 1.25,
+        min_samples: int = 5,
+        max_step_fraction: float = 0.25,
+        bounds: Optional[Dict[str, Tuple[int, int]]] = None,
+        window: int = 50,
+        history: int = 100,
+    ):
+        """
+        Args:
+            quantile: Tail quantile of per-slot phase durations a buffer must cover.
+            headroom: Multiplier on the measured quantile.
+            min_samples: Slots needed before a buffer is tuned.
+            max_step_fraction: Largest relative change per adjustment (damps oscillation).
+            bounds: (min, max) seconds per buffer (defaults: DEFAULT_BOUNDS).
+            window: Recent slots the quantiles are taken over.
+            history: Number of decisions kept for get_status().
+        """
+        self.quantile = quantile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.max_step_fraction = max_step_fraction
+        self.bounds = dict(DEFAULT_BOUNDS, **(bounds or {}))
+        self.phases: Dict[str, Histogram] = {phase: Histogram(window=window) for phase in PHASES}
+        self.decisions: Deque[TimingDecision] = deque(maxlen=history)
+        self._open_slots: Dict[Optional[int], Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+        self._last_slot: Optional[int] = None
+        self._lock = threading.Lock()
+
+    # --- Measurement ---
+    def observe(self, phase: str, seconds: float, slot: Optional[int] = None):
+        """Record one phase duration; it counts once the slot is closed with end_slot()."""
+        if phase not in self.phases:
+            raise ValueError(f"Unknown phase '{phase}'. Use one of {PHASES}")
+        with self._lock:
+            self._open_slots[slot][phase].append(max(0.0, seconds))
+
+    @contextmanager
+    def measure(self, phase: str, slot: Optional[int] = None) -> Iterator[None]:
+        """`with controller.measure(PHASE_SCORING, slot):` - observe the block's wall-clock time."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start, slot)
+
+    def end_slot(self, slot: Optional[int] = None) -> Dict[str, float]:
+        """
+        Fold a slot's observations into the per-phase histograms.
+
+        Returns:
+            The slot's combined duration per phase.
+        """
+        with self._lock:
+            observations = self._open_slots.pop(slot, {})
+            self._last_slot = slot
+        combined = {phase: _SLOT_COMBINE[phase](values) for phase, values in observations.items() if values}
+        for phase, seconds in combined.items():
+            self.phases[phase].observe(seconds)
+        return combined
+
+    # --- Tuning ---
+    def buffer_target(self, buffer: str) -> Tuple[Optional[float], int]:
+        """(target seconds, slots measured) for a buffer; target is None until enough samples."""
+        histograms = [self.phases[phase] for phase in BUFFER_PHASES[buffer]]
+        samples = min(h.count for h in histograms)
+        if samples < self.min_samples:
+            return None, samples
+        # Sum of per-phase tails: conservative when the phases run back to back
+        tail = sum(h.quantile(self.quantile) or 0.0 for h in histograms)
+        return tail * self.headroom, samples
+
+    def adjust(self, config, slot: Optional[int] = None) -> List[TimingDecision]:
+        """
+        Move the config's buffers towards the measured targets (mutates `config`).
+
+        Does nothing but record the reason when `config.adaptive_timing_enabled`
+        is False or there are not enough measurements yet.
+        """
+        slot = self._last_slot if slot is None else slot
+        decisions = []
+        enabled = getattr(config, "adaptive_timing_enabled", True)
+        for buffer in BUFFER_PHASES:
+            if not hasattr(config, buffer):
+                continue
+            previous = int(getattr(config, buffer))
+            target, samples = self.buffer_target(buffer)
+            if not enabled:
+                new, reason = previous, "adaptive timing disabled"
+            elif target is None:
+                new, reason = previous, f"waiting for {self.min_samples} slots ({samples} measured)"
+            else:
+                new, reason = self._next_value(buffer, previous, target)
+                setattr(config, buffer, new)
+            decisions.append(TimingDecision(slot, buffer, previous, new, target, samples, reason, time.time()))
+
+        with self._lock:
+            self.decisions.extend(decisions)
+        for decision in decisions:
+            if decision.new != decision.previous:
+                logger.info(
+                    f"⏱️ {decision.buffer}: {decision.previous}s -> {decision.new}s "
+                    f"(target {decision.target:.1f}s from {decision.samples} slots; {decision.reason})"
+                )
+        return decisions
+
+    def _next_value(self, buffer: str, previous: int, target: float) -> Tuple[int, str]:
+        low, high = self.bounds[buffer]
+        bounded = min(max(target, low), high)
+        max_step = max(1.0, previous * self.max_step_fraction)
+        stepped = min(max(bounded, previous - max_step), previous + max_step)
+        new = int(round(stepped))
+
+        if bounded != target:
+            reason = f"clamped to bounds [{low}, {high}]"
+        elif stepped != bounded:
+            reason = f"step limited to {max_step:.0f}s"
+        elif new == previous:
+            reason = "on target"
+        else:
+            reason = "tracking measured tail"
+        return new, reason
+
+    # --- Introspection ---
+    def estimated_slot_seconds(self, config) -> Optional[float]:
+        """Typical (p50) phase time plus the current buffers: how short a slot can be."""
+        medians = [self.phases[phase].quantile(0.5) for phase in PHASES]
+        if any(m is None for m in medians):
+            return None
+        return sum(medians) + sum(float(getattr(config, buffer, 0)) for buffer in BUFFER_PHASES)
+
+    def get_status(self, config=None) -> Dict[str, Any]:
+        with self._lock:
+            decisions = [d.to_dict() for d in self.decisions]
+        status = {
+            "quantile": self.quantile,
+            "headroom": self.headroom,
+            "bounds": {buffer: list(bound) for buffer, bound in self.bounds.items()},
+            "phases": {phase: histogram.snapshot() for phase, histogram in self.phases.items()},
+            "decisions": decisions[-10:],
+        }
+        if config is not None:
+            status["buffers"] = {buffer: getattr(config, buffer, None) for buffer in BUFFER_PHASES}
+            status["estimated_slot_seconds"] = self.estimated_slot_seconds(config)
+        return status
@@ -0,0 +1,129 @@
+"""
+Task admission for the Subnet1 miner.
+
+Decides, the moment a task arrives, whether the miner can still deliver a
+result before the task's deadline given what it has actually measured
+(p95 end-to-end latency) and how much work is already queued in front of
+it. Infeasible tasks are rejected immediately with a machine-readable
+reason so the validator can reassign them while there is still time.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .metrics import MinerMetrics
+from .models.latency_model import DEFAULT_RESOLUTIONS, GenerationLatencyModel
+
+# Machine-readable rejection reasons (sent as result_data["rejection_reason"])
+REJECT_DEADLINE_INFEASIBLE = "deadline_infeasible"
+REJECT_QUEUE_FULL = "queue_full"
+REJECT_MODEL_NOT_READY = "model_not_ready"
+
+# Cheapest generation the miner would still attempt (see GenerationLatencyModel.plan)
+MIN_PLAN_STEPS = 4
+
+
+@dataclass(frozen=True)
+class AdmissionDecision:
+    """Outcome of an admission check."""
+
+    admitted: bool
+    reason: Optional[str] = None
+    # Seconds the miner expects to need (queue wait + service)
+    estimated_seconds: Optional[float] = None
+    # Seconds left until the task's deadline (None = no deadline)
+    remaining_seconds: Optional[float] = None
+    queue_depth: int = 0
+
+    def to_result_data(self) -> Dict[str, Any]:
+        """Fields merged into an error result so the validator can act on the rejection."""
+        return {
+            "rejection_reason": self.reason,
+            "estimated_seconds": _round(self.estimated_seconds),
+            "remaining_seconds": _round(self.remaining_seconds),
+            "queue_depth": self.queue_depth,
+        }
+
+
+class AdmissionController:
+    """
+    Admission based on measured latency and current queue depth.
+
+    A task is admitted when
+
+        remaining >= (queue_ahead // parallelism) * generation_mean + service_p95
+
+    where service_p95 is the measured p95 end-to-end latency once at least
+    `min_samples` tasks have finished, and the latency model's cheapest plan
+    plus the submit budget before that. `parallelism` is the number of
+    generations that run at once (generation pool workers).
+    """
+
+    def __init__(
+        self,
+        metrics: MinerMetrics,
+        latency_model: GenerationLatencyModel,
+        submit_budget_s: float = 3.0,
+        max_queue_depth: Optional[int] = None,
+        min_samples: int = 5,
+        quantile: float = 0.95,
+        parallelism: int = 1,
+    ):
+        self.metrics = metrics
+        self.latency_model = latency_model
+        self.submit_budget_s = submit_budget_s
+        self.max_queue_depth = max_queue_depth
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.parallelism = max(1, parallelism)
+
+    def service_seconds(self) -> float:
+        """Expected time to serve one task once it reaches the front of the queue."""
+        if self.metrics.end_to_end.count >= self.min_samples:
+            measured = self.metrics.end_to_end.quantile(self.quantile)
+            if measured is not None:
+                return measured
+        smallest = min(DEFAULT_RESOLUTIONS)
+        return self.latency_model.estimate(MIN_PLAN_STEPS, smallest, smallest) + self.submit_budget_s
+
+    def per_task_queue_seconds(self) -> float:
+        """How long each batch of `parallelism` tasks already in flight delays a new one."""
+        generation = self.metrics.phases["generation"].snapshot()
+        if generation["count"]:
+            return generation["mean"]
+        smallest = min(DEFAULT_RESOLUTIONS)
+        return self.latency_model.estimate(MIN_PLAN_STEPS, smallest, smallest)
+
+    def evaluate(
+        self, deadline: Optional[float], queue_depth: int, now: Optional[float] = None
+    ) -> AdmissionDecision:
+        """
+        Decide whether to accept a task.
+
+        Args:
+            deadline: Unix timestamp the result is due (None = no deadline).
+            queue_depth: Tasks already being processed or waiting on this miner.
+            now: Current time (defaults to time.time()).
+        """
+        now = time.time() if now is None else now
+        if self.max_queue_depth is not None and queue_depth >= self.max_queue_depth:
+            return AdmissionDecision(False, REJECT_QUEUE_FULL, queue_depth=queue_depth)
+
+        queue_rounds = queue_depth // self.parallelism
+        estimated = queue_rounds * self.per_task_queue_seconds() + self.service_seconds()
+        if deadline is None:
+            return AdmissionDecision(True, estimated_seconds=estimated, queue_depth=queue_depth)
+
+        remaining = deadline - now
+        return AdmissionDecision(
+            admitted=remaining >= estimated,
+            reason=None if remaining >= estimated else REJECT_DEADLINE_INFEASIBLE,
+            estimated_seconds=estimated,
+            remaining_seconds=remaining,
+            queue_depth=queue_depth,
+        )
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
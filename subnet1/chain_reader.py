@@ -0,0 +1,206 @@
+"""
+Batched, non-blocking contract reads over JSON-RPC.
+
+Reading the metagraph used to cost one synchronous eth_call per miner or
+validator, issued from inside async code, which blocked the event loop for
+a full RPC round-trip per entity. BatchedChainReader sends many eth_calls
+as JSON-RPC batch requests (one HTTP round-trip per `max_batch_size` calls)
+on an async httpx client. If a node rejects batches, the reader falls back
+to concurrent single requests.
+
+The reader is ABI-agnostic: callers pass encoded calldata (see
+encode_address_call) and decode the returned words (see decode_words), so
+it needs no web3 at import time.
+"""
+
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_TIMEOUT = 10.0
+WORD_SIZE = 32
+
+
+class ChainReadError(RuntimeError):
+    """
+    The RPC endpoint could not be reached or answered with an error.
+
+    `rpc_error` is the JSON-RPC error object ({"code", "message"}) when the node
+    answered with one, and None for transport errors (connection, HTTP status).
+    """
+
+    def __init__(self, message: str, rpc_error: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.rpc_error = rpc_error
+
+
+@dataclass(frozen=True)
+class ContractCall:
+    """One read-only call: target contract and ABI-encoded calldata."""
+
+    to: str
+    data: bytes
+
+
+def encode_address_call(selector: bytes, address: str) -> bytes:
+    """Calldata for a `fn(address)` call: 4-byte selector + left-padded address word."""
+    raw = bytes.fromhex(address[2:] if address.startswith("0x") else address)
+    if len(selector) != 4 or len(raw) != 20:
+        raise ValueError(f"Bad selector or address: {selector!r}, {address}")
+    return selector + raw.rjust(WORD_SIZE, b"\0")
+
+
+def decode_words(data: bytes, kinds: Sequence[str]) -> Tuple[Any, ...]:
+    """
+    Decode static return values ("bool", "uint", "address") from 32-byte words.
+
+    Raises:
+        ValueError: `data` is shorter than the requested words (e.g. a revert).
+    """
+    if len(data) < WORD_SIZE * len(kinds):
+        raise ValueError(f"Expected {len(kinds)} words, got {len(data)} bytes")
+    values = []
+    for i, kind in enumerate(kinds):
+        word = data[i * WORD_SIZE:(i + 1) * WORD_SIZE]
+        if kind == "bool":
+            values.append(word[-1] != 0)
+        elif kind == "uint":
+            values.append(int.from_bytes(word, "big"))
+        elif kind == "address":
+            values.append("0x" + word[-20:].hex())
+        else:
+            raise ValueError(f"Unsupported ABI kind: {kind}")
+    return tuple(values)
+
+
+class BatchedChainReader:
+    """eth_call many contract reads in as few HTTP round-trips as possible."""
+
+    def __init__(
+        self,
+        rpc_url: str,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Args:
+            rpc_url: JSON-RPC endpoint of the chain.
+            max_batch_size: eth_calls per batch request (public RPCs often cap this).
+            timeout: HTTP timeout per request.
+            transport: Optional httpx transport (custom networking or a local chain stand-in).
+        """
+        self.rpc_url = rpc_url
+        self.max_batch_size = max(1, max_batch_size)
+        self.timeout = timeout
+        self.transport = transport
+        # Flipped off the first time the node refuses a batch request
+        self.batching_supported = True
+        self.stats = {"calls": 0, "http_requests": 0, "failed_calls": 0}
+        self._ids = itertools.count(1)
+
+    def _request(self, call: ContractCall, block: Union[str, int]) -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": "eth_call",
+            "params": [{"to": call.to, "data": "0x" + call.data.hex()}, hex(block) if isinstance(block, int) else block],
+        }
+
+    async def _rpc(self, method: str, params: List[Any]) -> Any:
+        """Single JSON-RPC request; raises ChainReadError on transport or RPC errors."""
+        async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
+            try:
+                reply = await self._post(client, {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params})
+            except httpx.HTTPError as e:
+                raise ChainReadError(f"RPC request to {self.rpc_url} failed: {e}") from e
+        if not isinstance(reply, dict) or "result" not in reply:
+            error = reply.get("error") if isinstance(reply, dict) else None
+            raise ChainReadError(
+                f"{method} failed: {error if isinstance(reply, dict) else reply}",
+                rpc_error=error if isinstance(error, dict) else None,
+            )
+        return reply["result"]
+
+    async def block_number(self) -> int:
+        """Current chain head (eth_blockNumber)."""
+        return int(await self._rpc("eth_blockNumber", []), 16)
+
+    async def get_logs(
+        self, address: str, from_block: int, to_block: int, topics: Optional[List[Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """eth_getLogs for one contract over an inclusive block range."""
+        log_filter = {"address": address, "fromBlock": hex(from_block), "toBlock": hex(to_block)}
+        if topics:
+            log_filter["topics"] = topics
+        return await self._rpc("eth_getLogs", [log_filter])
+
+    async def call(self, call: ContractCall, block: Union[str, int] = "latest") -> Optional[bytes]:
+        return (await self.call_many([call], block))[0]
+
+    async def call_many(
+        self, calls: Sequence[ContractCall], block: Union[str, int] = "latest"
+    ) -> List[Optional[bytes]]:
+        """
+        Run read-only calls against the same block (tag or number).
+
+        Returns:
+            Return data per call, in order; None for calls that reverted or errored.
+
+        Raises:
+            ChainReadError: The endpoint could not be reached.
+        """
+        if not calls:
+            return []
+        requests = [self._request(call, block) for call in calls]
+        self.stats["calls"] += len(requests)
+        async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
+            try:
+                if self.batching_supported:
+                    chunks = [
+                        requests[i:i + self.max_batch_size] for i in range(0, len(requests), self.max_batch_size)
+                    ]
+                    replies = await asyncio.gather(*(self._post_batch(client, chunk) for chunk in chunks))
+                    responses = {r.get("id"): r for reply in replies for r in reply}
+                else:
+                    replies = await asyncio.gather(*(self._post(client, r) for r in requests))
+                    responses = {r.get("id"): r for r in replies}
+            except httpx.HTTPError as e:
+                raise ChainReadError(f"RPC request to {self.rpc_url} failed: {e}") from e
+
+        results = []
+        for request in requests:
+            response = responses.get(request["id"]) or {}
+            result = response.get("result")
+            if result is None:
+                self.stats["failed_calls"] += 1
+                logger.debug(f"eth_call {request['params'][0]['to']} failed: {response.get('error')}")
+                results.append(None)
+            else:
+                results.append(bytes.fromhex(result[2:] if result.startswith("0x") else result))
+        return results
+
+    async def _post(self, client: httpx.AsyncClient, payload: Any) -> Any:
+        self.stats["http_requests"] += 1
+        response = await client.post(self.rpc_url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def _post_batch(self, client: httpx.AsyncClient, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        reply = await self._post(client, chunk)
+        if isinstance(reply, list):
+            return reply
+        # Node answered the batch with a single error object: no batch support
+        logger.warning(f"⚠️ RPC node rejected batch request ({reply.get('error')}); using concurrent single calls")
+        self.batching_supported = False
+        return list(await asyncio.gather(*(self._post(client, r) for r in chunk)))
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"batching_supported": self.batching_supported, "max_batch_size": self.max_batch_size, **self.stats}
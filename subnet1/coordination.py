@@ -0,0 +1,550 @@
+"""
+Event-driven slot coordination backends.
+
+The SDK's FlexibleSlotCoordinator writes one JSON state file per validator
+and phase into the coordination directory
+(slot_<slot>_<phase>_<validator_uid>.json). Miners used to poll that
+directory every `validator_detection_interval` seconds. The backends here
+expose the same information (latest state per validator, active validators
+of a slot) but push changes to subscribers as they happen:
+
+  inotify   watch the coordination directory with Linux inotify (no polling)
+  unix      local pub-sub over Unix datagram sockets in <dir>/sockets/
+  udp       pub-sub over UDP datagrams (subscribers bind, publishers send to targets
+            and to every subscriber registered in <dir>/sockets/ on this host)
+  poll      the old behaviour: rescan the directory every interval
+
+Validators keep writing state files; with `unix`/`udp` a relay (see
+start_relay) forwards file changes to the sockets so miners get phase
+changes within milliseconds.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import json
+import logging
+import os
+import socket
+import struct
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+BACKEND_INOTIFY = "inotify"
+BACKEND_UNIX = "unix"
+BACKEND_UDP = "udp"
+BACKEND_POLL = "poll"
+BACKENDS = (BACKEND_INOTIFY, BACKEND_UNIX, BACKEND_UDP, BACKEND_POLL)
+
+DEFAULT_COORDINATION_DIR = "slot_coordination"
+DEFAULT_UDP_PORT = 47100
+STATE_FILE_PATTERN = "slot_*.json"
+SOCKET_SUBDIR = "sockets"
+# Registration file of a UDP subscriber in SOCKET_SUBDIR ("host:port")
+UDP_REGISTRATION_SUFFIX = ".udp"
+MAX_DATAGRAM = 65_507
+
+# inotify(7) constants
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+@dataclass
+class SlotStateEvent:
+    """A validator's slot/phase state, as written to the coordination directory."""
+
+    validator_uid: str
+    slot: int
+    phase: str
+    timestamp: float
+    joined_mid_slot: bool = False
+    extra_data: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SlotStateEvent":
+        return cls(
+            validator_uid=str(data["validator_uid"]),
+            slot=int(data["slot"]),
+            phase=str(data["phase"]),
+            timestamp=float(data.get("timestamp", 0.0)),
+            joined_mid_slot=bool(data.get("joined_mid_slot", False)),
+            extra_data=dict(data.get("extra_data") or {}),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def filename(self) -> str:
+        return f"slot_{self.slot}_{self.phase}_{self.validator_uid}.json"
+
+
+def read_state_file(path: Path) -> Optional[SlotStateEvent]:
+    """Parse a state file; None if it is missing, partial or not a state."""
+    try:
+        with open(path) as f:
+            return SlotStateEvent.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_state_file(directory: Path, event: SlotStateEvent) -> Path:
+    """Write a state file atomically (readers and watchers never see it half-written)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / event.filename
+    tmp = directory / f".{event.filename}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(event.to_dict(), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+class CoordinationBackend:
+    """
+    Latest slot state per validator, updated by the concrete backend, with
+    push delivery to subscribers.
+
+    Use from asyncio: `await backend.start()`, then `await backend.wait_for_event()`
+    or iterate a queue from `subscribe()`.
+    """
+
+    name = "base"
+    # False for backends that have to poll (callers may then keep their interval)
+    event_driven = True
+
+    def __init__(self, coordination_dir: str = DEFAULT_COORDINATION_DIR):
+        self.coordination_dir = Path(coordination_dir)
+        self.states: Dict[str, SlotStateEvent] = {}
+        self.events_received = 0
+        self._subscribers: List[asyncio.Queue] = []
+        self._default_queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # --- Lifecycle ---
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        # Subscribed before anything can arrive, so wait_for_event() misses nothing
+        if self._default_queue is None:
+            self._default_queue = self.subscribe()
+        self._load_existing()
+
+    async def stop(self):
+        pass
+
+    def _load_existing(self):
+        """Seed state from the files already in the coordination directory."""
+        if not self.coordination_dir.is_dir():
+            return
+        for path in sorted(self.coordination_dir.glob(STATE_FILE_PATTERN)):
+            event = read_state_file(path)
+            if event:
+                self._update_state(event)
+
+    # --- Subscribers ---
+    def subscribe(self, maxsize: int = 1000) -> asyncio.Queue:
+        """Queue receiving every SlotStateEvent from now on (oldest dropped when full)."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    async def wait_for_event(self, timeout: Optional[float] = None) -> Optional[SlotStateEvent]:
+        """Next state change, or None after `timeout` seconds."""
+        if self._default_queue is None:
+            self._default_queue = self.subscribe()
+        try:
+            return await asyncio.wait_for(self._default_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _update_state(self, event: SlotStateEvent) -> bool:
+        current = self.states.get(event.validator_uid)
+        if current and (current.slot, current.timestamp) > (event.slot, event.timestamp):
+            return False
+        self.states[event.validator_uid] = event
+        return True
+
+    def _deliver(self, event: SlotStateEvent):
+        """Record an incoming event and push it to subscribers (event-loop thread)."""
+        self.events_received += 1
+        if not self._update_state(event):
+            return
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    # --- Queries (same information FlexibleSlotCoordinator exposes) ---
+    def active_validators(self, slot: int) -> List[str]:
+        """UIDs of validators whose latest state is in `slot`."""
+        return sorted(uid for uid, event in self.states.items() if event.slot == slot)
+
+    def latest_phase(self, validator_uid: str) -> Optional[Tuple[int, str]]:
+        event = self.states.get(validator_uid)
+        return (event.slot, event.phase) if event else None
+
+    def current_slot(self) -> Optional[int]:
+        return max((event.slot for event in self.states.values()), default=None)
+
+    # --- Publishing ---
+    async def publish(self, event: SlotStateEvent):
+        """Announce a validator state change (file backends: write the state file)."""
+        write_state_file(self.coordination_dir, event)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "event_driven": self.event_driven,
+            "coordination_dir": str(self.coordination_dir),
+            "validators": len(self.states),
+            "events_received": self.events_received,
+            "current_slot": self.current_slot(),
+        }
+
+
+class PollingCoordinationBackend(CoordinationBackend):
+    """Rescans the directory every `interval` seconds (the pre-existing behaviour)."""
+
+    name = BACKEND_POLL
+    event_driven = False
+
+    def __init__(self, coordination_dir: str = DEFAULT_COORDINATION_DIR, interval: float = 10.0):
+        super().__init__(coordination_dir)
+        self.interval = interval
+        self._mtimes: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await super().start()
+        self._scan(deliver=False)
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self._scan(deliver=True)
+            except Exception as e:
+                logger.error(f"❌ Error scanning {self.coordination_dir}: {e}")
+
+    def _scan(self, deliver: bool):
+        if not self.coordination_dir.is_dir():
+            return
+        for path in self.coordination_dir.glob(STATE_FILE_PATTERN):
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if self._mtimes.get(path.name) == mtime:
+                continue
+            self._mtimes[path.name] = mtime
+            event = read_state_file(path)
+            if event and deliver:
+                self._deliver(event)
+
+
+class InotifyCoordinationBackend(CoordinationBackend):
+    """Watches the coordination directory with inotify; no polling while idle."""
+
+    name = BACKEND_INOTIFY
+
+    def __init__(self, coordination_dir: str = DEFAULT_COORDINATION_DIR):
+        super().__init__(coordination_dir)
+        self._fd: Optional[int] = None
+        # Forwarding task when used as a relay (start_relay)
+        self.relay_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def is_available() -> bool:
+        return _libc() is not None
+
+    async def start(self):
+        await super().start()
+        libc = _libc()
+        if libc is None:
+            raise RuntimeError("inotify is not available on this platform")
+        self.coordination_dir.mkdir(parents=True, exist_ok=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO
+        if libc.inotify_add_watch(fd, str(self.coordination_dir).encode(), mask) < 0:
+            os.close(fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {self.coordination_dir}")
+        self._fd = fd
+        self._loop.add_reader(fd, self._on_readable)
+        logger.info(f"👀 Watching {self.coordination_dir} with inotify")
+
+    async def stop(self):
+        if self.relay_task is not None:
+            self.relay_task.cancel()
+            self.relay_task = None
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(data):
+            _, _, _, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+            start = offset + _INOTIFY_EVENT.size
+            name = data[start : start + name_len].rstrip(b"\0").decode(errors="replace")
+            offset = start + name_len
+            if name.startswith("slot_") and name.endswith(".json"):
+                event = read_state_file(self.coordination_dir / name)
+                if event:
+                    self._deliver(event)
+
+
+class DatagramCoordinationBackend(CoordinationBackend):
+    """
+    Pub-sub of state events over datagrams.
+
+    unix: every subscriber binds a socket in <coordination_dir>/sockets/; a
+          publisher sends each event to all sockets found there.
+    udp:  subscribers bind `bind` (host, port); publishers send to `targets`.
+          Every subscriber also registers its address in <coordination_dir>/sockets/
+          and publishers send to those too. A second subscriber on the same host
+          finds `bind` taken and listens on an ephemeral port instead, which
+          same-host publishers (the relay) reach through its registration.
+          (SO_REUSEPORT would not help: unicast datagrams go to one socket only.)
+    """
+
+    def __init__(
+        self,
+        coordination_dir: str = DEFAULT_COORDINATION_DIR,
+        transport: str = BACKEND_UNIX,
+        bind: Optional[Tuple[str, int]] = None,
+        targets: Sequence[Tuple[str, int]] = (),
+        subscribe: bool = True,
+    ):
+        """
+        Args:
+            coordination_dir: Coordination directory (state seed + unix socket dir).
+            transport: BACKEND_UNIX or BACKEND_UDP.
+            bind: UDP address to receive on (default 127.0.0.1:DEFAULT_UDP_PORT).
+            targets: UDP addresses a publisher sends to.
+            subscribe: Whether to receive events (publish-only relays pass False).
+        """
+        super().__init__(coordination_dir)
+        if transport not in (BACKEND_UNIX, BACKEND_UDP):
+            raise ValueError(f"Unknown datagram transport '{transport}'")
+        self.name = transport
+        self.transport = transport
+        self.bind = bind or ("127.0.0.1", DEFAULT_UDP_PORT)
+        self.targets = list(targets)
+        self.receive = subscribe
+        self.socket_dir = self.coordination_dir / SOCKET_SUBDIR
+        self._sock: Optional[socket.socket] = None
+        self._sock_path: Optional[Path] = None
+        self._registration: Optional[Path] = None
+        # UDP address actually listened on (differs from `bind` after a fallback)
+        self.bound: Optional[Tuple[str, int]] = None
+
+    async def start(self):
+        await super().start()
+        family = socket.AF_UNIX if self.transport == BACKEND_UNIX else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        if self.receive:
+            if self.transport == BACKEND_UNIX:
+                self.socket_dir.mkdir(parents=True, exist_ok=True)
+                self._sock_path = self.socket_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+                sock.bind(str(self._sock_path))
+            else:
+                self._bind_udp(sock)
+            self._loop.add_reader(sock.fileno(), self._on_readable)
+        self._sock = sock
+        logger.info(
+            f"📡 Slot coordination over {self.transport} datagrams ({self._sock_path or self.bound or self.bind})"
+        )
+
+    def _bind_udp(self, sock: socket.socket):
+        """Bind the UDP subscriber (ephemeral port if `bind` is taken) and register its address."""
+        try:
+            sock.bind(self.bind)
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                raise
+            sock.bind((self.bind[0], 0))
+            logger.warning(
+                f"⚠️ UDP {self.bind[0]}:{self.bind[1]} is used by another subscriber; listening on port "
+                f"{sock.getsockname()[1]} (reachable through publishers on this host)"
+            )
+        self.bound = sock.getsockname()[:2]
+        self.socket_dir.mkdir(parents=True, exist_ok=True)
+        registration = self.socket_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}{UDP_REGISTRATION_SUFFIX}"
+        staging = registration.with_suffix(".tmp")
+        staging.write_text(f"{self.bound[0]}:{self.bound[1]}")
+        os.replace(staging, registration)
+        self._registration = registration
+
+    async def stop(self):
+        if self._sock is not None:
+            if self.receive:
+                self._loop.remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+        if self._sock_path is not None:
+            self._sock_path.unlink(missing_ok=True)
+            self._sock_path = None
+        if self._registration is not None:
+            self._registration.unlink(missing_ok=True)
+            self._registration = None
+
+    def _on_readable(self):
+        while True:
+            try:
+                payload = self._sock.recv(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                self._deliver(SlotStateEvent.from_dict(json.loads(payload)))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.debug(f"Ignoring malformed coordination datagram: {e}")
+
+    async def publish(self, event: SlotStateEvent):
+        """Send the event to every subscriber (the state file is still written for compatibility)."""
+        await super().publish(event)
+        self.send(event)
+
+    def send(self, event: SlotStateEvent) -> int:
+        """Send without writing the state file; returns the number of subscribers reached."""
+        if self._sock is None:
+            raise RuntimeError("Backend not started")
+        payload = json.dumps(event.to_dict()).encode()
+        sent = 0
+        if self.transport == BACKEND_UNIX:
+            for path in self.socket_dir.glob("*.sock") if self.socket_dir.is_dir() else ():
+                try:
+                    self._sock.sendto(payload, str(path))
+                    sent += 1
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Subscriber exited without cleaning up its socket
+                    path.unlink(missing_ok=True)
+                except BlockingIOError:
+                    logger.debug(f"Subscriber {path.name} is not keeping up; event dropped")
+        else:
+            # Configured targets plus same-host registrations, each address once
+            targets = dict.fromkeys(self.targets)
+            targets.update(dict.fromkeys(self._registered_udp_targets()))
+            for target in targets:
+                try:
+                    self._sock.sendto(payload, target)
+                    sent += 1
+                except OSError as e:
+                    logger.debug(f"UDP send to {target} failed: {e}")
+        return sent
+
+    def _registered_udp_targets(self) -> List[Tuple[str, int]]:
+        """Addresses of the UDP subscribers registered on this host (stale registrations are removed)."""
+        targets = []
+        for path in self.socket_dir.glob(f"*{UDP_REGISTRATION_SUFFIX}") if self.socket_dir.is_dir() else ():
+            try:
+                os.kill(int(path.name.split("-", 1)[0]), 0)
+            except ProcessLookupError:
+                # Subscriber exited without cleaning up its registration
+                path.unlink(missing_ok=True)
+                continue
+            except (ValueError, PermissionError):
+                pass
+            try:
+                targets.extend(_parse_targets(path.read_text()))
+            except (OSError, ValueError) as e:
+                logger.debug(f"Ignoring UDP registration {path.name}: {e}")
+        return targets
+
+
+async def start_relay(
+    coordination_dir: str, publisher: DatagramCoordinationBackend
+) -> InotifyCoordinationBackend:
+    """
+    Forward state-file changes in `coordination_dir` to datagram subscribers.
+
+    Runs on the validator host: the SDK keeps writing state files, miners
+    listening on unix/udp get every phase change as it is written.
+    """
+    watcher = InotifyCoordinationBackend(coordination_dir)
+    await watcher.start()
+    queue = watcher.subscribe()
+
+    async def _forward():
+        while True:
+            publisher.send(await queue.get())
+
+    watcher.relay_task = asyncio.create_task(_forward())
+    return watcher
+
+
+def _parse_targets(value: str) -> List[Tuple[str, int]]:
+    targets = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        host, _, port = item.rpartition(":")
+        targets.append((host or "127.0.0.1", int(port)))
+    return targets
+
+
+def create_coordination_backend(
+    kind: Optional[str] = None,
+    coordination_dir: str = DEFAULT_COORDINATION_DIR,
+    poll_interval: float = 10.0,
+) -> CoordinationBackend:
+    """
+    Backend chosen by `kind` or COORDINATION_BACKEND (default inotify).
+
+    inotify falls back to polling every `poll_interval` where it is not
+    available. UDP uses COORDINATION_UDP_BIND (host:port) and
+    COORDINATION_UDP_TARGETS (comma-separated host:port).
+    """
+    kind = (kind or os.getenv("COORDINATION_BACKEND", BACKEND_INOTIFY)).lower()
+    if kind == BACKEND_INOTIFY:
+        if InotifyCoordinationBackend.is_available():
+            return InotifyCoordinationBackend(coordination_dir)
+        logger.warning(f"⚠️ inotify not available; polling {coordination_dir} every {poll_interval}s")
+        return PollingCoordinationBackend(coordination_dir, poll_interval)
+    if kind == BACKEND_UNIX:
+        return DatagramCoordinationBackend(coordination_dir, BACKEND_UNIX)
+    if kind == BACKEND_UDP:
+        bind = _parse_targets(os.getenv("COORDINATION_UDP_BIND", f"127.0.0.1:{DEFAULT_UDP_PORT}"))[0]
+        targets = _parse_targets(os.getenv("COORDINATION_UDP_TARGETS", ""))
+        return DatagramCoordinationBackend(coordination_dir, BACKEND_UDP, bind=bind, targets=targets)
+    if kind == BACKEND_POLL:
+        return PollingCoordinationBackend(coordination_dir, poll_interval)
+    raise ValueError(f"Unknown coordination backend '{kind}'. Use one of {BACKENDS}")
+
+
+_libc_handle = None
+
+
+def _libc():
+    """libc with inotify symbols, or None (non-Linux)."""
+    global _libc_handle
+    if _libc_handle is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1, libc.inotify_add_watch  # noqa: B018 (probe symbols)
+            _libc_handle = libc
+        except (OSError, AttributeError):
+            _libc_handle = False
+    return _libc_handle or None
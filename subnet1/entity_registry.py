@@ -0,0 +1,265 @@
+"""
+Indexed registry of subnet entities (miners and validators).
+
+Entity files in `entities/` (name, type, address, api_endpoint, ...) used to
+be read by each script on its own, often with hard-coded file ranges, and
+UID -> address maps were pasted as literals. EntityRegistry loads every
+entity file once and indexes it by name, file stem, hex UID (hex of the
+name, the on-chain UID format, or an explicit "uid" field) and address
+(case-insensitive), so every lookup is one dict access. Chain data can be
+merged in (e.g. from the metagraph indexer store), and the registry can
+reload itself lazily when the directory changes.
+
+Typical use:
+
+    registry = get_entity_registry()
+    address = registry.address_of("7375626e6574315f6d696e65725f303031")
+    miners = registry.miners()
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+TYPE_MINER = "miner"
+TYPE_VALIDATOR = "validator"
+DEFAULT_ENTITIES_DIR = Path(__file__).resolve().parent.parent / "entities"
+DEFAULT_RELOAD_INTERVAL = 2.0
+# Never included in to_dict() / logs
+SECRET_FIELDS = ("private_key",)
+
+
+def uid_hex_for(name: str) -> str:
+    """On-chain hex UID of an entity name (hex of its UTF-8 bytes)."""
+    return name.encode("utf-8").hex()
+
+
+@dataclass
+class Entity:
+    """One miner or validator: identity from its file plus optional chain state."""
+
+    name: str
+    type: str
+    address: str
+    uid_hex: str
+    api_endpoint: Optional[str] = None
+    source: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict, repr=False)
+    chain: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_miner(self) -> bool:
+        return self.type == TYPE_MINER
+
+    @property
+    def is_validator(self) -> bool:
+        return self.type == TYPE_VALIDATOR
+
+    @property
+    def private_key(self) -> Optional[str]:
+        return self.data.get("private_key")
+
+    def to_dict(self) -> Dict[str, Any]:
+        public = {k: v for k, v in self.data.items() if k not in SECRET_FIELDS}
+        return {**public, "name": self.name, "type": self.type, "address": self.address,
+                "uid_hex": self.uid_hex, "chain": dict(self.chain)}
+
+
+def _entity_from_dict(data: Mapping[str, Any], source: Optional[str] = None) -> Optional[Entity]:
+    name, address = data.get("name"), data.get("address")
+    if not name or not address:
+        return None
+    entity_type = str(data.get("type", "")).lower()
+    uid = data.get("uid")
+    return Entity(
+        name=str(name),
+        type=entity_type,
+        address=str(address),
+        uid_hex=str(uid).lower().removeprefix("0x") if isinstance(uid, str) and uid else uid_hex_for(str(name)),
+        api_endpoint=data.get("api_endpoint"),
+        source=source,
+        data=dict(data),
+    )
+
+
+class EntityRegistry:
+    """Entities indexed by name, file stem, hex UID and address."""
+
+    def __init__(
+        self,
+        entities_dir: Union[str, Path, None] = DEFAULT_ENTITIES_DIR,
+        auto_reload: bool = False,
+        reload_interval: float = DEFAULT_RELOAD_INTERVAL,
+    ):
+        """
+        Args:
+            entities_dir: Directory of entity JSON files (None = start empty, add() only).
+            auto_reload: Re-read the directory on lookup when files changed.
+            reload_interval: Minimum seconds between change checks.
+        """
+        self.entities_dir = Path(entities_dir) if entities_dir else None
+        self.auto_reload = auto_reload
+        self.reload_interval = reload_interval
+        self._entities: List[Entity] = []
+        self._index: Dict[str, Entity] = {}
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self.reload()
+
+    # --- Loading ---
+    def _scan(self) -> Tuple:
+        """Cheap change signature: (file name, mtime, size) of every entity file."""
+        if self.entities_dir is None or not self.entities_dir.is_dir():
+            return ()
+        signature = []
+        with os.scandir(self.entities_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(signature))
+
+    def reload(self) -> int:
+        """Re-read every entity file (chain data merged earlier is kept). Returns the entity count."""
+        with self._lock:
+            chain = {e.address.lower(): e.chain for e in self._entities if e.chain}
+            signature = self._scan()
+            entities = []
+            for name, _, _ in signature:
+                path = self.entities_dir / name
+                try:
+                    with open(path, "r") as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ Skipping unreadable entity file {path}: {e}")
+                    continue
+                entity = _entity_from_dict(data, source=path.stem) if isinstance(data, dict) else None
+                if entity is None:
+                    logger.debug(f"Skipping {path}: not an entity file (needs name and address)")
+                    continue
+                entity.chain = chain.get(entity.address.lower(), {})
+                entities.append(entity)
+            # Entities only known from chain data survive a file reload
+            known = {e.address.lower() for e in entities}
+            entities += [e for e in self._entities if e.source is None and e.address.lower() not in known]
+            self._rebuild(entities)
+            self._signature = signature
+            self._checked_at = time.monotonic()
+            return len(entities)
+
+    def _rebuild(self, entities: List[Entity]):
+        index: Dict[str, Entity] = {}
+        for entity in entities:
+            for key in (entity.name, entity.source, entity.uid_hex, entity.address):
+                if key:
+                    index.setdefault(key.lower(), entity)
+        self._entities = entities
+        self._index = index
+
+    def _maybe_reload(self):
+        if not self.auto_reload or time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if self._scan() != self._signature:
+                count = self.reload()
+                logger.info(f"🔄 Entity registry reloaded ({count} entities)")
+
+    # --- Chain data ---
+    def add(self, entity: Entity) -> Entity:
+        with self._lock:
+            self._rebuild([e for e in self._entities if e.address.lower() != entity.address.lower()] + [entity])
+        return entity
+
+    def merge_chain(self, entity_type: str, records: Iterable[Mapping[str, Any]]) -> int:
+        """
+        Attach on-chain info ({"address": ..., ...}) to entities; unknown addresses
+        become chain-only entities. Returns the number of records merged.
+        """
+        merged = 0
+        with self._lock:
+            entities = list(self._entities)
+            by_address = {e.address.lower(): e for e in entities}
+            for record in records:
+                address = str(record.get("address", ""))
+                if not address:
+                    continue
+                entity = by_address.get(address.lower())
+                if entity is None:
+                    name = record.get("name") or address
+                    entity = Entity(name=name, type=entity_type, address=address, uid_hex=str(record.get("uid") or uid_hex_for(name)))
+                    entities.append(entity)
+                    by_address[address.lower()] = entity
+                entity.chain = {k: v for k, v in record.items() if k != "address"}
+                merged += 1
+            self._rebuild(entities)
+        return merged
+
+    # --- Lookups ---
+    def get(self, key: str) -> Optional[Entity]:
+        """Entity by name, file stem, hex UID (with or without 0x) or address."""
+        self._maybe_reload()
+        if not key:
+            return None
+        key = str(key).lower()
+        return self._index.get(key) or (self._index.get(key[2:]) if key.startswith("0x") else None)
+
+    def __getitem__(self, key: str) -> Entity:
+        entity = self.get(key)
+        if entity is None:
+            raise KeyError(key)
+        return entity
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        self._maybe_reload()
+        return len(self._entities)
+
+    def address_of(self, key: str) -> Optional[str]:
+        entity = self.get(key)
+        return entity.address if entity else None
+
+    def all(self, entity_type: Optional[str] = None) -> List[Entity]:
+        self._maybe_reload()
+        return [e for e in self._entities if entity_type is None or e.type == entity_type]
+
+    def miners(self) -> List[Entity]:
+        return self.all(TYPE_MINER)
+
+    def validators(self) -> List[Entity]:
+        return self.all(TYPE_VALIDATOR)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "entities_dir": str(self.entities_dir) if self.entities_dir else None,
+            "miners": len(self.miners()),
+            "validators": len(self.validators()),
+            "with_chain_data": sum(1 for e in self._entities if e.chain),
+            "auto_reload": self.auto_reload,
+        }
+
+
+_registry: Optional[EntityRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_entity_registry() -> EntityRegistry:
+    """The process-wide registry (ENTITIES_DIR overrides the directory; reloads on change)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = EntityRegistry(
+                os.getenv("ENTITIES_DIR") or DEFAULT_ENTITIES_DIR,
+                auto_reload=os.getenv("ENTITIES_AUTO_RELOAD", "true").lower() == "true",
+            )
+        return _registry
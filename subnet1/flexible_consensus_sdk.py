@@ -15,11 +15,44 @@ import time
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
 
+from .adaptive_timing import (
+    PHASE_CONSENSUS_EXCHANGE,
+    PHASE_METAGRAPH_SUBMIT,
+    PHASE_SCORING,
+    PHASE_TASK_ROUND_TRIP,
+    PHASES,
+    AdaptiveTimingController,
+)
+from .coordination import (
+    BACKEND_UDP,
+    BACKEND_UNIX,
+    DEFAULT_COORDINATION_DIR,
+    create_coordination_backend,
+    start_relay,
+)
+from .tracing import (
+    SPAN_CHAIN_SUBMIT,
+    SPAN_CONSENSUS_CYCLE,
+    SPAN_DISPATCH,
+    SPAN_PEER_EXCHANGE,
+    SPAN_SCORING,
+    get_tracer,
+)
+
 # Add path to moderntensor core
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../moderntensor_aptos"))
 
 logger = logging.getLogger(__name__)
 
+# Traced spans used as adaptive-timing phase measurements when the consensus
+# cycle does not report phase durations itself
+TRACED_TIMING_PHASES = {
+    SPAN_DISPATCH: PHASE_TASK_ROUND_TRIP,
+    SPAN_SCORING: PHASE_SCORING,
+    SPAN_PEER_EXCHANGE: PHASE_CONSENSUS_EXCHANGE,
+    SPAN_CHAIN_SUBMIT: PHASE_METAGRAPH_SUBMIT,
+}
+
 @dataclass
 class FlexibleConsensusConfig:
     """Configuration for flexible consensus in Subnet1"""
@@ -165,6 +198,12 @@ class FlexibleValidatorWrapper:
             "auto_extensions_used": 0,
             "last_consensus_time": None
         }
+        # Learns real phase durations and retunes the deadline buffers after each slot
+        self.timing = AdaptiveTimingController()
+        self.tracer = get_tracer()
+        # Forwards slot state files to unix/udp coordination subscribers (miners)
+        self.coordination_relay = None
+        self._relay_checked = False
         
         logger.info(f"🎯 FlexibleValidatorWrapper initialized for {getattr(validator_node, 'uid', 'unknown')}")
     
@@ -189,9 +228,7 @@ class FlexibleValidatorWrapper:
                 slot_config.allow_mid_slot_join = self.config.allow_mid_slot_join
                 slot_config.auto_extend_on_consensus = self.config.auto_extend_on_consensus
                 slot_config.max_auto_extension_seconds = self.config.max_auto_extension_seconds
-                slot_config.task_deadline_buffer = self.config.task_deadline_buffer
-                slot_config.consensus_deadline_buffer = self.config.consensus_deadline_buffer
-                slot_config.metagraph_deadline_buffer = self.config.metagraph_deadline_buffer
+                self._apply_buffers(slot_config)
                 slot_config.adaptive_timing_enabled = self.config.adaptive_timing_enabled
                 slot_config.min_validators_for_consensus = self.config.min_validators_for_consensus
                 slot_config.flexible_epoch_start = self.config.flexible_epoch_start
@@ -238,23 +275,42 @@ class FlexibleValidatorWrapper:
             if not self.enable_flexible_consensus():
                 return False
         
+        if not self._relay_checked:
+            self._relay_checked = True
+            await self.start_coordination_relay()
+        
+        # Phase methods become spans, the live source for adaptive timing (idempotent;
+        # components such as consensus may appear after construction)
+        self.tracer.instrument_phases(self.validator_node, validator=getattr(self.validator_node, 'uid', None))
+        
         try:
             logger.info(f"🚀 Starting flexible consensus cycle for slot {slot or 'auto-detect'}")
             
             # Use flexible consensus cycle if available
             if hasattr(self.validator_node.consensus, 'run_flexible_consensus_cycle'):
-                await self.validator_node.consensus.run_flexible_consensus_cycle(slot)
+                with self.tracer.span(SPAN_CONSENSUS_CYCLE, slot=slot, validator=getattr(self.validator_node, 'uid', None)) as cycle:
+                    await self.validator_node.consensus.run_flexible_consensus_cycle(slot)
+                self.consensus_stats["last_cycle_seconds"] = cycle.duration if cycle else None
                 
                 # Update stats
                 self.consensus_stats["flexible_cycles_run"] += 1
                 self.consensus_stats["last_consensus_time"] = time.time()
                 
                 # Get metrics from consensus
-                if hasattr(self.validator_node.consensus, 'flexible_metrics'):
-                    metrics = self.validator_node.consensus.flexible_metrics
+                metrics = getattr(self.validator_node.consensus, 'flexible_metrics', None) or {}
+                if metrics:
                     self.consensus_stats["mid_slot_joins"] = metrics.get("mid_slot_joins", 0)
                     self.consensus_stats["auto_extensions_used"] = metrics.get("auto_extensions_used", 0)
+                # Phase durations reported by the consensus cycle, else the traced spans
+                phase_durations = metrics.get("phase_durations")
+                if phase_durations:
+                    for phase, seconds in phase_durations.items():
+                        if phase in PHASES:
+                            self.timing.observe(phase, seconds, slot)
+                else:
+                    self._observe_traced_phases(cycle)
                 
+                self.update_timing(slot)
                 logger.info("✅ Flexible consensus cycle completed successfully")
                 return True
             else:
@@ -271,6 +327,83 @@ class FlexibleValidatorWrapper:
             logger.error(f"❌ Error in flexible consensus cycle: {e}")
             return False
     
+    async def start_coordination_relay(self, kind: Optional[str] = None) -> bool:
+        """
+        Push this validator's slot state changes to miners over unix/udp datagrams.
+        
+        Only starts when `kind` (or COORDINATION_BACKEND) is 'unix' or 'udp';
+        with the default inotify backend miners watch the state files directly.
+        
+        Returns:
+            True if a relay is running
+        """
+        kind = (kind or os.getenv("COORDINATION_BACKEND", "")).lower()
+        if kind not in (BACKEND_UNIX, BACKEND_UDP):
+            return False
+        slot_coordinator = getattr(self.validator_node, 'slot_coordinator', None)
+        coordination_dir = str(getattr(slot_coordinator, 'coordination_dir', DEFAULT_COORDINATION_DIR))
+        try:
+            publisher = create_coordination_backend(kind, coordination_dir)
+            publisher.receive = False
+            await publisher.start()
+            self.coordination_relay = await start_relay(coordination_dir, publisher)
+            logger.info(f"📡 Relaying slot coordination from {coordination_dir} over {kind}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Could not start coordination relay: {e}")
+            return False
+    
+    def record_phase(self, phase: str, seconds: float, slot: Optional[int] = None):
+        """
+        Record a measured phase duration (task round-trip, scoring, consensus
+        exchange, metagraph submission) for the adaptive timing controller.
+        """
+        self.timing.observe(phase, seconds, slot)
+    
+    def update_timing(self, slot: Optional[int] = None) -> list:
+        """
+        Close a slot's measurements and retune the deadline buffers.
+        
+        Returns:
+            The TimingDecisions made (one per buffer)
+        """
+        self.timing.end_slot(slot)
+        decisions = self.timing.adjust(self.config, slot)
+        if any(d.new != d.previous for d in decisions) and hasattr(self.validator_node, 'slot_coordinator'):
+            self._apply_buffers(self.validator_node.slot_coordinator.slot_config)
+        return decisions
+    
+    def _observe_traced_phases(self, cycle):
+        """
+        Feed the phase spans recorded inside a consensus cycle span to adaptive timing.
+
+        Only the outermost span of a phase counts: a scoring span nested in another
+        scoring span (score_miner_results -> _score_individual_result) is already
+        part of its parent's duration.
+        """
+        if cycle is None:
+            return
+        slot = cycle.tags.get("slot")
+        inside = [s for s in self.tracer.spans() if s.start >= cycle.start and s.end <= cycle.end + 1e-6]
+        by_id = {s.span_id: s for s in inside}
+        for span in inside:
+            if span.name not in TRACED_TIMING_PHASES:
+                continue
+            parent = by_id.get(span.parent_id)
+            while parent is not None and parent.name != span.name:
+                parent = by_id.get(parent.parent_id)
+            if parent is None:
+                self.timing.observe(TRACED_TIMING_PHASES[span.name], span.duration, slot)
+    
+    def get_trace(self, slot: Optional[int] = None) -> Dict[str, Any]:
+        """Chrome trace / Perfetto JSON of the recorded consensus spans"""
+        return self.tracer.to_chrome_trace(slot)
+    
+    def _apply_buffers(self, slot_config):
+        slot_config.task_deadline_buffer = self.config.task_deadline_buffer
+        slot_config.consensus_deadline_buffer = self.config.consensus_deadline_buffer
+        slot_config.metagraph_deadline_buffer = self.config.metagraph_deadline_buffer
+    
     def get_status(self) -> Dict[str, Any]:
         """Get current wrapper status"""
         base_status = {
@@ -281,7 +414,9 @@ class FlexibleValidatorWrapper:
                 "auto_extend_on_consensus": self.config.auto_extend_on_consensus,
                 "adaptive_timing_enabled": self.config.adaptive_timing_enabled
             },
-            "stats": self.consensus_stats.copy()
+            "stats": self.consensus_stats.copy(),
+            "adaptive_timing": self.timing.get_status(self.config),
+            "trace_summary": self.tracer.summary()
         }
         
         # Add consensus status if available
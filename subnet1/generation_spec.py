@@ -0,0 +1,105 @@
+"""
+Generation spec negotiated between validator and miner.
+
+The validator scores images with CLIP, whose preprocess resizes everything
+to 224px. Without guidance miners render and upload the pipeline's default
+512px PNG. The validator therefore sends an explicit spec with every task
+(`task_data["generation_spec"]`) and the miner honors it when planning
+generation and encoding the result.
+"""
+
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Sequence
+
+from .models.image_encoding import normalize_format
+
+logger = logging.getLogger(__name__)
+
+# Defaults sent by the validator (VALIDATOR_TASK_*): smallest generation size
+# above CLIP's 224px input, compact JPEG output
+DEFAULT_RESOLUTION = 256
+DEFAULT_MAX_STEPS = 20
+DEFAULT_OUTPUT_FORMAT = "JPEG"
+DEFAULT_MAX_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class GenerationSpec:
+    """What the validator wants generated. None fields leave the miner's own choice."""
+
+    # Longest edge of the image the validator needs (generation and output)
+    resolution: Optional[int] = None
+    # Upper bound on diffusion steps
+    max_steps: Optional[int] = None
+    # PNG, JPEG or WEBP
+    output_format: Optional[str] = None
+    # Upper bound on the encoded image size
+    max_bytes: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["GenerationSpec"]:
+        """
+        Parse a spec from task data; invalid fields are dropped, not fatal.
+
+        Returns:
+            GenerationSpec, or None if `data` is empty or not a dict.
+        """
+        if not data or not isinstance(data, dict):
+            return None
+        fields = {}
+        for key in ("resolution", "max_steps", "max_bytes"):
+            value = data.get(key)
+            if value is None:
+                continue
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring invalid generation_spec.{key}: {value!r}")
+                continue
+            if value > 0:
+                fields[key] = value
+        if data.get("output_format"):
+            try:
+                fields["output_format"] = normalize_format(data["output_format"])
+            except ValueError:
+                logger.warning(f"Ignoring invalid generation_spec.output_format: {data['output_format']!r}")
+        return cls(**fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def allowed_resolutions(self, candidates: Sequence[int]) -> Sequence[int]:
+        """
+        Generation sizes that do not exceed `resolution`.
+
+        If every candidate is larger (e.g. resolution=224), the smallest one is
+        kept and the output is downscaled to `resolution` when encoding.
+        """
+        if not self.resolution:
+            return candidates
+        allowed = [size for size in candidates if size <= self.resolution]
+        return allowed or [min(candidates)]
+
+    def cap_steps(self, steps: int) -> int:
+        return min(steps, self.max_steps) if self.max_steps else steps
+
+    def output_overrides(self) -> Dict[str, Any]:
+        """Keys for OutputSpec.merged_with()."""
+        return {"format": self.output_format, "max_edge": self.resolution, "max_bytes": self.max_bytes}
+
+
+def validator_generation_spec_from_env() -> GenerationSpec:
+    """Spec the validator sends (VALIDATOR_TASK_RESOLUTION / _MAX_STEPS / _OUTPUT_FORMAT / _MAX_BYTES; 0 = unset)."""
+
+    def _int_env(name: str, default: int) -> Optional[int]:
+        value = int(os.getenv(name, str(default)))
+        return value if value > 0 else None
+
+    return GenerationSpec(
+        resolution=_int_env("VALIDATOR_TASK_RESOLUTION", DEFAULT_RESOLUTION),
+        max_steps=_int_env("VALIDATOR_TASK_MAX_STEPS", DEFAULT_MAX_STEPS),
+        output_format=os.getenv("VALIDATOR_TASK_OUTPUT_FORMAT", DEFAULT_OUTPUT_FORMAT).upper() or None,
+        max_bytes=_int_env("VALIDATOR_TASK_MAX_BYTES", DEFAULT_MAX_BYTES),
+    )
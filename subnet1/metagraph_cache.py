@@ -0,0 +1,266 @@
+"""
+Block-keyed metagraph cache backed by an append-only snapshot log.
+
+Entity info (miners, validators, network stats) is cached together with the
+block it was read at. A refresh first asks the chain for the current block
+number. If the block has not moved, or nothing relevant changed, the cached
+entities are served without further RPC. Invalidation is per block by
+default. In event-driven mode (mark_dirty fed from contract events) only the
+touched entities are re-read.
+
+On disk the cache is a full JSON snapshot plus a JSON-lines delta log next
+to it (`<snapshot>.log`). Every refresh that changes something appends one
+line {"block": n, "changes": {key: value-or-null}}. Every `compact_every`
+deltas the state is rewritten atomically (temp file + os.replace) and the
+log is truncated. Loading replays the log over the snapshot, so a validator
+starts from local data in microseconds; a torn last line is cut off.
+
+Typical use:
+
+    cache = MetagraphCache("config/core_metagraph_data.json")
+    await cache.refresh(get_block_number, read_entities)   # cheap when the block is unchanged
+    info = cache.get("miners", address)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple, Union
+
+from .response_cache import encode_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPACT_EVERY = 100
+LOG_SUFFIX = ".log"
+
+# (section, key) e.g. ("miners", "0xabc..."); sections hold {key: info}
+EntityKey = Tuple[str, str]
+ReadEntities = Callable[[Optional[Set[EntityKey]], int], Awaitable[Dict[str, Dict[str, Any]]]]
+
+
+def _normalize(value: Any) -> Any:
+    """JSON round-trip, so cached values compare equal to the ones replayed from disk."""
+    return json.loads(encode_json(value))
+
+
+def write_json_atomic(path: Path, payload: Any) -> None:
+    """Write JSON so readers never see a half-written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode_json(payload))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SnapshotLog:
+    """Full snapshot file + append-only delta log with periodic compaction."""
+
+    def __init__(self, path: Union[str, Path], compact_every: int = DEFAULT_COMPACT_EVERY):
+        self.path = Path(path)
+        self.log_path = self.path.with_name(self.path.name + LOG_SUFFIX)
+        self.compact_every = compact_every
+        self.pending_deltas = 0
+
+    def load(self) -> Tuple[Optional[int], Dict[str, Dict[str, Any]]]:
+        """(block, sections) from the snapshot with the delta log replayed over it."""
+        block, sections = None, {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_bytes())
+                block = data.get("block")
+                sections = data.get("sections", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable metagraph snapshot {self.path}: {e}")
+        self.pending_deltas = 0
+        if self.log_path.exists():
+            good_offset, torn = 0, False
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        delta = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        break
+                    _apply(sections, delta.get("changes", {}))
+                    block = delta.get("block", block)
+                    self.pending_deltas += 1
+                    good_offset += len(line)
+                    complete = line.endswith(b"\n")
+            if torn:
+                # Torn final write; cut it off so the next append starts on a clean line
+                logger.warning(f"⚠️ Dropping truncated delta at byte {good_offset} of {self.log_path}")
+                os.truncate(self.log_path, good_offset)
+            if good_offset and not complete:
+                with open(self.log_path, "ab") as f:
+                    f.write(b"\n")
+        return block, sections
+
+    def append(self, block: int, changes: Dict[str, Dict[str, Any]]) -> None:
+        """Append one delta ({section: {key: value or None}}) and fsync it."""
+        line = encode_json({"block": block, "changes": changes, "time": time.time()}) + b"\n"
+        with open(self.log_path, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending_deltas += 1
+
+    def compact(self, block: Optional[int], sections: Dict[str, Dict[str, Any]]) -> None:
+        """Rewrite the snapshot with the full state and drop the replayed log."""
+        write_json_atomic(self.path, {"block": block, "sections": sections, "time": time.time()})
+        # Snapshot now contains every delta; an interrupted unlink only means a harmless replay
+        self.log_path.unlink(missing_ok=True)
+        self.pending_deltas = 0
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.pending_deltas >= self.compact_every
+
+
+def _apply(sections: Dict[str, Dict[str, Any]], changes: Dict[str, Dict[str, Any]]) -> None:
+    for section, entries in changes.items():
+        target = sections.setdefault(section, {})
+        for key, value in entries.items():
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+
+
+class MetagraphCache:
+    """Metagraph entities cached per block, persisted through a SnapshotLog."""
+
+    def __init__(
+        self,
+        snapshot_path: Optional[Union[str, Path]] = None,
+        compact_every: int = DEFAULT_COMPACT_EVERY,
+        event_driven: bool = False,
+    ):
+        """
+        Args:
+            snapshot_path: Snapshot file (delta log lives next to it); None = memory only.
+            compact_every: Deltas appended before the snapshot is rewritten.
+            event_driven: Keep entities across blocks and re-read only keys passed
+                to mark_dirty (requires a contract event feed).
+        """
+        self.log = SnapshotLog(snapshot_path, compact_every) if snapshot_path else None
+        self.event_driven = event_driven
+        self.block: Optional[int] = None
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        self._dirty: Set[EntityKey] = set()
+        self._lock = threading.Lock()
+        self.stats = {"refreshes": 0, "cache_hits": 0, "full_reads": 0, "partial_reads": 0, "deltas": 0}
+        if self.log is not None:
+            self.block, self.sections = self.log.load()
+            if self.block is not None:
+                logger.info(f"📦 Loaded metagraph snapshot at block {self.block} from {self.log.path}")
+
+    # --- Local reads ---
+    def get(self, section: str, key: str, default: Any = None) -> Any:
+        return self.sections.get(section, {}).get(key, default)
+
+    def section(self, section: str) -> Dict[str, Any]:
+        return dict(self.sections.get(section, {}))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"block": self.block, "sections": {name: dict(entries) for name, entries in self.sections.items()}}
+
+    # --- Invalidation ---
+    def mark_dirty(self, keys: Iterable[EntityKey]) -> None:
+        """Entities touched by contract events; re-read on the next refresh."""
+        with self._lock:
+            self._dirty.update(keys)
+
+    def invalidate(self) -> None:
+        """Force a full re-read on the next refresh."""
+        with self._lock:
+            self.block = None
+
+    def is_fresh(self, block: int) -> bool:
+        return self.block is not None and (self.block == block or self.event_driven) and not self._dirty
+
+    # --- Refresh ---
+    async def refresh(self, get_block_number: Callable[[], Awaitable[int]], read: ReadEntities) -> bool:
+        """
+        Bring the cache up to the current block.
+
+        Args:
+            get_block_number: Returns the chain head block number.
+            read: read(keys, block) -> {section: {key: info}}; keys None = read everything,
+                otherwise only those (section, key) entities. Missing keys count as removed.
+
+        Returns:
+            True if anything changed.
+        """
+        self.stats["refreshes"] += 1
+        block = await get_block_number()
+        if self.is_fresh(block):
+            self.stats["cache_hits"] += 1
+            if self.event_driven and block != self.block:
+                self.block = block
+            return False
+
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        partial = self.event_driven and self.block is not None
+        try:
+            fresh = _normalize(await read(dirty if partial else None, block))
+        except Exception:
+            with self._lock:
+                self._dirty |= dirty
+            raise
+
+        if partial:
+            self.stats["partial_reads"] += 1
+            changes = {}
+            for section, key in dirty:
+                value = fresh.get(section, {}).get(key)
+                if self.get(section, key) != value:
+                    changes.setdefault(section, {})[key] = value
+        else:
+            self.stats["full_reads"] += 1
+            changes = _diff(self.sections, fresh)
+        return self._commit(block, changes)
+
+    def _commit(self, block: int, changes: Dict[str, Dict[str, Any]]) -> bool:
+        self.block = block
+        if not changes:
+            return False
+        _apply(self.sections, changes)
+        self.stats["deltas"] += 1
+        if self.log is not None:
+            self.log.append(block, changes)
+            if self.log.needs_compaction:
+                self.log.compact(self.block, self.sections)
+        return True
+
+    def compact(self) -> None:
+        if self.log is not None:
+            self.log.compact(self.block, self.sections)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "block": self.block,
+            "entities": {name: len(entries) for name, entries in self.sections.items()},
+            "event_driven": self.event_driven,
+            "dirty": len(self._dirty),
+            "pending_deltas": self.log.pending_deltas if self.log else 0,
+            **self.stats,
+        }
+
+
+def _diff(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """{section: {key: new value or None if removed}} for entries that differ."""
+    changes: Dict[str, Dict[str, Any]] = {}
+    for section in set(old) | set(new):
+        before, after = old.get(section, {}), new.get(section, {})
+        entries = {key: after.get(key) for key in set(before) | set(after) if before.get(key) != after.get(key)}
+        if entries:
+            changes[section] = entries
+    return changes
@@ -0,0 +1,288 @@
+"""
+Event-log-driven metagraph indexer with a local sqlite store.
+
+Instead of listing every miner/validator and calling get_*_info once per
+entity on every run, the indexer follows the metagraph contract's logs
+with eth_getLogs, from the last synced block onward, in bounded block
+ranges. Every address that appears as an indexed topic of a log is an
+entity whose on-chain state may have changed. Those entities are re-read
+in one batched call at the range's last block and upserted into sqlite
+(indexed by address and UID). The range's block is written as the
+checkpoint in the same transaction, so an interrupted sync resumes exactly
+where it stopped.
+
+Queries (by address, by UID, all miners/validators) are then local reads.
+The indexer is ABI-agnostic: it needs no event signatures, only a
+`fetch_info(keys, block)` callable that reads the touched entities (e.g.
+CoreMetagraph.fetch_entity_info).
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from .chain_reader import BatchedChainReader, ChainReadError
+from .response_cache import encode_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BLOCK_RANGE = 2000
+DEFAULT_POLL_INTERVAL = 15.0
+# Successful ranges in a row before the range is doubled again
+GROW_AFTER_RANGES = 4
+
+# eth_getLogs refusals (lowercase message fragments) that mean "ask for less".
+# A block-range cap is a fixed node setting; a result-size cap depends on how
+# many logs the range holds, so only the latter lets the range grow back past it.
+_BLOCK_RANGE_ERRORS = ("block range", "range too large", "range is too large", "blocks range")
+_RESULT_SIZE_ERRORS = ("too many", "more than", "response size", "response too large", "result set", "limit exceeded")
+RANGE_ERROR_BLOCKS = "block_range"
+RANGE_ERROR_RESULTS = "result_size"
+ENTITY_KINDS = ("miners", "validators")
+CHECKPOINT_KEY = "last_synced_block"
+
+# (kind, address) -> info dict, or None if the address is no longer that kind of entity
+EntityKey = Tuple[str, str]
+FetchInfo = Callable[[Set[str], int], Awaitable[Dict[EntityKey, Optional[Dict[str, Any]]]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    kind TEXT NOT NULL,
+    address TEXT NOT NULL,
+    uid TEXT,
+    info TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, address)
+);
+CREATE INDEX IF NOT EXISTS entities_by_address ON entities (address);
+CREATE INDEX IF NOT EXISTS entities_by_uid ON entities (uid);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    key TEXT PRIMARY KEY,
+    block INTEGER NOT NULL
+);
+"""
+
+
+def classify_range_error(error: ChainReadError) -> Optional[str]:
+    """
+    RANGE_ERROR_BLOCKS / RANGE_ERROR_RESULTS if the node refused eth_getLogs because
+    the range or its result set is too large; None for anything else (transport
+    errors, other RPC errors), which should propagate.
+    """
+    rpc_error = getattr(error, "rpc_error", None)
+    if not rpc_error:
+        return None
+    message = str(rpc_error.get("message", "")).lower()
+    if any(fragment in message for fragment in _BLOCK_RANGE_ERRORS):
+        return RANGE_ERROR_BLOCKS
+    if any(fragment in message for fragment in _RESULT_SIZE_ERRORS):
+        return RANGE_ERROR_RESULTS
+    return None
+
+
+def topic_addresses(topics: Sequence[str]) -> Set[str]:
+    """Addresses carried in indexed topics (32-byte words whose top 12 bytes are zero)."""
+    addresses = set()
+    for topic in topics[1:]:
+        word = topic[2:] if topic.startswith("0x") else topic
+        if len(word) == 64 and word[:24] == "0" * 24 and word[24:] != "0" * 40:
+            addresses.add("0x" + word[24:].lower())
+    return addresses
+
+
+class MetagraphStore:
+    """sqlite store of indexed entities plus the sync checkpoint."""
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def checkpoint(self) -> Optional[int]:
+        row = self.conn.execute("SELECT block FROM checkpoints WHERE key = ?", (CHECKPOINT_KEY,)).fetchone()
+        return row["block"] if row else None
+
+    def apply(self, block: int, changes: Dict[EntityKey, Optional[Dict[str, Any]]]) -> None:
+        """Upsert/remove entities and advance the checkpoint to `block` atomically."""
+        now = time.time()
+        upserts, removals = [], []
+        for (kind, address), info in changes.items():
+            address = address.lower()
+            if info is None:
+                removals.append((kind, address))
+            else:
+                uid = info.get("uid")
+                upserts.append((kind, address, str(uid) if uid is not None else None, encode_json(info).decode(), block, now))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO entities (kind, address, uid, info, block, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (kind, address) DO UPDATE SET uid = excluded.uid, info = excluded.info, "
+                "block = excluded.block, updated_at = excluded.updated_at",
+                upserts,
+            )
+            self.conn.executemany("DELETE FROM entities WHERE kind = ? AND address = ?", removals)
+            self.conn.execute(
+                "INSERT INTO checkpoints (key, block) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET block = excluded.block",
+                (CHECKPOINT_KEY, block),
+            )
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        return {**json.loads(row["info"]), "kind": row["kind"], "address": row["address"], "indexed_block": row["block"]}
+
+    def get(self, address: str, kind: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        query, params = "SELECT * FROM entities WHERE address = ?", [address.lower()]
+        if kind:
+            query, params = query + " AND kind = ?", params + [kind]
+        row = self.conn.execute(query, params).fetchone()
+        return self._row(row) if row else None
+
+    def get_by_uid(self, uid: Union[str, int], kind: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        query, params = "SELECT * FROM entities WHERE uid = ?", [str(uid)]
+        if kind:
+            query, params = query + " AND kind = ?", params + [kind]
+        row = self.conn.execute(query, params).fetchone()
+        return self._row(row) if row else None
+
+    def entities(self, kind: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("SELECT * FROM entities WHERE kind = ? ORDER BY address", (kind,))
+        return [self._row(row) for row in rows]
+
+    def addresses(self, kind: str) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT address FROM entities WHERE kind = ? ORDER BY address", (kind,))]
+
+    def close(self):
+        self.conn.close()
+
+
+class MetagraphIndexer:
+    """Follows contract logs into a MetagraphStore."""
+
+    def __init__(
+        self,
+        reader: BatchedChainReader,
+        store: MetagraphStore,
+        contract_address: str,
+        fetch_info: FetchInfo,
+        start_block: int = 0,
+        max_block_range: int = DEFAULT_MAX_BLOCK_RANGE,
+        confirmations: int = 0,
+        topics: Optional[List[Any]] = None,
+        on_change: Optional[Callable[[Iterable[EntityKey]], None]] = None,
+    ):
+        """
+        Args:
+            reader: Chain reader (eth_blockNumber / eth_getLogs / eth_call).
+            store: Where entities and the checkpoint live.
+            contract_address: Metagraph contract whose logs are followed.
+            fetch_info: fetch_info(addresses, block) -> {(kind, address): info or None}.
+            start_block: First block to index when there is no checkpoint (contract deployment).
+            max_block_range: Largest eth_getLogs range. Halved when the node refuses a range
+                as too large (a block-range cap also becomes the new ceiling) and doubled
+                again after GROW_AFTER_RANGES successful ranges in a row.
+            confirmations: Stay this many blocks behind the head (reorg safety).
+            topics: Optional eth_getLogs topic filter (default: every log of the contract).
+            on_change: Called with the changed (kind, address) keys after each range,
+                e.g. MetagraphCache.mark_dirty.
+        """
+        self.reader = reader
+        self.store = store
+        self.contract_address = contract_address
+        self.fetch_info = fetch_info
+        self.start_block = start_block
+        self.max_block_range = max(1, max_block_range)
+        self.block_range = self.max_block_range
+        # Highest range the node's block-range cap is known to allow
+        self.range_ceiling = self.max_block_range
+        self._successful_ranges = 0
+        self.confirmations = confirmations
+        self.topics = topics
+        self.on_change = on_change
+        self.stats = {"ranges": 0, "logs": 0, "entity_updates": 0, "range_reductions": 0, "range_increases": 0}
+        self._running = False
+
+    async def sync_once(self) -> int:
+        """
+        Index from the checkpoint up to the (confirmed) head.
+
+        Returns:
+            Number of logs processed.
+        """
+        head = await self.reader.block_number() - self.confirmations
+        checkpoint = self.store.checkpoint()
+        from_block = self.start_block if checkpoint is None else checkpoint + 1
+        processed = 0
+        while from_block <= head:
+            to_block = min(from_block + self.block_range - 1, head)
+            try:
+                logs = await self.reader.get_logs(self.contract_address, from_block, to_block, self.topics)
+            except ChainReadError as e:
+                kind = classify_range_error(e)
+                if kind is None or to_block == from_block:
+                    raise
+                # Retry the same start with half the range
+                self.block_range = max(1, (to_block - from_block + 1) // 2)
+                if kind == RANGE_ERROR_BLOCKS:
+                    self.range_ceiling = min(self.range_ceiling, self.block_range)
+                self._successful_ranges = 0
+                self.stats["range_reductions"] += 1
+                logger.debug(f"eth_getLogs {from_block}-{to_block} refused ({e}); range now {self.block_range}")
+                continue
+            addresses = set()
+            for log in logs:
+                if not log.get("removed"):
+                    addresses |= topic_addresses(log.get("topics", []))
+            changes = await self.fetch_info(addresses, to_block) if addresses else {}
+            self.store.apply(to_block, changes)
+            if changes and self.on_change is not None:
+                self.on_change(changes.keys())
+
+            self.stats["ranges"] += 1
+            self.stats["logs"] += len(logs)
+            self.stats["entity_updates"] += len(changes)
+            processed += len(logs)
+            from_block = to_block + 1
+            self._grow_range()
+        return processed
+
+    def _grow_range(self):
+        self._successful_ranges += 1
+        limit = min(self.max_block_range, self.range_ceiling)
+        if self._successful_ranges >= GROW_AFTER_RANGES and self.block_range < limit:
+            self.block_range = min(self.block_range * 2, limit)
+            self._successful_ranges = 0
+            self.stats["range_increases"] += 1
+
+    async def run(self, interval: float = DEFAULT_POLL_INTERVAL):
+        """Sync forever (until stop()), every `interval` seconds."""
+        self._running = True
+        while self._running:
+            try:
+                count = await self.sync_once()
+                if count:
+                    logger.info(f"📇 Indexed {count} metagraph logs up to block {self.store.checkpoint()}")
+            except ChainReadError as e:
+                logger.warning(f"⚠️ Metagraph index sync failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stop(self):
+        self._running = False
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "checkpoint": self.store.checkpoint(),
+            **{kind: len(self.store.addresses(kind)) for kind in ENTITY_KINDS},
+            "block_range": self.block_range,
+            "range_ceiling": self.range_ceiling,
+            **self.stats,
+        }
@@ -0,0 +1,245 @@
+"""
+Lightweight in-process metrics for the Subnet1 miner.
+
+Keeps per-phase latency histograms, per-validator outcome counters and a
+rolling throughput gauge, and renders them either as a plain dict (for
+logs / `get_performance_metrics`) or in the Prometheus text format served
+at `/metrics`. Pure Python and thread-safe; no client library required.
+"""
+
+import bisect
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Phases a task goes through on the miner, in order
+PHASE_QUEUE_WAIT = "queue_wait"
+PHASE_GENERATION = "generation"
+PHASE_ENCODE = "encode"
+PHASE_SUBMIT = "submit"
+# Local CLIP scoring of best-of-N candidates
+PHASE_SELF_CHECK = "self_check"
+PHASES = (PHASE_QUEUE_WAIT, PHASE_GENERATION, PHASE_SELF_CHECK, PHASE_ENCODE, PHASE_SUBMIT)
+
+# Task outcomes counted per validator
+OUTCOME_SUCCESS = "success"
+OUTCOME_DEADLINE_MISS = "deadline_miss"
+OUTCOME_FAILURE = "failure"
+# Refused at admission (never started), see subnet1/admission.py
+OUTCOME_REJECTED = "rejected"
+OUTCOMES = (OUTCOME_SUCCESS, OUTCOME_DEADLINE_MISS, OUTCOME_FAILURE, OUTCOME_REJECTED)
+
+# Seconds; spans fast encodes (ms) up to slow CPU generations (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Histogram:
+    """Cumulative bucket histogram plus a bounded window of recent samples for quantiles."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS, window: int = 512):
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        value = max(0.0, float(value))
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+            self._recent.append(value)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantile (0..1) over the recent window, or None without samples."""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(q * (len(samples) - 1)))))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._count, self._sum
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+    def cumulative_buckets(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs, ending with +Inf, as Prometheus expects."""
+        with self._lock:
+            counts = list(self._counts)
+        result, running = [], 0
+        for bound, bucket_count in zip(list(self.buckets) + [float("inf")], counts):
+            running += bucket_count
+            result.append(("+Inf" if bound == float("inf") else f"{bound:g}", running))
+        return result
+
+
+class RollingRate:
+    """Events per minute over a sliding time window."""
+
+    def __init__(self, window_seconds: float = 300.0):
+        self.window_seconds = window_seconds
+        self._events: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def mark(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._events.append(now)
+            self._trim(now)
+
+    def per_minute(self, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._trim(now)
+            return len(self._events) * 60.0 / self.window_seconds
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._events and self._events[0] < cutoff:
+            self._events.popleft()
+
+
+class MinerMetrics:
+    """All telemetry a miner collects while handling tasks."""
+
+    def __init__(self, throughput_window_seconds: float = 300.0):
+        self.phases: Dict[str, Histogram] = {phase: Histogram() for phase in PHASES}
+        self.end_to_end = Histogram()
+        self.throughput = RollingRate(throughput_window_seconds)
+        self._outcomes: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(OUTCOMES, 0))
+        self._tasks_received = 0
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def task_received(self):
+        with self._lock:
+            self._tasks_received += 1
+
+    def observe_phase(self, phase: str, seconds: float):
+        if phase not in self.phases:
+            raise ValueError(f"Unknown phase '{phase}'. Use one of {PHASES}")
+        self.phases[phase].observe(seconds)
+
+    def record_outcome(self, validator: Optional[str], outcome: str, total_seconds: Optional[float] = None):
+        """
+        Count one finished task.
+
+        Args:
+            validator: Validator endpoint the task came from.
+            outcome: One of OUTCOMES.
+            total_seconds: End-to-end time from receipt to submission, if known.
+        """
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown outcome '{outcome}'. Use one of {OUTCOMES}")
+        with self._lock:
+            self._outcomes[validator or "unknown"][outcome] += 1
+        if total_seconds is not None:
+            self.end_to_end.observe(total_seconds)
+        if outcome == OUTCOME_SUCCESS:
+            self.throughput.mark()
+
+    def outcome_totals(self) -> Dict[str, int]:
+        with self._lock:
+            totals = dict.fromkeys(OUTCOMES, 0)
+            for counters in self._outcomes.values():
+                for outcome, value in counters.items():
+                    totals[outcome] += value
+        return totals
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain-dict view of every metric."""
+        with self._lock:
+            per_validator = {validator: dict(counters) for validator, counters in self._outcomes.items()}
+            tasks_received = self._tasks_received
+        totals = self.outcome_totals()
+        return {
+            "uptime_seconds": time.time() - self.started_at,
+            "tasks_received": tasks_received,
+            "tasks_completed": totals[OUTCOME_SUCCESS],
+            "outcomes": totals,
+            "per_validator": per_validator,
+            "throughput_per_minute": self.throughput.per_minute(),
+            "phases": {phase: histogram.snapshot() for phase, histogram in self.phases.items()},
+            "end_to_end": self.end_to_end.snapshot(),
+        }
+
+    def render_prometheus(self, prefix: str = "subnet1_miner") -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_phase_seconds Time spent per task phase.",
+            f"# TYPE {prefix}_phase_seconds histogram",
+        ]
+        for phase, histogram in self.phases.items():
+            lines.extend(_histogram_lines(f"{prefix}_phase_seconds", histogram, f'phase="{phase}"'))
+
+        lines += [
+            f"# HELP {prefix}_task_seconds End-to-end time from task receipt to result submission.",
+            f"# TYPE {prefix}_task_seconds histogram",
+        ]
+        lines.extend(_histogram_lines(f"{prefix}_task_seconds", self.end_to_end, ""))
+
+        lines += [
+            f"# HELP {prefix}_tasks_total Finished tasks by validator and outcome.",
+            f"# TYPE {prefix}_tasks_total counter",
+        ]
+        with self._lock:
+            per_validator = {validator: dict(counters) for validator, counters in self._outcomes.items()}
+            tasks_received = self._tasks_received
+        for validator, counters in sorted(per_validator.items()):
+            for outcome, value in counters.items():
+                lines.append(
+                    f'{prefix}_tasks_total{{validator="{_escape(validator)}",outcome="{outcome}"}} {value}'
+                )
+
+        lines += [
+            f"# HELP {prefix}_tasks_received_total Tasks received.",
+            f"# TYPE {prefix}_tasks_received_total counter",
+            f"{prefix}_tasks_received_total {tasks_received}",
+            f"# HELP {prefix}_throughput_per_minute Successful tasks per minute over the rolling window.",
+            f"# TYPE {prefix}_throughput_per_minute gauge",
+            f"{prefix}_throughput_per_minute {self.throughput.per_minute():g}",
+            f"# HELP {prefix}_peak_rss_megabytes Peak resident memory of the miner process.",
+            f"# TYPE {prefix}_peak_rss_megabytes gauge",
+            f"{prefix}_peak_rss_megabytes {peak_rss_mb():g}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name: str, histogram: Histogram, labels: str) -> List[str]:
+    sep = "," if labels else ""
+    lines = [
+        f'{name}_bucket{{{labels}{sep}le="{le}"}} {count}' for le, count in histogram.cumulative_buckets()
+    ]
+    snapshot = histogram.snapshot()
+    label_block = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{label_block} {snapshot['sum']:g}")
+    lines.append(f"{name}_count{label_block} {snapshot['count']}")
+    return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
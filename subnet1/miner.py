@@ -12,14 +12,14 @@ import traceback
 import requests
 import binascii  # Thêm import nếu chưa có (dù không dùng trực tiếp ở đây)
 from typing import Optional
-import base64
-from io import BytesIO
 import os
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 from PIL import Image
 import httpx
 import random
+import threading
+from concurrent.futures import Future
 
 # Import từ SDK Moderntensor
 try:
@@ -40,14 +40,24 @@ except ImportError:
         priority: Optional[int] = None
         validator_endpoint: Optional[str] = None
 
+        def __init__(self, **kwargs):
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+
     class ResultModel:
-        pass
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+        def dict(self):
+            return dict(self.__dict__)
 
     class BaseMiner:
         def __init__(self, *args, **kwargs):
             self.validator_url = kwargs.get(
                 "validator_url"
             )  # URL validator mặc định (fallback)
+            self.host = kwargs.get("host", "0.0.0.0")
+            self.port = kwargs.get("port", 8000)
 
         def process_task(self, task: TaskModel) -> dict:
             return {}
@@ -62,7 +72,13 @@ except ImportError:
 # Import từ các module khác trong subnet này
 try:
     # Các hàm để sinh ảnh và chuyển đổi sang base64
-    from .models.image_generator import generate_image_from_prompt, image_to_base64
+    from .models.image_generator import (
+        generate_image_from_prompt,
+        generate_images_from_prompt,
+        image_to_base64,
+        load_pipeline,
+        unload_pipeline,
+    )
 except ImportError:
     logging.error(
         "Could not import image generation functions from .models.image_generator."
@@ -72,9 +88,56 @@ except ImportError:
     def generate_image_from_prompt(*args, **kwargs):
         return None
 
+    def generate_images_from_prompt(*args, **kwargs):
+        return None
+
     def image_to_base64(*args, **kwargs):
         return None
 
+    def load_pipeline(*args, **kwargs):
+        return None
+
+    def unload_pipeline(*args, **kwargs):
+        return None
+
+try:
+    # Chấm điểm CLIP cục bộ cho chế độ best-of-N (cùng công thức với validator)
+    from .scoring.clip_scorer import calculate_clip_scores
+except ImportError:
+    logging.warning(
+        "Could not import calculate_clip_scores from .scoring.clip_scorer. Best-of-N self-check is disabled."
+    )
+
+    def calculate_clip_scores(*args, **kwargs):
+        return []
+
+
+from .models.latency_model import DEFAULT_RESOLUTIONS, GenerationLatencyModel, GenerationPlan
+from .models.generation_profiles import get_generation_profile
+from .models.image_encoding import OutputSpec, encode_image_base64, output_spec_from_env
+from .generation_spec import GenerationSpec
+from .models.generation_pool import GenerationPool, pool_workers_from_env
+from .models.model_manager import get_model_manager
+from .task_context import TaskContext
+from .metrics import (
+    MinerMetrics,
+    OUTCOME_DEADLINE_MISS,
+    OUTCOME_FAILURE,
+    OUTCOME_REJECTED,
+    OUTCOME_SUCCESS,
+    PHASE_ENCODE,
+    PHASE_GENERATION,
+    PHASE_QUEUE_WAIT,
+    PHASE_SELF_CHECK,
+    PHASE_SUBMIT,
+    peak_rss_mb,
+)
+from .admission import (
+    AdmissionController,
+    AdmissionDecision,
+    REJECT_DEADLINE_INFEASIBLE,
+    REJECT_MODEL_NOT_READY,
+)
 
 # Lấy logger
 logger = logging.getLogger(__name__)
@@ -84,6 +147,37 @@ logger = logging.getLogger(__name__)
 DEFAULT_MODEL_ID = "segmind/tiny-sd"
 # Có thể đọc từ env var nếu muốn linh hoạt hơn
 MODEL_ID = os.getenv("IMAGEGEN_MODEL_ID", DEFAULT_MODEL_ID)
+# Số bước inference tối đa (mặc định lấy theo generation profile)
+MAX_INFERENCE_STEPS = os.getenv("IMAGEGEN_MAX_STEPS")
+# Thời gian dành cho encode + gửi kết quả về validator (giây)
+SUBMIT_BUDGET_SECONDS = float(os.getenv("MINER_SUBMIT_BUDGET_SECONDS", "3.0"))
+# File lưu latency model giữa các lần chạy (tùy chọn)
+LATENCY_MODEL_PATH = os.getenv("MINER_LATENCY_MODEL_PATH")
+# Thời gian tối đa chờ kết quả từ generation pool cho task không có deadline (giây)
+POOL_RESULT_TIMEOUT_SECONDS = float(os.getenv("MINER_POOL_RESULT_TIMEOUT_SECONDS", "300"))
+# Số lần sinh ảnh khởi động (warm-up) sau khi tải model
+WARMUP_GENERATIONS = int(os.getenv("MINER_WARMUP_GENERATIONS", "1"))
+WARMUP_STEPS = int(os.getenv("MINER_WARMUP_STEPS", "2"))
+# Thời gian tối đa chờ model sẵn sàng cho task không có deadline (giây)
+MODEL_READY_WAIT_SECONDS = float(os.getenv("MINER_MODEL_READY_WAIT_SECONDS", "60"))
+# Cửa sổ tính throughput (giây) cho /metrics
+THROUGHPUT_WINDOW_SECONDS = float(os.getenv("MINER_THROUGHPUT_WINDOW_SECONDS", "300"))
+# Lỗi cho biết task bị bỏ vì không kịp deadline (đếm là deadline_miss, không phải failure)
+DEADLINE_INFEASIBLE_ERROR = "Deadline infeasible for this miner"
+# Số task tối đa đang xử lý/chờ cùng lúc (0 = không giới hạn, chỉ xét deadline)
+MAX_QUEUE_DEPTH = int(os.getenv("MINER_MAX_QUEUE_DEPTH", "8"))
+# Số task đã hoàn thành tối thiểu trước khi dùng p95 đo được cho admission
+ADMISSION_MIN_SAMPLES = int(os.getenv("MINER_ADMISSION_MIN_SAMPLES", "5"))
+# Best-of-N: số ảnh ứng viên tối đa mỗi task, chấm CLIP cục bộ rồi gửi ảnh tốt nhất (1 = tắt)
+BEST_OF_N = int(os.getenv("MINER_BEST_OF_N", "1"))
+# Thời gian dự kiến cho bước tự chấm điểm trước khi có số đo thực tế (giây)
+SELF_CHECK_BUDGET_SECONDS = float(os.getenv("MINER_SELF_CHECK_BUDGET_SECONDS", "1.0"))
+
+# Trạng thái sẵn sàng của model
+MODEL_STATE_LOADING = "loading"
+MODEL_STATE_WARMING_UP = "warming_up"
+MODEL_STATE_READY = "ready"
+MODEL_STATE_FAILED = "failed"
 
 
 # --- 1. Task Processing Logic ---
@@ -117,6 +211,11 @@ class Subnet1Miner(BaseMiner):
         port: int = 8000,  # Cổng server miner lắng nghe
         miner_id: str = "subnet1_miner_default",  # ID dễ đọc để nhận diện/logging
         model_id: str = MODEL_ID,
+        generation_profile: Optional[str] = None,
+        load_model_in_background: bool = True,
+        output_spec: Optional[OutputSpec] = None,
+        pool_workers: Optional[int] = None,
+        best_of_n: Optional[int] = None,
     ):
         """
         Khởi tạo Subnet1Miner.
@@ -128,6 +227,16 @@ class Subnet1Miner(BaseMiner):
             port: Cổng server miner.
             miner_id: Tên định danh dễ đọc cho miner này (dùng cho logging).
             model_id: ID của model sinh ảnh (ví dụ: từ Hugging Face).
+            generation_profile: Tên generation profile (None = IMAGEGEN_PROFILE hoặc "default").
+            load_model_in_background: Tải + warm-up model ở thread nền để server
+                (và endpoint /status) phản hồi ngay; task sẽ chờ đến khi model sẵn sàng.
+            output_spec: Định dạng/chất lượng/kích thước ảnh gửi về validator
+                (None = MINER_OUTPUT_FORMAT / MINER_OUTPUT_QUALITY / MINER_OUTPUT_MAX_EDGE).
+                Task có thể ghi đè qua trường 'output_spec'.
+            pool_workers: Số process sinh ảnh song song (None = IMAGEGEN_POOL_WORKERS;
+                0 = sinh ảnh ngay trong process miner).
+            best_of_n: Số ảnh ứng viên tối đa mỗi task (None = MINER_BEST_OF_N; 1 = tắt).
+                Số ứng viên thực tế được chọn theo latency đo được để vẫn kịp deadline.
         """
         # Gọi __init__ của lớp cha (BaseMiner)
         # Pass miner_uid to BaseMiner's __init__ as well
@@ -144,6 +253,30 @@ class Subnet1Miner(BaseMiner):
             on_chain_uid_hex  # Đã được gán bởi super() nếu dùng miner_uid
         )
         self.model_id = model_id
+        self.generation_profile = get_generation_profile(generation_profile)
+        self.max_inference_steps = int(
+            MAX_INFERENCE_STEPS or self.generation_profile.num_inference_steps
+        )
+
+        self.output_spec = output_spec or output_spec_from_env()
+        self.best_of_n = max(1, BEST_OF_N if best_of_n is None else best_of_n)
+
+        # Latency model riêng của miner này (học từ các lần sinh ảnh trước)
+        self.latency_model = GenerationLatencyModel(state_path=LATENCY_MODEL_PATH)
+
+        # Telemetry: histogram theo phase, bộ đếm theo validator, throughput (xem /metrics)
+        self.metrics = MinerMetrics(throughput_window_seconds=THROUGHPUT_WINDOW_SECONDS)
+
+        # Admission: từ chối ngay task không kịp deadline (theo p95 đo được + độ dài hàng đợi)
+        self.admission = AdmissionController(
+            self.metrics,
+            self.latency_model,
+            submit_budget_s=SUBMIT_BUDGET_SECONDS,
+            max_queue_depth=MAX_QUEUE_DEPTH or None,
+            min_samples=ADMISSION_MIN_SAMPLES,
+        )
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
 
         # Kiểm tra định dạng UID hex (tùy chọn nhưng nên có)
         try:
@@ -163,12 +296,63 @@ class Subnet1Miner(BaseMiner):
             f"   ➡️ Validator Submit URL: [link={self.validator_url}]{self.validator_url}[/link]"
         )
         logger.info(f"   🧠 Using Image Gen Model: [magenta]{self.model_id}[/]")
+        logger.info(
+            f"   ⚙️ Generation profile: [magenta]{self.generation_profile.name}[/] (max {self.max_inference_steps} steps)"
+        )
+        logger.info(
+            f"   🗜️ Output: {self.output_spec.format} q={self.output_spec.quality}, max edge {self.output_spec.max_edge or 'full'}"
+        )
+        if self.best_of_n > 1:
+            logger.info(f"   🏅 Best-of-N: up to {self.best_of_n} candidates per task (local CLIP self-check)")
+
+        # Trạng thái sẵn sàng + thời gian tải/warm-up (hiển thị ở /status)
+        self.pipe = None
+        self.pool_workers = pool_workers_from_env() if pool_workers is None else pool_workers
+        self.generation_pool: Optional[GenerationPool] = None
+        self.model_state = MODEL_STATE_LOADING
+        self.model_error: Optional[str] = None
+        self.model_timings = {
+            "load_seconds": None,
+            "warmup_seconds": [],
+            "cold_start_seconds": None,
+            "peak_rss_mb": None,
+        }
+        self._init_started_at = time.time()
+        self._model_ready = threading.Event()
+        self._register_status_routes()
 
         # Tải model AI (có thể mất thời gian)
-        self.pipe = self._load_model()
+        if load_model_in_background:
+            threading.Thread(
+                target=self._initialize_model, name="model-loader", daemon=True
+            ).start()
+        else:
+            self._initialize_model()
+
+    # --- Model loading & readiness ---
+    def _initialize_model(self):
+        """Tải model, chạy warm-up và đánh dấu miner sẵn sàng nhận task."""
+        try:
+            self.pipe = self._load_model()
+            self.model_state = MODEL_STATE_WARMING_UP
+            self._warm_up_model()
+            self.model_timings["cold_start_seconds"] = time.time() - self._init_started_at
+            self.model_timings["peak_rss_mb"] = peak_rss_mb()
+            self.model_state = MODEL_STATE_READY
+            self._model_ready.set()
+            logger.info(
+                f"🟢 [bold green]Miner ready[/] (cold start {self.model_timings['cold_start_seconds']:.2f}s: "
+                f"load {self.model_timings['load_seconds']:.2f}s, "
+                f"warm-up {sum(self.model_timings['warmup_seconds']):.2f}s; "
+                f"peak RSS {self.model_timings['peak_rss_mb']:.0f} MiB)"
+            )
+        except Exception as e:
+            self.model_state = MODEL_STATE_FAILED
+            self.model_error = str(e)
+            logger.error(f"🔴 Miner model initialization failed: {e}")
 
     def _load_model(self):
-        """Tải model sinh ảnh (ví dụ: Stable Diffusion)."""
+        """Tải model sinh ảnh (Stable Diffusion) qua models.image_generator.load_pipeline."""
         logger.info(
             f"⏳ [bold]Loading image generation model[/] ([magenta]{self.model_id}[/])... This may take a while."
         )
@@ -176,25 +360,19 @@ class Subnet1Miner(BaseMiner):
         try:
             # --- Logic tải model thực tế ---
             logger.debug("   Attempting to load model pipeline...")
-            # pipe = StableDiffusionPipeline.from_pretrained(self.model_id)
-            # # Tối ưu hóa nếu có GPU
-            # if torch.cuda.is_available():
-            #     logger.info("   🚀 CUDA detected. Moving model to GPU.")
-            #     pipe = pipe.to("cuda")
-            # elif torch.backends.mps.is_available(): # Cho Apple Silicon
-            #     logger.info("   🍏 MPS detected. Moving model to MPS.")
-            #     pipe = pipe.to("mps")
-            # else:
-            #     logger.info("   🐌 No GPU acceleration detected (CUDA/MPS). Running on CPU.")
-
-            # >>> Thay bằng logic tải model của bạn <<<
-            # Giả lập việc tải model
-            time.sleep(2)
-            pipe = "FAKE_MODEL_PIPELINE"  # Placeholder
-            # --------------------------------
+            # load_pipeline tự chọn device (CUDA/MPS/CPU) và cache pipeline,
+            # nên các lần gọi generate_image_from_prompt sau sẽ dùng lại pipeline này.
+            if self.pool_workers > 0:
+                pipe = self._start_generation_pool()
+            else:
+                pipe = load_pipeline(model_id=self.model_id, profile=self.generation_profile)
+            if pipe is None:
+                raise RuntimeError("load_pipeline returned no pipeline")
             load_duration = time.time() - start_load_time
+            self.model_timings["load_seconds"] = load_duration
             logger.info(
-                f"✅🧠 [bold]Image generation model[/] ([magenta]{self.model_id}[/]) [bold green]loaded successfully[/] in {load_duration:.2f}s."
+                f"✅🧠 [bold]Image generation model[/] ([magenta]{self.model_id}[/]) [bold green]loaded successfully[/] in {load_duration:.2f}s "
+                f"(peak RSS {peak_rss_mb():.0f} MiB)."
             )
             return pipe
         except Exception as e:
@@ -205,16 +383,222 @@ class Subnet1Miner(BaseMiner):
             # Có thể raise lỗi hoặc thoát nếu không load được model
             raise RuntimeError(f"Could not load model: {self.model_id}") from e
 
-    def process_task(self, task: TaskModel) -> dict:
+    def _start_generation_pool(self) -> GenerationPool:
+        """Khởi động generation pool (mỗi worker tự tải model từ safetensors mmap và warm-up)."""
+        pool = GenerationPool(
+            model_id=self.model_id,
+            num_workers=self.pool_workers,
+            profile=self.generation_profile,
+            warmup_steps=WARMUP_STEPS if WARMUP_GENERATIONS else 0,
+        )
+        pool.start()
+        self.generation_pool = pool
+        # N task có thể sinh ảnh cùng lúc
+        self.admission.parallelism = pool.num_workers
+        self.model_timings["warmup_seconds"] = [
+            info["warmup_seconds"] for info in pool.worker_info.values()
+        ]
+        logger.info(
+            f"   🧵 Generation pool: {pool.num_workers} workers, CPUs {pool.core_slices}"
+        )
+        return pool
+
+    def _generate(self, record_latency: bool = True, **kwargs):
+        """
+        Sinh ảnh trong process miner hoặc qua generation pool (nếu bật).
+
+        Với num_images > 1 (best-of-N) trả về danh sách ảnh sinh trong một lần gọi batch.
+
+        Args:
+            record_latency: Cập nhật latency model với thời gian đo được (False cho warm-up:
+                lần chạy nguội chậm hơn nhiều và sẽ thay thế giá trị đã học/lưu trên đĩa).
+        """
+        num_images = kwargs.get("num_images", 1)
+        latency_model = self.latency_model if record_latency else None
+        if self.generation_pool is None:
+            if num_images > 1:
+                return generate_images_from_prompt(
+                    model_id=self.model_id,
+                    latency_model=latency_model,
+                    profile=self.generation_profile,
+                    **kwargs,
+                )
+            kwargs.pop("num_images", None)
+            return generate_image_from_prompt(
+                model_id=self.model_id,
+                latency_model=latency_model,
+                profile=self.generation_profile,
+                **kwargs,
+            )
+        future = self.generation_pool.submit(latency_state=self.latency_model.to_dict(), **kwargs)
+        # Worker tự hủy khi quá deadline; timeout ở đây chỉ để không treo nếu worker bị kẹt
+        deadline = kwargs.get("deadline")
+        if deadline is None:
+            timeout = POOL_RESULT_TIMEOUT_SECONDS
+        else:
+            timeout = max(0.0, deadline - time.time()) + SUBMIT_BUDGET_SECONDS
+        image = future.result(timeout=timeout)
+        stats = getattr(future, "stats", None)
+        if record_latency and image is not None and stats and kwargs.get("height") and kwargs.get("width"):
+            self.latency_model.record(
+                num_inference_steps=kwargs["num_inference_steps"],
+                height=kwargs["height"],
+                width=kwargs["width"],
+                total_seconds=stats["seconds"],
+                batch_size=num_images,
+            )
+        return image
+
+    def _warm_up_model(self):
+        """
+        Chạy vài lần sinh ảnh ngắn để khởi tạo kernel/allocator (và torch.compile)
+        trước task thật. Không cập nhật latency model: thời gian chạy nguội không
+        đại diện cho task thật.
+        """
+        if self.generation_pool is not None:
+            return  # Các worker của pool đã warm-up khi khởi động
+        for i in range(WARMUP_GENERATIONS):
+            warmup_start = time.time()
+            image = self._generate(
+                record_latency=False,
+                prompt="a photo of a cat",
+                num_inference_steps=WARMUP_STEPS,
+            )
+            duration = time.time() - warmup_start
+            self.model_timings["warmup_seconds"].append(duration)
+            if image is None:
+                raise RuntimeError(f"Warm-up generation {i + 1} failed")
+            logger.info(f"   🔥 Warm-up generation {i + 1}/{WARMUP_GENERATIONS} took {duration:.2f}s")
+
+    def is_ready(self) -> bool:
+        """Model đã tải và warm-up xong chưa."""
+        return self._model_ready.is_set()
+
+    def wait_until_ready(self, deadline: Optional[float] = None) -> bool:
+        """
+        Chờ model sẵn sàng, nhưng không quá thời điểm còn kịp xử lý task.
+
+        Args:
+            deadline: Unix timestamp của task (None = chờ tối đa MODEL_READY_WAIT_SECONDS).
+
+        Returns:
+            True nếu model sẵn sàng.
+        """
+        if self.is_ready():
+            return True
+        if self.model_state == MODEL_STATE_FAILED:
+            return False
+        if deadline is None:
+            timeout = MODEL_READY_WAIT_SECONDS
+        else:
+            timeout = deadline - time.time() - SUBMIT_BUDGET_SECONDS
+        return self._model_ready.wait(timeout=max(0.0, timeout))
+
+    def get_status(self) -> dict:
+        """Trạng thái sẵn sàng và thời gian khởi động của miner."""
+        return {
+            "miner_id": self.miner_id_readable,
+            "miner_uid": self.on_chain_uid_hex,
+            "model_id": self.model_id,
+            "generation_profile": self.generation_profile.name,
+            "ready": self.is_ready(),
+            "model_state": self.model_state,
+            "model_error": self.model_error,
+            "timings": dict(self.model_timings),
+            "latency_model": self.latency_model.to_dict(),
+            "model_cache": get_model_manager().stats(),
+        }
+
+    def switch_model(self, model_id: str, wait: bool = False) -> Future:
+        """
+        Đổi model sinh ảnh lúc đang chạy (A/B test, nâng cấp) mà không restart.
+
+        Model mới được tải nền; task mới chỉ dùng nó sau khi tải xong, task đang
+        chạy vẫn giữ model cũ. Model cũ được giải phóng khi task cuối dùng nó kết
+        thúc (kể cả khi không đặt MODEL_MEMORY_BUDGET_MB).
+
+        Args:
+            model_id: Model mới (Hugging Face ID hoặc thư mục local).
+            wait: Chờ tải xong trước khi trả về.
+
+        Returns:
+            Future trả về model_id khi đã chuyển xong.
+        """
+        if self.generation_pool is not None:
+            raise RuntimeError("Model switching is not supported in generation pool mode")
+        future: Future = Future()
+
+        def _load_and_switch():
+            start = time.time()
+            pipe = load_pipeline(model_id=model_id, profile=self.generation_profile)
+            if pipe is None:
+                logger.error(f"🔴 Model switch to {model_id} failed: could not load pipeline")
+                future.set_exception(RuntimeError(f"Could not load model: {model_id}"))
+                return
+            previous, self.model_id, self.pipe = self.model_id, model_id, pipe
+            if previous != model_id:
+                unload_pipeline(previous, profile=self.generation_profile)
+            logger.info(
+                f"🔁 Image model switched: [magenta]{previous}[/] -> [magenta]{model_id}[/] "
+                f"(loaded in {time.time() - start:.2f}s)"
+            )
+            future.set_result(model_id)
+
+        logger.info(f"⏳ Preloading image model [magenta]{model_id}[/] for switch...")
+        threading.Thread(target=_load_and_switch, name="model-switch", daemon=True).start()
+        if wait:
+            future.exception()
+        return future
+
+    def _register_status_routes(self):
+        """Đăng ký endpoint /status và /metrics trên FastAPI app của BaseMiner (nếu có)."""
+        app = getattr(self, "app", None)
+        if app is None:
+            logger.debug("BaseMiner exposes no FastAPI app; /status and /metrics endpoints not registered.")
+            return
+
+        @app.get("/status")
+        async def miner_status():
+            status = self.get_status()
+            return JSONResponse(content=status, status_code=200 if status["ready"] else 503)
+
+        @app.post("/model")
+        async def miner_switch_model(request: dict):
+            model_id = request.get("model_id")
+            if not model_id:
+                return JSONResponse(content={"error": "model_id is required"}, status_code=400)
+            try:
+                self.switch_model(model_id)
+            except RuntimeError as e:
+                return JSONResponse(content={"error": str(e)}, status_code=409)
+            return JSONResponse(
+                content={"switching_to": model_id, "current_model": self.model_id}, status_code=202
+            )
+
+        @app.get("/metrics")
+        async def miner_metrics():
+            return PlainTextResponse(
+                self.metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+            )
+
+    def process_task(self, task: TaskModel, context: Optional[TaskContext] = None) -> dict:
         """
         Thực hiện task và trả về dictionary chứa chi tiết kết quả.
         Dict này sẽ được đặt vào trường 'result_data' của ResultModel.
+
+        Args:
+            task: Task nhận từ validator.
+            context: Ngữ cảnh riêng của task (deadline, trace id); tạo mới nếu None.
         """
+        context = context or TaskContext.from_task(task, self.validator_url)
         # Sử dụng ID dễ đọc cho logging
         logger.info(
-            f"⛏️ [bold]Processing task[/] [yellow]{task.task_id}[/yellow] for miner '{self.miner_id_readable}'"
+            f"⛏️ [bold]Processing task[/] [yellow]{task.task_id}[/yellow] for miner '{self.miner_id_readable}' (trace: {context.trace_id})"
         )
         start_time = time.time()
+        queue_wait = max(0.0, start_time - context.received_at)
+        self.metrics.observe_phase(PHASE_QUEUE_WAIT, queue_wait)
+        timings_ms = {PHASE_QUEUE_WAIT: int(queue_wait * 1000)}
 
         # Lấy prompt từ task.task_data (theo định nghĩa TaskModel mới)
         prompt = task.description
@@ -231,17 +615,57 @@ class Subnet1Miner(BaseMiner):
 
         logger.debug(f"Task {task.task_id} - Prompt: '{prompt}'")
 
+        # Spec của validator (độ phân giải, số bước tối đa, định dạng, kích thước tối đa)
+        generation_spec = GenerationSpec.from_dict(getattr(task, "generation_spec", None))
+
+        # --- Chọn số bước / độ phân giải theo thời gian còn lại ---
+        deadline = context.deadline
+        plan = self._plan_generation(deadline, generation_spec)
+        if plan is None:
+            duration = time.time() - start_time
+            logger.warning(
+                f"   ⏰ Task {task.task_id} cannot be finished before its deadline. Skipping generation."
+            )
+            return {
+                "error_details": DEADLINE_INFEASIBLE_ERROR,
+                "rejection_reason": REJECT_DEADLINE_INFEASIBLE,
+                "processing_time_ms": int(duration * 1000),
+            }
+
+        # --- Best-of-N: số ứng viên vừa với thời gian còn lại ---
+        num_candidates = self._choose_candidate_count(plan, deadline)
+        self_check_score = None
+        generation_deadline = None
+        if deadline:
+            generation_deadline = deadline - SUBMIT_BUDGET_SECONDS
+            if num_candidates > 1:
+                generation_deadline -= self._self_check_seconds()
+
         # --- Thực hiện sinh ảnh ---
         generated_image = None
         error_message = None
         image_base64_string = None
         generation_start_time = time.time()
         logger.info(
-            f"   ⏳ [italic]Starting image generation...[/] (Task: {task.task_id}) "
+            f"   ⏳ [italic]Starting image generation...[/] ({plan.num_inference_steps} steps, "
+            f"{plan.width}x{plan.height}, {num_candidates} candidate(s), est. {plan.estimated_seconds:.1f}s) (Task: {task.task_id}) "
         )
         try:
-            generated_image = generate_image_from_prompt(prompt=prompt)
+            generated_image = self._generate(
+                prompt=prompt,
+                num_inference_steps=plan.num_inference_steps,
+                height=plan.height,
+                width=plan.width,
+                deadline=generation_deadline,
+                num_images=num_candidates,
+            )
             generation_duration = time.time() - generation_start_time
+            self.metrics.observe_phase(PHASE_GENERATION, generation_duration)
+            timings_ms[PHASE_GENERATION] = int(generation_duration * 1000)
+            if num_candidates > 1 and generated_image:
+                generated_image, self_check_score = self._select_best_candidate(
+                    prompt, generated_image, timings_ms
+                )
             if generated_image:
                 logger.info(
                     f"   ✅🖼️ [italic]Image generated successfully[/] in {generation_duration:.2f}s. (Task: {task.task_id}) "
@@ -277,9 +701,23 @@ class Subnet1Miner(BaseMiner):
                 "processing_time_ms": int(total_duration * 1000),
             }
 
-        # --- Chuyển đổi sang base64 ---
+        # --- Chuyển đổi sang base64 (theo generation spec / output spec của task hoặc của miner) ---
+        output_spec = self.output_spec.merged_with(getattr(task, "output_spec", None))
+        if generation_spec is not None:
+            output_spec = output_spec.merged_with(generation_spec.output_overrides())
         try:
-            image_base64_string = image_to_base64(generated_image)
+            encode_start_time = time.time()
+            image_base64_string = image_to_base64(
+                generated_image,
+                format=output_spec.format,
+                quality=output_spec.quality,
+                max_edge=output_spec.max_edge,
+                max_bytes=output_spec.max_bytes,
+            )
+            encode_duration = time.time() - encode_start_time
+            self.metrics.observe_phase(PHASE_ENCODE, encode_duration)
+            timings_ms[PHASE_ENCODE] = int(encode_duration * 1000)
+            total_duration = time.time() - start_time
             if not image_base64_string:
                 logger.warning(
                     f"   ❌ Task {task.task_id} failed: Could not convert image to base64"
@@ -305,18 +743,130 @@ class Subnet1Miner(BaseMiner):
             "processing_time_ms": int(total_duration * 1000),
             "miner_uid": self.on_chain_uid_hex,
             "model_id": self.model_id,
+            "output_format": output_spec.format,
+            "num_inference_steps": plan.num_inference_steps,
+            "resolution": plan.width,
+            "candidates": num_candidates,
+            "self_check_score": self_check_score,
+            "trace_id": context.trace_id,
+            "timings_ms": timings_ms,
         }
 
+    def _plan_generation(
+        self, deadline: Optional[float], generation_spec: Optional[GenerationSpec] = None
+    ) -> Optional[GenerationPlan]:
+        """
+        Chọn số bước và độ phân giải vừa với thời gian còn lại trước deadline,
+        trừ đi thời gian dự phòng cho việc encode và gửi kết quả.
+
+        Không vượt quá độ phân giải / số bước trong generation spec của validator.
+        """
+        max_steps = self.max_inference_steps
+        resolutions = DEFAULT_RESOLUTIONS
+        if generation_spec is not None:
+            max_steps = generation_spec.cap_steps(max_steps)
+            resolutions = generation_spec.allowed_resolutions(resolutions)
+        if deadline is None:
+            size = max(resolutions)
+            return GenerationPlan(
+                max_steps,
+                size,
+                size,
+                self.latency_model.estimate(max_steps, size, size),
+            )
+        time_budget = deadline - time.time() - SUBMIT_BUDGET_SECONDS
+        return self.latency_model.plan(time_budget, max_steps=max_steps, resolutions=resolutions)
+
+    def _self_check_seconds(self) -> float:
+        """Thời gian dự kiến cho bước tự chấm điểm (p95 đo được, hoặc giá trị mặc định)."""
+        measured = self.metrics.phases[PHASE_SELF_CHECK].quantile(0.95)
+        return SELF_CHECK_BUDGET_SECONDS if measured is None else measured
+
+    def _choose_candidate_count(self, plan: GenerationPlan, deadline: Optional[float]) -> int:
+        """
+        Số ảnh ứng viên (best-of-N) sinh cùng một batch mà vẫn kịp deadline.
+
+        Dùng latency model (đã học từ các lần sinh ảnh, kể cả batch) cho phần sinh ảnh
+        và thời gian tự chấm điểm đo được; không bao giờ nhỏ hơn 1. Số bước / độ phân
+        giải của `plan` được ưu tiên; ứng viên thêm chỉ dùng thời gian còn dư (ví dụ khi
+        generation spec của validator giới hạn độ phân giải và số bước).
+        """
+        if self.best_of_n <= 1:
+            return 1
+        if deadline is None:
+            return self.best_of_n
+        budget = deadline - time.time() - SUBMIT_BUDGET_SECONDS - self._self_check_seconds()
+        fitting = self.latency_model.max_batch_within(
+            budget, plan.num_inference_steps, plan.height, plan.width, self.best_of_n
+        )
+        return max(1, fitting)
+
+    def _select_best_candidate(self, prompt: str, images: list, timings_ms: dict):
+        """
+        Chấm CLIP cục bộ cho các ứng viên (một batch) và chọn ảnh điểm cao nhất.
+
+        Returns:
+            (ảnh tốt nhất, điểm của nó); nếu không chấm được thì (ảnh đầu tiên, None).
+        """
+        start = time.time()
+        scores = calculate_clip_scores(prompt, images)
+        duration = time.time() - start
+        self.metrics.observe_phase(PHASE_SELF_CHECK, duration)
+        timings_ms[PHASE_SELF_CHECK] = int(duration * 1000)
+        if len(scores) != len(images):
+            logger.warning("   ⚠️ Self-check scoring unavailable; submitting the first candidate")
+            return images[0], None
+        best = max(range(len(images)), key=scores.__getitem__)
+        logger.info(
+            f"   🏅 Best of {len(images)} candidates: #{best + 1} (CLIP {scores[best]:.3f}, "
+            f"range {min(scores):.3f}-{max(scores):.3f}, self-check {duration:.2f}s)"
+        )
+        return images[best], scores[best]
+
     def handle_task(self, task: TaskModel):
         """
         Xử lý task - gọi process_task và gửi kết quả.
+
+        Mọi thông tin phụ thuộc task (validator nhận kết quả, deadline, trace id)
+        nằm trong TaskContext riêng, nên nhiều task từ nhiều validator có thể
+        được xử lý đồng thời mà không gửi nhầm kết quả.
         """
-        # Store validator endpoint for result submission
-        self.current_validator_endpoint = task.validator_endpoint
+        context = TaskContext.from_task(task, self.validator_url)
+        self.metrics.task_received()
+
+        # Admission: từ chối ngay nếu không thể kịp deadline để validator giao lại task
+        with self._in_flight_lock:
+            decision = self.admission.evaluate(context.deadline, self._in_flight)
+            if decision.admitted:
+                self._in_flight += 1
+        if not decision.admitted:
+            self._reject_task(task, context, decision)
+            return
+
+        try:
+            self._run_admitted_task(task, context)
+        finally:
+            with self._in_flight_lock:
+                self._in_flight -= 1
+
+    def _run_admitted_task(self, task: TaskModel, context: TaskContext):
+        """Chờ model sẵn sàng, xử lý task và gửi kết quả."""
+        # Chờ model sẵn sàng (trong giới hạn deadline), nếu không thì từ chối ngay
+        if not self.wait_until_ready(context.deadline):
+            self._reject_task(
+                task,
+                context,
+                AdmissionDecision(
+                    False,
+                    REJECT_MODEL_NOT_READY,
+                    remaining_seconds=context.remaining_seconds(),
+                ),
+            )
+            return
 
         try:
             # Process the task
-            result_data = self.process_task(task)
+            result_data = self.process_task(task, context)
 
             # Create result model
             result = ResultModel(
@@ -326,7 +876,8 @@ class Subnet1Miner(BaseMiner):
             )
 
             # Submit result to validator
-            self.submit_result(result)
+            submitted = self.submit_result(result, context)
+            self._record_outcome(context, result_data, submitted)
 
         except Exception as e:
             logger.exception(f"Error handling task {task.task_id}: {e}")
@@ -337,42 +888,104 @@ class Subnet1Miner(BaseMiner):
                 result_data={
                     "error_details": f"Task handling error: {type(e).__name__}",
                     "processing_time_ms": 0,
+                    "trace_id": context.trace_id,
                 },
             )
-            self.submit_result(error_result)
+            self.submit_result(error_result, context)
+            self._record_outcome(context, None, False)
+
+    def _reject_task(self, task: TaskModel, context: TaskContext, decision: AdmissionDecision):
+        """Gửi ngay kết quả từ chối (kèm lý do máy đọc được) cho validator."""
+        if decision.reason == REJECT_MODEL_NOT_READY:
+            error_details = f"Miner not ready (model {self.model_state})"
+        else:
+            error_details = f"Task rejected: {decision.reason}"
+        remaining = (
+            f"{decision.remaining_seconds:.1f}s" if decision.remaining_seconds is not None else "no deadline"
+        )
+        logger.warning(
+            f"🚫 Task {task.task_id} rejected ({decision.reason}): "
+            f"need ~{decision.estimated_seconds or 0:.1f}s, {remaining} left, "
+            f"queue depth {decision.queue_depth}"
+        )
+        result_data = {
+            "error_details": error_details,
+            "processing_time_ms": 0,
+            "trace_id": context.trace_id,
+        }
+        result_data.update(decision.to_result_data())
+        self.submit_result(
+            ResultModel(
+                task_id=task.task_id,
+                miner_uid=self.on_chain_uid_hex,
+                result_data=result_data,
+            ),
+            context,
+        )
+        self.metrics.record_outcome(context.validator_endpoint, OUTCOME_REJECTED)
+
+    def _record_outcome(
+        self, context: TaskContext, result_data: Optional[dict], submitted: bool
+    ):
+        """Đếm kết quả task (success / deadline_miss / failure) theo validator."""
+        finished_at = time.time()
+        past_deadline = context.deadline is not None and finished_at > context.deadline
+        if submitted and result_data and result_data.get("output_description"):
+            outcome = OUTCOME_DEADLINE_MISS if past_deadline else OUTCOME_SUCCESS
+        elif past_deadline or (
+            result_data and result_data.get("rejection_reason") == REJECT_DEADLINE_INFEASIBLE
+        ):
+            outcome = OUTCOME_DEADLINE_MISS
+        else:
+            outcome = OUTCOME_FAILURE
+        self.metrics.record_outcome(
+            context.validator_endpoint, outcome, finished_at - context.received_at
+        )
 
-    def submit_result(self, result: ResultModel):
+    def submit_result(self, result: ResultModel, context: Optional[TaskContext] = None) -> bool:
         """
         Submit result back to validator.
-        This method sends the result to the validator endpoint specified in the original task.
+        This method sends the result to the validator endpoint carried by the task's
+        context (falling back to the default validator URL).
+
+        Returns:
+            True nếu validator đã nhận kết quả.
         """
+        submit_start_time = time.time()
         try:
             result_dict = result.dict()
 
-            # Get validator endpoint from the current task or use default
-            target_validator_url = (
-                getattr(self, "current_validator_endpoint", None) or self.validator_url
-            )
-            if not target_validator_url:
+            # Get validator endpoint from the task context or use default
+            if context is None:
+                context = TaskContext(
+                    task_id=result.task_id,
+                    validator_endpoint=self.validator_url,
+                    deadline=None,
+                    trace_id=result.result_data.get("trace_id", "")
+                    if isinstance(getattr(result, "result_data", None), dict)
+                    else "",
+                )
+            result_submit_url = context.result_submit_url
+            if not result_submit_url:
                 logger.error(
                     f"No validator URL found for task {result.task_id}. Cannot send result."
                 )
-                return
-
-            result_submit_url = (
-                f"{target_validator_url.rstrip('/')}/v1/miner/submit_result"
-            )
+                return False
 
             logger.debug(
                 f"Sending result for task {result.task_id} to {result_submit_url}"
             )
 
-            response = requests.post(result_submit_url, json=result_dict, timeout=10)
+            headers = {"X-Trace-Id": context.trace_id} if context.trace_id else None
+            response = requests.post(
+                result_submit_url, json=result_dict, timeout=10, headers=headers
+            )
             response.raise_for_status()
 
             logger.info(
                 f"✅ Result for task {result.task_id} sent successfully to validator"
             )
+            return True
 
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ Error sending result for task {result.task_id}: {e}")
@@ -380,6 +993,9 @@ class Subnet1Miner(BaseMiner):
             logger.exception(
                 f"❌ Unexpected error sending result for task {result.task_id}: {e}"
             )
+        finally:
+            self.metrics.observe_phase(PHASE_SUBMIT, time.time() - submit_start_time)
+        return False
 
     def run(self):
         """
@@ -393,11 +1009,8 @@ class Subnet1Miner(BaseMiner):
             logger.exception(f"Error running Subnet1Miner: {e}")
             raise
 
-    def _encode_image(self, image: Image.Image) -> str:
+    def _encode_image(self, image: Image.Image, spec: Optional[OutputSpec] = None) -> str:
         """
-        Encode PIL Image to base64 string.
+        Encode PIL Image to base64 string using the miner's output spec.
         """
-        buffered = BytesIO()
-        image.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        return img_str
+        return encode_image_base64(image, spec or self.output_spec)
@@ -0,0 +1,439 @@
+"""
+Multi-process image generation pool for CPU hosts.
+
+One diffusion pipeline cannot keep a many-core CPU busy (small UNets stop
+scaling well past ~8 threads), and separate miner processes each hold a
+private copy of the weights. The pool runs N worker processes, each pinned
+to its own slice of cores with a fixed thread count, and loads weights from
+memory-mapped safetensors so their pages are shared between workers.
+
+The miner dispatches jobs from its task handlers; each job returns a PIL
+image (a list of images for batched best-of-N jobs, or None) through a Future.
+Every worker has its own job and result pipes and is handed one job at a time
+by the parent, so a worker killed mid-read or mid-write cannot wedge a lock
+the other workers share. A worker that dies (OOM kill, segfault) is noticed
+by the collector thread: the job it was running fails with WorkerDiedError
+and the worker is respawned.
+"""
+
+import atexit
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import replace
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional
+
+from .generation_profiles import GenerationProfile, get_generation_profile
+
+logger = logging.getLogger(__name__)
+
+# Module providing load_pipeline() / generate_image_from_prompt() inside workers
+DEFAULT_BACKEND = "subnet1.models.image_generator"
+
+_MSG_READY = "ready"
+_MSG_FAILED = "failed"
+_MSG_RESULT = "result"
+
+
+class WorkerDiedError(RuntimeError):
+    """The worker process running a job exited before returning its result."""
+
+
+def pool_workers_from_env() -> int:
+    """Worker count from IMAGEGEN_POOL_WORKERS (0 = generate in the miner process)."""
+    return max(0, int(os.getenv("IMAGEGEN_POOL_WORKERS", "0")))
+
+
+def plan_core_slices(num_workers: int, cpu_ids: Optional[List[int]] = None) -> List[List[int]]:
+    """
+    Split the usable CPUs into `num_workers` contiguous, non-overlapping slices.
+
+    Args:
+        num_workers: Number of pool workers.
+        cpu_ids: CPUs to split (default: this process's affinity mask).
+    """
+    if cpu_ids is None:
+        cpu_ids = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    per_worker = max(1, len(cpu_ids) // num_workers)
+    slices = []
+    for i in range(num_workers):
+        # More workers than CPUs: wrap around and share cores
+        start = (i * per_worker) % len(cpu_ids)
+        slices.append(cpu_ids[start:start + per_worker])
+    return slices
+
+
+def _worker_main(
+    worker_index: int,
+    backend: str,
+    model_id: str,
+    profile: GenerationProfile,
+    cpu_ids: List[int],
+    warmup_steps: int,
+    jobs,
+    results,
+):
+    """
+    Worker process: pin, load the pipeline once, then serve jobs until a None sentinel.
+
+    `jobs` and `results` are this worker's own pipe ends (receive / send).
+    """
+    threads = len(cpu_ids)
+    # Must be set before torch is imported in this process
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpu_ids)
+        except OSError as e:
+            logger.warning(f"Worker {worker_index}: could not pin to CPUs {cpu_ids}: {e}")
+
+    try:
+        generator = importlib.import_module(backend)
+        from .latency_model import GenerationLatencyModel
+
+        profile = replace(profile, num_threads=threads)
+        load_start = time.time()
+        pipeline = generator.load_pipeline(model_id=model_id, profile=profile, mmap_weights=True)
+        if pipeline is None:
+            raise RuntimeError("load_pipeline returned no pipeline")
+        load_seconds = time.time() - load_start
+
+        warmup_start = time.time()
+        if warmup_steps > 0:
+            generator.generate_image_from_prompt(
+                prompt="a photo of a cat",
+                model_id=model_id,
+                num_inference_steps=warmup_steps,
+                profile=profile,
+            )
+        warmup_seconds = time.time() - warmup_start
+    except Exception as e:
+        results.send((_MSG_FAILED, worker_index, f"{type(e).__name__}: {e}"))
+        return
+
+    results.send(
+        (_MSG_READY, worker_index, {"pid": os.getpid(), "load_seconds": load_seconds, "warmup_seconds": warmup_seconds})
+    )
+
+    while True:
+        try:
+            job = jobs.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        job_id, kwargs, latency_state = job
+        # Deadline aborts inside the worker use the miner's current latency estimates
+        latency_model = (
+            GenerationLatencyModel(
+                step_cost_per_mpx=latency_state["step_cost_per_mpx"],
+                overhead_per_mpx=latency_state["overhead_per_mpx"],
+            )
+            if latency_state
+            else None
+        )
+        start = time.time()
+        # num_images > 1: best-of-N candidates in one batched call (returns a list)
+        if kwargs.get("num_images", 1) > 1:
+            generate = generator.generate_images_from_prompt
+        else:
+            kwargs.pop("num_images", None)
+            generate = generator.generate_image_from_prompt
+        try:
+            image = generate(
+                model_id=model_id, profile=profile, latency_model=latency_model, **kwargs
+            )
+        except Exception as e:
+            logger.exception(f"Worker {worker_index}: generation failed: {e}")
+            image = None
+        results.send(
+            (_MSG_RESULT, job_id, image, {"worker": worker_index, "seconds": time.time() - start})
+        )
+
+
+class GenerationPool:
+    """A fixed set of generation worker processes fed one job at a time by the parent."""
+
+    def __init__(
+        self,
+        model_id: str,
+        num_workers: int,
+        profile: Optional[GenerationProfile] = None,
+        warmup_steps: int = 2,
+        backend: str = DEFAULT_BACKEND,
+        start_method: str = "spawn",
+        cpu_ids: Optional[List[int]] = None,
+    ):
+        """
+        Args:
+            model_id: Model every worker loads.
+            num_workers: Number of worker processes.
+            profile: Generation profile (threads are overridden per worker).
+            warmup_steps: Steps of the warm-up generation each worker runs (0 = none).
+            backend: Module providing load_pipeline / generate_image_from_prompt.
+            start_method: multiprocessing start method ("spawn" is safe with torch threads).
+            cpu_ids: CPUs to split between workers (default: all usable CPUs).
+        """
+        if num_workers < 1:
+            raise ValueError("GenerationPool needs at least one worker")
+        self.model_id = model_id
+        self.num_workers = num_workers
+        self.profile = profile or get_generation_profile()
+        self.warmup_steps = warmup_steps
+        self.backend = backend
+        self.core_slices = plan_core_slices(num_workers, cpu_ids)
+
+        self._ctx = multiprocessing.get_context(start_method)
+        self._processes: List[multiprocessing.Process] = []
+        # Per worker: parent ends of its job pipe (send) and result pipe (receive)
+        self._job_conns: List[Any] = [None] * num_workers
+        self._result_conns: List[Any] = [None] * num_workers
+        self._pending: Dict[int, Future] = {}
+        # Jobs not yet handed to a worker, and the job each busy worker is running;
+        # both guarded by _pending_lock
+        self._backlog: deque = deque()
+        self._busy: Dict[int, int] = {}
+        self._pending_lock = threading.Lock()
+        self._job_ids = itertools.count()
+        self._collector: Optional[threading.Thread] = None
+        self._running = False
+        self.worker_info: Dict[int, Dict[str, Any]] = {}
+        # Respawned workers that failed to load again; not respawned a second time
+        self._failed_workers: Dict[int, str] = {}
+        self.stats = {"worker_deaths": 0, "respawns": 0}
+
+    # --- Lifecycle ---
+    def start(self, timeout: Optional[float] = None) -> "GenerationPool":
+        """
+        Start the workers and wait until all of them have loaded and warmed up.
+
+        Raises:
+            RuntimeError: If a worker fails to load or the timeout expires.
+        """
+        self._processes = [self._spawn_worker(index) for index in range(self.num_workers)]
+        atexit.register(self.shutdown)
+
+        deadline = None if timeout is None else time.time() + timeout
+        while len(self.worker_info) < self.num_workers:
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            waiting = [self._result_conns[i] for i in range(self.num_workers) if i not in self.worker_info]
+            ready = wait(waiting, timeout=remaining)
+            if not ready:
+                self.shutdown()
+                raise RuntimeError(f"Generation pool not ready after {timeout}s")
+            for conn in ready:
+                worker_index = self._result_conns.index(conn)
+                try:
+                    kind, _, payload = conn.recv()
+                except EOFError:
+                    kind, payload = _MSG_FAILED, f"exited with code {self._processes[worker_index].exitcode}"
+                if kind == _MSG_FAILED:
+                    self.shutdown()
+                    raise RuntimeError(f"Generation worker {worker_index} failed to start: {payload}")
+                self.worker_info[worker_index] = payload
+                logger.info(
+                    f"🧵 Generation worker {worker_index} ready (pid {payload['pid']}, CPUs {self.core_slices[worker_index]}, "
+                    f"load {payload['load_seconds']:.2f}s, warm-up {payload['warmup_seconds']:.2f}s)"
+                )
+
+        self._running = True
+        self._collector = threading.Thread(target=self._collect_results, name="generation-pool-collector", daemon=True)
+        self._collector.start()
+        return self
+
+    def _spawn_worker(self, index: int) -> multiprocessing.Process:
+        """Start worker `index` with fresh job and result pipes."""
+        job_recv, job_send = self._ctx.Pipe(duplex=False)
+        result_recv, result_send = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.backend, self.model_id, self.profile, self.core_slices[index],
+                  self.warmup_steps, job_recv, result_send),
+            name=f"generation-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        # Only the worker keeps its ends, so its death shows up as EOF here
+        job_recv.close()
+        result_send.close()
+        self._close_conns(index)
+        self._job_conns[index] = job_send
+        self._result_conns[index] = result_recv
+        return process
+
+    def _close_conns(self, index: int):
+        for conns in (self._job_conns, self._result_conns):
+            if conns[index] is not None:
+                conns[index].close()
+                conns[index] = None
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stop all workers; pending jobs resolve to None."""
+        if not self._processes:
+            return
+        self._running = False
+        for conn in self._job_conns:
+            try:
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for process in self._processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+        if self._collector is not None and self._collector is not threading.current_thread():
+            self._collector.join(timeout=timeout)
+        for index in range(self.num_workers):
+            self._close_conns(index)
+        self._processes = []
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._backlog.clear()
+            self._busy.clear()
+        for future in pending.values():
+            if not future.done():
+                future.set_result(None)
+
+    @property
+    def pids(self) -> List[int]:
+        return [info["pid"] for info in self.worker_info.values()]
+
+    # --- Jobs ---
+    def submit(self, latency_state: Optional[Dict[str, Any]] = None, **kwargs) -> Future:
+        """
+        Queue one generation; kwargs are passed to generate_image_from_prompt in a worker.
+
+        Args:
+            latency_state: GenerationLatencyModel.to_dict() used for deadline aborts.
+        """
+        if not self._running:
+            raise RuntimeError("Generation pool is not running")
+        future: Future = Future()
+        job_id = next(self._job_ids)
+        with self._pending_lock:
+            self._pending[job_id] = future
+            self._backlog.append((job_id, kwargs, latency_state))
+        self._dispatch()
+        return future
+
+    def generate(self, timeout: Optional[float] = None, latency_state: Optional[Dict[str, Any]] = None, **kwargs):
+        """Blocking submit(); returns the PIL image or None."""
+        return self.submit(latency_state=latency_state, **kwargs).result(timeout=timeout)
+
+    def _dispatch(self):
+        """Hand backlog jobs to idle, ready workers (one job per worker at a time)."""
+        with self._pending_lock:
+            if self._backlog and len(self._failed_workers) == self.num_workers:
+                # Every worker failed to respawn: nothing will ever run these jobs
+                while self._backlog:
+                    job_id, _, _ = self._backlog.popleft()
+                    future = self._pending.pop(job_id, None)
+                    if future is not None and not future.done():
+                        future.set_exception(RuntimeError("No generation workers left"))
+                return
+            for index in range(self.num_workers):
+                if not self._backlog or not self._running:
+                    break
+                if index in self._busy or index not in self.worker_info or index in self._failed_workers:
+                    continue
+                if self._processes[index].exitcode is not None:
+                    continue  # Dead, not yet respawned by the collector
+                job = self._backlog.popleft()
+                try:
+                    self._job_conns[index].send(job)
+                except (OSError, ValueError):
+                    # Worker died between checks: keep the job for the next worker
+                    self._backlog.appendleft(job)
+                    continue
+                self._busy[index] = job[0]
+
+    def _collect_results(self):
+        while self._running:
+            conns = {
+                self._result_conns[index]: index
+                for index in range(self.num_workers)
+                if index not in self._failed_workers and self._result_conns[index] is not None
+            }
+            try:
+                ready = wait(list(conns), timeout=0.5)
+            except (OSError, ValueError):
+                ready = []
+            for conn in ready:
+                self._receive(conns[conn], conn)
+            # Every pass: a dead worker is replaced even while others keep returning results
+            self._check_workers()
+            self._dispatch()
+
+    def _receive(self, index: int, conn) -> bool:
+        """Handle one message from worker `index`; False once its pipe is closed."""
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return False
+        self._handle_message(index, message)
+        return True
+
+    def _handle_message(self, index: int, message):
+        kind = message[0]
+        if kind == _MSG_RESULT:
+            _, job_id, image, stats = message
+            with self._pending_lock:
+                if self._busy.get(index) == job_id:
+                    del self._busy[index]
+            self._resolve(job_id, image, stats=stats)
+        elif kind == _MSG_READY:
+            _, worker_index, info = message
+            self.worker_info[worker_index] = info
+            logger.info(f"🧵 Generation worker {worker_index} respawned (pid {info['pid']})")
+        elif kind == _MSG_FAILED:
+            _, worker_index, error = message
+            self._failed_workers[worker_index] = error
+            logger.error(f"🔴 Respawned generation worker {worker_index} failed to start: {error}")
+
+    def _resolve(self, job_id: int, image=None, stats=None, error: Optional[Exception] = None):
+        with self._pending_lock:
+            future = self._pending.pop(job_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.stats = stats
+            future.set_result(image)
+
+    def _check_workers(self):
+        """Fail the job of every dead worker and respawn it."""
+        for index, process in enumerate(self._processes):
+            if process.exitcode is None or not self._running:
+                continue
+            if index in self._failed_workers:
+                continue
+            # Messages the worker sent before dying (its last result, a start-up failure)
+            conn = self._result_conns[index]
+            while conn is not None and conn.poll() and self._receive(index, conn):
+                pass
+            if index in self._failed_workers:
+                continue
+            with self._pending_lock:
+                # Under the lock so _dispatch() cannot hand this worker another job
+                job_id = self._busy.pop(index, None)
+                self.worker_info.pop(index, None)
+            self.stats["worker_deaths"] += 1
+            logger.warning(
+                f"⚠️ Generation worker {index} (pid {process.pid}) died with exit code {process.exitcode}"
+                + (f" while running job {job_id}" if job_id is not None else "")
+            )
+            if job_id is not None:
+                self._resolve(job_id, error=WorkerDiedError(
+                    f"Generation worker {index} exited with code {process.exitcode}"
+                ))
+            self._processes[index] = self._spawn_worker(index)
+            self.stats["respawns"] += 1
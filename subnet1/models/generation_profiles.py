@@ -0,0 +1,116 @@
+"""
+Named generation profiles for the image generation pipeline.
+
+A profile bundles the pipeline-level speed/quality knobs (scheduler, attention
+slicing, memory format, torch.compile, dtype, thread count) so operators can
+switch CPU tuning with one setting:
+
+    IMAGEGEN_PROFILE=fast_cpu python scripts/run_miner_core.py
+"""
+
+import logging
+import os
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_NAME = "default"
+
+# Scheduler aliases -> diffusers class names
+SCHEDULER_CLASSES = {
+    "dpm_solver_multistep": "DPMSolverMultistepScheduler",
+    "euler_ancestral": "EulerAncestralDiscreteScheduler",
+    "euler": "EulerDiscreteScheduler",
+    "ddim": "DDIMScheduler",
+    "pndm": "PNDMScheduler",
+}
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Pipeline tuning options applied by `load_pipeline`."""
+
+    name: str
+    # None keeps the scheduler shipped with the model
+    scheduler: Optional[str] = None
+    # Steps to use when the task leaves enough time (fewer for multistep solvers)
+    num_inference_steps: int = 25
+    attention_slicing: bool = False
+    channels_last: bool = False
+    torch_compile: bool = False
+    # "float32" or "bfloat16" (bf16 only applied on CPUs that support it)
+    cpu_dtype: str = "float32"
+    # None keeps torch's default intra-op thread count
+    num_threads: Optional[int] = None
+
+
+GENERATION_PROFILES: Dict[str, GenerationProfile] = {
+    # Behaviour before profiles existed: default scheduler, fp32, 25 steps
+    "default": GenerationProfile(name="default"),
+    # DPM-Solver++ reaches comparable quality in ~15 steps; NHWC convs are faster on CPU
+    "fast_cpu": GenerationProfile(
+        name="fast_cpu",
+        scheduler="dpm_solver_multistep",
+        num_inference_steps=15,
+        channels_last=True,
+    ),
+    # fast_cpu plus bf16 weights/activations on CPUs with AVX512-BF16 / AMX
+    "bf16_cpu": GenerationProfile(
+        name="bf16_cpu",
+        scheduler="dpm_solver_multistep",
+        num_inference_steps=15,
+        channels_last=True,
+        cpu_dtype="bfloat16",
+    ),
+    # fast_cpu plus torch.compile on the UNet (slow first call, faster steady state)
+    "compiled_cpu": GenerationProfile(
+        name="compiled_cpu",
+        scheduler="dpm_solver_multistep",
+        num_inference_steps=15,
+        channels_last=True,
+        torch_compile=True,
+    ),
+    # Smallest peak memory, for hosts that swap with the default profile
+    "low_memory": GenerationProfile(
+        name="low_memory",
+        scheduler="dpm_solver_multistep",
+        num_inference_steps=15,
+        attention_slicing=True,
+    ),
+}
+
+
+def get_generation_profile(name: Optional[str] = None) -> GenerationProfile:
+    """
+    Resolve a generation profile.
+
+    Args:
+        name: Profile name; falls back to the IMAGEGEN_PROFILE env var, then "default".
+
+    Returns:
+        The profile, with IMAGEGEN_NUM_THREADS applied as a thread-count override.
+    """
+    name = name or os.getenv("IMAGEGEN_PROFILE") or DEFAULT_PROFILE_NAME
+    profile = GENERATION_PROFILES.get(name)
+    if profile is None:
+        logger.warning(
+            f"⚠️ Unknown generation profile '{name}', using '{DEFAULT_PROFILE_NAME}'. "
+            f"Available: {list(GENERATION_PROFILES)}"
+        )
+        profile = GENERATION_PROFILES[DEFAULT_PROFILE_NAME]
+
+    threads = os.getenv("IMAGEGEN_NUM_THREADS")
+    if threads:
+        profile = replace(profile, num_threads=int(threads))
+    return profile
+
+
+def cpu_supports_bf16() -> bool:
+    """Whether this CPU has native bf16 matmul support (AVX512-BF16 or AMX)."""
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
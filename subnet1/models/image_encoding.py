@@ -0,0 +1,159 @@
+"""
+Output encoding for generated images.
+
+The validator's CLIP preprocess resizes every image to 224px, so shipping a
+lossless full-resolution PNG mostly costs encode time and upload size. An
+OutputSpec controls format, quality and the longest edge sent back.
+"""
+
+import base64
+import logging
+import os
+from dataclasses import dataclass, replace
+from io import BytesIO
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("PNG", "JPEG", "WEBP")
+
+# Fast settings per format: PNG level 1 is ~5x faster than the default level 6,
+# WebP method 2 trades a few percent of size for a much faster encoder.
+_PNG_COMPRESS_LEVEL = 1
+_WEBP_METHOD = 2
+
+# Used when an encoding exceeds max_bytes: lower quality first, then shrink the image
+_FALLBACK_QUALITIES = (75, 60, 45, 30)
+_SHRINK_FACTOR = 0.75
+_MIN_EDGE = 64
+
+
+def normalize_format(fmt: str) -> str:
+    """Canonical format name ("jpg" -> "JPEG").
+
+    Raises:
+        ValueError: The format is not one of SUPPORTED_FORMATS.
+    """
+    normalized = str(fmt).upper()
+    if normalized == "JPG":
+        normalized = "JPEG"
+    if normalized not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported output format '{fmt}'. Use one of {SUPPORTED_FORMATS}")
+    return normalized
+
+
+@dataclass(frozen=True)
+class OutputSpec:
+    """How a generated image is encoded before submission."""
+
+    format: str = "PNG"
+    # JPEG/WebP quality (1-100); ignored for PNG
+    quality: int = 90
+    # Longest edge in pixels after downscaling; None keeps the generated size
+    max_edge: Optional[int] = None
+    # Upper bound on the encoded size; quality and then size are reduced to fit
+    max_bytes: Optional[int] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "format", normalize_format(self.format))
+        object.__setattr__(self, "quality", max(1, min(100, int(self.quality))))
+
+    def merged_with(self, overrides: Optional[Dict[str, Any]]) -> "OutputSpec":
+        """
+        Return a copy with the known keys of `overrides` (e.g. from task data) applied.
+
+        Each key is applied on its own, so one invalid value drops only that key.
+        """
+        if not overrides:
+            return self
+        spec = self
+        for key in ("format", "quality", "max_edge", "max_bytes"):
+            if overrides.get(key) is None:
+                continue
+            try:
+                spec = replace(spec, **{key: overrides[key]})
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Ignoring invalid output spec {key}={overrides[key]!r}: {e}")
+        return spec
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": self.format,
+            "quality": self.quality,
+            "max_edge": self.max_edge,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def output_spec_from_env() -> OutputSpec:
+    """Miner-wide default spec from MINER_OUTPUT_FORMAT / _QUALITY / _MAX_EDGE."""
+    max_edge = os.getenv("MINER_OUTPUT_MAX_EDGE", "256")
+    return OutputSpec(
+        format=os.getenv("MINER_OUTPUT_FORMAT", "JPEG"),
+        quality=int(os.getenv("MINER_OUTPUT_QUALITY", "90")),
+        max_edge=int(max_edge) if max_edge and int(max_edge) > 0 else None,
+    )
+
+
+def encode_image(image: Image.Image, spec: OutputSpec) -> bytes:
+    """
+    Downscale (if needed) and encode an image according to `spec`.
+
+    Args:
+        image: Generated PIL image.
+        spec: Output format, quality, max edge and max bytes.
+
+    Returns:
+        Encoded image bytes (best effort if max_bytes cannot be met).
+    """
+    image = _downscale(image, spec.max_edge)
+    data = _encode(image, spec.format, spec.quality)
+    if spec.max_bytes is None or len(data) <= spec.max_bytes:
+        return data
+    return _shrink_to_fit(image, spec, data)
+
+
+def _downscale(image: Image.Image, max_edge: Optional[int]) -> Image.Image:
+    if max_edge and max(image.size) > max_edge:
+        image = image.copy()
+        # Bicubic matches CLIP's own resize; reducing_gap does a fast box pre-shrink
+        image.thumbnail((max_edge, max_edge), Image.Resampling.BICUBIC, reducing_gap=2.0)
+    return image
+
+
+def _encode(image: Image.Image, fmt: str, quality: int) -> bytes:
+    buffered = BytesIO()
+    if fmt == "PNG":
+        image.save(buffered, format="PNG", compress_level=_PNG_COMPRESS_LEVEL)
+    elif fmt == "JPEG":
+        image.convert("RGB").save(buffered, format="JPEG", quality=quality, optimize=True)
+    else:
+        image.save(buffered, format="WEBP", quality=quality, method=_WEBP_METHOD)
+    return buffered.getvalue()
+
+
+def _shrink_to_fit(image: Image.Image, spec: OutputSpec, data: bytes) -> bytes:
+    """Re-encode at lower quality (lossy formats), then smaller sizes, until max_bytes fits."""
+    quality = spec.quality
+    if spec.format != "PNG":
+        for quality in (q for q in _FALLBACK_QUALITIES if q < spec.quality):
+            data = _encode(image, spec.format, quality)
+            if len(data) <= spec.max_bytes:
+                return data
+
+    edge = max(image.size)
+    while edge > _MIN_EDGE:
+        edge = max(_MIN_EDGE, int(edge * _SHRINK_FACTOR))
+        data = _encode(_downscale(image, edge), spec.format, quality)
+        if len(data) <= spec.max_bytes:
+            return data
+
+    logger.warning(f"Could not fit image into {spec.max_bytes} bytes ({len(data)} bytes at {edge}px)")
+    return data
+
+
+def encode_image_base64(image: Image.Image, spec: OutputSpec) -> str:
+    """`encode_image` followed by base64 (the wire format of `output_description`)."""
+    return base64.b64encode(encode_image(image, spec)).decode("utf-8")
@@ -1,14 +1,65 @@
 import torch
+import diffusers
 from diffusers import StableDiffusionPipeline
 from PIL import Image
 import logging
-import base64
-from io import BytesIO
+import inspect
+import os
+import threading
+import time
+from dataclasses import replace
+from typing import List, Optional
+
+from .latency_model import GenerationLatencyModel
+from .safetensors_mmap import share_pipeline_weights
+from .model_store import find_local_pipeline
+from .model_manager import get_model_manager
+from .image_encoding import OutputSpec, encode_image_base64
+from . import onnx_backend
+from .generation_profiles import (
+    GenerationProfile,
+    SCHEDULER_CLASSES,
+    cpu_supports_bf16,
+    get_generation_profile,
+)
 
 logger = logging.getLogger(__name__)
 
-# Biến global để cache pipeline (cách đơn giản, có thể dùng class nếu cần phức tạp hơn)
-_pipeline_cache = {}
+
+class GenerationAborted(RuntimeError):
+    """Raised from the step callback when the task deadline can no longer be met."""
+
+# Pipeline được cache trong ModelManager dùng chung của process (giới hạn bộ nhớ,
+# LRU + reference counting, xem MODEL_MEMORY_BUDGET_MB)
+_model_manager = get_model_manager()
+
+# Trỏ weights về mmap của file safetensors (tải lười, chia sẻ trang giữa các process)
+MMAP_WEIGHTS = os.getenv("IMAGEGEN_MMAP_WEIGHTS", "1") == "1"
+
+# Backend sinh ảnh: "torch" (diffusers) hoặc "onnx" / "onnx-int8" (ONNX Runtime, CPU)
+DEFAULT_BACKEND = onnx_backend.backend_from_env()
+
+# Một pipeline diffusers không an toàn khi gọi đồng thời từ nhiều thread
+# (scheduler giữ state theo step), nên mỗi pipeline có một lock riêng.
+# Lock không bao giờ bị xóa, kể cả khi pipeline được unload.
+_generation_locks = {}
+_generation_locks_guard = threading.Lock()
+
+
+def _get_generation_lock(cache_key) -> threading.Lock:
+    """Return the lock serializing inference on the pipeline cached under `cache_key`."""
+    with _generation_locks_guard:
+        return _generation_locks.setdefault(cache_key, threading.Lock())
+
+
+def pipeline_cache_key(
+    model_id: str, profile: Optional[GenerationProfile] = None, backend: Optional[str] = None
+) -> tuple:
+    """Key of a pipeline in the model manager: (kind, model_id, device, profile, backend)."""
+    profile = profile or get_generation_profile()
+    backend = backend or DEFAULT_BACKEND
+    device = "cpu" if backend != onnx_backend.BACKEND_TORCH else str(_get_device())
+    return ("pipeline", model_id, device, profile.name, backend)
 
 def _get_device():
     """Xác định device phù hợp (MPS cho M1/M2, CUDA hoặc CPU)."""
@@ -19,42 +70,178 @@ def _get_device():
     else:
         return torch.device("cpu")
 
-def load_pipeline(model_id: str = "segmind/tiny-sd", revision="fp16"):
-    """Tải và cache Stable Diffusion pipeline."""
-    global _pipeline_cache
-    device = _get_device()
-    # Sử dụng tuple (model_id, revision, device) làm key cache
-    cache_key = (model_id, str(device))
+def _select_dtype(device, profile: GenerationProfile):
+    """float16 cho GPU/MPS; trên CPU dùng float32 hoặc bf16 nếu profile yêu cầu và CPU hỗ trợ."""
+    if device != torch.device("cpu"):
+        return torch.float16
+    if profile.cpu_dtype == "bfloat16":
+        if cpu_supports_bf16():
+            return torch.bfloat16
+        logger.warning(
+            f"Profile '{profile.name}' requests bf16 but this CPU has no native bf16 support. Using float32."
+        )
+    return torch.float32
+
+def _apply_scheduler(pipeline, profile: GenerationProfile):
+    """Thay scheduler theo profile (dùng cho cả pipeline torch và ONNX)."""
+    if profile.scheduler:
+        scheduler_cls = getattr(diffusers, SCHEDULER_CLASSES.get(profile.scheduler, profile.scheduler), None)
+        if scheduler_cls is None:
+            logger.warning(f"Unknown scheduler '{profile.scheduler}' in profile '{profile.name}'. Keeping default.")
+        else:
+            pipeline.scheduler = scheduler_cls.from_config(pipeline.scheduler.config)
+    return pipeline
+
+def _apply_profile(pipeline, profile: GenerationProfile):
+    """Áp dụng các tối ưu hóa của profile lên pipeline đã tải."""
+    _apply_scheduler(pipeline, profile)
+    if profile.attention_slicing:
+        pipeline.enable_attention_slicing()
+    if profile.channels_last:
+        pipeline.unet.to(memory_format=torch.channels_last)
+        pipeline.vae.to(memory_format=torch.channels_last)
+    if profile.torch_compile:
+        if hasattr(torch, "compile"):
+            # Biên dịch lại mỗi khi độ phân giải thay đổi; lần gọi đầu tiên sẽ chậm
+            pipeline.unet = torch.compile(pipeline.unet, mode="reduce-overhead")
+        else:
+            logger.warning("torch.compile is not available in this torch version. Skipping.")
+    return pipeline
+
+def load_pipeline(
+    model_id: str = "segmind/tiny-sd",
+    revision="fp16",
+    profile: Optional[GenerationProfile] = None,
+    use_safetensors: bool = True,
+    mmap_weights: Optional[bool] = None,
+    backend: Optional[str] = None,
+):
+    """
+    Tải và cache Stable Diffusion pipeline (đã áp dụng generation profile).
 
-    if cache_key in _pipeline_cache:
-        logger.debug(f"Using cached pipeline for {model_id} on {device}")
-        return _pipeline_cache[cache_key]
+    Ưu tiên bản safetensors trong thư mục model offline (SUBNET1_MODEL_DIR, tạo bằng
+    scripts/convert_models_to_safetensors.py), sau đó tới Hugging Face.
 
-    logger.info(f"Loading pipeline {model_id} (revision: {revision}) onto device: {device}...")
+    Args:
+        model_id: Tên model trên Hugging Face hoặc thư mục local.
+        profile: Generation profile (None = IMAGEGEN_PROFILE).
+        use_safetensors: Ưu tiên file .safetensors; chỉ dùng pickle .bin nếu model không có.
+        mmap_weights: Sau khi tải, trỏ weights về mmap của file safetensors để
+            nhiều process (generation pool) dùng chung trang bộ nhớ (chỉ CPU).
+            None = IMAGEGEN_MMAP_WEIGHTS (mặc định bật).
+        backend: "torch", "onnx" hoặc "onnx-int8" (None = IMAGEGEN_BACKEND).
+            Lần đầu dùng ONNX, model được export (và lượng tử hóa) vào thư mục model offline.
+    """
+    profile = profile or get_generation_profile()
+    backend = backend or DEFAULT_BACKEND
+    cache_key = pipeline_cache_key(model_id, profile, backend)
     try:
-        pipeline = StableDiffusionPipeline.from_pretrained(
-            model_id,
-            torch_dtype=torch.float16 if device != torch.device("cpu") else torch.float32, # float16 cho GPU/MPS
-            # revision=revision,
-            use_safetensors=False, # Ưu tiên safetensors
-            # variant="fp16" # Một số model có variant riêng
+        return _model_manager.get(
+            cache_key,
+            lambda: _load_pipeline_uncached(model_id, revision, profile, use_safetensors, mmap_weights, backend),
         )
+    except RuntimeError:
+        return None
+
+
+def unload_pipeline(
+    model_id: str, profile: Optional[GenerationProfile] = None, backend: Optional[str] = None
+) -> None:
+    """Giải phóng pipeline của model_id khỏi ModelManager (ngay, hoặc khi task cuối dùng nó kết thúc)."""
+    cache_key = pipeline_cache_key(model_id, profile, backend)
+    # Lock của cache_key được giữ lại: task đang chạy có thể vẫn giữ nó, và nếu model
+    # được nạp lại thì pipeline mới phải dùng đúng lock đó (số key nhỏ, có giới hạn)
+    _model_manager.retire(cache_key)
+
+
+def _load_pipeline_uncached(
+    model_id: str,
+    revision,
+    profile: GenerationProfile,
+    use_safetensors: bool,
+    mmap_weights: Optional[bool],
+    backend: str = onnx_backend.BACKEND_TORCH,
+):
+    """Tải pipeline (không cache); trả về None nếu lỗi."""
+    source = find_local_pipeline(model_id) or model_id
+    if backend != onnx_backend.BACKEND_TORCH:
+        return _load_onnx_pipeline(source, model_id, profile, backend)
+
+    device = _get_device()
+    mmap_weights = MMAP_WEIGHTS if mmap_weights is None else mmap_weights
+    logger.info(
+        f"Loading pipeline {model_id} from {source} (revision: {revision}, profile: {profile.name}) onto device: {device}..."
+    )
+    try:
+        if profile.num_threads and device == torch.device("cpu"):
+            torch.set_num_threads(profile.num_threads)
+        pipeline = _from_pretrained(source, _select_dtype(device, profile), use_safetensors or mmap_weights)
         pipeline.to(device)
-        # (Tùy chọn) Tối ưu hóa nếu cần (ví dụ: attention slicing)
-        # pipeline.enable_attention_slicing()
+        if mmap_weights and device == torch.device("cpu"):
+            if share_pipeline_weights(pipeline, source) and profile.channels_last:
+                # channels_last chép lại weights conv của UNet/VAE thành bản riêng của
+                # từng process, mất tác dụng chia sẻ trang của mmap -> bỏ qua
+                logger.info("Skipping channels_last: pipeline weights are memory-mapped and shared")
+                profile = replace(profile, channels_last=False)
+        _apply_profile(pipeline, profile)
 
-        _pipeline_cache[cache_key] = pipeline
-        logger.info(f"Pipeline {model_id} loaded successfully.")
+        logger.info(f"Pipeline {model_id} loaded successfully (profile: {profile.name}).")
         return pipeline
     except Exception as e:
         logger.exception(f"Failed to load pipeline {model_id}: {e}")
         return None
 
+def _load_onnx_pipeline(source: str, model_id: str, profile: GenerationProfile, backend: str):
+    """Tải pipeline ONNX Runtime (export lần đầu); trả về None nếu lỗi hoặc thiếu optimum."""
+    if not onnx_backend.is_available():
+        logger.error(
+            f"Backend '{backend}' requires optimum[onnxruntime]. Install it or set IMAGEGEN_BACKEND=torch."
+        )
+        return None
+    logger.info(f"Loading pipeline {model_id} with ONNX Runtime ({backend}, profile: {profile.name})...")
+    try:
+        pipeline = onnx_backend.load_onnx_pipeline(
+            source, model_id, profile, quantized=backend == onnx_backend.BACKEND_ONNX_INT8
+        )
+        # Các tối ưu còn lại của profile (dtype, channels_last, torch.compile) chỉ áp dụng cho torch
+        _apply_scheduler(pipeline, profile)
+        return pipeline
+    except Exception as e:
+        logger.exception(f"Failed to load ONNX pipeline {model_id}: {e}")
+        return None
+
+def _from_pretrained(source: str, torch_dtype, prefer_safetensors: bool):
+    """from_pretrained với safetensors; quay về .bin (kèm cảnh báo) nếu model chưa có bản safetensors."""
+    if prefer_safetensors:
+        try:
+            return StableDiffusionPipeline.from_pretrained(
+                source, torch_dtype=torch_dtype, use_safetensors=True
+            )
+        except (OSError, EnvironmentError, ValueError) as e:
+            logger.warning(
+                f"No safetensors weights for {source} ({e}). Falling back to .bin; "
+                f"run scripts/convert_models_to_safetensors.py for faster, memory-mapped loading."
+            )
+    return StableDiffusionPipeline.from_pretrained(
+        source, torch_dtype=torch_dtype, use_safetensors=False
+    )
+
+def _mean_step_seconds(step_times: list) -> float:
+    """Mean step duration; the first interval also covers text encoding so it is skipped when possible."""
+    timed = step_times[1:] if len(step_times) > 1 else step_times
+    return sum(timed) / len(timed)
+
 def generate_image_from_prompt(
     prompt: str,
     model_id: str = "segmind/tiny-sd", # Model nhẹ
     num_inference_steps: int = 25,     # Số bước inference (ít hơn để nhanh hơn)
     guidance_scale: float = 7.5,
+    height: Optional[int] = None,
+    width: Optional[int] = None,
+    deadline: Optional[float] = None,
+    latency_model: Optional[GenerationLatencyModel] = None,
+    profile: Optional[GenerationProfile] = None,
+    backend: Optional[str] = None,
     # revision="fp16"
 ) -> Image.Image | None: # Trả về đối tượng PIL Image hoặc None nếu lỗi
     """
@@ -65,47 +252,187 @@ def generate_image_from_prompt(
         model_id: Tên model trên Hugging Face.
         num_inference_steps: Số bước khuếch tán ngược.
         guidance_scale: Mức độ ảnh hưởng của prompt.
-        revision: Revision của model (thường là fp16 cho bản tối ưu).
+        height: Chiều cao ảnh (None = mặc định của pipeline).
+        width: Chiều rộng ảnh (None = mặc định của pipeline).
+        deadline: Unix timestamp; the run is aborted once it can no longer finish in time.
+        latency_model: Model used for the abort decision and updated with this run's timings.
+        profile: Generation profile (None = IMAGEGEN_PROFILE env var or "default").
+        backend: "torch", "onnx" hoặc "onnx-int8" (None = IMAGEGEN_BACKEND).
 
     Returns:
         Đối tượng PIL.Image chứa ảnh được tạo, hoặc None nếu có lỗi.
     """
-    pipeline = load_pipeline(model_id=model_id)
-    if pipeline is None:
+    images = generate_images_from_prompt(
+        prompt, 1, model_id, num_inference_steps, guidance_scale, height, width,
+        deadline, latency_model, profile, backend,
+    )
+    return images[0] if images else None
+
+def generate_images_from_prompt(
+    prompt: str,
+    num_images: int,
+    model_id: str = "segmind/tiny-sd",
+    num_inference_steps: int = 25,
+    guidance_scale: float = 7.5,
+    height: Optional[int] = None,
+    width: Optional[int] = None,
+    deadline: Optional[float] = None,
+    latency_model: Optional[GenerationLatencyModel] = None,
+    profile: Optional[GenerationProfile] = None,
+    backend: Optional[str] = None,
+) -> List[Image.Image] | None:
+    """
+    Tạo nhiều ảnh ứng viên cho cùng một prompt trong một lần gọi pipeline (batch).
+
+    Text encoder chỉ chạy một lần và UNet xử lý cả batch mỗi step, nên N ảnh
+    tốn ít hơn N lần sinh ảnh riêng lẻ. Tham số giống generate_image_from_prompt.
+
+    Returns:
+        Danh sách `num_images` ảnh PIL, hoặc None nếu có lỗi / bị hủy vì deadline.
+    """
+    profile = profile or get_generation_profile()
+    backend = backend or DEFAULT_BACKEND
+    cache_key = pipeline_cache_key(model_id, profile, backend)
+    # Giữ reference trong lúc sinh ảnh để ModelManager không giải phóng pipeline
+    try:
+        pipeline = _model_manager.acquire(
+            cache_key,
+            lambda: _load_pipeline_uncached(model_id, "fp16", profile, True, None, backend),
+        )
+    except RuntimeError:
         return None
+    try:
+        return _generate_with_pipeline(
+            pipeline, cache_key, prompt, model_id, num_inference_steps, guidance_scale,
+            height, width, deadline, latency_model, max(1, num_images),
+        )
+    finally:
+        _model_manager.release(cache_key)
 
+def _generate_with_pipeline(
+    pipeline,
+    cache_key,
+    prompt: str,
+    model_id: str,
+    num_inference_steps: int,
+    guidance_scale: float,
+    height: Optional[int],
+    width: Optional[int],
+    deadline: Optional[float],
+    latency_model: Optional[GenerationLatencyModel],
+    num_images: int = 1,
+) -> List[Image.Image] | None:
     device = _get_device()
-    logger.info(f"Generating image for prompt: '{prompt}' using {model_id} on {device}")
+    logger.info(f"Generating {num_images} image(s) for prompt: '{prompt}' using {model_id} on {device}")
+
+    # Kích thước thực tế (pipeline mặc định dùng sample_size * vae_scale_factor)
+    # (config của UNet ONNX trong optimum là dict thường, không có truy cập thuộc tính)
+    unet_config = pipeline.unet.config
+    sample_size = unet_config["sample_size"] if isinstance(unet_config, dict) else unet_config.sample_size
+    default_size = sample_size * pipeline.vae_scale_factor
+    height = height or default_size
+    width = width or default_size
+
+    step_times = []
+    last_step_at = [time.time()]
+
+    def _on_step_end(pipe, step_index, timestep, callback_kwargs):
+        now = time.time()
+        step_times.append(now - last_step_at[0])
+        last_step_at[0] = now
+        if deadline is not None and latency_model is not None:
+            steps_remaining = num_inference_steps - (step_index + 1)
+            if not latency_model.is_deadline_reachable(
+                steps_remaining, height, width, deadline, num_images
+            ):
+                raise GenerationAborted(
+                    f"Deadline unreachable after step {step_index + 1}/{num_inference_steps}"
+                )
+        return callback_kwargs
+
+    def _on_step(step_index, timestep, latents):
+        # Callback kiểu cũ (callback/callback_steps) của pipeline ONNX trong optimum
+        _on_step_end(pipeline, step_index, timestep, {})
 
     try:
         # Chạy inference
-        # Sử dụng torch.Generator để có thể đặt seed nếu muốn kết quả lặp lại
-        generator = torch.Generator(device=str(device)) # Có thể đặt seed: .manual_seed(some_seed)
-        with torch.inference_mode(): # Tối ưu bộ nhớ khi inference
+        if "callback_on_step_end" in inspect.signature(pipeline.__call__).parameters:
+            # Sử dụng torch.Generator để có thể đặt seed nếu muốn kết quả lặp lại
+            generator = torch.Generator(device=str(device)) # Có thể đặt seed: .manual_seed(some_seed)
+            call_kwargs = {"generator": generator, "callback_on_step_end": _on_step_end}
+        else:
+            call_kwargs = {"callback": _on_step, "callback_steps": 1}
+        with _get_generation_lock(cache_key), torch.inference_mode(): # Tối ưu bộ nhớ khi inference
+             # Đo thời gian sau khi có lock: thời gian chờ task khác không tính vào latency model
+             start_time = time.time()
+             last_step_at[0] = start_time
              # Chuyển pipeline sang chế độ eval nếu có (một số pipeline cần)
              # if hasattr(pipeline, 'eval'): pipeline.eval()
-             image = pipeline(
+             images = pipeline(
                  prompt,
                  num_inference_steps=num_inference_steps,
                  guidance_scale=guidance_scale,
-                 generator=generator
-             ).images[0] # Lấy ảnh đầu tiên từ kết quả
+                 height=height,
+                 width=width,
+                 num_images_per_prompt=num_images,
+                 **call_kwargs,
+             ).images
+        total_duration = time.time() - start_time
 
-        logger.info("Image generated successfully.")
-        return image
+        if latency_model is not None and step_times:
+            latency_model.record(
+                num_inference_steps=len(step_times),
+                height=height,
+                width=width,
+                total_seconds=total_duration,
+                step_seconds=_mean_step_seconds(step_times),
+                batch_size=num_images,
+            )
+
+        logger.info(
+            f"Image generated successfully ({num_images}x {num_inference_steps} steps, {width}x{height}, {total_duration:.2f}s)."
+        )
+        return list(images)
+    except GenerationAborted as e:
+        logger.warning(f"Image generation aborted for prompt '{prompt[:50]}': {e}")
+        if latency_model is not None and step_times:
+            # Per-step timings from the partial run are still valid measurements
+            latency_model.record(
+                num_inference_steps=len(step_times),
+                height=height,
+                width=width,
+                total_seconds=sum(step_times)
+                + latency_model.estimate_overhead_seconds(height, width, num_images),
+                step_seconds=_mean_step_seconds(step_times),
+                batch_size=num_images,
+            )
+        return None
     except Exception as e:
         logger.exception(f"Error during image generation for prompt '{prompt}': {e}")
         return None
 
-def image_to_base64(image: Image.Image, format="PNG") -> str | None:
-    """Chuyển đổi đối tượng PIL Image sang chuỗi base64."""
+def image_to_base64(
+    image: Image.Image,
+    format="PNG",
+    quality: int = 90,
+    max_edge: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> str | None:
+    """
+    Chuyển đổi đối tượng PIL Image sang chuỗi base64.
+
+    Args:
+        image: Ảnh cần encode.
+        format: PNG, JPEG hoặc WEBP.
+        quality: Chất lượng JPEG/WebP (1-100).
+        max_edge: Cạnh dài nhất sau khi thu nhỏ (None = giữ nguyên kích thước).
+        max_bytes: Kích thước tối đa sau khi encode (giảm chất lượng rồi kích thước nếu vượt).
+    """
     if not image:
         return None
     try:
-        buffered = BytesIO()
-        image.save(buffered, format=format)
-        img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-        return img_str
+        spec = OutputSpec(format=format, quality=quality, max_edge=max_edge, max_bytes=max_bytes)
+        return encode_image_base64(image, spec)
     except Exception as e:
         logger.error(f"Failed to convert image to base64: {e}")
         return None
@@ -0,0 +1,231 @@
+"""
+Online latency model for the miner's own image generation.
+
+The miner records how long each diffusion step and the fixed per-run overhead
+(text encoding, VAE decode) actually took on this host. Costs are tracked per
+megapixel so a measurement at one resolution can be reused to plan another.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Square resolutions tried by the planner, largest first (multiples of 64 for SD UNets)
+DEFAULT_RESOLUTIONS = (512, 448, 384, 320, 256)
+
+# Conservative priors used until the first real run has been measured (CPU, tiny-sd)
+DEFAULT_STEP_COST_PER_MPX = 2.0
+DEFAULT_OVERHEAD_PER_MPX = 4.0
+
+
+@dataclass
+class GenerationPlan:
+    """Steps and resolution chosen for one generation run."""
+
+    num_inference_steps: int
+    height: int
+    width: int
+    estimated_seconds: float
+
+
+class GenerationLatencyModel:
+    """
+    Exponentially smoothed model of generation cost on this host.
+
+    duration ≈ megapixels * (overhead_per_mpx + steps * step_cost_per_mpx)
+
+    A batch of N images counts as N times the megapixels. Batched runs are
+    recorded the same way, so if batching is sub-linear on this host the
+    learned per-megapixel costs come out lower.
+    """
+
+    def __init__(
+        self,
+        step_cost_per_mpx: float = DEFAULT_STEP_COST_PER_MPX,
+        overhead_per_mpx: float = DEFAULT_OVERHEAD_PER_MPX,
+        smoothing: float = 0.3,
+        safety_factor: float = 1.15,
+        state_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            step_cost_per_mpx: Initial seconds per diffusion step per megapixel.
+            overhead_per_mpx: Initial non-step seconds per megapixel.
+            smoothing: EMA weight given to each new measurement (0-1].
+            safety_factor: Multiplier applied to estimates when planning.
+            state_path: Optional JSON file used to persist the model across restarts.
+        """
+        self.step_cost_per_mpx = step_cost_per_mpx
+        self.overhead_per_mpx = overhead_per_mpx
+        self.smoothing = smoothing
+        self.safety_factor = safety_factor
+        self.state_path = state_path
+        self.samples = 0
+        self._lock = threading.Lock()
+
+        if state_path:
+            self._load_state(state_path)
+
+    # --- Estimation ---
+    @staticmethod
+    def _megapixels(height: int, width: int, batch_size: int = 1) -> float:
+        return (height * width * batch_size) / 1_000_000
+
+    def estimate_step_seconds(self, height: int, width: int, batch_size: int = 1) -> float:
+        """Expected duration of a single diffusion step at this resolution."""
+        return self.step_cost_per_mpx * self._megapixels(height, width, batch_size)
+
+    def estimate_overhead_seconds(self, height: int, width: int, batch_size: int = 1) -> float:
+        """Expected non-step duration (text encoder, VAE decode) at this resolution."""
+        return self.overhead_per_mpx * self._megapixels(height, width, batch_size)
+
+    def estimate(self, num_inference_steps: int, height: int, width: int, batch_size: int = 1) -> float:
+        """Expected wall-clock duration of a full run, including the safety factor."""
+        raw = self.estimate_overhead_seconds(
+            height, width, batch_size
+        ) + num_inference_steps * self.estimate_step_seconds(height, width, batch_size)
+        return raw * self.safety_factor
+
+    def plan(
+        self,
+        time_budget_s: float,
+        max_steps: int = 25,
+        min_steps: int = 4,
+        preferred_min_steps: int = 12,
+        resolutions: Sequence[int] = DEFAULT_RESOLUTIONS,
+    ) -> Optional[GenerationPlan]:
+        """
+        Pick the largest resolution and step count that fit in the time budget.
+
+        A resolution is only kept if at least `preferred_min_steps` fit; otherwise
+        the smallest resolution is tried with as few as `min_steps`.
+
+        Returns:
+            GenerationPlan, or None if not even the cheapest run fits.
+        """
+        if time_budget_s <= 0:
+            return None
+
+        ordered = sorted(set(resolutions), reverse=True)
+        floor_steps = min(preferred_min_steps, max_steps)
+        for size in ordered:
+            steps = self._max_steps_within(time_budget_s, size, size, max_steps)
+            if steps >= floor_steps:
+                return GenerationPlan(steps, size, size, self.estimate(steps, size, size))
+
+        smallest = ordered[-1]
+        steps = self._max_steps_within(time_budget_s, smallest, smallest, max_steps)
+        if steps >= min(min_steps, max_steps):
+            return GenerationPlan(
+                steps, smallest, smallest, self.estimate(steps, smallest, smallest)
+            )
+        return None
+
+    def _max_steps_within(
+        self, time_budget_s: float, height: int, width: int, max_steps: int
+    ) -> int:
+        usable = time_budget_s / self.safety_factor - self.estimate_overhead_seconds(
+            height, width
+        )
+        step_s = self.estimate_step_seconds(height, width)
+        if usable <= 0 or step_s <= 0:
+            return 0
+        return max(0, min(max_steps, math.floor(usable / step_s)))
+
+    def max_batch_within(
+        self, time_budget_s: float, num_inference_steps: int, height: int, width: int, max_batch: int
+    ) -> int:
+        """Largest batch size (<= max_batch) whose estimate fits the budget; 0 if none does."""
+        for batch_size in range(max_batch, 0, -1):
+            if self.estimate(num_inference_steps, height, width, batch_size) <= time_budget_s:
+                return batch_size
+        return 0
+
+    def is_deadline_reachable(
+        self, steps_remaining: int, height: int, width: int, deadline: float, batch_size: int = 1
+    ) -> bool:
+        """Whether the remaining steps plus decode can still finish before `deadline`."""
+        remaining_s = steps_remaining * self.estimate_step_seconds(
+            height, width, batch_size
+        ) + self.estimate_overhead_seconds(height, width, batch_size)
+        return time.time() + remaining_s <= deadline
+
+    # --- Learning ---
+    def record(
+        self,
+        num_inference_steps: int,
+        height: int,
+        width: int,
+        total_seconds: float,
+        step_seconds: Optional[float] = None,
+        batch_size: int = 1,
+    ) -> None:
+        """
+        Fold one measured run into the model.
+
+        Args:
+            num_inference_steps: Number of steps that actually ran.
+            height: Generated image height.
+            width: Generated image width.
+            total_seconds: Wall-clock duration of the whole pipeline call.
+            step_seconds: Mean measured duration of one step, if known.
+            batch_size: Images generated by the call.
+        """
+        mpx = self._megapixels(height, width, batch_size)
+        if mpx <= 0 or num_inference_steps <= 0 or total_seconds <= 0:
+            return
+
+        if step_seconds is None:
+            # Without per-step timings, attribute everything beyond the current
+            # overhead estimate to the steps.
+            step_seconds = max(
+                total_seconds - self.estimate_overhead_seconds(height, width, batch_size), 0.0
+            ) / num_inference_steps
+        overhead_seconds = max(total_seconds - step_seconds * num_inference_steps, 0.0)
+
+        with self._lock:
+            alpha = 1.0 if self.samples == 0 else self.smoothing
+            self.step_cost_per_mpx += alpha * (step_seconds / mpx - self.step_cost_per_mpx)
+            self.overhead_per_mpx += alpha * (overhead_seconds / mpx - self.overhead_per_mpx)
+            self.samples += 1
+
+        logger.debug(
+            f"Latency model updated: {self.step_cost_per_mpx:.3f}s/step/MPx, "
+            f"{self.overhead_per_mpx:.3f}s overhead/MPx ({self.samples} samples)"
+        )
+        if self.state_path:
+            self._save_state(self.state_path)
+
+    # --- Persistence ---
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "step_cost_per_mpx": self.step_cost_per_mpx,
+            "overhead_per_mpx": self.overhead_per_mpx,
+            "samples": self.samples,
+        }
+
+    def _load_state(self, path: str) -> None:
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            self.step_cost_per_mpx = float(data["step_cost_per_mpx"])
+            self.overhead_per_mpx = float(data["overhead_per_mpx"])
+            self.samples = int(data.get("samples", 0))
+            logger.info(f"📈 Loaded generation latency model from {path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load latency model from {path}: {e}")
+
+    def _save_state(self, path: str) -> None:
+        try:
+            with open(path, "w") as f:
+                json.dump(self.to_dict(), f)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not save latency model to {path}: {e}")
@@ -0,0 +1,302 @@
+"""
+Bounded, shared cache for loaded models.
+
+Replaces the per-module unbounded dicts (`_pipeline_cache`, `_clip_model_cache`)
+with one manager per process that:
+- keeps total model memory under a budget (MODEL_MEMORY_BUDGET_MB),
+- evicts least-recently-used models, but never one that is in use
+  (reference counted through `use()` / `acquire()`),
+- loads each model once even under concurrent requests,
+- can preload the next model in the background so a runtime switch
+  (A/B test, model upgrade) needs no restart and no cold start.
+"""
+
+import gc
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """
+    Memory held by a model's tensors.
+
+    Understands torch modules, diffusers pipelines (via `.components`) and
+    tuples/lists/dicts of those (e.g. CLIP's (model, preprocess)).
+    """
+    seen = set()
+
+    def _module_bytes(obj) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        if isinstance(obj, (tuple, list)):
+            return sum(_module_bytes(item) for item in obj)
+        if isinstance(obj, dict):
+            return sum(_module_bytes(item) for item in obj.values())
+        components = getattr(obj, "components", None)
+        if isinstance(components, dict):
+            return sum(_module_bytes(item) for item in components.values())
+        if hasattr(obj, "parameters") and hasattr(obj, "buffers"):
+            tensors = list(obj.parameters()) + list(obj.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        return 0
+
+    return _module_bytes(model)
+
+
+class _Entry:
+    def __init__(self):
+        self.model: Any = None
+        self.size_bytes = 0
+        self.refcount = 0
+        self.last_used = time.time()
+        self.loaded = threading.Event()
+        self.error: Optional[BaseException] = None
+        # Dropped as soon as the last reference is released (see retire())
+        self.retired = False
+
+
+class ModelManager:
+    """Process-wide LRU cache of loaded models with reference counting and a memory budget."""
+
+    def __init__(
+        self,
+        memory_budget_mb: Optional[float] = None,
+        size_estimator: Callable[[Any], int] = estimate_model_bytes,
+    ):
+        """
+        Args:
+            memory_budget_mb: Max total size of cached models (None = unbounded).
+            size_estimator: Returns the bytes held by a loaded model.
+        """
+        self.memory_budget_bytes = None if memory_budget_mb is None else int(memory_budget_mb * _MB)
+        self.size_estimator = size_estimator
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._lock = threading.RLock()
+
+    # --- Loading / reference counting ---
+    def acquire(self, key: Hashable, loader: Callable[[], Any], size_hint_mb: Optional[float] = None) -> Any:
+        """
+        Return the model for `key`, loading it with `loader()` if needed, and take a reference.
+
+        Every acquire() must be paired with release(key); prefer `use()`.
+
+        Args:
+            key: Cache key (e.g. (model_id, device, profile)).
+            loader: Loads the model; returning None counts as a failure.
+            size_hint_mb: Expected size; idle models are evicted first to make room.
+
+        Raises:
+            RuntimeError: If the loader fails.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                if size_hint_mb:
+                    self._evict_until_fits(int(size_hint_mb * _MB), exclude=key)
+                entry = self._entries[key] = _Entry()
+            entry.retired = False
+            entry.refcount += 1
+
+        if owner:
+            self._load(key, entry, loader)
+        else:
+            entry.loaded.wait()
+
+        if entry.error is not None:
+            self.release(key)
+            raise RuntimeError(f"Loading model {key} failed: {entry.error}") from entry.error
+        entry.last_used = time.time()
+        return entry.model
+
+    def release(self, key: Hashable):
+        """Drop a reference taken by acquire(); idle models become evictable."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refcount = max(0, entry.refcount - 1)
+            entry.last_used = time.time()
+            if entry.error is not None and entry.refcount == 0:
+                # Failed loads are not cached, the next acquire retries
+                del self._entries[key]
+            elif entry.refcount == 0 and entry.retired:
+                self._drop(key)
+            elif entry.refcount == 0:
+                self._evict_until_fits(0, exclude=key)
+
+    @contextmanager
+    def use(self, key: Hashable, loader: Callable[[], Any], size_hint_mb: Optional[float] = None) -> Iterator[Any]:
+        """`with manager.use(key, loader) as model:` - the model cannot be evicted inside the block."""
+        model = self.acquire(key, loader, size_hint_mb)
+        try:
+            yield model
+        finally:
+            self.release(key)
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Load (or fetch) and cache a model without holding a reference."""
+        model = self.acquire(key, loader)
+        self.release(key)
+        return model
+
+    def preload(self, key: Hashable, loader: Callable[[], Any]) -> Future:
+        """Load a model in a background thread; the Future resolves to the model (or the load error)."""
+        future: Future = Future()
+
+        def _run():
+            try:
+                future.set_result(self.get(key, loader))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=_run, name=f"model-preload-{key}", daemon=True).start()
+        return future
+
+    def _load(self, key: Hashable, entry: _Entry, loader: Callable[[], Any]):
+        start = time.time()
+        try:
+            model = loader()
+            if model is None:
+                raise RuntimeError("loader returned None")
+            entry.model = model
+            entry.size_bytes = self.size_estimator(model)
+            logger.info(
+                f"📦 Model {key} loaded in {time.time() - start:.2f}s ({entry.size_bytes / _MB:.0f} MiB, "
+                f"cache total {self.total_bytes() / _MB:.0f} MiB)"
+            )
+        except BaseException as e:
+            entry.error = e
+            logger.error(f"❌ Loading model {key} failed: {e}")
+        finally:
+            entry.loaded.set()
+        if entry.error is None:
+            with self._lock:
+                self._evict_until_fits(0, exclude=key)
+
+    # --- Eviction ---
+    def _evict_until_fits(self, incoming_bytes: int, exclude: Optional[Hashable] = None):
+        """Evict idle LRU models until cache + incoming fits the budget (caller holds the lock)."""
+        if self.memory_budget_bytes is None:
+            return
+        idle = sorted(
+            (
+                (entry.last_used, key)
+                for key, entry in self._entries.items()
+                if key != exclude and entry.refcount == 0 and entry.loaded.is_set()
+            ),
+            key=lambda item: item[0],
+        )
+        for _, key in idle:
+            if self.total_bytes() + incoming_bytes <= self.memory_budget_bytes:
+                break
+            self._drop(key)
+        if self.total_bytes() + incoming_bytes > self.memory_budget_bytes:
+            logger.warning(
+                f"⚠️ Model cache {self.total_bytes() / _MB:.0f} MiB exceeds budget "
+                f"{self.memory_budget_bytes / _MB:.0f} MiB; remaining models are in use"
+            )
+
+    def evict(self, key: Hashable) -> bool:
+        """Evict one model if it is idle. Returns True if it was removed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refcount > 0:
+                return False
+            self._drop(key)
+            return True
+
+    def retire(self, key: Hashable) -> bool:
+        """
+        Evict a model that is no longer wanted (e.g. after a model switch), even
+        without a memory budget: now if idle, otherwise when its last user releases it.
+
+        Returns:
+            True if it was removed immediately.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry.refcount > 0:
+                entry.retired = True
+                logger.info(f"⏳ Model {key} retired; evicting after {entry.refcount} in-flight user(s) finish")
+                return False
+            self._drop(key)
+            return True
+
+    def clear(self):
+        """Evict every idle model."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.refcount == 0]:
+                self._drop(key)
+
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key)
+        logger.info(f"🗑️ Evicting model {key} ({entry.size_bytes / _MB:.0f} MiB)")
+        entry.model = None
+        gc.collect()
+        _empty_device_cache()
+
+    # --- Introspection ---
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return [key for key, entry in self._entries.items() if entry.loaded.is_set() and entry.error is None]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.keys()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budget_mb": None if self.memory_budget_bytes is None else self.memory_budget_bytes / _MB,
+                "total_mb": self.total_bytes() / _MB,
+                "models": [
+                    {
+                        "key": str(key),
+                        "size_mb": entry.size_bytes / _MB,
+                        "refcount": entry.refcount,
+                        "loaded": entry.loaded.is_set(),
+                        "idle_seconds": time.time() - entry.last_used,
+                    }
+                    for key, entry in self._entries.items()
+                ],
+            }
+
+
+def _empty_device_cache():
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+_manager: Optional[ModelManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_model_manager() -> ModelManager:
+    """The process-wide manager shared by the generator and the CLIP scorer."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            budget = os.getenv("MODEL_MEMORY_BUDGET_MB")
+            _manager = ModelManager(memory_budget_mb=float(budget) if budget else None)
+        return _manager
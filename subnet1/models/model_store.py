@@ -0,0 +1,45 @@
+"""
+Offline model directory.
+
+`scripts/convert_models_to_safetensors.py` writes safetensors copies of the
+generation pipeline and the CLIP scorer here once; miners and validators
+then load from local files (memory-mapped) instead of pickled `.bin`
+checkpoints from the Hugging Face cache.
+
+Layout:
+    <model dir>/<org>--<name>/            diffusers pipeline (save_pretrained)
+    <model dir>/clip/<ViT-B-32>.safetensors  CLIP state dict
+"""
+
+import os
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_MODEL_DIR = str(Path(__file__).resolve().parents[2] / "model_store")
+
+
+def model_dir() -> str:
+    """Root of the offline model directory (SUBNET1_MODEL_DIR)."""
+    return os.getenv("SUBNET1_MODEL_DIR", DEFAULT_MODEL_DIR)
+
+
+def pipeline_dir(model_id: str, root: Optional[str] = None) -> str:
+    """Where the safetensors copy of a diffusers pipeline lives."""
+    return os.path.join(root or model_dir(), model_id.replace("/", "--"))
+
+
+def clip_weights_path(model_name: str, root: Optional[str] = None) -> str:
+    """Where the safetensors copy of a CLIP model lives (e.g. "ViT-B/32")."""
+    return os.path.join(root or model_dir(), "clip", f"{model_name.replace('/', '-')}.safetensors")
+
+
+def find_local_pipeline(model_id: str) -> Optional[str]:
+    """Offline pipeline directory for `model_id`, if it has been converted."""
+    path = pipeline_dir(model_id)
+    return path if os.path.exists(os.path.join(path, "model_index.json")) else None
+
+
+def find_local_clip(model_name: str) -> Optional[str]:
+    """Offline CLIP weights for `model_name`, if they have been converted."""
+    path = clip_weights_path(model_name)
+    return path if os.path.exists(path) else None
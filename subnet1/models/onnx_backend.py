@@ -0,0 +1,144 @@
+"""
+ONNX Runtime backend for the image generation pipeline (CPU).
+
+Exports the text encoder, UNet and VAE decoder of a diffusers model to ONNX
+once (into the offline model directory), optionally quantizes the weights to
+int8, and loads them as an `ORTStableDiffusionPipeline` with full graph
+optimizations. The pipeline is called exactly like the PyTorch one, so
+`generate_image_from_prompt` works unchanged.
+
+Requires `optimum[onnxruntime]` (optional dependency). Select with
+IMAGEGEN_BACKEND=onnx (or onnx-int8).
+"""
+
+import logging
+import os
+import shutil
+from typing import Optional
+
+from .generation_profiles import GenerationProfile
+from .model_store import model_dir
+
+logger = logging.getLogger(__name__)
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+BACKEND_ONNX_INT8 = "onnx-int8"
+BACKENDS = (BACKEND_TORCH, BACKEND_ONNX, BACKEND_ONNX_INT8)
+
+# Components with int8 weights in the quantized export. The VAE decoder stays
+# fp32: it is cheap relative to the UNet and quantizing it visibly bands colors.
+QUANTIZED_COMPONENTS = ("unet", "text_encoder")
+
+
+def backend_from_env() -> str:
+    """Generation backend from IMAGEGEN_BACKEND (torch, onnx, onnx-int8)."""
+    backend = os.getenv("IMAGEGEN_BACKEND", BACKEND_TORCH).lower()
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown IMAGEGEN_BACKEND '{backend}'. Using {BACKEND_TORCH}.")
+        return BACKEND_TORCH
+    return backend
+
+
+def is_available() -> bool:
+    """True if optimum's ONNX Runtime integration is installed."""
+    try:
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def onnx_model_dir(model_id: str, quantized: bool = False, root: Optional[str] = None) -> str:
+    """Where the ONNX export of `model_id` lives in the offline model directory."""
+    suffix = "onnx-int8" if quantized else "onnx"
+    return os.path.join(root or model_dir(), f"{model_id.replace('/', '--')}--{suffix}")
+
+
+def export_onnx(model_id: str, output_dir: Optional[str] = None) -> str:
+    """
+    Export `model_id` (Hub ID or local diffusers directory) to ONNX.
+
+    Returns:
+        The export directory.
+    """
+    from optimum.onnxruntime import ORTStableDiffusionPipeline
+
+    output_dir = output_dir or onnx_model_dir(model_id)
+    logger.info(f"📤 Exporting {model_id} to ONNX at {output_dir} (one-time, may take a few minutes)...")
+    pipeline = ORTStableDiffusionPipeline.from_pretrained(model_id, export=True)
+    pipeline.save_pretrained(output_dir)
+    return output_dir
+
+
+def quantize_onnx(source_dir: str, output_dir: str) -> str:
+    """
+    Copy an ONNX export and quantize the weights of QUANTIZED_COMPONENTS to int8.
+
+    Dynamic quantization: int8 weights, activations quantized on the fly, so no
+    calibration data is needed.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    shutil.copytree(source_dir, output_dir, dirs_exist_ok=True)
+    for component in QUANTIZED_COMPONENTS:
+        model_path = os.path.join(source_dir, component, "model.onnx")
+        if not os.path.exists(model_path):
+            logger.warning(f"No {component} in {source_dir}; skipping quantization")
+            continue
+        target = os.path.join(output_dir, component, "model.onnx")
+        logger.info(f"🗜️ Quantizing {component} weights to int8...")
+        quantize_dynamic(
+            model_path,
+            target,
+            weight_type=QuantType.QInt8,
+            use_external_data_format=os.path.exists(model_path + "_data"),
+        )
+    return output_dir
+
+
+def ensure_export(model_id: str, quantized: bool = False, source: Optional[str] = None) -> str:
+    """
+    Export (and quantize) on first use; later calls reuse the files on disk.
+
+    Args:
+        model_id: Model name used for the export directory.
+        quantized: Also produce the int8 copy and return its directory.
+        source: What to export from (local diffusers copy or Hub ID; default model_id).
+    """
+    fp32_dir = onnx_model_dir(model_id)
+    if not os.path.exists(os.path.join(fp32_dir, "model_index.json")):
+        export_onnx(source or model_id, fp32_dir)
+    if not quantized:
+        return fp32_dir
+    int8_dir = onnx_model_dir(model_id, quantized=True)
+    if not os.path.exists(os.path.join(int8_dir, "model_index.json")):
+        quantize_onnx(fp32_dir, int8_dir)
+    return int8_dir
+
+
+def load_onnx_pipeline(source: str, model_id: str, profile: GenerationProfile, quantized: bool = False):
+    """
+    Load the ONNX Runtime pipeline for `model_id`, exporting it first if needed.
+
+    Args:
+        source: What to export from (local diffusers copy or Hub ID).
+        model_id: Model name used for the export directory.
+        profile: Generation profile (threads and scheduler are honored).
+        quantized: Use int8 weights.
+    """
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTStableDiffusionPipeline
+
+    path = ensure_export(model_id, quantized, source=source)
+
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if profile.num_threads:
+        session_options.intra_op_num_threads = profile.num_threads
+
+    pipeline = ORTStableDiffusionPipeline.from_pretrained(
+        path, provider="CPUExecutionProvider", session_options=session_options
+    )
+    logger.info(f"🧩 ONNX Runtime pipeline loaded from {path} ({'int8' if quantized else 'fp32'} weights)")
+    return pipeline
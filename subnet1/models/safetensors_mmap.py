@@ -0,0 +1,140 @@
+"""
+Memory-mapped safetensors weights.
+
+`from_pretrained` copies every weight into private process memory, so N
+generation workers hold N copies of the model. Rebinding a module's
+parameters to tensors backed by a copy-on-write mmap of the safetensors
+file lets all workers share the same page-cache pages (weights are
+read-only during inference) and lets the kernel page them in lazily.
+"""
+
+import json
+import logging
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# safetensors dtype tags -> torch dtypes
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+# Weight files of each StableDiffusionPipeline component inside a model directory
+PIPELINE_WEIGHT_FILES = {
+    "unet": "unet/diffusion_pytorch_model.safetensors",
+    "vae": "vae/diffusion_pytorch_model.safetensors",
+    "text_encoder": "text_encoder/model.safetensors",
+}
+
+
+def read_safetensors_header(path: str) -> Tuple[Dict[str, dict], int]:
+    """
+    Read the JSON header of a safetensors file.
+
+    Returns:
+        (header, data_start): tensor entries and the byte offset where tensor data begins.
+    """
+    with open(path, "rb") as f:
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+    return header, 8 + header_size
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Load every tensor of a safetensors file as a view on one private mmap of the file.
+
+    Pages stay shared with other processes mapping the same file until written.
+    """
+    header, data_start = read_safetensors_header(path)
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    tensors = {}
+    for name, info in header.items():
+        dtype = _DTYPES[info["dtype"]]
+        begin, _ = info["data_offsets"]
+        tensor = torch.empty(0, dtype=dtype)
+        offset = data_start + begin
+        if offset % tensor.element_size():
+            raise ValueError(f"Tensor '{name}' in {path} is not aligned for {dtype}; cannot map it")
+        tensor.set_(storage, offset // tensor.element_size(), info["shape"])
+        tensors[name] = tensor
+    return tensors
+
+
+def share_module_weights(module: torch.nn.Module, path: str) -> bool:
+    """
+    Rebind a module's parameters/buffers to mmap-backed tensors from `path`.
+
+    Only done when every mapped tensor already has the module's dtype (a cast
+    would copy anyway) and torch supports load_state_dict(assign=True) (>= 2.1).
+
+    Returns:
+        True if the weights now come from the mmap.
+    """
+    mapped = load_safetensors_mmap(path)
+    current = module.state_dict()
+    for name, tensor in mapped.items():
+        target = current.get(name)
+        if target is not None and (target.dtype != tensor.dtype or target.shape != tensor.shape):
+            logger.info(
+                f"Not sharing {os.path.basename(path)}: '{name}' is {target.dtype} in memory but {tensor.dtype} on disk"
+            )
+            return False
+    try:
+        module.load_state_dict(mapped, strict=False, assign=True)
+    except TypeError:
+        # assign= needs torch>=2.1; the module keeps its own (already loaded) copy
+        logger.info(f"Not sharing {os.path.basename(path)}: torch {torch.__version__} cannot assign mmap tensors")
+        return False
+    return True
+
+
+def resolve_model_dir(model_id: str) -> Optional[str]:
+    """Local directory holding `model_id` (a path, or its Hugging Face cache snapshot)."""
+    if os.path.isdir(model_id):
+        return model_id
+    try:
+        from huggingface_hub import snapshot_download
+
+        return snapshot_download(model_id, local_files_only=True)
+    except Exception as e:
+        logger.warning(f"No local snapshot of {model_id}: {e}")
+        return None
+
+
+def share_pipeline_weights(pipeline, model_id: str) -> int:
+    """
+    Map the UNet, VAE and text encoder weights of a loaded pipeline from safetensors.
+
+    Returns:
+        Number of components now backed by shared pages.
+    """
+    model_dir = resolve_model_dir(model_id)
+    if model_dir is None:
+        return 0
+    shared = 0
+    for component, relative_path in PIPELINE_WEIGHT_FILES.items():
+        module = getattr(pipeline, component, None)
+        path = os.path.join(model_dir, relative_path)
+        if module is None or not os.path.exists(path):
+            continue
+        try:
+            shared += share_module_weights(module, path)
+        except Exception as e:
+            logger.warning(f"Could not memory-map {component} weights from {path}: {e}")
+    logger.info(f"🗺️ {shared}/{len(PIPELINE_WEIGHT_FILES)} pipeline components memory-mapped from {model_dir}")
+    return shared
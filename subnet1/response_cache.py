@@ -0,0 +1,161 @@
+"""
+Pre-serialized, ETag-validated HTTP responses for data that peers poll.
+
+Finalized consensus cycle results never change, yet peers and monitoring
+tools poll them repeatedly. The cache keeps each payload as encoded JSON
+bytes (orjson when available) with a content-hash ETag, so a repeated
+poll is a dictionary lookup, and a poll carrying a matching If-None-Match
+header gets an empty 304. Entries are LRU-bounded; mutable data (status)
+can be cached with a short TTL instead of forever.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Union
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+JSON_MEDIA_TYPE = "application/json"
+
+
+def encode_json(payload: Any) -> bytes:
+    """JSON bytes via orjson (numpy arrays, non-str keys allowed), json as fallback."""
+    if orjson is not None:
+        return orjson.dumps(
+            payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str
+        )
+    return json.dumps(payload, default=str, separators=(",", ":")).encode()
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return any(c == "*" or c.removeprefix("W/") == etag for c in candidates)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    created: float
+    # None = never expires (finalized data)
+    expires: Optional[float] = None
+    status_code: int = 200
+
+    @property
+    def expired(self) -> bool:
+        return self.expires is not None and time.monotonic() >= self.expires
+
+
+def make_entry(payload: Union[bytes, Any], ttl: Optional[float] = None, status_code: int = 200) -> CachedResponse:
+    """Encode a payload (unless already bytes) into a CachedResponse without storing it."""
+    body = bytes(payload) if isinstance(payload, (bytes, bytearray)) else encode_json(payload)
+    return CachedResponse(
+        body=body,
+        etag=make_etag(body),
+        created=time.time(),
+        expires=time.monotonic() + ttl if ttl is not None else None,
+        status_code=status_code,
+    )
+
+
+class ResponseCache:
+    """LRU cache of encoded responses keyed by (route, params)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Updated under _lock, like the entries
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expired:
+                if entry is not None:
+                    del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(
+        self, key: Hashable, payload: Union[bytes, Any], ttl: Optional[float] = None, status_code: int = 200
+    ) -> CachedResponse:
+        """Encode (unless already bytes) and store a payload; ttl None = keep until evicted."""
+        entry = make_entry(payload, ttl, status_code)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return entry
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def respond(
+        self,
+        key: Hashable,
+        if_none_match: Optional[str],
+        build: Callable[[], Awaitable[Optional[CachedResponse]]],
+    ) -> Response:
+        """
+        Serve `key` from cache (304 on a matching ETag), building it with `build` on a miss.
+
+        `build` stores the entry itself (or returns an uncached one) and may
+        return None when there is nothing to serve.
+        """
+        entry = self.get(key)
+        if entry is None:
+            self._count("misses")
+            entry = await build()
+            if entry is None:
+                return Response(status_code=404)
+        else:
+            self._count("hits")
+        return self.to_response(entry, if_none_match)
+
+    def to_response(self, entry: CachedResponse, if_none_match: Optional[str] = None) -> Response:
+        headers = {"ETag": entry.etag}
+        headers["Cache-Control"] = (
+            "public, max-age=31536000, immutable" if entry.expires is None
+            else f"max-age={max(0, int(entry.expires - time.monotonic()))}"
+        )
+        if entry.status_code == 200 and etag_matches(if_none_match, entry.etag):
+            self._count("not_modified")
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, status_code=entry.status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        return {"entries": len(self), "max_entries": self.max_entries, **stats}
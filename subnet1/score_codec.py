@@ -0,0 +1,228 @@
+"""
+Compact binary encoding of per-slot scores exchanged between validators.
+
+Peers used to exchange {hex_miner_uid: float} JSON dicts, which grow by ~50
+bytes per miner and cost a full JSON parse. This codec sends the same scores
+as two packed arrays:
+
+- miner indices into the metagraph-ordered miner list (uint16, or uint32 on
+  metagraphs with more than 65535 miners), stored as sorted first differences;
+- scores quantized to the contract fixed point (aggregation.SCORE_SCALE) as
+  uint32, or as int32 differences against the sender's previous slot.
+
+The body is optionally zlib-compressed. A header carries the slot, the base
+slot of a delta frame and a fingerprint of the miner list, so a peer with a
+different metagraph view (or without the base slot) rejects the frame with
+ScoreCodecError instead of misreading it. encode_payload/decode_payload fall
+back to JSON in those cases.
+
+Typical use:
+
+    codec = ScoreCodec(metagraph_miner_uids)
+    content_type, body = codec.encode_payload(slot, {miner_uid: score})
+    packet = codec.decode_payload(content_type, body, peer=validator_uid)
+    matrix = ScoreMatrix.from_rows({validator_uid: (packet.miner_uids, packet.scores)})
+"""
+
+import json
+import logging
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .aggregation import SCORE_SCALE
+from .response_cache import encode_json
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_BINARY = "application/x-subnet1-scores"
+CONTENT_TYPE_JSON = "application/json"
+
+FORMAT_VERSION = 1
+MAGIC = b"MTSC"
+FLAG_DELTA = 0x01
+FLAG_COMPRESSED = 0x02
+FLAG_WIDE_INDEX = 0x04
+
+# magic, version, flags, reserved, miner-list fingerprint, count, slot, base slot
+_HEADER = struct.Struct("<4sBBHIIqq")
+_NO_BASE_SLOT = -1
+DEFAULT_KEYFRAME_INTERVAL = 10
+
+
+class ScoreCodecError(ValueError):
+    """Frame cannot be encoded or decoded with this codec state (use the JSON fallback)."""
+
+
+def index_fingerprint(miner_uids: Sequence[Hashable]) -> int:
+    """CRC32 of the ordered miner list; both peers must agree on it."""
+    return zlib.crc32("\n".join(str(uid) for uid in miner_uids).encode())
+
+
+@dataclass
+class ScorePacket:
+    """Scores of one slot from one peer, aligned with `miner_uids`."""
+
+    slot: int
+    miner_uids: List[Hashable]
+    scores: np.ndarray
+
+    def to_dict(self) -> Dict[Hashable, float]:
+        return {uid: float(s) for uid, s in zip(self.miner_uids, self.scores)}
+
+
+class ScoreCodec:
+    """Encoder/decoder bound to one metagraph miner ordering."""
+
+    def __init__(
+        self,
+        miner_uids: Sequence[Hashable],
+        compress: bool = True,
+        delta: bool = True,
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+    ):
+        """
+        Args:
+            miner_uids: Miners in metagraph order; a miner's position is its index on the wire.
+            compress: zlib-compress frame bodies.
+            delta: Send scores as differences against our previous slot.
+            keyframe_interval: Send a full frame at least every N slots so peers
+                that missed a slot can resynchronize.
+        """
+        self.miner_uids = list(miner_uids)
+        self.index = {uid: i for i, uid in enumerate(self.miner_uids)}
+        self.fingerprint = index_fingerprint(self.miner_uids)
+        self.wide = len(self.miner_uids) > np.iinfo(np.uint16).max
+        self.compress = compress
+        self.delta = delta
+        self.keyframe_interval = keyframe_interval
+        # Dense quantized vector we last sent (slot, values; 0 = not scored)
+        self._sent: Optional[Tuple[int, np.ndarray]] = None
+        self._frames_since_keyframe = 0
+        # Last decoded dense vector per peer, base for their delta frames
+        self._received: Dict[Hashable, Tuple[int, np.ndarray]] = {}
+
+    # --- Encoding ---
+    def encode(self, slot: int, scores: Mapping[Hashable, float]) -> bytes:
+        """
+        Encode {miner_uid: score} for `slot`.
+
+        Raises:
+            ScoreCodecError: A miner is not in the metagraph ordering.
+        """
+        indices = np.fromiter((self.index.get(uid, -1) for uid in scores), dtype=np.int64, count=len(scores))
+        if (indices < 0).any():
+            unknown = [uid for uid, i in zip(scores, indices) if i < 0]
+            raise ScoreCodecError(f"{len(unknown)} miner(s) not in metagraph index, e.g. {unknown[0]}")
+        values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        order = np.argsort(indices, kind="stable")
+        indices = indices[order]
+        quantized = np.round(np.clip(values[order], 0.0, 1.0) * SCORE_SCALE).astype(np.int64)
+
+        dense = np.zeros(len(self.miner_uids), dtype=np.int64)
+        dense[indices] = quantized
+
+        flags = FLAG_WIDE_INDEX if self.wide else 0
+        base_slot = _NO_BASE_SLOT
+        use_delta = (
+            self.delta and self._sent is not None and self._frames_since_keyframe < self.keyframe_interval
+        )
+        if use_delta:
+            base_slot, previous = self._sent
+            flags |= FLAG_DELTA
+            payload_values = (quantized - previous[indices]).astype("<i4")
+            self._frames_since_keyframe += 1
+        else:
+            payload_values = quantized.astype("<u4")
+            self._frames_since_keyframe = 0
+        self._sent = (int(slot), dense)
+
+        index_diffs = np.diff(indices, prepend=0).astype("<u4" if self.wide else "<u2")
+        body = index_diffs.tobytes() + payload_values.tobytes()
+        if self.compress:
+            body = zlib.compress(body, 1)
+            flags |= FLAG_COMPRESSED
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, flags, 0, self.fingerprint, len(indices), int(slot), base_slot)
+        return header + body
+
+    # --- Decoding ---
+    def decode(self, data: bytes, peer: Hashable) -> ScorePacket:
+        """
+        Decode a frame produced by encode() on a peer with the same miner ordering.
+
+        Args:
+            data: The frame.
+            peer: Sender identity (e.g. validator UID); delta frames are resolved
+                against its previous slot. None decodes keyframes only.
+
+        Raises:
+            ScoreCodecError: Malformed frame, different miner ordering, or a delta
+                frame whose base slot we do not hold for this peer.
+        """
+        if len(data) < _HEADER.size:
+            raise ScoreCodecError("Frame shorter than header")
+        magic, version, flags, _, fingerprint, count, slot, base_slot = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ScoreCodecError(f"Unsupported frame (magic={magic!r}, version={version})")
+        if fingerprint != self.fingerprint:
+            raise ScoreCodecError("Peer uses a different metagraph miner ordering")
+
+        body = data[_HEADER.size:]
+        if flags & FLAG_COMPRESSED:
+            try:
+                body = zlib.decompress(body)
+            except zlib.error as e:
+                raise ScoreCodecError(f"Corrupt frame body: {e}") from e
+        index_dtype = np.dtype("<u4" if flags & FLAG_WIDE_INDEX else "<u2")
+        if len(body) != count * (index_dtype.itemsize + 4):
+            raise ScoreCodecError(f"Frame body has {len(body)} bytes for {count} scores")
+
+        indices = np.cumsum(np.frombuffer(body, dtype=index_dtype, count=count), dtype=np.int64)
+        if count and indices[-1] >= len(self.miner_uids):
+            raise ScoreCodecError("Miner index out of range")
+        offset = count * index_dtype.itemsize
+        if flags & FLAG_DELTA:
+            base = self._received.get(peer) if peer is not None else None
+            if base is None or base[0] != base_slot:
+                raise ScoreCodecError(f"Delta frame for slot {slot} needs base slot {base_slot} from {peer}")
+            deltas = np.frombuffer(body, dtype="<i4", count=count, offset=offset).astype(np.int64)
+            quantized = base[1][indices] + deltas
+        else:
+            quantized = np.frombuffer(body, dtype="<u4", count=count, offset=offset).astype(np.int64)
+
+        dense = np.zeros(len(self.miner_uids), dtype=np.int64)
+        dense[indices] = quantized
+        if peer is not None:
+            self._received[peer] = (int(slot), dense)
+        return ScorePacket(
+            slot=int(slot),
+            miner_uids=[self.miner_uids[i] for i in indices],
+            scores=quantized / SCORE_SCALE,
+        )
+
+    # --- Negotiated exchange with JSON fallback ---
+    def encode_payload(self, slot: int, scores: Mapping[Hashable, float]) -> Tuple[str, bytes]:
+        """(content type, body): binary frame, or JSON if the scores cannot be indexed."""
+        try:
+            return CONTENT_TYPE_BINARY, self.encode(slot, scores)
+        except ScoreCodecError as e:
+            logger.warning(f"⚠️ Falling back to JSON score exchange for slot {slot}: {e}")
+            # Peers did not get a binary frame for this slot: next frame must be a keyframe
+            self._sent = None
+            return CONTENT_TYPE_JSON, encode_json({"slot": int(slot), "scores": dict(scores)})
+
+    def decode_payload(self, content_type: Optional[str], body: bytes, peer: Hashable) -> ScorePacket:
+        """Decode a body sent with encode_payload (or a legacy JSON score dict)."""
+        if content_type and content_type.split(";")[0].strip() == CONTENT_TYPE_BINARY:
+            return self.decode(body, peer)
+        payload = json.loads(body)
+        scores = payload.get("scores", payload) if isinstance(payload, dict) else {}
+        slot = payload.get("slot", -1) if isinstance(payload, dict) and "scores" in payload else -1
+        return ScorePacket(
+            slot=int(slot),
+            miner_uids=list(scores),
+            scores=np.fromiter((float(v) for v in scores.values()), dtype=np.float64, count=len(scores)),
+        )
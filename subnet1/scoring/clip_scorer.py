@@ -4,16 +4,26 @@ from PIL import Image
 import base64
 from io import BytesIO
 import logging
+import os
 import re
-from typing import Optional
+import time
+from concurrent.futures import Future
+from typing import List, Optional
+
+from ..metrics import peak_rss_mb
+from ..models.model_store import find_local_clip
+from ..models.safetensors_mmap import load_safetensors_mmap, share_module_weights
+from ..models.model_manager import get_model_manager
 
 logger = logging.getLogger(__name__)
 
-# Cache cho model và processor
-_clip_model_cache = {}
-_clip_preprocess_cache = {}
+# Model và preprocess được cache trong ModelManager dùng chung của process
+_model_manager = get_model_manager()
 _clip_device_cache = None
 
+# Model CLIP đang dùng để chấm điểm (đổi lúc chạy bằng switch_clip_model)
+_active_clip_model = os.getenv("CLIP_MODEL_NAME", "ViT-B/32")
+
 
 def _safe_base64_decode(base64_string: str) -> bytes:
     """
@@ -73,34 +83,97 @@ def _get_clip_device():
     return _clip_device_cache
 
 
-def load_clip_model(model_name: str = "ViT-B/32"):
-    """Tải và cache model CLIP và preprocessor."""
-    global _clip_model_cache, _clip_preprocess_cache
-    device = _get_clip_device()
-    cache_key = (model_name, str(device))
+def clip_cache_key(model_name: str) -> tuple:
+    """Key of a CLIP model in the model manager."""
+    return ("clip", model_name, str(_get_clip_device()))
+
+
+def load_clip_model(model_name: Optional[str] = None):
+    """Tải và cache model CLIP và preprocessor (None = model đang active)."""
+    model_name = model_name or _active_clip_model
+    try:
+        return _model_manager.get(clip_cache_key(model_name), lambda: _load_clip_uncached(model_name))
+    except RuntimeError:
+        return None, None
 
-    if cache_key in _clip_model_cache:
-        logger.debug(f"Using cached CLIP model/preprocess for {model_name} on {device}")
-        return _clip_model_cache[cache_key], _clip_preprocess_cache[cache_key]
 
+def get_active_clip_model() -> str:
+    return _active_clip_model
+
+
+def switch_clip_model(model_name: str, wait: bool = False) -> Future:
+    """
+    Chuyển model CLIP dùng để chấm điểm mà không cần khởi động lại.
+
+    Model mới được tải nền; chỉ khi tải xong mới chuyển, nên các lần chấm điểm
+    trong lúc chờ vẫn dùng model cũ. Model cũ được giải phóng theo LRU khi
+    vượt ngân sách bộ nhớ và không còn được dùng.
+
+    Args:
+        model_name: Model CLIP mới (ví dụ "ViT-L/14").
+        wait: Chờ tải xong trước khi trả về.
+
+    Returns:
+        Future hoàn thành (với model) khi đã chuyển sang model mới.
+    """
+    future = _model_manager.preload(clip_cache_key(model_name), lambda: _load_clip_uncached(model_name))
+
+    def _activate(done: Future):
+        global _active_clip_model
+        if done.exception() is None:
+            previous, _active_clip_model = _active_clip_model, model_name
+            logger.info(f"🔁 CLIP scoring model switched: {previous} -> {model_name}")
+        else:
+            logger.error(f"CLIP model switch to {model_name} failed: {done.exception()}")
+
+    future.add_done_callback(_activate)
+    if wait:
+        future.exception()
+    return future
+
+
+def _load_clip_uncached(model_name: str):
+    """Tải model CLIP (không cache); trả về (model, preprocess) hoặc None nếu lỗi."""
+    device = _get_clip_device()
     logger.info(f"Loading CLIP model: {model_name} onto device: {device}...")
+    start_time = time.time()
     try:
-        # Sử dụng thư viện `clip` đã cài từ OpenAI repo
-        model, preprocess = clip.load(model_name, device=device)
-        _clip_model_cache[cache_key] = model
-        _clip_preprocess_cache[cache_key] = preprocess
-        logger.info(f"CLIP model {model_name} loaded successfully.")
+        local_path = find_local_clip(model_name)
+        if local_path:
+            # Bản safetensors offline (scripts/convert_models_to_safetensors.py), tải qua mmap
+            model, preprocess = _load_clip_from_safetensors(local_path, device)
+        else:
+            # Sử dụng thư viện `clip` đã cài từ OpenAI repo
+            model, preprocess = clip.load(model_name, device=device)
+        logger.info(
+            f"CLIP model {model_name} loaded successfully from {local_path or 'clip cache'} "
+            f"in {time.time() - start_time:.2f}s (peak RSS {peak_rss_mb():.0f} MiB)."
+        )
         return model, preprocess
     except Exception as e:
         logger.exception(f"Failed to load CLIP model {model_name}: {e}")
-        return None, None
+        return None
+
+
+def _load_clip_from_safetensors(path: str, device):
+    """Dựng model CLIP từ state dict safetensors (giống clip.load(..., jit=False))."""
+    from clip.clip import _transform
+    from clip.model import build_model
+
+    model = build_model(load_safetensors_mmap(path)).to(device)
+    if str(device) == "cpu":
+        model.float()
+        # build_model đã copy weights; trỏ lại về mmap để trang bộ nhớ được chia sẻ
+        share_module_weights(model, path)
+    model.eval()
+    return model, _transform(model.visual.input_resolution)
 
 
 def calculate_clip_score(
     prompt: str,
     image_base64: Optional[str] = None,
     image_bytes: Optional[bytes] = None,
-    model_name: str = "ViT-B/32",  # Model CLIP tiêu chuẩn
+    model_name: Optional[str] = None,  # None = model đang active (mặc định ViT-B/32)
 ) -> float:
     """
     Tính điểm tương đồng CLIP giữa prompt và ảnh.
@@ -118,12 +191,21 @@ def calculate_clip_score(
         logger.warning("CLIP scoring skipped: Missing prompt or image data.")
         return 0.0
 
-    model, preprocess = load_clip_model(model_name)
-    if model is None or preprocess is None:
+    model_name = model_name or _active_clip_model
+    cache_key = clip_cache_key(model_name)
+    # Giữ reference trong lúc chấm điểm để model không bị giải phóng
+    try:
+        model, preprocess = _model_manager.acquire(cache_key, lambda: _load_clip_uncached(model_name))
+    except RuntimeError:
         logger.error("CLIP model/preprocess not loaded. Cannot calculate score.")
         return 0.0
+    try:
+        return _score_with_model(model, preprocess, prompt, image_base64, image_bytes)
+    finally:
+        _model_manager.release(cache_key)
 
-    device = _get_clip_device()
+
+def _score_with_model(model, preprocess, prompt: str, image_base64, image_bytes) -> float:
     image = None
     try:
         # --- Xử lý ảnh đầu vào ---
@@ -156,50 +238,73 @@ def calculate_clip_score(
             logger.error("Image could not be processed.")
             return 0.0
 
-        # --- Chuẩn bị input cho CLIP ---
-        image_input = preprocess(image).unsqueeze(0).to(device)
-        text_input = clip.tokenize([prompt]).to(device)
+        final_score = _score_images(model, preprocess, prompt, [image])[0]
+        logger.debug(
+            f"CLIP score calculated for prompt '{prompt[:30]}...': {final_score:.4f}"
+        )
+        return final_score
+
+    except Exception as e:
+        logger.exception(f"Error during CLIP score calculation: {e}")
+        return 0.0  # Trả về 0 nếu có lỗi
 
-        # --- Tính toán embeddings và similarity ---
-        with torch.no_grad():  # Không cần tính gradient
-            image_features = model.encode_image(image_input)
-            text_features = model.encode_text(text_input)
 
-            # Chuẩn hóa features (quan trọng cho cosine similarity)
-            image_features /= image_features.norm(dim=-1, keepdim=True)
-            text_features /= text_features.norm(dim=-1, keepdim=True)
+def _score_images(model, preprocess, prompt: str, images: List[Image.Image]) -> List[float]:
+    """
+    Điểm CLIP của nhiều ảnh cho cùng một prompt trong một lần forward (batch).
 
-            # Tính cosine similarity
-            # similarity = (image_features @ text_features.T).squeeze(0).item() # Chỉ lấy giá trị đầu tiên
+    Điểm = cosine similarity giữa embedding ảnh và text, chuẩn hóa về [0, 1].
+    """
+    device = _get_clip_device()
+    # --- Chuẩn bị input cho CLIP ---
+    image_input = torch.stack([preprocess(image) for image in images]).to(device)
+    text_input = clip.tokenize([prompt]).to(device)
 
-            # Hoặc tính logit scale (theo cách làm của CLIP gốc) và chuẩn hóa
-            logit_scale = model.logit_scale.exp()
-            logits_per_image = logit_scale * image_features @ text_features.t()
-            # logits_per_text = logits_per_image.t() # Không cần cái này
+    # --- Tính toán embeddings và similarity ---
+    with torch.no_grad():  # Không cần tính gradient
+        image_features = model.encode_image(image_input)
+        text_features = model.encode_text(text_input)
 
-            # Lấy giá trị tương đồng (logit) - giá trị này không nằm trong [-1,1]
-            similarity_logit = logits_per_image.squeeze().item()  # Lấy giá trị float
+        # Chuẩn hóa features (quan trọng cho cosine similarity)
+        image_features /= image_features.norm(dim=-1, keepdim=True)
+        text_features /= text_features.norm(dim=-1, keepdim=True)
 
-            # **Chuẩn hóa điểm số về [0, 1]**
-            # Cách 1: Dùng Cosine Similarity trực tiếp
-            cosine_sim = (image_features * text_features).sum(dim=-1).squeeze().item()
-            normalized_score = (cosine_sim + 1.0) / 2.0
+        # Cosine similarity của từng ảnh với prompt, chuẩn hóa về [0, 1]
+        cosine_sims = (image_features @ text_features.t()).squeeze(-1)
+        normalized = ((cosine_sims + 1.0) / 2.0).clamp(0.0, 1.0)
+    return [float(score) for score in normalized.tolist()]
 
-            # Cách 2: Chuẩn hóa logit (cần xem xét thang đo phù hợp)
-            # Ví dụ đơn giản: dùng hàm sigmoid hoặc scale dựa trên khoảng giá trị thực tế
-            # normalized_score_logit = 1 / (1 + math.exp(-similarity_logit / 10)) # Ví dụ scale factor 10
 
-            # Chọn cách chuẩn hóa (dùng cosine sim cho đơn giản)
-            final_score = max(0.0, min(1.0, normalized_score))
+def calculate_clip_scores(
+    prompt: str,
+    images: List[Image.Image],
+    model_name: Optional[str] = None,
+) -> List[float]:
+    """
+    Điểm CLIP của nhiều ảnh PIL cho cùng một prompt, tính theo batch.
 
-            logger.debug(
-                f"CLIP score calculated for prompt '{prompt[:30]}...': {final_score:.4f} (Cosine Sim: {cosine_sim:.4f})"
-            )
-            return final_score
+    Cùng công thức với calculate_clip_score (miner dùng để tự chấm các ứng viên
+    best-of-N trước khi gửi).
 
+    Returns:
+        Danh sách điểm trong [0.0, 1.0] theo thứ tự của `images`, hoặc [] nếu có lỗi.
+    """
+    if not prompt or not images:
+        return []
+    model_name = model_name or _active_clip_model
+    cache_key = clip_cache_key(model_name)
+    try:
+        model, preprocess = _model_manager.acquire(cache_key, lambda: _load_clip_uncached(model_name))
+    except RuntimeError:
+        logger.error("CLIP model/preprocess not loaded. Cannot calculate scores.")
+        return []
+    try:
+        return _score_images(model, preprocess, prompt, [image.convert("RGB") for image in images])
     except Exception as e:
-        logger.exception(f"Error during CLIP score calculation: {e}")
-        return 0.0  # Trả về 0 nếu có lỗi
+        logger.exception(f"Error during batched CLIP score calculation: {e}")
+        return []
+    finally:
+        _model_manager.release(cache_key)
 
 
 # --- Ví dụ sử dụng (có thể chạy file này độc lập để test) ---
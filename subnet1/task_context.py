@@ -0,0 +1,82 @@
+"""
+Per-task context carried through a miner's generation and submission.
+
+Everything that depends on *which* task is being handled (where the result
+goes, when it is due, how it is traced) lives here instead of on the miner
+instance, so tasks from different validators can run concurrently.
+"""
+
+import datetime
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+RESULT_SUBMIT_PATH = "/v1/miner/submit_result"
+
+
+def parse_task_deadline(deadline) -> Optional[float]:
+    """
+    Convert a task deadline (ISO-8601 string or Unix timestamp) to a Unix timestamp.
+
+    Returns:
+        Deadline as seconds since the epoch, or None if missing/unparseable.
+    """
+    if deadline is None or deadline == "":
+        return None
+    try:
+        return float(deadline)
+    except (TypeError, ValueError):
+        pass
+    try:
+        deadline_dt = datetime.datetime.fromisoformat(str(deadline).replace("Z", "+00:00"))
+        if deadline_dt.tzinfo is None:
+            deadline_dt = deadline_dt.replace(tzinfo=datetime.timezone.utc)
+        return deadline_dt.timestamp()
+    except ValueError:
+        logger.warning(f"Could not parse task deadline: {deadline!r}")
+        return None
+
+
+@dataclass(frozen=True)
+class TaskContext:
+    """Immutable routing and timing information for one task."""
+
+    task_id: str
+    # Base URL of the validator that sent the task (result goes back there)
+    validator_endpoint: Optional[str]
+    # Unix timestamp the result must reach the validator by
+    deadline: Optional[float]
+    trace_id: str
+    received_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_task(cls, task, default_validator_url: Optional[str] = None) -> "TaskContext":
+        """
+        Build the context for an incoming task.
+
+        Args:
+            task: TaskModel received from a validator.
+            default_validator_url: Fallback submit target if the task names none.
+        """
+        return cls(
+            task_id=task.task_id,
+            validator_endpoint=getattr(task, "validator_endpoint", None) or default_validator_url,
+            deadline=parse_task_deadline(getattr(task, "deadline", None)),
+            trace_id=getattr(task, "trace_id", None) or uuid.uuid4().hex[:16],
+        )
+
+    @property
+    def result_submit_url(self) -> Optional[str]:
+        if not self.validator_endpoint:
+            return None
+        return f"{self.validator_endpoint.rstrip('/')}{RESULT_SUBMIT_PATH}"
+
+    def remaining_seconds(self) -> Optional[float]:
+        """Seconds left until the deadline (negative once missed), or None if unbounded."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
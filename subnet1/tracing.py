@@ -0,0 +1,285 @@
+"""
+Span-based tracing of consensus cycles with Chrome trace / Perfetto export.
+
+Each phase of a slot (task creation, dispatch, result ingest, scoring, peer
+exchange, chain submission) is recorded as a span carrying slot and
+validator tags. Child spans inherit the tags of the span they run in, also
+across asyncio tasks (contextvars). Finished spans live in a bounded ring
+buffer and can be exported as Chrome trace JSON, which chrome://tracing and
+ui.perfetto.dev open directly.
+
+Typical use:
+
+    tracer = get_tracer()
+    with tracer.span(SPAN_CONSENSUS_CYCLE, slot=slot, validator=uid):
+        with tracer.span(SPAN_SCORING):
+            ...
+    trace = tracer.to_chrome_trace(slot=slot)
+"""
+
+import asyncio
+import contextvars
+import functools
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Span names of a consensus slot
+SPAN_CONSENSUS_CYCLE = "consensus_cycle"
+SPAN_TASK_CREATE = "task_create"
+SPAN_DISPATCH = "dispatch"
+SPAN_RESULT_INGEST = "result_ingest"
+SPAN_SCORING = "scoring"
+SPAN_PEER_EXCHANGE = "peer_exchange"
+SPAN_CHAIN_SUBMIT = "chain_submit"
+
+# SDK / Subnet1 methods recorded as phase spans by Tracer.instrument_phases(),
+# looked up on the validator node and its tasks/consensus/network components.
+# Outer and inner methods of one phase may both be listed (score_miner_results
+# calls _score_individual_result); the nested span is a child of the outer one.
+TRACED_SDK_METHODS = {
+    SPAN_DISPATCH: ("send_task_and_track", "send_tasks_to_miners"),
+    SPAN_RESULT_INGEST: ("add_miner_result", "receive_results"),
+    SPAN_SCORING: ("score_miner_results", "_score_individual_result"),
+    SPAN_PEER_EXCHANGE: ("broadcast_scores", "wait_for_consensus_scores"),
+    SPAN_CHAIN_SUBMIT: ("commit_updates_to_blockchain", "submit_to_blockchain", "update_metagraph"),
+}
+TRACED_COMPONENTS = ("tasks", "consensus", "network")
+
+# Tags passed down from a span to the spans started inside it
+INHERITED_TAGS = ("slot", "validator")
+
+DEFAULT_CAPACITY = 20_000
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("subnet1_current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+@dataclass
+class Span:
+    """One timed operation."""
+
+    name: str
+    category: str
+    # Wall-clock start (seconds since epoch) and duration (seconds)
+    start: float
+    duration: float = 0.0
+    tags: Dict[str, Any] = field(default_factory=dict)
+    span_id: int = field(default_factory=lambda: next(_span_ids))
+    parent_id: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "category": self.category,
+            "start": self.start,
+            "duration": self.duration,
+            "tags": dict(self.tags),
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    """Records spans into a ring buffer of the most recent `capacity` spans."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, enabled: bool = True):
+        self.enabled = enabled
+        self._spans: Deque[Span] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    # --- Recording ---
+    @contextmanager
+    def span(self, name: str, category: str = "consensus", **tags) -> Iterator[Optional[Span]]:
+        """
+        Time the enclosed block as a span.
+
+        Args:
+            name: Span name (one of the SPAN_* constants for consensus phases).
+            category: Chrome trace category.
+            **tags: Extra tags (slot, validator, miner_uid, ...); slot and validator
+                default to the enclosing span's.
+        """
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        inherited = {k: parent.tags[k] for k in INHERITED_TAGS if parent and k in parent.tags}
+        span = Span(
+            name=name,
+            category=category,
+            start=time.time(),
+            tags={**inherited, **{k: v for k, v in tags.items() if v is not None}},
+            parent_id=parent.span_id if parent else None,
+        )
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current_span.reset(token)
+            self._record(span)
+
+    def record(self, name: str, start: float, duration: float, category: str = "consensus", **tags) -> Span:
+        """Record an already-measured span (start = wall-clock seconds)."""
+        parent = _current_span.get()
+        inherited = {k: parent.tags[k] for k in INHERITED_TAGS if parent and k in parent.tags}
+        span = Span(
+            name, category, start, max(0.0, duration), {**inherited, **tags}, parent_id=parent.span_id if parent else None
+        )
+        if self.enabled:
+            self._record(span)
+        return span
+
+    def _record(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def instrument(self, obj: Any, method_name: str, span_name: str, **tags) -> bool:
+        """
+        Wrap `obj.method_name` (sync or async) so every call is recorded as a span.
+
+        Returns:
+            False if the object has no such method (nothing is changed).
+        """
+        method = getattr(obj, method_name, None)
+        if not callable(method) or getattr(method, "_subnet1_traced", False):
+            return False
+
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def traced(*args, **kwargs):
+                with self.span(span_name, **tags):
+                    return await method(*args, **kwargs)
+        else:
+            @functools.wraps(method)
+            def traced(*args, **kwargs):
+                with self.span(span_name, **tags):
+                    return method(*args, **kwargs)
+
+        traced._subnet1_traced = True
+        setattr(obj, method_name, traced)
+        return True
+
+    def instrument_phases(self, node: Any, **tags) -> List[str]:
+        """
+        Instrument every TRACED_SDK_METHODS method found on `node` and its
+        components (idempotent). Returns the names newly wrapped.
+        """
+        components = [node] + [getattr(node, name) for name in TRACED_COMPONENTS if getattr(node, name, None) is not None]
+        traced = []
+        for span_name, method_names in TRACED_SDK_METHODS.items():
+            for component in components:
+                for method_name in method_names:
+                    if self.instrument(component, method_name, span_name, **tags):
+                        traced.append(method_name)
+        return traced
+
+    # --- Reading ---
+    def spans(self, slot: Optional[int] = None, **tags) -> List[Span]:
+        """Recorded spans, oldest first, optionally filtered by slot and other tags."""
+        if slot is not None:
+            tags["slot"] = slot
+        with self._lock:
+            spans = list(self._spans)
+        return [s for s in spans if all(s.tags.get(k) == v for k, v in tags.items())]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def summary(self, slot: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """Count, total and max seconds per span name - which phase was slow."""
+        result: Dict[str, Dict[str, float]] = {}
+        for span in self.spans(slot):
+            entry = result.setdefault(span.name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            entry["count"] += 1
+            entry["total_seconds"] += span.duration
+            entry["max_seconds"] = max(entry["max_seconds"], span.duration)
+        return result
+
+    def to_chrome_trace(self, slot: Optional[int] = None, **tags) -> Dict[str, Any]:
+        """
+        Export spans as Chrome trace JSON ("X" complete events, microseconds).
+
+        Overlapping sibling spans (e.g. concurrent dispatches) are placed on
+        separate lanes (tids) so each lane stays properly nested.
+        """
+        spans = sorted(self.spans(slot, **tags), key=lambda s: (s.start, -s.duration))
+        pid = os.getpid()
+        validator = next((s.tags["validator"] for s in spans if "validator" in s.tags), None)
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"validator {validator or pid}"}}
+        ]
+        lanes: List[List[float]] = []
+        for span in spans:
+            lane = _assign_lane(lanes, span.start, span.end)
+            args = dict(span.tags)
+            if span.error:
+                args["error"] = span.error
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round(span.start * 1e6, 3),
+                    "dur": round(span.duration * 1e6, 3),
+                    "pid": pid,
+                    "tid": lane + 1,
+                    "args": _jsonable(args),
+                }
+            )
+        for lane in range(len(lanes)):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": lane + 1, "args": {"name": f"lane {lane + 1}"}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _assign_lane(lanes: List[List[float]], start: float, end: float) -> int:
+    """First lane whose open spans all contain [start, end] (each lane is a stack of end times)."""
+    for index, stack in enumerate(lanes):
+        while stack and stack[-1] <= start:
+            stack.pop()
+        if not stack or end <= stack[-1]:
+            stack.append(end)
+            return index
+    lanes.append([end])
+    return len(lanes) - 1
+
+
+def _jsonable(tags: Mapping[str, Any]) -> Dict[str, Any]:
+    return {k: v if isinstance(v, (str, int, float, bool)) or v is None else str(v) for k, v in tags.items()}
+
+
+# Tracer dùng chung của process
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer (capacity from TRACE_CAPACITY, disabled with TRACE_ENABLED=0)."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(
+                capacity=int(os.getenv("TRACE_CAPACITY", DEFAULT_CAPACITY)),
+                enabled=os.getenv("TRACE_ENABLED", "1").lower() not in ("0", "false", "no"),
+            )
+        return _tracer
@@ -22,7 +22,7 @@ import datetime
 import threading
 import uvicorn
 import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from collections import defaultdict
 import os
 import binascii
@@ -198,9 +198,21 @@ except ImportError:
     def calculate_clip_score(*args, **kwargs) -> float:
         return 0.0
 
+from .aggregation import AGGREGATION_MEAN, ScoreMatrix, aggregate_consensus, to_uint64
+from .generation_spec import GenerationSpec, validator_generation_spec_from_env
+from .entity_registry import get_entity_registry
+from .response_cache import ResponseCache, make_entry
+from .tracing import SPAN_RESULT_INGEST, SPAN_TASK_CREATE, get_tracer
 
 logger = logging.getLogger(__name__)
 
+# Route của ValidatorNodeNetwork (SDK) được phục vụ qua cache response đã encode sẵn
+CONSENSUS_RESULT_PATH = "/api/v1/consensus/result/{cycle_num}"
+VALIDATOR_STATUS_PATH = "/api/v1/validator/status"
+# Dữ liệu chưa finalized (status, cycle đang chạy) chỉ cache rất ngắn
+MUTABLE_CACHE_TTL_SECONDS = 1.0
+FINALIZED_STATUSES = ("finalized", "completed", "complete", "success", "done")
+
 DEFAULT_PROMPTS = [
     "A photorealistic image of an astronaut riding a horse on the moon.",
     "A watercolor painting of a cozy bookstore cafe in autumn.",
@@ -215,6 +227,30 @@ DEFAULT_PROMPTS = [
 ]
 
 
+async def _call_endpoint(endpoint, **kwargs):
+    """Gọi handler FastAPI gốc; trả (payload dict hoặc bytes JSON, status code)."""
+    from fastapi import Response
+    from fastapi.encoders import jsonable_encoder
+
+    result = endpoint(**kwargs)
+    if asyncio.iscoroutine(result):
+        result = await result
+    if isinstance(result, Response):
+        try:
+            return json.loads(result.body), result.status_code
+        except ValueError:
+            return bytes(result.body), result.status_code
+    # Như FastAPI khi tự serialize: pydantic models, dataclasses, datetime... thành JSON types
+    return jsonable_encoder(result), 200
+
+
+def _add_route_before(app, original_route, path: str, endpoint):
+    """Đăng ký `endpoint` cho `path` và xếp nó trước route gốc để được match trước."""
+    app.add_api_route(path, endpoint, methods=["GET"])
+    routes = app.router.routes
+    routes.insert(routes.index(original_route), routes.pop())
+
+
 class Subnet1Validator(ValidatorNode):
     """
     Validator cho Subnet 1 (Image Generation).
@@ -262,6 +298,23 @@ class Subnet1Validator(ValidatorNode):
         # Track flexible consensus status from SDK
         self.subnet_flexible_mode = flexible_mode
 
+        # Generation spec gửi kèm mỗi task (độ phân giải, số bước, định dạng, kích thước tối đa)
+        self.generation_spec: GenerationSpec = validator_generation_spec_from_env()
+
+        # Tracing theo span cho từng phase của slot (export Chrome trace qua /trace)
+        self.tracer = get_tracer()
+        self._install_tracing()
+        self._register_trace_routes()
+
+        # Kết quả consensus đã finalized được giữ dạng bytes orjson + ETag (giới hạn số cycle)
+        self.response_cache = ResponseCache(
+            max_entries=int(os.getenv("VALIDATOR_RESULT_CACHE_CYCLES", "256"))
+        )
+        self._register_cached_routes()
+
+        # Registry entity dùng chung (tra cứu O(1) theo tên, hex UID, địa chỉ)
+        self.entity_registry = get_entity_registry()
+
         # Safe logging that doesn't crash if core is not available
         if hasattr(self, "core") and self.core and hasattr(self.core, "info"):
             uid_display = (
@@ -326,11 +379,14 @@ class Subnet1Validator(ValidatorNode):
         # Trả về dictionary chứa các trường cần thiết CHO MINER HIỂU
         # Miner sẽ cần đọc 'description' để lấy prompt
         # Miner sẽ cần đọc 'validator_endpoint' để biết gửi kết quả về đâu
+        # Miner dùng 'generation_spec' để không sinh/gửi nhiều pixel hơn CLIP cần
+        generation_spec = getattr(self, "generation_spec", None) or validator_generation_spec_from_env()
         return {
             "description": selected_prompt,  # Prompt chính là description của task
             "deadline": deadline_str,
             "priority": priority_level,
             "validator_endpoint": origin_validator_endpoint,  # <<<--- THÊM DÒNG NÀY
+            "generation_spec": generation_spec.to_dict(),
         }
 
     # --- Restore the correct override method for scoring ---
@@ -368,6 +424,14 @@ class Subnet1Validator(ValidatorNode):
             processing_time_ms = result_data.get("processing_time_ms", 0)  # Optional
 
             # 2. Check for errors or missing image
+            rejection_reason = result_data.get("rejection_reason")
+            if rejection_reason:
+                # Miner từ chối ngay (admission) - task có thể được giao lại cho miner khác
+                logger.info(
+                    f"Miner rejected task ({rejection_reason}, needs ~{result_data.get('estimated_seconds')}s, "
+                    f"{result_data.get('remaining_seconds')}s left). Assigning score 0."
+                )
+                return 0.0
             if reported_error:
                 logger.warning(
                     f"Miner reported an error: '{reported_error}'. Assigning score 0."
@@ -397,7 +461,10 @@ class Subnet1Validator(ValidatorNode):
                     miner_uid = result_data.get("miner_uid", "unknown_miner")
                     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
                     # Need task_id for a truly unique name. Placeholder:
-                    filename = f"{output_dir}/result_{miner_uid[:8]}_{timestamp}.png"
+                    extension = {"JPEG": "jpg", "WEBP": "webp"}.get(
+                        str(result_data.get("output_format", "")).upper(), "png"
+                    )
+                    filename = f"{output_dir}/result_{miner_uid[:8]}_{timestamp}.{extension}"
                     with open(filename, "wb") as f:
                         f.write(image_bytes)
                     logger.info(f"   Saved image result to: {filename}")
@@ -464,8 +531,9 @@ class Subnet1Validator(ValidatorNode):
         """
         (Override) Tạo task assignment cho miner.
         """
-        task_id = self._generate_unique_task_id(miner.uid)
-        task_data = self._create_task_data(miner.uid)
+        with self.tracer.span(SPAN_TASK_CREATE, validator=self._trace_uid(), miner_uid=miner.uid):
+            task_id = self._generate_unique_task_id(miner.uid)
+            task_data = self._create_task_data(miner.uid)
 
         if task_data is None:
             logger.warning(f"Could not create task data for miner {miner.uid}")
@@ -483,6 +551,131 @@ class Subnet1Validator(ValidatorNode):
         """Generate a random prompt for testing."""
         return random.choice(DEFAULT_PROMPTS)
 
+    def _trace_uid(self) -> Optional[str]:
+        info = getattr(getattr(self, "core", None), "info", None) or getattr(self, "info", None)
+        return getattr(info, "uid", None)
+
+    def _install_tracing(self):
+        """Bọc các hook chấm điểm/nhận kết quả của Subnet1 và phase của SDK bằng span."""
+        uid = self._trace_uid()
+        self.tracer.instrument(self, "_should_process_result", SPAN_RESULT_INGEST, validator=uid)
+        traced = self.tracer.instrument_phases(self, validator=uid)
+        logger.debug(f"🔎 Tracing SDK phases: {traced or 'none found'}")
+
+    def _api_app(self):
+        return getattr(self, "app", None) or getattr(getattr(self, "network", None), "app", None)
+
+    def _register_trace_routes(self):
+        """Đăng ký endpoint /trace (Chrome trace JSON) và /trace/summary nếu có FastAPI app."""
+        app = self._api_app()
+        if app is None:
+            logger.debug("No FastAPI app on validator; /trace endpoints not registered.")
+            return
+
+        @app.get("/trace")
+        async def validator_trace(slot: Optional[int] = None):
+            # Mở bằng chrome://tracing hoặc ui.perfetto.dev
+            return JSONResponse(content=self.tracer.to_chrome_trace(slot))
+
+        @app.get("/trace/summary")
+        async def validator_trace_summary(slot: Optional[int] = None):
+            return JSONResponse(content=self.tracer.summary(slot))
+
+    @staticmethod
+    def _is_finalized_result(payload: Any) -> bool:
+        """Kết quả cycle đã chốt (không đổi nữa) thì mới được cache vĩnh viễn."""
+        if not isinstance(payload, dict):
+            return False
+        if payload.get("finalized") is not None:
+            return bool(payload["finalized"])
+        return str(payload.get("status", "")).lower() in FINALIZED_STATUSES
+
+    def miner_address(self, miner_uid: str) -> Optional[str]:
+        """Địa chỉ on-chain của miner theo hex UID / tên (None nếu không có trong registry)."""
+        return self.entity_registry.address_of(miner_uid)
+
+    def aggregate_slot_scores(
+        self,
+        scores: List[ValidatorScore],
+        stakes: Optional[Dict[str, float]] = None,
+        method: str = AGGREGATION_MEAN,
+    ) -> Dict[str, float]:
+        """
+        Điểm consensus theo miner từ các ValidatorScore của một slot (ma trận validator x miner).
+
+        Args:
+            scores: ValidatorScore của slot (của mình và của các peer).
+            stakes: Stake theo validator UID (None = mọi validator cùng trọng số).
+            method: AGGREGATION_MEAN hoặc AGGREGATION_MEDIAN (đều theo stake).
+
+        Returns:
+            {miner_uid: consensus score}; miner không ai chấm bị bỏ qua.
+        """
+        matrix = ScoreMatrix.from_validator_scores(scores)
+        if stakes is None:
+            stakes = dict.fromkeys(matrix.validators.uids, 1.0)
+        return aggregate_consensus(matrix, stakes, method=method).to_dict()
+
+    def metagraph_batch(self, consensus: Dict[str, float]) -> Tuple[List[str], List[int]]:
+        """
+        (địa chỉ miner, performance uint64) cho updateMetagraph từ điểm consensus.
+
+        Miner không có địa chỉ trong registry bị bỏ qua.
+        """
+        uids = [uid for uid in consensus if self.miner_address(uid)]
+        matrix = ScoreMatrix.from_rows({self._trace_uid(): (uids, [consensus[uid] for uid in uids])})
+        return [self.miner_address(uid) for uid in uids], to_uint64(matrix.scores[0]).tolist()
+
+    def _register_cached_routes(self):
+        """
+        Đặt route có cache trước các route consensus result / status của SDK.
+
+        Lần poll đầu gọi handler gốc rồi lưu bytes + ETag; các lần sau chỉ là
+        tra dict, và trả 304 nếu If-None-Match khớp.
+        """
+        app = self._api_app()
+        if app is None:
+            return
+        from fastapi import Request
+        from fastapi.routing import APIRoute
+
+        originals = {r.path: r for r in app.router.routes if isinstance(r, APIRoute)}
+
+        result_route = originals.get(CONSENSUS_RESULT_PATH)
+        if result_route is not None:
+            original_result = result_route.endpoint
+
+            async def cached_consensus_result(cycle_num: int, request: Request):
+                key = ("consensus_result", cycle_num)
+
+                async def build():
+                    payload, status_code = await _call_endpoint(original_result, cycle_num=cycle_num)
+                    if status_code != 200:
+                        return make_entry(payload, status_code=status_code)
+                    ttl = None if self._is_finalized_result(payload) else MUTABLE_CACHE_TTL_SECONDS
+                    return self.response_cache.put(key, payload, ttl=ttl)
+
+                return await self.response_cache.respond(key, request.headers.get("if-none-match"), build)
+
+            _add_route_before(app, result_route, CONSENSUS_RESULT_PATH, cached_consensus_result)
+
+        status_route = originals.get(VALIDATOR_STATUS_PATH)
+        if status_route is not None:
+            original_status = status_route.endpoint
+
+            async def cached_validator_status(request: Request):
+                async def build():
+                    payload, status_code = await _call_endpoint(original_status)
+                    if status_code != 200:
+                        return make_entry(payload, status_code=status_code)
+                    return self.response_cache.put("validator_status", payload, ttl=MUTABLE_CACHE_TTL_SECONDS)
+
+                return await self.response_cache.respond(
+                    "validator_status", request.headers.get("if-none-match"), build
+                )
+
+            _add_route_before(app, status_route, VALIDATOR_STATUS_PATH, cached_validator_status)
+
     # --- 5. Use parent ValidatorNode run method ---
     # Note: ValidatorNodeNetwork already provides FastAPI server with:
     # - /health endpoint
@@ -545,6 +738,8 @@ class Subnet1Validator(ValidatorNode):
             "validator_scores": len(self.validator_scores),
             "api_port": self.api_port,
             "using_mock_classes": USING_MOCK_CLASSES,
+            "response_cache": self.response_cache.get_status(),
+            "entity_registry": self.entity_registry.get_status(),
         }
 
     async def stop(self):
@@ -0,0 +1,318 @@
+"""
+Concurrent health probing of registered validators for miners.
+
+Every sweep probes all validator endpoints at once (one httpx.AsyncClient,
+one task per validator, one shared deadline), so a sweep costs one timeout however many validators are
+registered. Results go into a TTL-cached table of RTT, error rate and the
+last slot/phase each validator reported. The table is ranked by latency,
+and the network condition and timeout multiplier are derived from measured
+RTT percentiles instead of the validator count.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+from .entity_registry import EntityRegistry, get_entity_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEALTH_PATH = "/health"
+DEFAULT_PROBE_TIMEOUT = 2.0
+DEFAULT_TTL_SECONDS = 60.0
+RTT_WINDOW = 20
+ERROR_SMOOTHING = 0.3
+
+CONDITION_GOOD = "good"
+CONDITION_FAIR = "fair"
+CONDITION_POOR = "poor"
+CONDITION_UNSTABLE = "unstable"
+
+# (condition, max p95 RTT seconds, max mean error rate, timeout multiplier), checked in order
+CONDITION_THRESHOLDS = (
+    (CONDITION_GOOD, 0.25, 0.05, 1.0),
+    (CONDITION_FAIR, 1.0, 0.20, 1.2),
+    (CONDITION_POOR, 3.0, 0.50, 1.5),
+)
+UNSTABLE_MULTIPLIER = 2.0
+
+EndpointSource = Callable[[], Union[Sequence[Tuple[str, str]], Awaitable[Sequence[Tuple[str, str]]]]]
+
+
+@dataclass
+class EndpointStats:
+    """Measured health of one validator endpoint."""
+
+    uid: str
+    url: str
+    rtts: Deque[float] = field(default_factory=lambda: deque(maxlen=RTT_WINDOW))
+    # Exponentially smoothed probe failure rate (0-1)
+    error_rate: float = 0.0
+    probes: int = 0
+    failures: int = 0
+    last_error: Optional[str] = None
+    last_slot: Optional[int] = None
+    last_phase: Optional[str] = None
+    last_probe: float = 0.0
+    last_success: Optional[float] = None
+
+    @property
+    def rtt(self) -> Optional[float]:
+        """Median RTT of recent successful probes."""
+        if not self.rtts:
+            return None
+        ordered = sorted(self.rtts)
+        return ordered[len(ordered) // 2]
+
+    @property
+    def healthy(self) -> bool:
+        return self.last_success is not None and self.last_success >= self.last_probe
+
+    def record(self, rtt: Optional[float], error: Optional[str], payload: Optional[Dict[str, Any]], now: float):
+        self.probes += 1
+        self.last_probe = now
+        failed = error is not None
+        self.error_rate += ERROR_SMOOTHING * ((1.0 if failed else 0.0) - self.error_rate)
+        if failed:
+            self.failures += 1
+            self.last_error = error
+            return
+        self.rtts.append(rtt)
+        self.last_success = now
+        self.last_error = None
+        if isinstance(payload, dict):
+            slot = payload.get("current_slot", payload.get("slot"))
+            phase = payload.get("current_phase", payload.get("phase"))
+            try:
+                self.last_slot = int(slot) if slot is not None else self.last_slot
+            except (TypeError, ValueError):
+                pass
+            self.last_phase = str(phase) if phase is not None else self.last_phase
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "uid": self.uid,
+            "url": self.url,
+            "rtt_ms": round(self.rtt * 1000, 1) if self.rtt is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "probes": self.probes,
+            "failures": self.failures,
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+            "last_slot": self.last_slot,
+            "last_phase": self.last_phase,
+            "last_probe": self.last_probe,
+        }
+
+
+class ValidatorDiscovery:
+    """Latency-ranked, TTL-cached table of validator endpoints."""
+
+    def __init__(
+        self,
+        endpoint_source: EndpointSource,
+        timeout: float = DEFAULT_PROBE_TIMEOUT,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        registry_ttl_seconds: float = 300.0,
+        health_path: str = DEFAULT_HEALTH_PATH,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Args:
+            endpoint_source: Returns [(validator_uid, base_url)] of registered
+                validators (sync or async; e.g. read from the metagraph).
+            timeout: Per-sweep timeout; every probe runs concurrently within it.
+            ttl_seconds: How long a probe result stays valid before the next sweep.
+            registry_ttl_seconds: How often the endpoint list is re-read from the source.
+            health_path: Path probed on each validator.
+            transport: Optional httpx transport (custom networking or tests).
+        """
+        self.endpoint_source = endpoint_source
+        self.timeout = timeout
+        self.ttl_seconds = ttl_seconds
+        self.registry_ttl_seconds = registry_ttl_seconds
+        self.health_path = health_path
+        self.transport = transport
+        self.stats: Dict[str, EndpointStats] = {}
+        self.last_sweep: float = 0.0
+        self.last_sweep_seconds: Optional[float] = None
+        self._endpoints: List[Tuple[str, str]] = []
+        self._endpoints_loaded_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    # --- Endpoint registry ---
+    async def _load_endpoints(self, force: bool = False) -> List[Tuple[str, str]]:
+        if not force and self._endpoints and time.time() - self._endpoints_loaded_at < self.registry_ttl_seconds:
+            return self._endpoints
+        try:
+            result = self.endpoint_source()
+            if asyncio.iscoroutine(result):
+                # A slow chain read must not stretch the sweep past its deadline
+                result = await asyncio.wait_for(result, timeout=self.timeout)
+            endpoints = [(str(uid), url.rstrip("/")) for uid, url in result if url and url.startswith("http")]
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load validator endpoints: {type(e).__name__}: {e}")
+            return self._endpoints
+        self._endpoints = endpoints
+        self._endpoints_loaded_at = time.time()
+        # Forget validators that are no longer registered
+        registered = {uid for uid, _ in endpoints}
+        for uid in list(self.stats):
+            if uid not in registered:
+                del self.stats[uid]
+        return endpoints
+
+    # --- Probing ---
+    async def sweep(self, force: bool = False) -> List[EndpointStats]:
+        """
+        Probe every registered validator concurrently (skipped while the table is fresh).
+
+        Returns:
+            The ranked table after the sweep.
+        """
+        async with self._lock:
+            if not force and time.time() - self.last_sweep < self.ttl_seconds:
+                return self.table()
+            endpoints = await self._load_endpoints()
+            started = time.perf_counter()
+            # One connection per validator so no probe waits for the pool
+            limits = httpx.Limits(max_connections=max(1, len(endpoints)))
+            async with httpx.AsyncClient(timeout=self.timeout, limits=limits, transport=self.transport) as client:
+                tasks = [asyncio.create_task(self._probe(client, url)) for _, url in endpoints]
+                # Hard deadline for the whole sweep: stragglers count as timeouts
+                _, pending = await asyncio.wait(tasks, timeout=self.timeout) if tasks else (set(), set())
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                results = [
+                    TimeoutError(f"no answer within {self.timeout}s") if task in pending
+                    else task.exception() or task.result()
+                    for task in tasks
+                ]
+            now = time.time()
+            for (uid, url), result in zip(endpoints, results):
+                stats = self.stats.get(uid)
+                if stats is None or stats.url != url:
+                    stats = self.stats[uid] = EndpointStats(uid=uid, url=url)
+                if isinstance(result, BaseException):
+                    stats.record(None, f"{type(result).__name__}: {result}", None, now)
+                else:
+                    stats.record(*result, now)
+            self.last_sweep = now
+            self.last_sweep_seconds = time.perf_counter() - started
+        healthy = sum(1 for s in self.stats.values() if s.healthy)
+        logger.debug(
+            f"🔍 Probed {len(endpoints)} validators in {self.last_sweep_seconds * 1000:.0f}ms ({healthy} healthy)"
+        )
+        return self.table()
+
+    async def _probe(self, client: httpx.AsyncClient, url: str) -> Tuple[Optional[float], Optional[str], Any]:
+        started = time.perf_counter()
+        try:
+            response = await client.get(f"{url}{self.health_path}")
+        except httpx.HTTPError as e:
+            return None, f"{type(e).__name__}: {e}" if str(e) else type(e).__name__, None
+        rtt = time.perf_counter() - started
+        if response.status_code >= 500:
+            return None, f"HTTP {response.status_code}", None
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = None
+        return rtt, None, payload
+
+    # --- Table ---
+    def table(self) -> List[EndpointStats]:
+        """Fresh entries ranked healthy-first, then by RTT, then by error rate."""
+        cutoff = time.time() - self.ttl_seconds * 2
+        fresh = [s for s in self.stats.values() if s.last_probe >= cutoff]
+        return sorted(
+            fresh,
+            key=lambda s: (not s.healthy, s.rtt if s.rtt is not None else float("inf"), s.error_rate),
+        )
+
+    def healthy_endpoints(self) -> List[str]:
+        return [s.url for s in self.table() if s.healthy]
+
+    def rtt_percentiles(self) -> Dict[str, Optional[float]]:
+        """p50/p95 over the current RTT of every healthy validator (seconds)."""
+        rtts = sorted(s.rtt for s in self.table() if s.healthy and s.rtt is not None)
+        if not rtts:
+            return {"p50": None, "p95": None}
+
+        def pick(q: float) -> float:
+            return rtts[min(len(rtts) - 1, int(round(q * (len(rtts) - 1))))]
+
+        return {"p50": pick(0.5), "p95": pick(0.95)}
+
+    def assess(self) -> Tuple[str, float]:
+        """
+        Network condition and response-timeout multiplier from measured latency.
+
+        Returns:
+            (condition, multiplier): unstable/2.0 when no validator answers.
+        """
+        p95 = self.rtt_percentiles()["p95"]
+        table = self.table()
+        if p95 is None or not table:
+            return CONDITION_UNSTABLE, UNSTABLE_MULTIPLIER
+        error_rate = sum(s.error_rate for s in table) / len(table)
+        for condition, max_p95, max_errors, multiplier in CONDITION_THRESHOLDS:
+            if p95 <= max_p95 and error_rate <= max_errors:
+                return condition, multiplier
+        return CONDITION_UNSTABLE, UNSTABLE_MULTIPLIER
+
+    def get_status(self) -> Dict[str, Any]:
+        condition, multiplier = self.assess()
+        percentiles = self.rtt_percentiles()
+        return {
+            "validators": [s.to_dict() for s in self.table()],
+            "rtt_p50_ms": round(percentiles["p50"] * 1000, 1) if percentiles["p50"] is not None else None,
+            "rtt_p95_ms": round(percentiles["p95"] * 1000, 1) if percentiles["p95"] is not None else None,
+            "network_conditions": condition,
+            "response_timeout_multiplier": multiplier,
+            "last_sweep": self.last_sweep,
+            "last_sweep_seconds": self.last_sweep_seconds,
+        }
+
+
+def metagraph_endpoint_source(client, registry: Optional[EntityRegistry] = None) -> EndpointSource:
+    """
+    Endpoint source: registered validator addresses from a metagraph client (one
+    get_all_validators() call, run in a worker thread), with UIDs and API endpoints
+    looked up in the entity registry instead of one chain read per validator.
+    """
+
+    def _read() -> List[Tuple[str, str]]:
+        entities = registry or get_entity_registry()
+        endpoints, unknown = [], []
+        for address in client.get_all_validators():
+            entity = entities.get(str(address))
+            if entity is None or not entity.api_endpoint:
+                unknown.append(str(address))
+                continue
+            endpoints.append((entity.uid_hex, entity.api_endpoint))
+        if unknown:
+            logger.debug(f"No API endpoint in the entity registry for validators: {unknown}")
+        return endpoints
+
+    async def _source():
+        return await asyncio.to_thread(_read)
+
+    return _source
+
+
+def env_endpoint_source(variable: str = "SUBNET1_VALIDATOR_ENDPOINTS") -> EndpointSource:
+    """Endpoint source from a comma-separated list of URLs (uid = URL) in `variable`."""
+
+    def _source():
+        urls = [u.strip() for u in os.getenv(variable, "").split(",") if u.strip()]
+        return [(url, url) for url in urls]
+
+    return _source
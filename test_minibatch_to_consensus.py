@@ -76,10 +76,11 @@ def test_minibatch_score_storage():
         scores = mock_core.slot_scores[slot]
         print(f"✅ Found {len(scores)} scores for consensus")
 
-        # Convert to dict format for consensus
-        local_scores = {}
-        for score_obj in scores:
-            local_scores[score_obj.miner_uid] = score_obj.score
+        # Convert to dict format for consensus (validator x miner matrix, as the validator does)
+        from subnet1.aggregation import ScoreMatrix, aggregate_consensus
+
+        matrix = ScoreMatrix.from_validator_scores(scores)
+        local_scores = aggregate_consensus(matrix, dict.fromkeys(matrix.validators.uids, 1.0)).to_dict()
 
         print(f"🔄 Converted to consensus format:")
         for miner_uid, score in local_scores.items():
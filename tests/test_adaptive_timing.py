@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for self-tuning flexible-consensus phase timing.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.adaptive_timing import (
+    PHASE_CONSENSUS_EXCHANGE,
+    PHASE_METAGRAPH_SUBMIT,
+    PHASE_SCORING,
+    PHASE_TASK_ROUND_TRIP,
+    AdaptiveTimingController,
+)
+from subnet1.flexible_consensus_sdk import FlexibleConsensusConfig, FlexibleValidatorWrapper
+from subnet1.tracing import Tracer
+
+
+def _run_slots(controller, slots, durations):
+    for slot in range(slots):
+        for phase, seconds in durations.items():
+            controller.observe(phase, seconds, slot)
+        controller.end_slot(slot)
+
+
+FAST_NETWORK = {
+    PHASE_TASK_ROUND_TRIP: 4.0,
+    PHASE_SCORING: 1.0,
+    PHASE_CONSENSUS_EXCHANGE: 2.0,
+    PHASE_METAGRAPH_SUBMIT: 2.0,
+}
+
+
+def test_slot_observations_combine_per_phase():
+    controller = AdaptiveTimingController()
+    for seconds in (1.0, 3.0, 2.0):
+        controller.observe(PHASE_TASK_ROUND_TRIP, seconds, slot=7)
+        controller.observe(PHASE_SCORING, seconds, slot=7)
+
+    combined = controller.end_slot(7)
+
+    # Tasks run in parallel (slowest counts); scoring runs sequentially (sum)
+    assert combined == {PHASE_TASK_ROUND_TRIP: 3.0, PHASE_SCORING: 6.0}
+
+
+def test_buffers_wait_for_enough_slots():
+    controller = AdaptiveTimingController(min_samples=5)
+    config = FlexibleConsensusConfig()
+    _run_slots(controller, 3, FAST_NETWORK)
+
+    decisions = controller.adjust(config)
+
+    assert config.task_deadline_buffer == 20
+    assert all(d.new == d.previous for d in decisions)
+    assert "waiting" in decisions[0].reason
+
+
+def test_buffers_shrink_towards_measured_tail_with_step_limit():
+    controller = AdaptiveTimingController(min_samples=3, headroom=1.25, max_step_fraction=0.25)
+    config = FlexibleConsensusConfig()
+    _run_slots(controller, 5, FAST_NETWORK)
+
+    controller.adjust(config)
+    # 20s -> at most 25% smaller per adjustment
+    assert config.task_deadline_buffer == 15
+
+    for _ in range(10):
+        controller.adjust(config)
+    assert config.task_deadline_buffer == 5  # 4s * 1.25
+    assert config.consensus_deadline_buffer == 5  # (1s + 2s) * 1.25 clamped to the 5s floor
+    assert config.metagraph_deadline_buffer == 3  # 2s * 1.25 clamped to the 3s floor
+
+
+def test_buffers_respect_upper_bound_and_disabled_flag():
+    controller = AdaptiveTimingController(min_samples=1, max_step_fraction=10.0)
+    slow = dict(FAST_NETWORK, **{PHASE_TASK_ROUND_TRIP: 500.0})
+    _run_slots(controller, 2, slow)
+
+    config = FlexibleConsensusConfig()
+    decision = controller.adjust(config)[0]
+    assert config.task_deadline_buffer == 120
+    assert "clamped" in decision.reason
+
+    frozen = FlexibleConsensusConfig(adaptive_timing_enabled=False)
+    controller.adjust(frozen)
+    assert frozen.task_deadline_buffer == 20
+
+
+def test_wrapper_applies_tuned_buffers_to_slot_coordinator():
+    slot_config = SimpleNamespace(task_deadline_buffer=20, consensus_deadline_buffer=30, metagraph_deadline_buffer=10)
+
+    class Consensus:
+        flexible_metrics = {"phase_durations": dict(FAST_NETWORK)}
+
+        def enable_flexible_mode(self, **kwargs):
+            return True
+
+        async def run_flexible_consensus_cycle(self, slot):
+            pass
+
+    node = SimpleNamespace(
+        uid="v1",
+        consensus=Consensus(),
+        slot_coordinator=SimpleNamespace(slot_config=slot_config, enable_flexible_mode=lambda **kwargs: None),
+    )
+    wrapper = FlexibleValidatorWrapper(node, FlexibleConsensusConfig())
+    wrapper.timing.min_samples = 2
+
+    for slot in range(3):
+        assert asyncio.run(wrapper.run_flexible_consensus(slot))
+
+    assert slot_config.task_deadline_buffer < 20
+    assert slot_config.task_deadline_buffer == wrapper.config.task_deadline_buffer
+    status = wrapper.get_status()["adaptive_timing"]
+    assert status["buffers"]["task_deadline_buffer"] == slot_config.task_deadline_buffer
+    assert status["decisions"][-1]["slot"] == 2
+
+
+def test_wrapper_times_phase_methods_without_sdk_metrics():
+    class Consensus:
+        flexible_metrics = {}
+
+        def __init__(self, node):
+            self.node = node
+
+        def enable_flexible_mode(self, **kwargs):
+            return True
+
+        async def send_tasks_to_miners(self):
+            await asyncio.sleep(0.02)
+
+        def score_miner_results(self):
+            # Outer scoring method calling the inner one: must not be counted twice
+            for _ in range(3):
+                self.node._score_individual_result({}, {})
+
+        async def broadcast_scores(self):
+            await asyncio.sleep(0.01)
+
+        async def run_flexible_consensus_cycle(self, slot):
+            await self.send_tasks_to_miners()
+            self.score_miner_results()
+            await self.broadcast_scores()
+
+    def score(task_data, result_data):
+        time.sleep(0.02)
+        return 0.5
+
+    node = SimpleNamespace(uid="v1", _score_individual_result=score)
+    node.consensus = Consensus(node)
+    wrapper = FlexibleValidatorWrapper(node, FlexibleConsensusConfig())
+    wrapper.tracer = Tracer()
+
+    start = time.perf_counter()
+    assert asyncio.run(wrapper.run_flexible_consensus(slot=3))
+    elapsed = time.perf_counter() - start
+
+    assert wrapper.timing.phases[PHASE_TASK_ROUND_TRIP].count == 1
+    assert wrapper.timing.phases[PHASE_TASK_ROUND_TRIP].quantile(0.5) >= 0.02
+    assert wrapper.timing.phases[PHASE_CONSENSUS_EXCHANGE].count == 1
+    scoring = wrapper.timing.phases[PHASE_SCORING]
+    assert scoring.count == 1
+    assert 0.06 <= scoring.quantile(0.5) < elapsed
+    assert wrapper.timing.phases[PHASE_METAGRAPH_SUBMIT].count == 0
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for miner task admission (subnet1/admission.py).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.admission import (
+    AdmissionController,
+    REJECT_DEADLINE_INFEASIBLE,
+    REJECT_QUEUE_FULL,
+)
+from subnet1.metrics import MinerMetrics, OUTCOME_SUCCESS, PHASE_GENERATION
+from subnet1.models.latency_model import GenerationLatencyModel
+
+
+def make_controller(e2e_samples=(), generation_samples=(), **kwargs):
+    metrics = MinerMetrics()
+    for seconds in e2e_samples:
+        metrics.record_outcome("http://validator-a:8001", OUTCOME_SUCCESS, seconds)
+    for seconds in generation_samples:
+        metrics.observe_phase(PHASE_GENERATION, seconds)
+    model = GenerationLatencyModel(step_cost_per_mpx=1.0, overhead_per_mpx=1.0)
+    return AdmissionController(metrics, model, submit_budget_s=1.0, min_samples=5, **kwargs)
+
+
+def test_uses_measured_p95_once_enough_samples():
+    controller = make_controller(e2e_samples=[10.0] * 10 + [30.0] * 2)
+
+    assert controller.service_seconds() == 30.0
+    assert controller.evaluate(deadline=1000 + 31, queue_depth=0, now=1000).admitted
+    decision = controller.evaluate(deadline=1000 + 25, queue_depth=0, now=1000)
+    assert not decision.admitted
+    assert decision.reason == REJECT_DEADLINE_INFEASIBLE
+
+
+def test_falls_back_to_latency_model_without_history():
+    controller = make_controller(e2e_samples=[100.0] * 2)
+
+    # 4 steps at 256x256 with the model above plus the 1s submit budget
+    assert controller.service_seconds() < 2.0
+    assert controller.evaluate(deadline=1010, queue_depth=0, now=1000).admitted
+
+
+def test_queue_depth_adds_wait_for_tasks_ahead():
+    controller = make_controller(e2e_samples=[5.0] * 10, generation_samples=[4.0] * 10)
+
+    assert controller.evaluate(deadline=1010, queue_depth=1, now=1000).admitted
+    decision = controller.evaluate(deadline=1010, queue_depth=2, now=1000)
+    assert not decision.admitted
+    assert decision.estimated_seconds == 13.0
+    assert decision.to_result_data()["rejection_reason"] == REJECT_DEADLINE_INFEASIBLE
+
+
+def test_queue_full_rejects_regardless_of_deadline():
+    controller = make_controller(max_queue_depth=2)
+
+    decision = controller.evaluate(deadline=None, queue_depth=2)
+    assert not decision.admitted
+    assert decision.reason == REJECT_QUEUE_FULL
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for vectorized consensus aggregation (checked against plain-Python references).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pytest
+
+from subnet1.aggregation import (
+    AGGREGATION_MEDIAN,
+    IndexMap,
+    ScoreMatrix,
+    aggregate_consensus,
+    align,
+    clip_outliers,
+    ema_update,
+    stake_weighted_mean,
+    stake_weighted_median,
+    to_uint64,
+)
+
+
+def _reference_weighted_median(pairs):
+    pairs = sorted(pairs)
+    total = sum(w for _, w in pairs)
+    running = 0.0
+    for value, weight in pairs:
+        running += weight
+        if running >= total / 2:
+            return value
+
+
+@pytest.fixture
+def random_matrix():
+    rng = np.random.default_rng(7)
+    scores = rng.random((12, 40))
+    scores[rng.random(scores.shape) < 0.3] = np.nan
+    stakes = rng.uniform(1, 100, size=12)
+    return scores, stakes
+
+
+def test_weighted_mean_and_median_match_reference(random_matrix):
+    scores, stakes = random_matrix
+    mean = stake_weighted_mean(scores, stakes)
+    median = stake_weighted_median(scores, stakes)
+
+    for m in range(scores.shape[1]):
+        rows = [v for v in range(scores.shape[0]) if not np.isnan(scores[v, m])]
+        if not rows:
+            assert np.isnan(mean[m]) and np.isnan(median[m])
+            continue
+        expected_mean = sum(scores[v, m] * stakes[v] for v in rows) / sum(stakes[v] for v in rows)
+        assert mean[m] == pytest.approx(expected_mean)
+        assert median[m] == _reference_weighted_median([(scores[v, m], stakes[v]) for v in rows])
+
+
+def test_outlier_validator_is_clipped_towards_the_majority():
+    scores = np.array([[0.80, 0.5], [0.82, 0.5], [0.79, np.nan], [0.0, 0.5]])
+    clipped = clip_outliers(scores, k=3.0)
+
+    # median 0.795, MAD 0.015 -> band 0.795 +/- 3 * 1.4826 * 0.015
+    assert clipped[3, 0] == pytest.approx(0.795 - 3 * 1.4826 * 0.015)
+    assert np.isnan(clipped[2, 1])
+    assert np.array_equal(clipped[:3, 0], scores[:3, 0])
+
+
+def test_matrix_from_validator_scores_and_consensus_dict():
+    class Score:
+        def __init__(self, validator_uid, miner_uid, score):
+            self.validator_uid, self.miner_uid, self.score = validator_uid, miner_uid, score
+
+    matrix = ScoreMatrix.from_validator_scores(
+        [Score("v1", "m1", 0.9), Score("v2", "m1", 0.7), Score("v1", "m2", 0.4)]
+    )
+    result = aggregate_consensus(matrix, {"v1": 3.0, "v2": 1.0}, clip_k=None)
+
+    assert result.to_dict() == pytest.approx({"m1": 0.85, "m2": 0.4})
+    assert result.validator_counts.tolist() == [2, 1]
+    median = aggregate_consensus(matrix, {"v1": 3.0, "v2": 1.0}, method=AGGREGATION_MEDIAN)
+    assert median.to_dict()["m1"] == 0.9
+
+
+def test_from_rows_matches_from_triples(random_matrix):
+    scores, _ = random_matrix
+    rows = {
+        f"v{v}": ([f"m{m}" for m in range(scores.shape[1]) if not np.isnan(scores[v, m])],
+                  [s for s in scores[v] if not np.isnan(s)])
+        for v in range(scores.shape[0])
+    }
+    triples = [(v, m, s) for v, (uids, values) in rows.items() for m, s in zip(uids, values)]
+
+    by_rows, by_triples = ScoreMatrix.from_rows(rows), ScoreMatrix.from_triples(triples)
+    assert by_rows.miners.uids == by_triples.miners.uids
+    assert np.array_equal(by_rows.scores, by_triples.scores, equal_nan=True)
+
+
+def test_ema_update_and_uint64_scaling():
+    previous = np.array([0.5, 0.5, 0.5])
+    current = np.array([1.0, np.nan, 0.0])
+    trust = ema_update(previous, current, alpha=0.2, decay=0.1)
+
+    assert trust == pytest.approx([0.6, 0.45, 0.4])
+    scaled = to_uint64(np.array([0.1234567, 1.5, -0.2, np.nan]))
+    assert scaled.dtype == np.uint64
+    assert scaled.tolist() == [123456, 1_000_000, 0, 0]
+
+
+def test_align_reorders_into_target_index():
+    target = IndexMap(["a", "b", "c"])
+    assert np.allclose(align([3.0, 1.0, 9.0], ["c", "a", "zz"], target, fill=0.0), [1.0, 0.0, 3.0])
+
+
+def test_validator_aggregates_slot_scores_and_scales_for_the_contract():
+    from types import SimpleNamespace
+
+    from subnet1.validator import Subnet1Validator
+
+    validator = Subnet1Validator.__new__(Subnet1Validator)
+    validator.entity_registry = SimpleNamespace(address_of={"m1": "0xA1", "m2": "0xA2"}.get)
+    scores = [
+        SimpleNamespace(validator_uid="v1", miner_uid="m1", score=0.6),
+        SimpleNamespace(validator_uid="v2", miner_uid="m1", score=0.8),
+        SimpleNamespace(validator_uid="v1", miner_uid="m2", score=0.3),
+        SimpleNamespace(validator_uid="v2", miner_uid="m3", score=0.9),
+    ]
+
+    consensus = validator.aggregate_slot_scores(scores)
+    assert consensus == pytest.approx({"m1": 0.7, "m2": 0.3, "m3": 0.9})
+    assert validator.aggregate_slot_scores(scores, stakes={"v1": 3.0, "v2": 1.0})["m1"] == pytest.approx(0.65)
+
+    addresses, performances = validator.metagraph_batch(consensus)
+    assert addresses == ["0xA1", "0xA2"]  # m3 has no registered address
+    assert performances == [int(0.7 * 1_000_000), 300_000]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for batched JSON-RPC contract reads against an in-process chain stand-in.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.chain_reader import (
+    BatchedChainReader,
+    ChainReadError,
+    ContractCall,
+    decode_words,
+    encode_address_call,
+)
+
+CONTRACT = "0x594fc12B3e3AB824537b947765dd9409DAAAa143"
+GET_MINER_INFO = bytes.fromhex("a1b2c3d4")
+ROUND_TRIP_SECONDS = 0.02
+
+
+class LocalChain:
+    """JSON-RPC eth_call stand-in: registered addresses answer getMinerInfo, others revert."""
+
+    def __init__(self, miners, batching=True):
+        self.miners = miners
+        self.batching = batching
+        self.http_requests = 0
+
+    def _eth_call(self, request):
+        data = bytes.fromhex(request["params"][0]["data"][2:])
+        address = "0x" + data[-20:].hex()
+        if data[:4] != GET_MINER_INFO or address not in self.miners:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": 3, "message": "execution reverted"}}
+        active, stake = self.miners[address]
+        words = [int(active), stake, 0, 1]
+        return {"jsonrpc": "2.0", "id": request["id"], "result": "0x" + b"".join(w.to_bytes(32, "big") for w in words).hex()}
+
+    def transport(self):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            self.http_requests += 1
+            await asyncio.sleep(ROUND_TRIP_SECONDS)
+            payload = json.loads(request.content)
+            if isinstance(payload, list):
+                if not self.batching:
+                    return httpx.Response(200, json={"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch not supported"}})
+                return httpx.Response(200, json=[self._eth_call(r) for r in payload])
+            return httpx.Response(200, json=self._eth_call(payload))
+
+        return httpx.MockTransport(handler)
+
+
+def _addresses(n):
+    return [f"0x{i:040x}" for i in range(1, n + 1)]
+
+
+def _calls(addresses):
+    return [ContractCall(CONTRACT, encode_address_call(GET_MINER_INFO, a)) for a in addresses]
+
+
+def test_batch_reads_all_entities_in_few_round_trips():
+    addresses = _addresses(250)
+    chain = LocalChain({a: (i % 2 == 0, 10**18 * i) for i, a in enumerate(addresses) if i != 7})
+    reader = BatchedChainReader("http://chain.local", max_batch_size=100, transport=chain.transport())
+
+    started = time.perf_counter()
+    results = asyncio.run(reader.call_many(_calls(addresses)))
+    elapsed = time.perf_counter() - started
+
+    assert chain.http_requests == 3
+    # Batches run concurrently: far below one round-trip per entity
+    assert elapsed < 10 * ROUND_TRIP_SECONDS
+    assert results[7] is None and reader.stats["failed_calls"] == 1
+    assert decode_words(results[4], ("bool", "uint", "uint", "uint")) == (True, 4 * 10**18, 0, 1)
+
+
+def test_falls_back_to_concurrent_single_calls_when_batches_are_rejected():
+    addresses = _addresses(20)
+    chain = LocalChain({a: (True, 1) for a in addresses}, batching=False)
+    reader = BatchedChainReader("http://chain.local", transport=chain.transport())
+
+    results = asyncio.run(reader.call_many(_calls(addresses)))
+    assert all(r is not None for r in results)
+    assert reader.batching_supported is False
+    chain.http_requests = 0
+    asyncio.run(reader.call_many(_calls(addresses[:5])))
+    assert chain.http_requests == 5
+
+
+def test_unreachable_endpoint_raises_chain_read_error():
+    def refuse(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    reader = BatchedChainReader("http://chain.local", transport=httpx.MockTransport(refuse))
+    with pytest.raises(ChainReadError):
+        asyncio.run(reader.call_many(_calls(_addresses(2))))
+
+
+def test_abi_helpers():
+    data = encode_address_call(GET_MINER_INFO, "0x594fc12B3e3AB824537b947765dd9409DAAAa143")
+    assert len(data) == 36 and data[:4] == GET_MINER_INFO
+    with pytest.raises(ValueError):
+        decode_words(b"", ("bool",))
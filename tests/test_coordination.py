@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for the event-driven slot coordination backends.
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.coordination import (
+    BACKEND_UDP,
+    BACKEND_UNIX,
+    DatagramCoordinationBackend,
+    InotifyCoordinationBackend,
+    PollingCoordinationBackend,
+    SlotStateEvent,
+    create_coordination_backend,
+    start_relay,
+    write_state_file,
+)
+
+
+def _event(uid="v1", slot=337215, phase="task_assignment"):
+    return SlotStateEvent(validator_uid=uid, slot=slot, phase=phase, timestamp=time.time())
+
+
+def test_existing_state_files_seed_active_validators(tmp_path):
+    write_state_file(tmp_path, _event("v1"))
+    write_state_file(tmp_path, _event("v2"))
+    write_state_file(tmp_path, _event("v3", slot=337214))
+    (tmp_path / "slot_1_broken_x.json").write_text("{not json")
+
+    async def scenario():
+        backend = PollingCoordinationBackend(str(tmp_path), interval=60)
+        await backend.start()
+        await backend.stop()
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert backend.current_slot() == 337215
+    assert backend.active_validators(337215) == ["v1", "v2"]
+    assert backend.latest_phase("v3") == (337214, "task_assignment")
+
+
+@pytest.mark.skipif(not InotifyCoordinationBackend.is_available(), reason="inotify not available")
+def test_inotify_delivers_phase_change_without_polling(tmp_path):
+    async def scenario():
+        backend = InotifyCoordinationBackend(str(tmp_path))
+        await backend.start()
+        started = time.perf_counter()
+        await backend.publish(_event("v1", phase="consensus_scoring"))
+        event = await backend.wait_for_event(timeout=2.0)
+        latency = time.perf_counter() - started
+        await backend.stop()
+        return backend, event, latency
+
+    backend, event, latency = asyncio.run(scenario())
+    assert event is not None and event.phase == "consensus_scoring"
+    assert latency < 0.5
+    assert backend.active_validators(337215) == ["v1"]
+
+
+def test_unix_socket_pubsub_reaches_all_subscribers(tmp_path):
+    async def scenario():
+        subscribers = [DatagramCoordinationBackend(str(tmp_path), BACKEND_UNIX) for _ in range(2)]
+        publisher = DatagramCoordinationBackend(str(tmp_path), BACKEND_UNIX, subscribe=False)
+        for backend in subscribers + [publisher]:
+            await backend.start()
+        sent = publisher.send(_event("v9", phase="metagraph_update"))
+        events = [await s.wait_for_event(timeout=2.0) for s in subscribers]
+        for backend in subscribers + [publisher]:
+            await backend.stop()
+        return sent, events
+
+    sent, events = asyncio.run(scenario())
+    assert sent == 2
+    assert all(e is not None and e.validator_uid == "v9" for e in events)
+    assert not list((tmp_path / "sockets").glob("*.sock"))
+
+
+def test_udp_pubsub(tmp_path):
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    async def scenario():
+        subscriber = DatagramCoordinationBackend(str(tmp_path), BACKEND_UDP, bind=("127.0.0.1", port))
+        publisher = DatagramCoordinationBackend(
+            str(tmp_path), BACKEND_UDP, targets=[("127.0.0.1", port)], subscribe=False
+        )
+        await subscriber.start()
+        await publisher.start()
+        await publisher.publish(_event("v2"))
+        event = await subscriber.wait_for_event(timeout=2.0)
+        await subscriber.stop()
+        await publisher.stop()
+        return event
+
+    event = asyncio.run(scenario())
+    assert event is not None and event.validator_uid == "v2"
+    # publish() still writes the state file for file-based readers
+    assert (tmp_path / _event("v2").filename).exists()
+
+
+def test_udp_subscribers_on_one_host_share_the_default_port(tmp_path):
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    async def scenario():
+        subscribers = [
+            DatagramCoordinationBackend(str(tmp_path), BACKEND_UDP, bind=("127.0.0.1", port)) for _ in range(2)
+        ]
+        publisher = DatagramCoordinationBackend(
+            str(tmp_path), BACKEND_UDP, targets=[("127.0.0.1", port)], subscribe=False
+        )
+        for backend in subscribers + [publisher]:
+            await backend.start()
+        bound = [s.bound for s in subscribers]
+        sent = publisher.send(_event("v3"))
+        events = [await s.wait_for_event(timeout=2.0) for s in subscribers]
+        for backend in subscribers + [publisher]:
+            await backend.stop()
+        return bound, sent, events
+
+    bound, sent, events = asyncio.run(scenario())
+    assert bound[0] == ("127.0.0.1", port) and bound[1][1] != port
+    assert sent == 2
+    assert all(e is not None and e.validator_uid == "v3" for e in events)
+    assert not list((tmp_path / "sockets").glob("*.udp"))
+
+
+@pytest.mark.skipif(not InotifyCoordinationBackend.is_available(), reason="inotify not available")
+def test_relay_forwards_state_files_to_socket_subscribers(tmp_path):
+    async def scenario():
+        miner = DatagramCoordinationBackend(str(tmp_path), BACKEND_UNIX)
+        await miner.start()
+        publisher = DatagramCoordinationBackend(str(tmp_path), BACKEND_UNIX, subscribe=False)
+        await publisher.start()
+        relay = await start_relay(str(tmp_path), publisher)
+        # The SDK's slot coordinator writing its state file
+        write_state_file(tmp_path, _event("v5", phase="consensus_scoring"))
+        event = await miner.wait_for_event(timeout=2.0)
+        for backend in (relay, publisher, miner):
+            await backend.stop()
+        return event
+
+    event = asyncio.run(scenario())
+    assert event is not None and (event.validator_uid, event.phase) == ("v5", "consensus_scoring")
+
+
+def test_create_backend_by_name(tmp_path):
+    assert create_coordination_backend("poll", str(tmp_path)).event_driven is False
+    assert create_coordination_backend("unix", str(tmp_path)).name == BACKEND_UNIX
+    with pytest.raises(ValueError):
+        create_coordination_backend("carrier-pigeon", str(tmp_path))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the indexed entity registry.
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.entity_registry import EntityRegistry, uid_hex_for
+
+
+def _write(directory, stem, name, entity_type="miner", address=None, **extra):
+    address = address or "0x" + uid_hex_for(name)[-40:].rjust(40, "0")
+    data = {"name": name, "type": entity_type, "address": address, "private_key": "secret", **extra}
+    (directory / f"{stem}.json").write_text(json.dumps(data))
+    return address
+
+
+def test_lookup_by_name_stem_hex_uid_and_address(tmp_path):
+    address = _write(tmp_path, "miner_1", "subnet1_miner_001", address="0xd89fBAbb72190ed22F012ADFC693ad974bAD3005")
+    _write(tmp_path, "validator_1", "subnet1_validator_001", "validator")
+    (tmp_path / "notes.json").write_text(json.dumps({"comment": "not an entity"}))
+    (tmp_path / "broken.json").write_text("{")
+
+    registry = EntityRegistry(tmp_path)
+
+    assert len(registry) == 2
+    entity = registry.get("7375626e6574315f6d696e65725f303031")
+    assert entity is registry.get("subnet1_miner_001") is registry.get("miner_1")
+    assert registry.get(address.lower()) is entity and registry.get("0x7375626e6574315f6d696e65725f303031") is entity
+    assert registry.address_of("subnet1_miner_001") == address
+    assert [v.name for v in registry.validators()] == ["subnet1_validator_001"]
+    assert "private_key" not in entity.to_dict() and entity.private_key == "secret"
+    assert registry.get("unknown") is None
+
+
+def test_merge_chain_data_survives_reload(tmp_path):
+    address = _write(tmp_path, "miner_1", "subnet1_miner_001")
+    registry = EntityRegistry(tmp_path)
+
+    merged = registry.merge_chain("miner", [
+        {"address": address.upper().replace("0X", "0x"), "is_active": True, "core_stake": "0.05"},
+        {"address": "0x" + "ab" * 20, "uid": "6d", "is_active": True},
+    ])
+    assert merged == 2
+    assert registry.get("subnet1_miner_001").chain["is_active"] is True
+    assert registry.get("6d").address == "0x" + "ab" * 20
+
+    registry.reload()
+    assert registry.get("subnet1_miner_001").chain["core_stake"] == "0.05"
+    assert registry.get("0x" + "ab" * 20) is not None
+
+
+def test_auto_reload_picks_up_file_changes(tmp_path):
+    _write(tmp_path, "miner_1", "subnet1_miner_001")
+    registry = EntityRegistry(tmp_path, auto_reload=True, reload_interval=0.0)
+    assert registry.get("subnet1_miner_002") is None
+
+    _write(tmp_path, "miner_2", "subnet1_miner_002")
+    assert registry.get("subnet1_miner_002") is not None
+    os.remove(tmp_path / "miner_1.json")
+    assert registry.get("subnet1_miner_001") is None
+
+    static = EntityRegistry(tmp_path)
+    _write(tmp_path, "miner_3", "subnet1_miner_003")
+    assert static.get("subnet1_miner_003") is None
+
+
+def test_scales_to_thousands_of_entities(tmp_path):
+    for i in range(3000):
+        _write(tmp_path, f"miner_{i}", f"subnet1_miner_{i:05d}", address=f"0x{i:040x}")
+
+    started = time.perf_counter()
+    registry = EntityRegistry(tmp_path)
+    load_seconds = time.perf_counter() - started
+    assert len(registry) == 3000
+    assert load_seconds < 5.0
+
+    started = time.perf_counter()
+    for i in range(3000):
+        assert registry.get(uid_hex_for(f"subnet1_miner_{i:05d}")).address == f"0x{i:040x}"
+    assert time.perf_counter() - started < 0.5
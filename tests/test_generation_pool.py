@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-process generation pool.
+
+This module doubles as the pool's backend: workers import it and call the
+fake load_pipeline / generate_image_from_prompt below instead of diffusers.
+"""
+
+import os
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from PIL import Image
+
+from subnet1.models.generation_pool import GenerationPool, WorkerDiedError, plan_core_slices
+
+
+# --- Fake backend (runs inside the worker processes) ---
+def load_pipeline(model_id=None, profile=None, mmap_weights=False):
+    if model_id == "broken-model":
+        return None
+    return object()
+
+
+def generate_image_from_prompt(prompt=None, num_inference_steps=1, height=64, width=64, **kwargs):
+    if prompt == "crash":
+        os._exit(1)  # Simulates an OOM kill / segfault mid-job
+    time.sleep(0.2 if prompt != "a photo of a cat" else 0)
+    color = (int(os.environ["OMP_NUM_THREADS"]), 0, 0)
+    return Image.new("RGB", (width, height), color=color)
+
+
+# --- Tests ---
+def test_core_slices_do_not_overlap():
+    assert plan_core_slices(2, cpu_ids=list(range(8))) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert plan_core_slices(3, cpu_ids=list(range(8))) == [[0, 1], [2, 3], [4, 5]]
+    # More workers than CPUs: one core each, wrapping around
+    assert plan_core_slices(3, cpu_ids=[0, 1]) == [[0], [1], [0]]
+
+
+def test_pool_runs_jobs_in_parallel_workers():
+    pool = GenerationPool(
+        model_id="fake-model", num_workers=2, backend=__name__, cpu_ids=[0, 0, 0, 0]
+    ).start(timeout=60)
+    try:
+        start = time.time()
+        futures = [pool.submit(prompt=f"prompt {i}", height=32, width=48) for i in range(4)]
+        images = [future.result(timeout=30) for future in futures]
+        elapsed = time.time() - start
+
+        assert all(image.size == (48, 32) for image in images)
+        # Each worker was given two "cores", so it runs with two threads
+        assert all(image.getpixel((0, 0))[0] == 2 for image in images)
+        assert {future.stats["worker"] for future in futures} == {0, 1}
+        assert elapsed < 0.75  # 4 x 0.2s jobs on 2 workers
+        assert len(set(pool.pids)) == 2
+    finally:
+        pool.shutdown()
+
+
+def test_pool_start_fails_when_a_worker_cannot_load():
+    pool = GenerationPool(model_id="broken-model", num_workers=1, backend=__name__)
+
+    with pytest.raises(RuntimeError, match="failed to start"):
+        pool.start(timeout=60)
+
+
+def test_dead_worker_fails_its_job_and_is_respawned():
+    pool = GenerationPool(model_id="fake-model", num_workers=1, backend=__name__, warmup_steps=0).start(timeout=60)
+    try:
+        first_pid = pool.pids[0]
+        with pytest.raises(WorkerDiedError):
+            pool.submit(prompt="crash").result(timeout=30)
+
+        image = pool.generate(timeout=60, prompt="after crash", height=16, width=16)
+        assert image.size == (16, 16)
+        assert pool.stats["respawns"] == 1
+        assert pool.pids and pool.pids[0] != first_pid
+    finally:
+        pool.shutdown()
+
+
+def test_killed_idle_worker_does_not_block_the_others():
+    pool = GenerationPool(
+        model_id="fake-model", num_workers=2, backend=__name__, warmup_steps=0, cpu_ids=[0, 0]
+    ).start(timeout=60)
+    try:
+        os.kill(pool.worker_info[0]["pid"], signal.SIGKILL)  # Idle, blocked reading its job pipe
+        deadline = time.time() + 30
+        while pool.stats["worker_deaths"] < 1 and time.time() < deadline:
+            time.sleep(0.05)
+        assert pool.stats["worker_deaths"] == 1
+
+        # Jobs keep flowing to the surviving worker while the dead one reloads
+        futures = [pool.submit(prompt=f"prompt {i}", height=16, width=16) for i in range(4)]
+        assert all(future.result(timeout=30).size == (16, 16) for future in futures)
+        assert pool.stats["respawns"] == 1
+    finally:
+        pool.shutdown()
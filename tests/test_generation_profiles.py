@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for generation profile selection.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.models.generation_profiles import (
+    DEFAULT_PROFILE_NAME,
+    GENERATION_PROFILES,
+    get_generation_profile,
+)
+
+
+def test_explicit_name_wins_over_env(monkeypatch):
+    monkeypatch.setenv("IMAGEGEN_PROFILE", "low_memory")
+    assert get_generation_profile("fast_cpu").name == "fast_cpu"
+
+
+def test_env_selects_profile(monkeypatch):
+    monkeypatch.setenv("IMAGEGEN_PROFILE", "fast_cpu")
+    profile = get_generation_profile()
+    assert profile.scheduler == "dpm_solver_multistep"
+    assert profile.num_inference_steps < GENERATION_PROFILES["default"].num_inference_steps
+
+
+def test_unknown_profile_falls_back_to_default(monkeypatch):
+    monkeypatch.delenv("IMAGEGEN_PROFILE", raising=False)
+    assert get_generation_profile("does_not_exist").name == DEFAULT_PROFILE_NAME
+
+
+def test_thread_override_from_env(monkeypatch):
+    monkeypatch.setenv("IMAGEGEN_NUM_THREADS", "3")
+    profile = get_generation_profile("fast_cpu")
+    assert profile.num_threads == 3
+    # The shared registry entry must not be mutated
+    assert GENERATION_PROFILES["fast_cpu"].num_threads is None
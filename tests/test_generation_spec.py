@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Tests for the validator-negotiated generation spec.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.generation_spec import GenerationSpec, validator_generation_spec_from_env
+from subnet1.models.image_encoding import OutputSpec
+
+
+def test_round_trip_and_invalid_fields_dropped():
+    spec = GenerationSpec(resolution=256, max_steps=20, output_format="JPEG", max_bytes=65536)
+    assert GenerationSpec.from_dict(spec.to_dict()) == spec
+
+    parsed = GenerationSpec.from_dict({"resolution": "big", "max_steps": -1, "output_format": "png"})
+    assert parsed == GenerationSpec(output_format="PNG")
+    assert GenerationSpec.from_dict({"resolution": 256, "output_format": "bmp"}) == GenerationSpec(resolution=256)
+    assert GenerationSpec.from_dict({"output_format": "jpg"}).output_format == "JPEG"
+    assert GenerationSpec.from_dict(None) is None
+
+
+def test_resolution_and_steps_limits():
+    spec = GenerationSpec(resolution=384, max_steps=10)
+    assert spec.allowed_resolutions((512, 448, 384, 320, 256)) == [384, 320, 256]
+    assert GenerationSpec(resolution=224).allowed_resolutions((512, 256)) == [256]
+    assert spec.cap_steps(25) == 10
+    assert GenerationSpec().cap_steps(25) == 25
+
+
+def test_output_overrides_apply_to_output_spec():
+    spec = GenerationSpec(resolution=224, output_format="WEBP", max_bytes=30000)
+    merged = OutputSpec("JPEG", quality=80, max_edge=512).merged_with(spec.output_overrides())
+    assert merged == OutputSpec("WEBP", quality=80, max_edge=224, max_bytes=30000)
+
+
+def test_validator_env_zero_disables_a_limit(monkeypatch):
+    monkeypatch.setenv("VALIDATOR_TASK_MAX_BYTES", "0")
+    monkeypatch.setenv("VALIDATOR_TASK_RESOLUTION", "224")
+    spec = validator_generation_spec_from_env()
+    assert spec.max_bytes is None
+    assert spec.resolution == 224
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for miner output encoding (format, quality, downscaling).
+"""
+
+import os
+import sys
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from PIL import Image
+
+from subnet1.models.image_encoding import OutputSpec, encode_image
+
+
+@pytest.fixture
+def image():
+    return Image.new("RGB", (512, 512), color=(120, 30, 200))
+
+
+@pytest.mark.parametrize("fmt", ["PNG", "JPEG", "WEBP"])
+def test_encode_round_trips_in_requested_format(image, fmt):
+    data = encode_image(image, OutputSpec(format=fmt, max_edge=256))
+    decoded = Image.open(BytesIO(data))
+
+    assert decoded.format == fmt
+    assert decoded.size == (256, 256)
+
+
+def test_max_edge_keeps_aspect_ratio():
+    wide = Image.new("RGB", (512, 256))
+    decoded = Image.open(BytesIO(encode_image(wide, OutputSpec("JPEG", max_edge=224))))
+    assert decoded.size == (224, 112)
+
+
+def test_no_upscaling_when_smaller_than_max_edge():
+    small = Image.new("RGB", (128, 128))
+    decoded = Image.open(BytesIO(encode_image(small, OutputSpec("PNG", max_edge=256))))
+    assert decoded.size == (128, 128)
+
+
+def test_task_overrides_merge_over_miner_defaults():
+    default = OutputSpec("JPEG", quality=90, max_edge=256)
+    merged = default.merged_with({"format": "webp", "quality": 70})
+
+    assert merged == OutputSpec("WEBP", quality=70, max_edge=256)
+    # Invalid overrides are ignored rather than failing the task
+    assert default.merged_with({"format": "bmp"}) == default
+    # ... one key at a time: the valid ones still apply
+    assert default.merged_with({"format": "bmp", "quality": 50, "max_bytes": 1000}) == OutputSpec(
+        "JPEG", quality=50, max_edge=256, max_bytes=1000
+    )
+
+
+def test_jpg_alias_and_quality_clamp():
+    spec = OutputSpec("jpg", quality=400)
+    assert spec.format == "JPEG"
+    assert spec.quality == 100
+
+
+def test_max_bytes_lowers_quality_then_size():
+    noisy = Image.frombytes("RGB", (256, 256), os.urandom(256 * 256 * 3))
+    unbounded = encode_image(noisy, OutputSpec("JPEG", quality=95))
+    data = encode_image(noisy, OutputSpec("JPEG", quality=95, max_bytes=len(unbounded) // 4))
+
+    assert len(data) <= len(unbounded) // 4
+    assert Image.open(BytesIO(data)).format == "JPEG"
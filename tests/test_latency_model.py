@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the miner's generation latency model and deadline planning.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.models.latency_model import GenerationLatencyModel
+
+
+def test_plan_prefers_full_resolution_when_time_allows():
+    model = GenerationLatencyModel(step_cost_per_mpx=1.0, overhead_per_mpx=2.0)
+    plan = model.plan(time_budget_s=120, max_steps=25)
+
+    assert plan is not None
+    assert (plan.height, plan.width) == (512, 512)
+    assert plan.num_inference_steps == 25
+
+
+def test_plan_drops_resolution_before_dropping_below_preferred_steps():
+    model = GenerationLatencyModel(step_cost_per_mpx=4.0, overhead_per_mpx=4.0)
+    plan = model.plan(time_budget_s=6, max_steps=25, preferred_min_steps=12)
+
+    assert plan is not None
+    assert plan.height < 512
+    assert plan.num_inference_steps >= 12
+    assert plan.estimated_seconds <= 6
+
+
+def test_plan_returns_none_when_infeasible():
+    model = GenerationLatencyModel(step_cost_per_mpx=10.0, overhead_per_mpx=10.0)
+    assert model.plan(time_budget_s=0.5) is None
+    assert model.plan(time_budget_s=-1) is None
+
+
+def test_record_learns_measured_step_cost():
+    model = GenerationLatencyModel(step_cost_per_mpx=10.0, overhead_per_mpx=10.0)
+    # 512x512 = 0.262144 MPx, 0.5s per step, 1s overhead
+    model.record(20, 512, 512, total_seconds=11.0, step_seconds=0.5)
+
+    assert abs(model.estimate_step_seconds(512, 512) - 0.5) < 1e-6
+    assert abs(model.estimate_overhead_seconds(512, 512) - 1.0) < 1e-6
+
+
+def test_batch_size_scales_estimate_and_limits_candidates():
+    model = GenerationLatencyModel(step_cost_per_mpx=1.0, overhead_per_mpx=1.0, safety_factor=1.0)
+    single = model.estimate(9, 1000, 1000)
+
+    assert model.estimate(9, 1000, 1000, batch_size=3) == 3 * single
+    assert model.max_batch_within(2.5 * single, 9, 1000, 1000, max_batch=4) == 2
+    assert model.max_batch_within(10 * single, 9, 1000, 1000, max_batch=4) == 4
+    assert model.max_batch_within(0.5 * single, 9, 1000, 1000, max_batch=4) == 0
+
+
+def test_deadline_reachability():
+    model = GenerationLatencyModel(step_cost_per_mpx=1.0, overhead_per_mpx=0.0)
+    now = time.time()
+    assert model.is_deadline_reachable(5, 512, 512, now + 60)
+    assert not model.is_deadline_reachable(50, 512, 512, now + 1)
+
+
+def test_state_round_trip(tmp_path):
+    path = str(tmp_path / "latency.json")
+    model = GenerationLatencyModel(state_path=path)
+    model.record(10, 256, 256, total_seconds=2.0, step_seconds=0.1)
+
+    restored = GenerationLatencyModel(state_path=path)
+    assert restored.samples == 1
+    assert abs(restored.step_cost_per_mpx - model.step_cost_per_mpx) < 1e-9
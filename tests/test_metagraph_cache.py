@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the block-keyed metagraph cache and its snapshot delta log.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.metagraph_cache import MetagraphCache
+
+
+class FakeChain:
+    def __init__(self):
+        self.block = 100
+        self.miners = {"0xa": {"stake": 1}, "0xb": {"stake": 2}}
+        self.reads = []
+
+    async def block_number(self):
+        return self.block
+
+    async def read(self, keys, block):
+        self.reads.append(keys)
+        miners = {k: v for k, v in self.miners.items() if keys is None or ("miners", k) in keys}
+        return {"miners": miners}
+
+
+def _refresh(cache, chain):
+    return asyncio.run(cache.refresh(chain.block_number, chain.read))
+
+
+def test_same_block_is_served_from_cache_and_changes_are_logged(tmp_path):
+    path = tmp_path / "metagraph.json"
+    chain = FakeChain()
+    cache = MetagraphCache(path)
+
+    assert _refresh(cache, chain) is True
+    assert _refresh(cache, chain) is False
+    assert chain.reads == [None] and cache.stats["cache_hits"] == 1
+
+    # New block with no changes: re-read, but nothing appended
+    chain.block = 101
+    assert _refresh(cache, chain) is False
+    chain.block = 102
+    chain.miners["0xb"] = {"stake": 5}
+    del chain.miners["0xa"]
+    assert _refresh(cache, chain) is True
+
+    lines = [json.loads(line) for line in (tmp_path / "metagraph.json.log").read_text().splitlines()]
+    assert [line["block"] for line in lines] == [100, 102]
+    assert lines[1]["changes"] == {"miners": {"0xa": None, "0xb": {"stake": 5}}}
+
+    reloaded = MetagraphCache(path)
+    assert reloaded.block == 102
+    assert reloaded.section("miners") == {"0xb": {"stake": 5}}
+
+
+def test_compaction_rewrites_snapshot_and_truncates_log(tmp_path):
+    path = tmp_path / "metagraph.json"
+    chain = FakeChain()
+    cache = MetagraphCache(path, compact_every=3)
+    for block in range(100, 104):
+        chain.block = block
+        chain.miners["0xa"] = {"stake": block}
+        _refresh(cache, chain)
+
+    assert json.loads(path.read_text())["block"] == 102
+    log = (tmp_path / "metagraph.json.log").read_text().splitlines()
+    assert len(log) == 1
+    # A torn trailing write is ignored on load
+    with open(tmp_path / "metagraph.json.log", "a") as f:
+        f.write('{"block": 104, "chan')
+    reloaded = MetagraphCache(path)
+    assert reloaded.block == 103 and reloaded.get("miners", "0xa") == {"stake": 103}
+
+
+def test_event_driven_mode_rereads_only_dirty_entities():
+    chain = FakeChain()
+    cache = MetagraphCache(event_driven=True)
+    _refresh(cache, chain)
+
+    chain.block = 150
+    chain.miners["0xa"] = {"stake": 9}
+    assert _refresh(cache, chain) is False  # no event yet: still cached
+    assert cache.block == 150
+
+    cache.mark_dirty([("miners", "0xa")])
+    assert _refresh(cache, chain) is True
+    assert chain.reads[-1] == {("miners", "0xa")}
+    assert cache.get("miners", "0xa") == {"stake": 9}
+    assert cache.get_status()["partial_reads"] == 1
+
+
+def test_failed_read_keeps_cached_block_and_entities(tmp_path):
+    path = tmp_path / "metagraph.json"
+    chain = FakeChain()
+    cache = MetagraphCache(path)
+    _refresh(cache, chain)
+
+    async def failing_read(keys, block):
+        raise RuntimeError("rpc down")
+
+    chain.block = 101
+    try:
+        asyncio.run(cache.refresh(chain.block_number, failing_read))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("read error should propagate")
+
+    assert cache.block == 100 and not cache.is_fresh(101)
+    assert cache.section("miners") == {"0xa": {"stake": 1}, "0xb": {"stake": 2}}
+    assert MetagraphCache(path).section("miners") == cache.section("miners")
+
+
+def test_torn_log_line_is_cut_off_before_the_next_append(tmp_path):
+    path = tmp_path / "metagraph.json"
+    chain = FakeChain()
+    _refresh(MetagraphCache(path), chain)
+    log_path = tmp_path / "metagraph.json.log"
+    with open(log_path, "ab") as f:
+        f.write(b'{"block": 101, "changes": {"miners": {"0xa"')
+
+    cache = MetagraphCache(path)
+    assert cache.block == 100
+    chain.block = 102
+    chain.miners["0xa"] = {"stake": 9}
+    assert _refresh(cache, chain) is True
+
+    reloaded = MetagraphCache(path)
+    assert reloaded.block == 102
+    assert reloaded.section("miners") == {"0xa": {"stake": 9}, "0xb": {"stake": 2}}
+    assert len(log_path.read_text().splitlines()) == 2
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Tests for the eth_getLogs metagraph indexer against an in-process EVM stand-in.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.chain_reader import BatchedChainReader, ChainReadError, ContractCall, decode_words, encode_address_call
+from subnet1.metagraph_indexer import MetagraphIndexer, MetagraphStore, topic_addresses
+
+CONTRACT = "0x594fc12b3e3ab824537b947765dd9409daaaa143"
+GET_MINER_INFO = bytes.fromhex("11111111")
+REGISTERED_TOPIC = "0x" + "ab" * 32
+MAX_LOG_RANGE = 500
+
+
+def _topic(address):
+    return "0x" + "0" * 24 + address[2:]
+
+
+class LocalEVM:
+    """Minimal JSON-RPC chain: miner registrations as logs + getMinerInfo(address) state per block."""
+
+    def __init__(self):
+        self.head = 0
+        self.logs = []
+        # address -> [(block, (active, stake, uid))], applied in order
+        self.history = {}
+        self.log_requests = []
+        self.fail_calls = False
+        self.fail_logs = False
+        # Refuse eth_getLogs results larger than this (like Infura's 10k cap)
+        self.max_results = None
+
+    def register(self, block, address, active=True, stake=1, uid=0):
+        self.head = max(self.head, block)
+        self.history.setdefault(address, []).append((block, (active, stake, uid)))
+        self.logs.append({"address": CONTRACT, "blockNumber": hex(block), "topics": [REGISTERED_TOPIC, _topic(address)]})
+
+    def _state(self, address, block):
+        states = [s for b, s in self.history.get(address, []) if b <= block]
+        return states[-1] if states else None
+
+    def _handle(self, request):
+        method, params = request["method"], request["params"]
+        reply = {"jsonrpc": "2.0", "id": request["id"]}
+        if method == "eth_blockNumber":
+            reply["result"] = hex(self.head)
+        elif method == "eth_getLogs":
+            start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+            self.log_requests.append((start, end))
+            if end - start + 1 > MAX_LOG_RANGE:
+                reply["error"] = {"code": -32005, "message": "query exceeds max block range"}
+            else:
+                logs = [log for log in self.logs if start <= int(log["blockNumber"], 16) <= end]
+                if self.max_results is not None and len(logs) > self.max_results:
+                    reply["error"] = {"code": -32005, "message": f"query returned more than {self.max_results} results"}
+                else:
+                    reply["result"] = logs
+        elif method == "eth_call":
+            data = bytes.fromhex(params[0]["data"][2:])
+            state = self._state("0x" + data[-20:].hex(), int(params[1], 16))
+            if self.fail_calls or state is None:
+                reply["error"] = {"code": 3, "message": "execution reverted"}
+            else:
+                reply["result"] = "0x" + b"".join(int(v).to_bytes(32, "big") for v in state).hex()
+        return reply
+
+    def transport(self):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            payload = json.loads(request.content)
+            if self.fail_calls and isinstance(payload, list):
+                return httpx.Response(503)
+            if self.fail_logs and not isinstance(payload, list) and payload["method"] == "eth_getLogs":
+                return httpx.Response(503)
+            body = [self._handle(r) for r in payload] if isinstance(payload, list) else self._handle(payload)
+            return httpx.Response(200, json=body)
+
+        return httpx.MockTransport(handler)
+
+
+def _indexer(evm, store, **kwargs):
+    reader = BatchedChainReader("http://evm.local", transport=evm.transport())
+
+    async def fetch_info(addresses, block):
+        addresses = sorted(addresses)
+        results = await reader.call_many(
+            [ContractCall(CONTRACT, encode_address_call(GET_MINER_INFO, a)) for a in addresses], block
+        )
+        changes = {}
+        for address, data in zip(addresses, results):
+            info = None
+            if data is not None:
+                active, stake, uid = decode_words(data, ("bool", "uint", "uint"))
+                info = {"is_active": active, "stake": stake, "uid": uid} if active else None
+            changes[("miners", address)] = info
+        return changes
+
+    return MetagraphIndexer(reader, store, CONTRACT, fetch_info, **kwargs)
+
+
+def _address(i):
+    return f"0x{i:040x}"
+
+
+def test_topic_addresses_skip_non_address_words():
+    assert topic_addresses([REGISTERED_TOPIC, _topic(_address(5)), "0x" + "ff" * 32]) == {_address(5)}
+
+
+def test_sync_indexes_entities_and_resumes_from_checkpoint(tmp_path):
+    evm = LocalEVM()
+    for i in range(1, 21):
+        evm.register(block=i * 300, address=_address(i), stake=i, uid=i)
+    path = tmp_path / "index.sqlite"
+    changed = []
+
+    indexer = _indexer(evm, MetagraphStore(path), max_block_range=2000, on_change=changed.extend)
+    assert asyncio.run(indexer.sync_once()) == 20
+    assert indexer.store.checkpoint() == 6000
+    # Node caps eth_getLogs at 500 blocks: the range shrank instead of failing
+    assert indexer.stats["range_reductions"] > 0
+    assert all(end - start + 1 <= MAX_LOG_RANGE for start, end in evm.log_requests[indexer.stats["range_reductions"]:])
+    assert len(indexer.store.addresses("miners")) == 20
+    assert indexer.store.get_by_uid(7)["stake"] == 7
+    assert ("miners", _address(3)) in changed
+    indexer.store.close()
+
+    # A new process picks up at the checkpoint; deregistration removes the entity
+    evm.register(block=6100, address=_address(3), active=False)
+    evm.register(block=6200, address=_address(99), stake=5, uid=99)
+    evm.log_requests.clear()
+    resumed = _indexer(evm, MetagraphStore(path))
+    assert asyncio.run(resumed.sync_once()) == 2
+    assert evm.log_requests[0][0] == 6001
+    assert resumed.store.get(_address(3)) is None
+    assert resumed.store.get(_address(99).upper().replace("0X", "0x"))["uid"] == 99
+    assert resumed.store.checkpoint() == 6200
+
+
+def test_failed_entity_read_does_not_advance_checkpoint():
+    evm = LocalEVM()
+    evm.register(block=10, address=_address(1))
+    store = MetagraphStore()
+    indexer = _indexer(evm, store, confirmations=0)
+
+    evm.fail_calls = True
+    with pytest.raises(ChainReadError):
+        asyncio.run(indexer.sync_once())
+    assert store.checkpoint() is None
+
+    evm.fail_calls = False
+    asyncio.run(indexer.sync_once())
+    assert store.checkpoint() == 10 and store.get(_address(1)) is not None
+
+
+def test_confirmations_keep_indexer_behind_head():
+    evm = LocalEVM()
+    evm.register(block=100, address=_address(1))
+    evm.register(block=105, address=_address(2))
+    indexer = _indexer(evm, MetagraphStore(), confirmations=3)
+    asyncio.run(indexer.sync_once())
+    assert indexer.store.checkpoint() == 102
+    assert indexer.store.addresses("miners") == [_address(1)]
+
+
+def test_transport_error_propagates_without_shrinking_the_range():
+    evm = LocalEVM()
+    evm.register(block=100, address=_address(1))
+    indexer = _indexer(evm, MetagraphStore(), max_block_range=400)
+
+    evm.fail_logs = True
+    with pytest.raises(ChainReadError):
+        asyncio.run(indexer.sync_once())
+    assert indexer.block_range == 400
+    assert indexer.stats["range_reductions"] == 0
+
+
+def test_range_grows_back_after_result_size_refusals():
+    evm = LocalEVM()
+    # A burst of logs early on, then quiet blocks
+    for i in range(1, 11):
+        evm.register(block=i, address=_address(i))
+    evm.register(block=4000, address=_address(50))
+    evm.max_results = 4
+    indexer = _indexer(evm, MetagraphStore(), max_block_range=400)
+
+    asyncio.run(indexer.sync_once())
+    assert indexer.store.checkpoint() == 4000
+    assert len(indexer.store.addresses("miners")) == 11
+    assert indexer.stats["range_reductions"] > 0
+    # Result-size refusals are not a block-range cap: the range recovers
+    assert indexer.stats["range_increases"] > 0
+    assert indexer.block_range == 400
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the miner metrics layer (subnet1/metrics.py).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+
+from subnet1.metrics import (
+    Histogram,
+    MinerMetrics,
+    OUTCOME_DEADLINE_MISS,
+    OUTCOME_FAILURE,
+    OUTCOME_SUCCESS,
+    PHASE_GENERATION,
+    RollingRate,
+)
+
+
+def test_histogram_buckets_are_cumulative_and_quantiles_track_samples():
+    histogram = Histogram(buckets=(1.0, 5.0))
+    for value in (0.5, 2.0, 3.0, 10.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative_buckets() == [("1", 1), ("5", 3), ("+Inf", 4)]
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == pytest.approx(15.5)
+    assert histogram.quantile(0.0) == 0.5
+    assert histogram.quantile(1.0) == 10.0
+
+
+def test_rolling_rate_forgets_events_outside_window():
+    rate = RollingRate(window_seconds=60)
+    rate.mark(now=0)
+    rate.mark(now=30)
+    rate.mark(now=50)
+
+    assert rate.per_minute(now=55) == pytest.approx(3.0)
+    assert rate.per_minute(now=100) == pytest.approx(1.0)
+
+
+def test_outcomes_are_counted_per_validator():
+    metrics = MinerMetrics()
+    metrics.record_outcome("http://validator-a:8001", OUTCOME_SUCCESS, 1.0)
+    metrics.record_outcome("http://validator-a:8001", OUTCOME_DEADLINE_MISS, 9.0)
+    metrics.record_outcome("http://validator-b:8001", OUTCOME_FAILURE)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["per_validator"]["http://validator-a:8001"][OUTCOME_SUCCESS] == 1
+    assert snapshot["per_validator"]["http://validator-a:8001"][OUTCOME_DEADLINE_MISS] == 1
+    assert snapshot["per_validator"]["http://validator-b:8001"][OUTCOME_FAILURE] == 1
+    assert snapshot["tasks_completed"] == 1
+    assert snapshot["end_to_end"]["count"] == 2
+
+
+def test_prometheus_rendering_includes_phases_and_validator_labels():
+    metrics = MinerMetrics()
+    metrics.observe_phase(PHASE_GENERATION, 4.2)
+    metrics.record_outcome('http://odd"host', OUTCOME_SUCCESS, 5.0)
+
+    text = metrics.render_prometheus()
+    assert 'subnet1_miner_phase_seconds_bucket{phase="generation",le="5"} 1' in text
+    assert 'subnet1_miner_phase_seconds_count{phase="generation"} 1' in text
+    assert 'validator="http://odd\\"host",outcome="success"} 1' in text
+    assert "subnet1_miner_throughput_per_minute" in text
+
+
+def test_unknown_phase_is_rejected():
+    with pytest.raises(ValueError):
+        MinerMetrics().observe_phase("upload", 1.0)
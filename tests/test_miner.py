@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Tests for Subnet1Miner task handling.
+
+Image generation and HTTP submission are replaced with fakes so the tests
+exercise only the miner's own logic.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import subnet1.miner as miner_module
+from subnet1.miner import Subnet1Miner
+from subnet1.models.model_manager import ModelManager
+
+
+class FakeResponse:
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def submissions(monkeypatch):
+    """Capture (url, payload) for every result the miner submits."""
+    sent = []
+    lock = threading.Lock()
+
+    def fake_post(url, json=None, timeout=None, headers=None):
+        with lock:
+            sent.append((url, json))
+        return FakeResponse()
+
+    monkeypatch.setattr(miner_module.requests, "post", fake_post)
+    return sent
+
+
+@pytest.fixture
+def fake_generation(monkeypatch):
+    monkeypatch.setattr(miner_module, "load_pipeline", lambda **kwargs: object())
+    monkeypatch.setattr(
+        miner_module,
+        "generate_image_from_prompt",
+        lambda **kwargs: Image.new("RGB", (64, 64), color="white"),
+    )
+    monkeypatch.setattr(miner_module, "image_to_base64", lambda image, **kwargs: "aW1n")
+
+
+def make_miner(**kwargs):
+    return Subnet1Miner(
+        validator_url="http://default-validator:8001",
+        on_chain_uid_hex="7375626e6574315f6d696e65725f303031",
+        load_model_in_background=False,
+        **kwargs,
+    )
+
+
+def make_task(task_id="task_1", validator_endpoint="http://validator-a:8001", **kwargs):
+    return miner_module.TaskModel(
+        task_id=task_id,
+        description="A cute dog wearing sunglasses",
+        deadline=kwargs.pop("deadline", None),
+        priority=1,
+        validator_endpoint=validator_endpoint,
+        **kwargs,
+    )
+
+
+# --- Readiness ---
+def test_miner_becomes_ready_after_load_and_warm_up(fake_generation):
+    miner = make_miner()
+
+    status = miner.get_status()
+    assert status["ready"] is True
+    assert status["model_state"] == miner_module.MODEL_STATE_READY
+    assert status["timings"]["load_seconds"] is not None
+    assert len(status["timings"]["warmup_seconds"]) == miner_module.WARMUP_GENERATIONS
+
+
+def test_warm_up_does_not_update_latency_model(monkeypatch):
+    latency_models = []
+
+    def record_generate(latency_model=None, **kwargs):
+        latency_models.append(latency_model)
+        return Image.new("RGB", (64, 64), color="white")
+
+    monkeypatch.setattr(miner_module, "load_pipeline", lambda **kwargs: object())
+    monkeypatch.setattr(miner_module, "generate_image_from_prompt", record_generate)
+    miner = make_miner()
+
+    assert len(latency_models) == miner_module.WARMUP_GENERATIONS
+    assert all(model is None for model in latency_models)
+    assert miner.latency_model.samples == 0
+
+
+def test_task_refused_when_model_failed_to_load(monkeypatch, submissions):
+    monkeypatch.setattr(miner_module, "load_pipeline", lambda **kwargs: None)
+    miner = make_miner()
+    assert miner.model_state == miner_module.MODEL_STATE_FAILED
+
+    miner.handle_task(make_task())
+
+    assert len(submissions) == 1
+    url, payload = submissions[0]
+    assert url == "http://validator-a:8001/v1/miner/submit_result"
+    assert "not ready" in payload["result_data"]["error_details"]
+    assert payload["result_data"]["rejection_reason"] == "model_not_ready"
+
+
+# --- Generation spec ---
+def test_generation_spec_caps_resolution_steps_and_output(monkeypatch, fake_generation, submissions):
+    generated, encoded = [], []
+
+    def record_generate(**kwargs):
+        generated.append(kwargs)
+        return Image.new("RGB", (64, 64), color="white")
+
+    def record_encode(image, **kwargs):
+        encoded.append(kwargs)
+        return "aW1n"
+
+    monkeypatch.setattr(miner_module, "generate_image_from_prompt", record_generate)
+    monkeypatch.setattr(miner_module, "image_to_base64", record_encode)
+    miner = make_miner()
+    generated.clear()
+
+    spec = {"resolution": 224, "max_steps": 8, "output_format": "webp", "max_bytes": 20000}
+    miner.handle_task(make_task(generation_spec=spec))
+
+    # 224px is below every generation size: smallest size, downscaled when encoding
+    assert (generated[0]["height"], generated[0]["width"]) == (256, 256)
+    assert generated[0]["num_inference_steps"] == 8
+    assert encoded[0]["format"] == "WEBP"
+    assert encoded[0]["max_edge"] == 224
+    assert encoded[0]["max_bytes"] == 20000
+    result = submissions[0][1]["result_data"]
+    assert result["output_format"] == "WEBP"
+    assert result["resolution"] == 256
+
+
+# --- Best-of-N ---
+def test_best_of_n_submits_highest_scoring_candidate(monkeypatch, fake_generation, submissions):
+    colors = ["red", "green", "blue"]
+    batches, encoded = [], []
+
+    def fake_batch(**kwargs):
+        batches.append(kwargs)
+        return [Image.new("RGB", (64, 64), color=c) for c in colors[: kwargs["num_images"]]]
+
+    monkeypatch.setattr(miner_module, "generate_images_from_prompt", fake_batch)
+    monkeypatch.setattr(miner_module, "calculate_clip_scores", lambda prompt, images: [0.2, 0.9, 0.5])
+    monkeypatch.setattr(
+        miner_module, "image_to_base64", lambda image, **kwargs: encoded.append(image) or "aW1n"
+    )
+    miner = make_miner(best_of_n=3)
+
+    miner.handle_task(make_task())
+
+    assert batches[0]["num_images"] == 3
+    assert encoded[0].getpixel((0, 0)) == (0, 128, 0)
+    result = submissions[0][1]["result_data"]
+    assert result["candidates"] == 3
+    assert result["self_check_score"] == 0.9
+    assert "self_check" in result["timings_ms"]
+
+
+def test_best_of_n_candidate_count_fits_the_deadline(monkeypatch, fake_generation, submissions):
+    batches = []
+
+    def fake_batch(**kwargs):
+        batches.append(kwargs["num_images"])
+        return [Image.new("RGB", (64, 64))] * kwargs["num_images"]
+
+    monkeypatch.setattr(miner_module, "generate_images_from_prompt", fake_batch)
+    monkeypatch.setattr(miner_module, "calculate_clip_scores", lambda prompt, images: [0.5] * len(images))
+    miner = make_miner(best_of_n=4)
+    miner.latency_model = miner_module.GenerationLatencyModel(
+        step_cost_per_mpx=2.0, overhead_per_mpx=4.0, safety_factor=1.15
+    )
+
+    # 8 steps at 256px ~1.5s per candidate; ~3.5s left after submit and self-check budgets
+    deadline = time.time() + miner_module.SUBMIT_BUDGET_SECONDS + miner_module.SELF_CHECK_BUDGET_SECONDS + 3.5
+    spec = {"resolution": 256, "max_steps": 8}
+    miner.handle_task(make_task(deadline=deadline, generation_spec=spec))
+
+    assert batches == [2]
+    assert submissions[0][1]["result_data"]["candidates"] == 2
+
+
+# --- Per-task routing ---
+def test_result_carries_trace_id_and_goes_to_task_validator(fake_generation, submissions):
+    miner = make_miner()
+
+    miner.handle_task(make_task(trace_id="trace-abc"))
+
+    url, payload = submissions[0]
+    assert url == "http://validator-a:8001/v1/miner/submit_result"
+    assert payload["result_data"]["trace_id"] == "trace-abc"
+
+
+def test_task_without_endpoint_falls_back_to_default_validator(fake_generation, submissions):
+    miner = make_miner()
+
+    miner.handle_task(make_task(validator_endpoint=None))
+
+    url, _ = submissions[0]
+    assert url == "http://default-validator:8001/v1/miner/submit_result"
+
+
+def test_interleaved_tasks_from_several_validators_do_not_cross_submit(
+    monkeypatch, fake_generation, submissions
+):
+    def slow_generate(**kwargs):
+        time.sleep(random.uniform(0.0, 0.05))
+        return Image.new("RGB", (64, 64), color="white")
+
+    monkeypatch.setattr(miner_module, "generate_image_from_prompt", slow_generate)
+    miner = make_miner()
+
+    validators = [f"http://validator-{name}:8001" for name in "abcd"]
+    tasks = [
+        make_task(task_id=f"task_{i}", validator_endpoint=validators[i % len(validators)])
+        for i in range(24)
+    ]
+    threads = [threading.Thread(target=miner.handle_task, args=(task,)) for task in tasks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(submissions) == len(tasks)
+    expected = {task.task_id: task.validator_endpoint for task in tasks}
+    trace_ids = set()
+    for url, payload in submissions:
+        assert url == f"{expected[payload['task_id']]}/v1/miner/submit_result"
+        trace_ids.add(payload["result_data"]["trace_id"])
+    assert len(trace_ids) == len(tasks)
+
+
+# --- Telemetry ---
+def test_handled_tasks_update_phase_metrics_and_validator_counters(fake_generation, submissions):
+    miner = make_miner()
+
+    miner.handle_task(make_task(task_id="ok", validator_endpoint="http://validator-a:8001"))
+    miner.handle_task(
+        make_task(task_id="late", validator_endpoint="http://validator-b:8001", deadline=time.time() - 5)
+    )
+
+    snapshot = miner.metrics.snapshot()
+    assert snapshot["tasks_received"] == 2
+    assert snapshot["per_validator"]["http://validator-a:8001"]["success"] == 1
+    assert snapshot["per_validator"]["http://validator-b:8001"]["rejected"] == 1
+    assert snapshot["phases"]["queue_wait"]["count"] == 1
+    assert snapshot["phases"]["generation"]["count"] == 1
+    assert snapshot["phases"]["encode"]["count"] == 1
+    assert snapshot["phases"]["submit"]["count"] == 2
+
+    _, payload = submissions[0]
+    assert set(payload["result_data"]["timings_ms"]) == {"queue_wait", "generation", "encode"}
+
+
+def test_status_and_metrics_routes(fake_generation, submissions):
+    miner = make_miner()
+    miner.app = FastAPI()
+    miner._register_status_routes()
+    client = TestClient(miner.app)
+    miner.handle_task(make_task(task_id="ok", validator_endpoint="http://validator-a:8001"))
+
+    status = client.get("/status")
+    assert status.status_code == 200
+    assert status.headers["content-type"] == "application/json"
+    assert status.json()["ready"] is True
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = metrics.text.splitlines()
+    assert "subnet1_miner_tasks_received_total 1" in lines
+    assert 'subnet1_miner_tasks_total{validator="http://validator-a:8001",outcome="success"} 1' in lines
+
+
+# --- Admission ---
+def test_infeasible_task_is_rejected_immediately_with_reason(monkeypatch, fake_generation, submissions):
+    generated = []
+    monkeypatch.setattr(
+        miner_module,
+        "generate_image_from_prompt",
+        lambda **kwargs: generated.append(kwargs) or Image.new("RGB", (64, 64)),
+    )
+    miner = make_miner()
+    generated.clear()  # warm-up
+
+    miner.handle_task(make_task(deadline=time.time() + 0.01))
+
+    assert generated == []
+    _, payload = submissions[0]
+    assert payload["result_data"]["rejection_reason"] == "deadline_infeasible"
+    assert payload["result_data"]["estimated_seconds"] > payload["result_data"]["remaining_seconds"]
+    assert miner._in_flight == 0
+
+
+# --- Model switching ---
+def test_switch_model_swaps_after_new_model_loads(monkeypatch, fake_generation):
+    loaded = []
+    monkeypatch.setattr(
+        miner_module, "load_pipeline", lambda model_id=None, **kwargs: loaded.append(model_id) or object()
+    )
+    miner = make_miner()
+    assert miner.model_id == miner_module.MODEL_ID
+
+    future = miner.switch_model("org/other-model", wait=True)
+
+    assert future.result() == "org/other-model"
+    assert miner.model_id == "org/other-model"
+    assert loaded[-1] == "org/other-model"
+
+
+def test_switch_model_releases_previous_model(monkeypatch, fake_generation):
+    manager = ModelManager(memory_budget_mb=None, size_estimator=lambda model: 1)
+    monkeypatch.setattr(
+        miner_module, "load_pipeline", lambda model_id=None, **kwargs: manager.get(model_id, object)
+    )
+    monkeypatch.setattr(miner_module, "unload_pipeline", lambda model_id, **kwargs: manager.retire(model_id))
+    miner = make_miner()
+    assert manager.keys() == [miner_module.MODEL_ID]
+
+    miner.switch_model("org/other-model", wait=True)
+
+    assert manager.keys() == ["org/other-model"]
+
+
+def test_failed_switch_keeps_current_model(monkeypatch, fake_generation):
+    miner = make_miner()
+    monkeypatch.setattr(miner_module, "load_pipeline", lambda **kwargs: None)
+
+    future = miner.switch_model("org/missing-model", wait=True)
+
+    assert isinstance(future.exception(), RuntimeError)
+    assert miner.model_id == miner_module.MODEL_ID
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared model manager (subnet1/models/model_manager.py).
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+
+from subnet1.models.model_manager import ModelManager
+
+MB = 1024 * 1024
+
+
+def make_manager(budget_mb):
+    return ModelManager(memory_budget_mb=budget_mb, size_estimator=lambda model: model["size_mb"] * MB)
+
+
+def fake_loader(name, size_mb, calls=None):
+    def _load():
+        if calls is not None:
+            calls.append(name)
+        return {"name": name, "size_mb": size_mb}
+
+    return _load
+
+
+def test_least_recently_used_idle_model_is_evicted_over_budget():
+    manager = make_manager(budget_mb=100)
+    manager.get("a", fake_loader("a", 40))
+    manager.get("b", fake_loader("b", 40))
+    manager.get("a", fake_loader("a", 40))  # touch a, so b is least recently used
+
+    manager.get("c", fake_loader("c", 40))
+
+    assert set(manager.keys()) == {"a", "c"}
+    assert manager.total_bytes() == 80 * MB
+
+
+def test_model_in_use_is_never_evicted():
+    manager = make_manager(budget_mb=50)
+    with manager.use("a", fake_loader("a", 40)) as model:
+        manager.get("b", fake_loader("b", 40))
+        assert "a" in manager.keys()
+        assert model["name"] == "a"
+
+    # Once released, the next load can evict it
+    manager.get("c", fake_loader("c", 40))
+    assert "a" not in manager.keys()
+
+
+def test_concurrent_acquires_load_once():
+    manager = make_manager(budget_mb=None)
+    calls = []
+
+    def slow_loader():
+        time.sleep(0.05)
+        return fake_loader("a", 10, calls)()
+
+    threads = [threading.Thread(target=manager.get, args=("a", slow_loader)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["a"]
+
+
+def test_failed_load_is_not_cached():
+    manager = make_manager(budget_mb=None)
+
+    with pytest.raises(RuntimeError):
+        manager.get("a", lambda: None)
+    assert manager.keys() == []
+
+    assert manager.get("a", fake_loader("a", 10))["name"] == "a"
+
+
+def test_preload_loads_in_background():
+    manager = make_manager(budget_mb=None)
+
+    future = manager.preload("next", fake_loader("next", 10))
+
+    assert future.result(timeout=5)["name"] == "next"
+    assert "next" in manager.keys()
+
+
+def test_retired_model_is_dropped_when_its_last_user_finishes():
+    manager = make_manager(budget_mb=None)
+    manager.get("idle", fake_loader("idle", 10))
+    assert manager.retire("idle") is True
+    assert "idle" not in manager.keys()
+
+    with manager.use("busy", fake_loader("busy", 10)):
+        assert manager.retire("busy") is False
+        assert "busy" in manager.keys()
+    assert manager.keys() == []
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline model directory layout.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.models import model_store
+
+
+def test_converted_models_are_found_in_model_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("SUBNET1_MODEL_DIR", str(tmp_path))
+    assert model_store.find_local_pipeline("segmind/tiny-sd") is None
+    assert model_store.find_local_clip("ViT-B/32") is None
+
+    pipeline_dir = tmp_path / "segmind--tiny-sd"
+    pipeline_dir.mkdir()
+    (pipeline_dir / "model_index.json").write_text("{}")
+    (tmp_path / "clip").mkdir()
+    (tmp_path / "clip" / "ViT-B-32.safetensors").write_bytes(b"")
+
+    assert model_store.find_local_pipeline("segmind/tiny-sd") == str(pipeline_dir)
+    assert model_store.find_local_clip("ViT-B/32") == str(tmp_path / "clip" / "ViT-B-32.safetensors")
+
+
+def test_incomplete_pipeline_copy_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setenv("SUBNET1_MODEL_DIR", str(tmp_path))
+    (tmp_path / "segmind--tiny-sd" / "unet").mkdir(parents=True)
+
+    assert model_store.find_local_pipeline("segmind/tiny-sd") is None
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the ONNX Runtime backend's export bookkeeping (no onnxruntime needed).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.models import onnx_backend
+
+
+def test_backend_from_env_falls_back_to_torch(monkeypatch):
+    monkeypatch.setenv("IMAGEGEN_BACKEND", "ONNX-INT8")
+    assert onnx_backend.backend_from_env() == onnx_backend.BACKEND_ONNX_INT8
+    monkeypatch.setenv("IMAGEGEN_BACKEND", "tensorrt")
+    assert onnx_backend.backend_from_env() == onnx_backend.BACKEND_TORCH
+
+
+def test_export_and_quantization_run_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("SUBNET1_MODEL_DIR", str(tmp_path))
+    calls = []
+
+    def fake_export(source, output_dir=None):
+        calls.append(("export", source))
+        os.makedirs(output_dir)
+        open(os.path.join(output_dir, "model_index.json"), "w").close()
+        return output_dir
+
+    def fake_quantize(source_dir, output_dir):
+        calls.append(("quantize", source_dir))
+        os.makedirs(output_dir)
+        open(os.path.join(output_dir, "model_index.json"), "w").close()
+        return output_dir
+
+    monkeypatch.setattr(onnx_backend, "export_onnx", fake_export)
+    monkeypatch.setattr(onnx_backend, "quantize_onnx", fake_quantize)
+
+    path = onnx_backend.ensure_export("segmind/tiny-sd", quantized=True, source="/local/copy")
+    assert path == str(tmp_path / "segmind--tiny-sd--onnx-int8")
+    assert onnx_backend.ensure_export("segmind/tiny-sd") == str(tmp_path / "segmind--tiny-sd--onnx")
+    onnx_backend.ensure_export("segmind/tiny-sd", quantized=True)
+
+    assert calls == [
+        ("export", "/local/copy"),
+        ("quantize", str(tmp_path / "segmind--tiny-sd--onnx")),
+    ]
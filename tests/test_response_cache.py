@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for pre-serialized, ETag-validated consensus result responses.
+"""
+
+import os
+import sys
+import time
+
+from dataclasses import dataclass
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.response_cache import ResponseCache, etag_matches
+from subnet1.validator import CONSENSUS_RESULT_PATH, VALIDATOR_STATUS_PATH, Subnet1Validator
+
+
+def _validator_with_sdk_routes(results):
+    """Subnet1Validator shell whose app carries SDK-style result/status routes."""
+    app = FastAPI()
+    calls = {"result": 0, "status": 0}
+
+    @app.get(CONSENSUS_RESULT_PATH)
+    async def get_consensus_result(cycle_num: int):
+        calls["result"] += 1
+        if cycle_num not in results:
+            raise HTTPException(status_code=404, detail="cycle not found")
+        return results[cycle_num]
+
+    @app.get(VALIDATOR_STATUS_PATH)
+    async def get_status():
+        calls["status"] += 1
+        return {"uid": "v1", "current_slot": 7}
+
+    validator = Subnet1Validator.__new__(Subnet1Validator)
+    validator.app = app
+    validator.response_cache = ResponseCache(max_entries=8)
+    validator._register_cached_routes()
+    return validator, TestClient(app), calls
+
+
+def test_finalized_cycle_is_encoded_once_and_revalidated_with_304():
+    results = {12: {"cycle": 12, "status": "finalized", "scores": {"m1": 0.9, "m2": 0.4}}}
+    validator, client, calls = _validator_with_sdk_routes(results)
+
+    first = client.get("/api/v1/consensus/result/12")
+    assert first.status_code == 200
+    assert first.json() == results[12]
+    etag = first.headers["etag"]
+    assert "immutable" in first.headers["cache-control"]
+
+    again = client.get("/api/v1/consensus/result/12")
+    assert again.content == first.content and again.headers["etag"] == etag
+
+    not_modified = client.get("/api/v1/consensus/result/12", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+
+    assert calls["result"] == 1
+    stats = validator.response_cache.get_status()
+    assert stats["hits"] == 2 and stats["not_modified"] == 1
+
+
+def test_in_progress_and_missing_cycles_are_not_kept():
+    results = {13: {"cycle": 13, "status": "in_progress"}}
+    validator, client, calls = _validator_with_sdk_routes(results)
+
+    assert client.get("/api/v1/consensus/result/99").status_code == 404
+    assert client.get("/api/v1/consensus/result/99").status_code == 404
+    assert calls["result"] == 2
+
+    response = client.get("/api/v1/consensus/result/13")
+    assert response.status_code == 200
+    assert "immutable" not in response.headers["cache-control"]
+    assert validator.response_cache.get(("consensus_result", 13)).expires is not None
+
+
+def test_status_route_is_cached_briefly():
+    validator, client, calls = _validator_with_sdk_routes({})
+    assert client.get("/api/v1/validator/status").json()["current_slot"] == 7
+    client.get("/api/v1/validator/status")
+    assert calls["status"] == 1
+
+
+class CycleResult(BaseModel):
+    cycle: int
+    status: str
+    scores: dict
+
+
+@dataclass
+class CycleSummary:
+    cycle: int
+    status: str
+
+
+def test_pydantic_and_dataclass_results_are_cached_as_json():
+    results = {
+        14: CycleResult(cycle=14, status="finalized", scores={"m1": 0.5}),
+        15: CycleSummary(cycle=15, status="finalized"),
+    }
+    validator, client, calls = _validator_with_sdk_routes(results)
+
+    assert client.get("/api/v1/consensus/result/14").json() == {"cycle": 14, "status": "finalized", "scores": {"m1": 0.5}}
+    assert client.get("/api/v1/consensus/result/15").json() == {"cycle": 15, "status": "finalized"}
+    # Recognized as finalized, so served from cache from now on
+    client.get("/api/v1/consensus/result/14")
+    assert calls["result"] == 2
+    assert validator.response_cache.get(("consensus_result", 14)).expires is None
+
+
+def test_cache_is_bounded_and_ttl_expires():
+    cache = ResponseCache(max_entries=2)
+    for cycle in range(3):
+        cache.put(cycle, {"cycle": cycle})
+    assert len(cache) == 2 and cache.get(0) is None
+    assert cache.stats["evictions"] == 1
+
+    cache.put("status", {"ok": True}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("status") is None
+
+    etag = cache.put("x", b'{"a":1}').etag
+    assert etag_matches(f'W/{etag}, "other"', etag)
+    assert etag_matches("*", etag) and not etag_matches(None, etag)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact binary score exchange codec.
+"""
+
+import os
+import secrets
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.aggregation import SCORE_SCALE, ScoreMatrix
+from subnet1.response_cache import encode_json
+from subnet1.score_codec import (
+    CONTENT_TYPE_BINARY,
+    CONTENT_TYPE_JSON,
+    FLAG_DELTA,
+    FLAG_WIDE_INDEX,
+    ScoreCodec,
+    ScoreCodecError,
+    _HEADER,
+)
+
+
+def _miners(n):
+    return [secrets.token_hex(16) for _ in range(n)]
+
+
+def _scores(miners, rng, coverage=0.8):
+    return {uid: float(rng.random()) for uid in miners if rng.random() < coverage}
+
+
+def test_round_trip_is_exact_to_contract_precision():
+    rng = np.random.default_rng(0)
+    miners = _miners(500)
+    sender, receiver = ScoreCodec(miners), ScoreCodec(miners)
+    scores = _scores(miners, rng)
+
+    packet = receiver.decode(sender.encode(7, scores), peer="v1")
+
+    assert packet.slot == 7
+    decoded = packet.to_dict()
+    assert set(decoded) == set(scores)
+    assert max(abs(decoded[uid] - scores[uid]) for uid in scores) <= 0.5 / SCORE_SCALE
+    matrix = ScoreMatrix.from_rows({"v1": (packet.miner_uids, packet.scores)})
+    assert matrix.scores.shape == (1, len(scores))
+
+
+def test_delta_frames_track_previous_slot_and_resync_on_keyframe():
+    rng = np.random.default_rng(1)
+    miners = _miners(2000)
+    sender = ScoreCodec(miners, keyframe_interval=2)
+    receiver, late_joiner = ScoreCodec(miners), ScoreCodec(miners)
+
+    for slot in range(1, 5):
+        scores = _scores(miners, rng)
+        frame = sender.encode(slot, scores)
+        flags = _HEADER.unpack_from(frame)[2]
+        assert bool(flags & FLAG_DELTA) == (slot in (2, 3))
+        decoded = receiver.decode(frame, peer="v1").to_dict()
+        assert max(abs(decoded[uid] - scores[uid]) for uid in scores) <= 0.5 / SCORE_SCALE
+
+        if slot == 2:
+            # Missed the keyframe of slot 1: cannot resolve the delta
+            with pytest.raises(ScoreCodecError):
+                late_joiner.decode(frame, peer="v1")
+        if slot == 4:
+            # Keyframe: the late joiner catches up
+            assert late_joiner.decode(frame, peer="v1").to_dict() == decoded
+    assert late_joiner.decode(sender.encode(5, scores), peer="v1").slot == 5
+
+
+def test_delta_bases_are_kept_per_peer():
+    miners = _miners(50)
+    sender_a, sender_b, receiver = ScoreCodec(miners), ScoreCodec(miners), ScoreCodec(miners)
+    receiver.decode(sender_a.encode(1, {miners[0]: 0.5}), peer="va")
+    receiver.decode(sender_b.encode(1, {miners[0]: 0.9}), peer="vb")
+
+    delta = sender_a.encode(2, {miners[0]: 0.6})
+    assert _HEADER.unpack_from(delta)[2] & FLAG_DELTA
+    assert receiver.decode(delta, peer="va").to_dict() == {miners[0]: 0.6}
+    # No sender identity: a delta cannot be resolved against anyone's base
+    with pytest.raises(ScoreCodecError):
+        ScoreCodec(miners).decode(delta, peer=None)
+
+
+def test_binary_frame_is_much_smaller_than_json():
+    rng = np.random.default_rng(2)
+    miners = _miners(10_000)
+    scores = _scores(miners, rng, coverage=1.0)
+    frame = ScoreCodec(miners).encode(1, scores)
+    assert len(frame) * 3 < len(encode_json(scores))
+
+
+def test_mismatched_ordering_and_unknown_miners_fall_back_to_json():
+    miners = _miners(10)
+    codec = ScoreCodec(miners)
+
+    with pytest.raises(ScoreCodecError):
+        ScoreCodec(list(reversed(miners))).decode(codec.encode(1, {miners[0]: 0.5}), peer="v1")
+
+    content_type, body = codec.encode_payload(2, {miners[1]: 0.25, "unregistered": 0.75})
+    assert content_type == CONTENT_TYPE_JSON
+    packet = ScoreCodec(miners).decode_payload(content_type, body, peer="v1")
+    assert packet.slot == 2 and packet.to_dict() == {miners[1]: 0.25, "unregistered": 0.75}
+
+    # Legacy flat JSON dicts still decode
+    legacy = ScoreCodec(miners).decode_payload("application/json", encode_json({miners[2]: 0.1}), peer="v1")
+    assert legacy.to_dict() == {miners[2]: 0.1}
+
+    content_type, body = codec.encode_payload(3, {miners[3]: 1.0})
+    assert content_type == CONTENT_TYPE_BINARY
+    assert _HEADER.unpack_from(body)[2] & FLAG_DELTA == 0
+
+
+def test_wide_indices_above_uint16():
+    miners = [f"m{i}" for i in range(70_000)]
+    codec = ScoreCodec(miners, compress=False)
+    frame = codec.encode(1, {"m69999": 0.5, "m3": 0.25})
+    assert _HEADER.unpack_from(frame)[2] & FLAG_WIDE_INDEX
+    assert ScoreCodec(miners).decode(frame, peer="v1").to_dict() == {"m3": 0.25, "m69999": 0.5}
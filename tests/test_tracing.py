@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for span tracing of consensus cycles and Chrome trace export.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.adaptive_timing import PHASE_SCORING, PHASE_TASK_ROUND_TRIP
+from subnet1.flexible_consensus_sdk import FlexibleConsensusConfig, FlexibleValidatorWrapper
+from subnet1.tracing import SPAN_CONSENSUS_CYCLE, SPAN_DISPATCH, SPAN_SCORING, Tracer
+
+
+def test_child_spans_inherit_slot_and_validator_across_tasks():
+    tracer = Tracer()
+
+    async def dispatch(miner):
+        with tracer.span(SPAN_DISPATCH, miner_uid=miner):
+            await asyncio.sleep(0.01)
+
+    async def cycle():
+        with tracer.span(SPAN_CONSENSUS_CYCLE, slot=5, validator="v1"):
+            await asyncio.gather(*(dispatch(m) for m in ("m1", "m2")))
+
+    asyncio.run(cycle())
+
+    dispatches = tracer.spans(slot=5, validator="v1")
+    assert [s.name for s in dispatches].count(SPAN_DISPATCH) == 2
+    parent = next(s for s in dispatches if s.name == SPAN_CONSENSUS_CYCLE)
+    assert all(s.parent_id == parent.span_id for s in dispatches if s.name == SPAN_DISPATCH)
+
+
+def test_ring_buffer_keeps_most_recent_spans_and_records_errors():
+    tracer = Tracer(capacity=3)
+    for i in range(5):
+        with tracer.span("step", index=i):
+            pass
+    try:
+        with tracer.span("failing"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    spans = tracer.spans()
+    assert [s.tags.get("index") for s in spans] == [3, 4, None]
+    assert spans[-1].error == "ValueError: boom"
+
+
+def test_chrome_trace_puts_overlapping_spans_on_separate_lanes():
+    tracer = Tracer()
+    tracer.record(SPAN_CONSENSUS_CYCLE, start=100.0, duration=10.0, slot=1)
+    tracer.record(SPAN_DISPATCH, start=101.0, duration=4.0, slot=1)
+    tracer.record(SPAN_DISPATCH, start=102.0, duration=4.0, slot=1)  # overlaps the first dispatch
+    tracer.record(SPAN_SCORING, start=107.0, duration=1.0, slot=1)
+    tracer.record(SPAN_SCORING, start=200.0, duration=1.0, slot=2)
+
+    trace = json.loads(json.dumps(tracer.to_chrome_trace(slot=1)))
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+
+    assert len(events) == 4
+    assert events[0]["ts"] == 100.0 * 1e6 and events[0]["dur"] == 10.0 * 1e6
+    lanes = {(e["name"], e["ts"]): e["tid"] for e in events}
+    assert lanes[(SPAN_DISPATCH, 101.0 * 1e6)] == lanes[(SPAN_CONSENSUS_CYCLE, 100.0 * 1e6)]
+    assert lanes[(SPAN_DISPATCH, 102.0 * 1e6)] != lanes[(SPAN_DISPATCH, 101.0 * 1e6)]
+    assert tracer.summary(slot=1)[SPAN_DISPATCH]["count"] == 2
+
+
+def test_instrument_wraps_async_methods():
+    tracer = Tracer()
+    node = SimpleNamespace()
+
+    async def broadcast_scores(scores):
+        return len(scores)
+
+    node.broadcast_scores = broadcast_scores
+    assert tracer.instrument(node, "broadcast_scores", "peer_exchange", validator="v1")
+    assert not tracer.instrument(node, "broadcast_scores", "peer_exchange")
+    assert not tracer.instrument(node, "missing_method", "peer_exchange")
+
+    assert asyncio.run(node.broadcast_scores([1, 2])) == 2
+    assert tracer.spans(validator="v1")[0].name == "peer_exchange"
+
+
+def test_wrapper_traces_cycle_and_feeds_adaptive_timing():
+    tracer = Tracer()
+
+    class Consensus:
+        flexible_metrics = {}
+
+        def enable_flexible_mode(self, **kwargs):
+            return True
+
+        async def run_flexible_consensus_cycle(self, slot):
+            with tracer.span(SPAN_DISPATCH):
+                await asyncio.sleep(0.01)
+            with tracer.span(SPAN_SCORING):
+                pass
+
+    wrapper = FlexibleValidatorWrapper(SimpleNamespace(uid="v1", consensus=Consensus()), FlexibleConsensusConfig())
+    wrapper.tracer = tracer
+
+    assert asyncio.run(wrapper.run_flexible_consensus(slot=9))
+
+    names = [s.name for s in tracer.spans(slot=9, validator="v1")]
+    assert names == [SPAN_DISPATCH, SPAN_SCORING, SPAN_CONSENSUS_CYCLE]
+    assert wrapper.timing.phases[PHASE_TASK_ROUND_TRIP].count == 1
+    assert wrapper.timing.phases[PHASE_SCORING].count == 1
+    assert wrapper.get_trace(slot=9)["traceEvents"]
+    assert wrapper.get_status()["trace_summary"][SPAN_CONSENSUS_CYCLE]["count"] == 1
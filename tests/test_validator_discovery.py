@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent validator discovery and the latency-ranked endpoint table.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from subnet1.validator_discovery import (
+    CONDITION_GOOD,
+    CONDITION_POOR,
+    CONDITION_UNSTABLE,
+    ValidatorDiscovery,
+    metagraph_endpoint_source,
+)
+from subnet1.entity_registry import Entity, EntityRegistry
+
+
+def _transport(delays, failing=()):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        await asyncio.sleep(delays.get(host, 0.0))
+        if host in failing:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"status": "ok", "current_slot": 42, "current_phase": "consensus_scoring"})
+
+    return httpx.MockTransport(handler)
+
+
+def _endpoints(hosts):
+    return lambda: [(host, f"http://{host}:8001") for host in hosts]
+
+
+def test_sweep_probes_all_validators_concurrently_and_ranks_by_rtt():
+    delays = {f"v{i}": 0.05 * (10 - i) for i in range(10)}
+    discovery = ValidatorDiscovery(_endpoints(delays), timeout=2.0, transport=_transport(delays))
+
+    started = time.perf_counter()
+    table = asyncio.run(discovery.sweep())
+    elapsed = time.perf_counter() - started
+
+    # Sequential probing would take ~2.75s
+    assert elapsed < 1.0
+    assert [s.uid for s in table][:3] == ["v9", "v8", "v7"]
+    assert table[0].last_slot == 42 and table[0].last_phase == "consensus_scoring"
+
+
+def test_hanging_validator_costs_one_timeout_and_counts_as_error():
+    delays = {"fast": 0.0, "hung": 30.0}
+    discovery = ValidatorDiscovery(_endpoints(delays), timeout=0.3, transport=_transport(delays))
+
+    started = time.perf_counter()
+    table = asyncio.run(discovery.sweep())
+
+    assert time.perf_counter() - started < 1.0
+    by_uid = {s.uid: s for s in table}
+    assert by_uid["fast"].healthy
+    assert not by_uid["hung"].healthy and by_uid["hung"].failures == 1
+    assert table[0].uid == "fast"
+
+
+def test_table_is_cached_for_ttl():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.host)
+        return httpx.Response(200, json={})
+
+    discovery = ValidatorDiscovery(_endpoints(["a", "b"]), ttl_seconds=60, transport=httpx.MockTransport(handler))
+
+    async def scenario():
+        await discovery.sweep()
+        await discovery.sweep()
+        await discovery.sweep(force=True)
+
+    asyncio.run(scenario())
+    assert len(calls) == 4
+
+
+def test_conditions_follow_latency_percentiles_and_errors():
+    fast = ValidatorDiscovery(_endpoints(["a", "b", "c"]), transport=_transport({}))
+    asyncio.run(fast.sweep())
+    assert fast.assess() == (CONDITION_GOOD, 1.0)
+
+    slow_delays = {"a": 1.5, "b": 1.6, "c": 1.7}
+    slow = ValidatorDiscovery(_endpoints(slow_delays), timeout=3.0, transport=_transport(slow_delays))
+    asyncio.run(slow.sweep())
+    assert slow.assess() == (CONDITION_POOR, 1.5)
+
+    down = ValidatorDiscovery(_endpoints(["a"]), transport=_transport({}, failing={"a"}))
+    asyncio.run(down.sweep())
+    assert down.assess() == (CONDITION_UNSTABLE, 2.0)
+    assert down.get_status()["validators"][0]["last_error"] == "HTTP 503"
+
+
+def test_metagraph_source_reads_endpoints_from_the_registry():
+    class Client:
+        def get_all_validators(self):
+            return ["0xAAA", "0xbbb", "0xCCC"]
+
+        def get_validator_info(self, address):
+            raise AssertionError("no per-validator chain read")
+
+    registry = EntityRegistry(entities_dir=None)
+    registry.add(Entity(name="validator_1", type="validator", address="0xaaa", uid_hex="v1", api_endpoint="http://v1:8001"))
+    registry.add(Entity(name="validator_2", type="validator", address="0xBBB", uid_hex="v2", api_endpoint="http://v2:8001"))
+
+    source = metagraph_endpoint_source(Client(), registry)
+    assert asyncio.run(source()) == [("v1", "http://v1:8001"), ("v2", "http://v2:8001")]
+
+
+def test_slow_endpoint_source_stays_within_the_sweep_timeout():
+    async def slow_source():
+        await asyncio.sleep(5)
+        return [("a", "http://a:8001")]
+
+    discovery = ValidatorDiscovery(slow_source, timeout=0.2, transport=_transport({}))
+    started = time.perf_counter()
+    assert asyncio.run(discovery.sweep()) == []
+    assert time.perf_counter() - started < 1.0